@@ -1 +1,2 @@
-from .http import HTTPChatAdapter
\ No newline at end of file
+from .http import HTTPChatAdapter
+from .stream_buffer import open_stream, sse_events
@@ -14,12 +14,10 @@ import asyncio, json, logging, uuid
 
 from typing import AsyncGenerator, Dict, Any
 
-from mirobody.utils import safe_read_cfg
 from .base import (
-    CHUNK_TYPE_ENUMS,
-
     ChatProtocolAdapter
 )
+from .stream_buffer import create_stream, grace_seconds, sse_events
 from ..model import ChatStreamRequest
 from ..message import compress_messages
 from ..unified_chat_service import UnifiedChatService
@@ -27,6 +25,13 @@ from ..file import process_files_from_storage
 
 from ...utils import execute_query
 
+# Strong references so fire-and-forget tasks are not garbage-collected mid-run.
+_background_tasks: set[asyncio.Task] = set()
+
+def _spawn(task: asyncio.Task) -> None:
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
 class ChunkAccumulator:
     """
     Efficient chunk accumulator using list accumulation
@@ -261,12 +266,17 @@ class HTTPChatAdapter(ChatProtocolAdapter):
         
         Performance optimization: Uses ChunkAccumulator with list accumulation
         instead of string concatenation (O(n) vs O(n²)).
+
+        Chunks go through a resumable stream buffer keyed by reply_id (see
+        stream_buffer.py): a client that drops can reconnect to
+        /api/chat/resume with Last-Event-ID, and generation keeps running for
+        CHAT_STREAM_GRACE seconds without a reader before it is cancelled.
         """
-        output_queue = asyncio.Queue()
-        
+        # Generate reply_id in adapter layer (not in service)
+        reply_id = f"web_{uuid.uuid4()}"
+        buffer = await create_stream(reply_id, str(context['user_id']))
+
         async def _background_processor():
-            # Generate reply_id in adapter layer (not in service)
-            reply_id = f"web_{uuid.uuid4()}"
             accumulator = ChunkAccumulator()
             
             # Define chunk type handlers (dictionary dispatch for O(1) lookup)
@@ -309,7 +319,7 @@ class HTTPChatAdapter(ChatProtocolAdapter):
             }
             
             # Send reply_id to frontend first
-            await output_queue.put({"type": "id", "content": reply_id})
+            await buffer.append({"type": "id", "content": reply_id})
             
             try:
                 async for chunk in chunks:
@@ -323,7 +333,7 @@ class HTTPChatAdapter(ChatProtocolAdapter):
                     should_send = handler(chunk)
                     
                     if should_send:
-                        await output_queue.put(chunk)
+                        await buffer.append(chunk)
                 
                 # Finalize: flush remaining accumulated content and add end chunk if needed
                 element_list = accumulator.finalize()
@@ -380,55 +390,40 @@ class HTTPChatAdapter(ChatProtocolAdapter):
                 
                 # Send 'end' chunk only after saving is complete (or if no save needed)
                 if accumulator.stream_completed:
-                    await output_queue.put({"type": "end", "content": ""})
+                    await buffer.append({"type": "end", "content": ""})
                     logging.info("✅ Stream ended, 'end' signal sent to frontend")
                     
+            except asyncio.CancelledError:
+                logging.warning("No reader for %ss, generation cancelled (reply_id=%s)", grace, reply_id)
+                await chunks.aclose()
+                raise
             except Exception as e:
                 logging.error("Background processor error: %s", e, exc_info=True)
-                await output_queue.put({"type": "error", "content": str(e)})
+                await buffer.append({"type": "error", "content": str(e)})
             finally:
-                await output_queue.put(None)
+                await buffer.finish()
                 logging.debug("Background task completed")
-        
-        asyncio.create_task(_background_processor())
-        
-        HEARTBEAT_INTERVAL = int(safe_read_cfg("HEARTBEAT_INTERVAL", "10"))
-        HEARTBEAT_COUNTER_THRESHOLD = int(safe_read_cfg("HEARTBEAT_COUNTER_THRESHOLD", "3"))
-        heartbeat_counter = 0
-        try:
-            while True:
-                try:
-                    chunk = await asyncio.wait_for(
-                        output_queue.get(),
-                        timeout=HEARTBEAT_INTERVAL
-                    )
-
-                    if chunk is None:
-                        break
 
-                    heartbeat_counter = 0
+        async def _watchdog(task: asyncio.Task):
+            # Readers touch the buffer at least every HEARTBEAT_INTERVAL seconds.
+            while not task.done():
+                await asyncio.sleep(min(grace / 4, 5))
+                if not task.done() and await buffer.idle_for() > grace:
+                    task.cancel()
 
-                    chunk_type = chunk.get("type", "")
-                    if chunk_type == "error":
-                        logging.error(json.dumps(chunk, ensure_ascii=False))
-                    if chunk_type not in CHUNK_TYPE_ENUMS.non_streaming_types:
-                        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
-                    
+        grace = grace_seconds()
+        task = asyncio.create_task(_background_processor())
+        _spawn(task)
+        _spawn(asyncio.create_task(_watchdog(task)))
 
-                except asyncio.TimeoutError:
-                    logging.debug(f"heartbeat_counter: {heartbeat_counter}")
-                    heartbeat_counter += 1
-                    if heartbeat_counter > HEARTBEAT_COUNTER_THRESHOLD:
-                        heartbeat_counter = 0
-
-                        yield f"data: {json.dumps({'type': 'heartbeat', 'content': ''}, ensure_ascii=False)}\n\n"
-
-                    continue
+        try:
+            async for event in sse_events(buffer):
+                yield event
 
             logging.info("Frontend stream completed")
             
         except (GeneratorExit, asyncio.CancelledError):
-            logging.warning("⚠️ Client disconnected, but background AI task continues")
+            logging.warning("⚠️ Client disconnected, background AI task continues for up to %ss (reply_id=%s)", grace, reply_id)
             raise
             
         except Exception as e:
@@ -0,0 +1,253 @@
+"""
+Resumable chat streams
+
+Every chunk the HTTP adapter sends is appended to a per-stream ring buffer
+under a monotonically increasing event id (1, 2, 3, ...) and written to the
+client as an SSE ``id:`` line. A client that drops mid-generation reconnects
+with the last id it saw (``Last-Event-ID``) and gets the missed chunks
+replayed before the live tail continues.
+
+Backends (CHAT_STREAM_BACKEND):
+- memory (default): in-process deque; a reconnect must reach the same worker
+- redis: a Redis stream per reply (XADD/XREAD), shared by all workers.
+  Needs a real Redis server; redis_compat has no stream commands.
+
+Config:
+- CHAT_STREAM_BUFFER_SIZE: events kept per stream (default 2000)
+- CHAT_STREAM_GRACE: seconds generation keeps running with no reader attached,
+  and seconds a finished stream stays available for replay (default 300)
+"""
+
+import asyncio, json, logging, time
+
+from collections import deque
+from typing import AsyncGenerator, Protocol
+
+from mirobody.utils import safe_read_cfg
+from .base import CHUNK_TYPE_ENUMS
+
+#-----------------------------------------------------------------------------
+
+DEFAULT_BUFFER_SIZE = 2000
+DEFAULT_GRACE       = 300   # seconds
+
+_KEY_PREFIX = "chat_stream:"
+
+def buffer_size() -> int:
+    return int(safe_read_cfg("CHAT_STREAM_BUFFER_SIZE", str(DEFAULT_BUFFER_SIZE)))
+
+def grace_seconds() -> int:
+    return int(safe_read_cfg("CHAT_STREAM_GRACE", str(DEFAULT_GRACE)))
+
+#-----------------------------------------------------------------------------
+
+class StreamBuffer(Protocol):
+    stream_id   : str
+    owner       : str
+
+    async def append(self, chunk: dict) -> int: ...
+
+    async def finish(self) -> None: ...
+
+    async def read(self, after: int, timeout: float) -> tuple[list[tuple[int, dict]], bool]: ...
+
+    async def touch(self) -> None: ...
+
+    async def idle_for(self) -> float: ...
+
+#-----------------------------------------------------------------------------
+
+class MemoryStreamBuffer:
+    """
+    Bounded in-process ring buffer for one reply.
+
+    read() returns every retained event with id > after, waiting up to
+    timeout seconds for one to arrive, plus whether the stream has finished.
+    """
+
+    def __init__(self, stream_id: str, owner: str, maxlen: int, retain: float):
+        self.stream_id = stream_id
+        self.owner = owner
+
+        self._events: deque[tuple[int, dict]] = deque(maxlen=maxlen)
+        self._last_id = 0
+        self._done = False
+        self._changed = asyncio.Event()
+        self._seen = time.monotonic()
+        self._retain = retain
+
+    async def append(self, chunk: dict) -> int:
+        self._last_id += 1
+        self._events.append((self._last_id, chunk))
+        self._wake()
+        return self._last_id
+
+    async def finish(self) -> None:
+        self._done = True
+        self._wake()
+
+        # Keep finished streams around for late reconnects, then drop them.
+        asyncio.get_running_loop().call_later(self._retain, _memory_streams.pop, self.stream_id, None)
+
+    async def read(self, after: int, timeout: float) -> tuple[list[tuple[int, dict]], bool]:
+        if self._last_id <= after and not self._done:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        return [e for e in self._events if e[0] > after], self._done
+
+    async def touch(self) -> None:
+        self._seen = time.monotonic()
+
+    async def idle_for(self) -> float:
+        return time.monotonic() - self._seen
+
+    def _wake(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+#-----------------------------------------------------------------------------
+
+class RedisStreamBuffer:
+    """
+    Redis stream ``chat_stream:<id>`` with explicit entry ids ``<event id>-0``,
+    so XREAD can resume from a Last-Event-ID directly. Owner, reader heartbeat
+    and completion live in the ``chat_stream:<id>:meta`` hash. Finishing adds
+    an ``eof`` entry so blocked readers wake up immediately.
+
+    Expects a client created with decode_responses=True.
+    """
+
+    def __init__(self, client, stream_id: str, owner: str, maxlen: int, retain: float, last_id: int = 0):
+        self.stream_id = stream_id
+        self.owner = owner
+
+        self._client = client
+        self._key = f"{_KEY_PREFIX}{stream_id}"
+        self._meta = f"{self._key}:meta"
+        self._maxlen = maxlen
+        self._retain = int(retain)
+        self._last_id = last_id
+
+    async def create(self) -> None:
+        await self._client.hset(self._meta, mapping={"owner": self.owner, "seen": str(time.time())})
+        # Upper bound in case the producer dies without finish(); refreshed there.
+        await self._client.expire(self._meta, 24 * 3600)
+
+    async def append(self, chunk: dict) -> int:
+        self._last_id += 1
+        await self._client.xadd(
+            self._key,
+            {"c": json.dumps(chunk, ensure_ascii=False)},
+            id=f"{self._last_id}-0",
+            maxlen=self._maxlen,
+            approximate=False,
+        )
+        if self._last_id == 1:
+            await self._client.expire(self._key, 24 * 3600)
+        return self._last_id
+
+    async def finish(self) -> None:
+        await self._client.xadd(self._key, {"eof": "1"}, id=f"{self._last_id + 1}-0")
+        await self._client.hset(self._meta, "done", "1")
+        await self._client.expire(self._key, self._retain)
+        await self._client.expire(self._meta, self._retain)
+
+    async def read(self, after: int, timeout: float) -> tuple[list[tuple[int, dict]], bool]:
+        result = await self._client.xread({self._key: f"{after}-0"}, block=max(1, int(timeout * 1000)))
+
+        events, done = [], False
+        for _, entries in result or []:
+            for entry_id, fields in entries:
+                if "eof" in fields:
+                    done = True
+                    break
+                events.append((int(entry_id.split("-")[0]), json.loads(fields["c"])))
+        return events, done
+
+    async def touch(self) -> None:
+        await self._client.hset(self._meta, "seen", str(time.time()))
+
+    async def idle_for(self) -> float:
+        seen = await self._client.hget(self._meta, "seen")
+        return time.time() - float(seen) if seen else float("inf")
+
+#-----------------------------------------------------------------------------
+
+_memory_streams: dict[str, MemoryStreamBuffer] = {}
+_redis = None
+
+async def _get_redis():
+    global _redis
+    if _redis is None:
+        from mirobody.utils.config import global_config
+        _redis = await global_config().get_redis().get_async_client()
+    return _redis
+
+def _use_redis() -> bool:
+    return safe_read_cfg("CHAT_STREAM_BACKEND", "memory").lower() == "redis"
+
+async def create_stream(stream_id: str, owner: str) -> StreamBuffer:
+    if _use_redis():
+        buffer = RedisStreamBuffer(await _get_redis(), stream_id, owner, buffer_size(), grace_seconds())
+        await buffer.create()
+        return buffer
+
+    buffer = MemoryStreamBuffer(stream_id, owner, buffer_size(), grace_seconds())
+    _memory_streams[stream_id] = buffer
+    return buffer
+
+async def open_stream(stream_id: str) -> StreamBuffer | None:
+    """Reader side of an existing stream, or None if it is unknown or expired."""
+    if not _use_redis():
+        return _memory_streams.get(stream_id)
+
+    client = await _get_redis()
+    owner = await client.hget(f"{_KEY_PREFIX}{stream_id}:meta", "owner")
+    if owner is None:
+        return None
+    return RedisStreamBuffer(client, stream_id, owner, buffer_size(), grace_seconds())
+
+#-----------------------------------------------------------------------------
+
+async def sse_events(buffer: StreamBuffer, after: int = 0) -> AsyncGenerator[str, None]:
+    """
+    Replay events with id > after, then tail the live stream until it finishes.
+
+    Events that already fell out of the ring buffer cannot be replayed; the
+    gap is visible to the client as a jump in ids.
+    """
+    heartbeat_interval = int(safe_read_cfg("HEARTBEAT_INTERVAL", "10"))
+    heartbeat_threshold = int(safe_read_cfg("HEARTBEAT_COUNTER_THRESHOLD", "3"))
+    heartbeat_counter = 0
+
+    while True:
+        await buffer.touch()
+        events, done = await buffer.read(after, heartbeat_interval)
+
+        if events:
+            heartbeat_counter = 0
+            if after and events[0][0] > after + 1:
+                logging.warning("Stream %s: events %d-%d expired before replay", buffer.stream_id, after + 1, events[0][0] - 1)
+
+        for event_id, chunk in events:
+            after = event_id
+
+            chunk_type = chunk.get("type", "")
+            if chunk_type == "error":
+                logging.error(json.dumps(chunk, ensure_ascii=False))
+            if chunk_type not in CHUNK_TYPE_ENUMS.non_streaming_types:
+                yield f"id: {event_id}\ndata: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+        if done:
+            break
+
+        if not events:
+            logging.debug(f"heartbeat_counter: {heartbeat_counter}")
+            heartbeat_counter += 1
+            if heartbeat_counter > heartbeat_threshold:
+                heartbeat_counter = 0
+
+                yield f"data: {json.dumps({'type': 'heartbeat', 'content': ''}, ensure_ascii=False)}\n\n"
@@ -0,0 +1,172 @@
+"""Resumable stream tests: disconnect at random offsets, reconnect with Last-Event-ID."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+
+import pytest
+
+from . import stream_buffer
+from .stream_buffer import MemoryStreamBuffer, RedisStreamBuffer, sse_events
+
+_CHUNKS = 60
+
+
+class _FakeStreamRedis:
+    """Just enough of redis.asyncio (decode_responses=True) for RedisStreamBuffer."""
+
+    def __init__(self) -> None:
+        self.streams: dict[str, list[tuple[str, dict]]] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+        self._changed = asyncio.Event()
+
+    async def xadd(self, key, fields, id, maxlen=None, approximate=True):
+        entries = self.streams.setdefault(key, [])
+        entries.append((id, dict(fields)))
+        if maxlen is not None:
+            del entries[:-maxlen]
+        self._changed.set()
+        self._changed = asyncio.Event()
+        return id
+
+    async def xread(self, streams, block=None):
+        (key, after), = streams.items()
+        after = int(after.split("-")[0])
+
+        def pending():
+            return [e for e in self.streams.get(key, []) if int(e[0].split("-")[0]) > after]
+
+        if not pending():
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=block / 1000)
+            except asyncio.TimeoutError:
+                return []
+        entries = pending()
+        return [[key, entries]] if entries else []
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        h = self.hashes.setdefault(key, {})
+        if mapping:
+            h.update(mapping)
+        if field is not None:
+            h[field] = value
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    async def expire(self, key, seconds):
+        return True
+
+
+def _parse(events: list[str]) -> list[tuple[int, dict]]:
+    out = []
+    for event in events:
+        fields = dict(line.split(": ", 1) for line in event.strip().split("\n"))
+        if "id" in fields:
+            out.append((int(fields["id"]), json.loads(fields["data"])))
+    return out
+
+
+async def _produce(buffer, count: int, rng: random.Random) -> None:
+    await buffer.append({"type": "id", "content": buffer.stream_id})
+    for i in range(count):
+        await buffer.append({"type": "reply", "content": f"t{i}"})
+        if rng.random() < 0.3:
+            await asyncio.sleep(0)
+    await buffer.append({"type": "end", "content": ""})
+    await buffer.finish()
+
+
+async def _read_with_drops(buffer, rng: random.Random) -> list[tuple[int, dict]]:
+    """Read until 'end', hanging up after a random number of events each time."""
+    received: list[tuple[int, dict]] = []
+    last_id = 0
+    while not received or received[-1][1]["type"] != "end":
+        stream = sse_events(buffer, last_id)
+        limit = rng.randint(1, 15)
+        got = []
+        async for event in stream:
+            got.append(event)
+            if len(got) >= limit:
+                break
+        await stream.aclose()
+        for event_id, chunk in _parse(got):
+            received.append((event_id, chunk))
+            last_id = event_id
+    return received
+
+
+def _memory_buffer(stream_id: str, maxlen: int = 1000):
+    return MemoryStreamBuffer(stream_id, "1", maxlen=maxlen, retain=60)
+
+
+def _redis_buffer(stream_id: str, maxlen: int = 1000):
+    return RedisStreamBuffer(_FakeStreamRedis(), stream_id, "1", maxlen=maxlen, retain=60)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_buffer", [_memory_buffer, _redis_buffer], ids=["memory", "redis"])
+@pytest.mark.parametrize("seed", range(5))
+async def test_reconnect_at_random_offsets_loses_nothing(make_buffer, seed) -> None:
+    rng = random.Random(seed)
+    buffer = make_buffer(f"web_{seed}")
+
+    producer = asyncio.create_task(_produce(buffer, _CHUNKS, rng))
+    received = await _read_with_drops(buffer, rng)
+    await producer
+
+    ids = [event_id for event_id, _ in received]
+    assert ids == list(range(1, _CHUNKS + 3))
+    assert "".join(c["content"] for _, c in received if c["type"] == "reply") == "".join(f"t{i}" for i in range(_CHUNKS))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_buffer", [_memory_buffer, _redis_buffer], ids=["memory", "redis"])
+async def test_replay_after_finish(make_buffer) -> None:
+    buffer = make_buffer("web_done")
+    await _produce(buffer, 5, random.Random(0))
+
+    replay = _parse([e async for e in sse_events(buffer, 3)])
+    assert [event_id for event_id, _ in replay] == [4, 5, 6, 7]
+    assert replay[-1][1]["type"] == "end"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_buffer", [_memory_buffer, _redis_buffer], ids=["memory", "redis"])
+async def test_ring_buffer_is_bounded(make_buffer) -> None:
+    buffer = make_buffer("web_small", maxlen=4)
+    await _produce(buffer, 10, random.Random(0))
+
+    # Events 1..8 fell out; replay resumes at the oldest one still held.
+    replay = _parse([e async for e in sse_events(buffer, 2)])
+    assert [event_id for event_id, _ in replay] == [9, 10, 11, 12]
+
+
+@pytest.mark.asyncio
+async def test_non_streaming_types_keep_ids_but_are_not_sent() -> None:
+    buffer = _memory_buffer("web_report")
+    await buffer.append({"type": "reply", "content": "a"})
+    await buffer.append({"type": "report", "content": "{}"})
+    await buffer.append({"type": "end", "content": ""})
+    await buffer.finish()
+
+    replay = _parse([e async for e in sse_events(buffer)])
+    assert [(i, c["type"]) for i, c in replay] == [(1, "reply"), (3, "end")]
+
+
+@pytest.mark.asyncio
+async def test_idle_tracks_readers_and_registry() -> None:
+    buffer = await stream_buffer.create_stream("web_idle", "42")
+    assert await stream_buffer.open_stream("web_idle") is buffer
+    assert buffer.owner == "42"
+
+    await asyncio.sleep(0.05)
+    assert await buffer.idle_for() >= 0.05
+    await buffer.touch()
+    assert await buffer.idle_for() < 0.05
+
+    await buffer.finish()
+    stream_buffer._memory_streams.pop("web_idle", None)
+    assert await stream_buffer.open_stream("web_idle") is None
@@ -28,7 +28,7 @@ from .user_config import (
     delete_user_prompt
 )
 from .unified_chat_service import UnifiedChatService
-from .adapters import HTTPChatAdapter
+from .adapters import HTTPChatAdapter, open_stream, sse_events
 
 from ..user import (
     JwtTokenValidator,
@@ -114,6 +114,7 @@ class ChatService:
         self.routes.append(Route(f"{uri_prefix}/api/history/delete", endpoint=self.history_delete_handler, methods=["POST", "OPTIONS"]))
 
         self.routes.append(Route(f"{uri_prefix}/api/chat", endpoint=self.chat_handler, methods=["POST", "OPTIONS"]))
+        self.routes.append(Route(f"{uri_prefix}/api/chat/resume", endpoint=self.chat_resume_handler, methods=["GET", "OPTIONS"]))
 
         self.routes.append(Route(f"{uri_prefix}/api/beneficiary-users", endpoint=self.beneficiary_user_handler, methods=["GET", "OPTIONS"]))
 
@@ -384,6 +385,55 @@ class ChatService:
     
     #-------------------------------------------------------------------------
 
+    async def chat_resume_handler(self, request: Request) -> Response:
+        """
+        Reconnect to a reply stream started by chat_handler.
+
+        Query: reply_id (the content of the stream's first 'id' chunk).
+        Header: Last-Event-ID, the last SSE id the client received (query
+        param last_event_id is accepted too). Missed chunks are replayed
+        first, then the live output is tailed until 'end'.
+        """
+        if request.method == "OPTIONS":
+            return json_response_with_code(disable_log=True)
+        
+        #-------------------------------------------------
+
+        if not request.state.user_id or \
+            not isinstance(request.state.user_id, int) or \
+            request.state.user_id <= 0:
+
+            return json_response("", status_code=401, request=request)
+
+        user_id = request.state.user_id
+
+        #-------------------------------------------------
+
+        reply_id = request.query_params.get("reply_id", "")
+        try:
+            last_event_id = int(
+                request.headers.get("Last-Event-ID") or request.query_params.get("last_event_id") or 0
+            )
+        except ValueError:
+            return json_response_with_code(-1, "Invalid Last-Event-ID.", request=request)
+
+        buffer = await open_stream(reply_id) if reply_id else None
+        if buffer is None or buffer.owner != str(user_id):
+            return json_response_with_code(-2, "Stream not found or expired.", request=request)
+
+        #-------------------------------------------------
+
+        return StreamingResponse(
+            sse_events(buffer, last_event_id),
+            headers={
+                "cache-control": "no-cache, no-transform",
+                "x-accel-buffering": "no",
+            },
+            media_type="text/event-stream"
+        )
+
+    #-------------------------------------------------------------------------
+
     async def beneficiary_user_handler(self, request: Request) -> Response:
         if request.method == "OPTIONS":
             return json_response_with_code(disable_log=True)
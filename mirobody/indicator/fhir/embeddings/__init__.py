@@ -6,6 +6,8 @@
                   id_map; upstream must populate ``th_series_data.fhir_id``
                   with canonical packed values)
   - :mod:`local`  consumer: lazy loader + dtype/path constants
+  - :mod:`ivfpq`  optional IVF-PQ approximate index over the emb npy
+                  (``ivfpq`` subcommand builds it; ``resolve`` uses it)
   - :mod:`names`  display-name parsers (LOINC LCN / SNOMED FSN / RxNorm
                   best-TTY / CVX) + ``code-names`` post-step CLI
   - :mod:`migrate` one-shot recovery: convert legacy 4-file artifacts to
@@ -13,6 +15,7 @@
 """
 
 from .db import build_id_map, cmd_embeddings_db, cmd_id_map
+from .ivfpq import cmd_ivfpq
 from .names import cmd_code_names
 from .ref import cmd_embeddings_ref
 
@@ -22,4 +25,5 @@ __all__ = [
     "cmd_embeddings_db",
     "cmd_embeddings_ref",
     "cmd_id_map",
+    "cmd_ivfpq",
 ]
@@ -0,0 +1,129 @@
+"""
+FHIR IVF-PQ Recall / Latency Benchmark
+
+Runs the same query batches through the brute-force resolve path
+(search_exact) and the IVF-PQ index at several nprobe settings, and reports
+recall@k against brute force plus per-batch latency.
+
+recall@k is per system: of the exact top-k rows of each system, the share the
+index also returned, pooled over all queries and systems.
+
+Queries are bundle rows perturbed with Gaussian noise (--noise is the noise
+norm relative to the unit-norm row), or real terms embedded through the
+configured provider with --terms.
+
+Build the index first:
+    python3 -m mirobody.indicator ivfpq
+
+Usage:
+    python3 -m mirobody.indicator.fhir.embeddings.bench_ivfpq \\
+        [--res-dir DIR] [--queries 256] [--batch 16] [--top-k 5] \\
+        [--nprobe 4 8 16 32 64] [--rerank 10] [--terms FILE]
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from ..common import SYSTEMS, resolve_fhir_embedding_column
+from ..search import _systems_array
+from .ivfpq import search_exact
+from .local import load
+
+
+def _sample_queries(embs: np.ndarray, count: int, noise: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(embs.shape[0], size=min(count, embs.shape[0]), replace=False))
+    q = embs[rows].astype(np.float32)
+    q += rng.standard_normal(q.shape, dtype=np.float32) * (noise / np.sqrt(q.shape[1]))
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+async def _embed_terms(path: str) -> np.ndarray:
+    from mirobody.utils.embedding import text_embedding
+
+    with open(path, encoding="utf-8") as f:
+        terms = [line.strip() for line in f if line.strip()]
+    provider, _ = resolve_fhir_embedding_column()
+    embs = [e for e in await text_embedding(terms, provider=provider) if e is not None]
+    q = np.asarray(embs, dtype=np.float32)
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def _run(search, Q: np.ndarray, batch: int) -> tuple[list, list[float]]:
+    hits: list = []
+    latencies: list[float] = []
+    for s in range(0, Q.shape[0], batch):
+        start = time.perf_counter()
+        hits.extend(search(Q[s:s + batch]))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return hits, latencies
+
+
+def _recall(exact_hits: list, approx_hits: list, sys_arr: np.ndarray) -> float:
+    total = found = 0
+    for exact, approx in zip(exact_hits, approx_hits):
+        got = {r for r, _ in approx}
+        for sys_int in {int(sys_arr[r]) for r, _ in exact}:
+            want = {r for r, _ in exact if sys_arr[r] == sys_int}
+            total += len(want)
+            found += len(want & got)
+    return found / total if total else float("nan")
+
+
+def _report(name: str, latencies: list[float], batch: int, recall: float) -> None:
+    lat = sorted(latencies)
+    p50 = lat[len(lat) // 2]
+    p99 = lat[min(len(lat) - 1, int(0.99 * len(lat)))]
+    print(f"{name:<14} {recall:>9.4f} {p50:>10.2f} {p99:>10.2f} {p50 / batch:>12.3f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--res-dir", default=None, help="Bundle dir (default: mirobody/res)")
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--batch", type=int, default=16, help="Queries per resolve batch")
+    parser.add_argument("--top-k", type=int, default=5, help="Per-system top_k")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    parser.add_argument("--rerank", type=int, default=None, help="Override the index's re-rank multiple")
+    parser.add_argument("--noise", type=float, default=0.5, help="Relative noise for sampled queries")
+    parser.add_argument("--terms", default=None, help="Embed terms (one per line) instead of sampling rows")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from mirobody.utils import Config
+    await Config.init()
+
+    cache = load(load_meta=False, bundle_dir=args.res_dir)
+    if cache is None:
+        raise SystemExit("no local fhir bundle found")
+    index = cache["ivfpq"]
+    if index is None:
+        raise SystemExit("no ivfpq index next to the bundle; run `python -m mirobody.indicator ivfpq`")
+
+    embs = cache["embs"]
+    sys_arr = _systems_array(cache)
+    targets = list(range(len(SYSTEMS)))
+    Q = await _embed_terms(args.terms) if args.terms else _sample_queries(embs, args.queries, args.noise, args.seed)
+
+    print(f"N={embs.shape[0]:,} nlist={index.nlist} M={index.m} queries={Q.shape[0]} "
+          f"batch={args.batch} top_k={args.top_k}/system")
+    print(f"{'path':<14} {'recall@k':>9} {'p50 ms':>10} {'p99 ms':>10} {'ms/query':>12}")
+
+    exact_hits, exact_lat = _run(
+        lambda q: search_exact(q, embs, sys_arr, targets, args.top_k), Q, args.batch,
+    )
+    _report("brute-force", exact_lat, args.batch, 1.0)
+
+    for nprobe in args.nprobe:
+        hits, lat = _run(
+            lambda q: index.search(q, embs, sys_arr, targets, args.top_k, nprobe=nprobe, rerank=args.rerank),
+            Q, args.batch,
+        )
+        _report(f"nprobe={nprobe}", lat, args.batch, _recall(exact_hits, hits, sys_arr))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
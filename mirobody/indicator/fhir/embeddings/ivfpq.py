@@ -0,0 +1,411 @@
+"""IVF-PQ approximate index over the local FHIR embedding bundle.
+
+Built offline by the ``ivfpq`` subcommand and stored next to the emb npy
+it indexes, as ``<emb stem>.ivfpq.*``:
+
+    .ivfpq.json           build params + source row count / file size /
+                          content fingerprint; written last, so its
+                          presence marks a complete build
+    .ivfpq.centroids.npy  (nlist, D) f4     coarse k-means centroids
+    .ivfpq.offsets.npy    (nlist+1,) i8     list l owns positions
+                                            offsets[l]:offsets[l+1]
+    .ivfpq.rows.npy       (N,) i4           emb npy row per position,
+                                            grouped by list
+    .ivfpq.codebooks.npy  (M, K, D/M) f4    PQ codebooks over residuals
+    .ivfpq.codes.npy      (N, M) u1         PQ codes, position-aligned
+                                            with rows.npy
+
+Rows are unit-norm, so cosine is an inner product. With x ≈ c + r̂ the
+approximate score is ``q·c + Σ_m q_m·codebook[m, code_m]``; the lookup
+table depends only on the query, not on the probed list, so each query
+builds it once. Approximate scores only pick candidates: the final
+scores are recomputed exactly against the fp16 vectors, so the values
+callers see are the same as on the brute-force path.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import os
+from argparse import Namespace
+
+import numpy as np
+
+from .local import RES_DIR, emb_basename, tmp_path
+
+log = logging.getLogger(__name__)
+
+DEFAULT_M = 64             # PQ subspaces (1024 / 64 = 16 dims each)
+DEFAULT_TRAIN_SIZE = 1 << 16
+DEFAULT_ITERS = 10
+DEFAULT_NPROBE = 32
+DEFAULT_RERANK = 10        # exact re-rank depth, as a multiple of top_k per system
+
+_KSUB = 256                # one uint8 code per subspace
+_FINGERPRINT_ROWS = 1024   # emb rows hashed into the source fingerprint
+_CHUNK = 1 << 14           # rows per fp16→fp32 block while building
+
+_PARTS = ("centroids", "offsets", "rows", "codebooks", "codes")
+
+
+def index_paths(emb_path: str) -> dict[str, str]:
+    """Sidecar paths for the index of *emb_path* (keys: meta + ``_PARTS``)."""
+    stem = emb_path[:-len(".npy")] if emb_path.endswith(".npy") else emb_path
+    paths = {part: f"{stem}.ivfpq.{part}.npy" for part in _PARTS}
+    paths["meta"] = f"{stem}.ivfpq.json"
+    return paths
+
+
+def emb_fingerprint(emb_path: str) -> str:
+    """Digest of the emb npy's dtype, shape and an evenly spaced row sample.
+
+    The npy is a fixed-width matrix, so a regenerated bundle of the same
+    size only shows in its contents; hashing a sample keeps this cheap on
+    multi-GB files while any re-embedding (which moves every row) changes it.
+    """
+    arr = np.load(emb_path, mmap_mode="r")
+    n = arr.shape[0]
+    picked = np.unique(np.linspace(0, n - 1, min(n, _FINGERPRINT_ROWS)).astype(np.int64)) if n else []
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{arr.dtype.descr}|{arr.shape}".encode())
+    digest.update(np.ascontiguousarray(arr[picked]).tobytes())
+    return digest.hexdigest()
+
+
+# ─── Exact reference path ────────────────────────────────────────────
+
+def search_exact(
+    Q: np.ndarray,
+    embs: np.ndarray,
+    sys_arr: np.ndarray,
+    target_codes: list[int],
+    top_k: int,
+) -> list[list[tuple[int, float]]]:
+    """Brute-force per-system top-k: one chunked GEMM for the whole batch.
+
+    For B queries against N rows × 1024 fp16 embeddings, this keeps peak
+    fp32 working set at ~256 MB (one row chunk) plus the (B × N) score
+    matrix, instead of allocating ~256 MB per query × B queries. The
+    GEMM call (vs B independent GEMVs) also lifts BLAS throughput.
+
+    Returns, per query, up to ``top_k`` ``(row, score)`` pairs for each
+    system in *target_codes*, unordered.
+    """
+    B = Q.shape[0]
+    n_rows = embs.shape[0]
+    scores_all = np.empty((B, n_rows), dtype=np.float32)
+
+    # Chunked fp16→fp32 GEMM to cap peak RAM regardless of N (and B).
+    chunk = 1 << 16
+    for s in range(0, n_rows, chunk):
+        e = min(s + chunk, n_rows)
+        chunk_fp32 = embs[s:e].astype(np.float32)            # (chunk, 1024)
+        np.matmul(Q, chunk_fp32.T, out=scores_all[:, s:e])   # (B, chunk)
+
+    masks = [(sys_int, sys_arr == sys_int) for sys_int in target_codes]
+    masks = [(sys_int, mask, int(mask.sum())) for sys_int, mask in masks]
+
+    out: list[list[tuple[int, float]]] = []
+    for b in range(B):
+        scores = scores_all[b]
+        picked: list[tuple[int, float]] = []
+        for _sys_int, mask, n_in_sys in masks:
+            if n_in_sys == 0:
+                continue
+            sys_scores = np.where(mask, scores, -np.inf)
+            k = min(top_k, n_in_sys)
+            top = np.argpartition(sys_scores, -k)[-k:]
+            picked.extend((int(r), float(scores[r])) for r in top)
+        out.append(picked)
+    return out
+
+
+# ─── Index ───────────────────────────────────────────────────────────
+
+class IvfPqIndex:
+    """Memory-mapped IVF-PQ index; see the module docstring for layout."""
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        codebooks: np.ndarray,
+        codes: np.ndarray,
+        nprobe: int = DEFAULT_NPROBE,
+        rerank: int = DEFAULT_RERANK,
+    ) -> None:
+        self.centroids = centroids
+        self.offsets = offsets
+        self.rows = rows
+        self.codebooks = codebooks
+        self.codes = codes
+        self.nlist = int(centroids.shape[0])
+        self.m = int(codebooks.shape[0])
+        self.nprobe = nprobe
+        self.rerank = rerank
+
+    def search(
+        self,
+        Q: np.ndarray,
+        embs: np.ndarray,
+        sys_arr: np.ndarray,
+        target_codes: list[int],
+        top_k: int,
+        nprobe: int | None = None,
+        rerank: int | None = None,
+    ) -> list[list[tuple[int, float]]]:
+        """Approximate counterpart of :func:`search_exact` (same contract).
+
+        Probes the *nprobe* lists whose centroids score highest, ranks
+        their rows by PQ score, then re-scores the best ``rerank * top_k``
+        of each system exactly against *embs* and keeps that system's
+        top ``top_k``.
+        """
+        nprobe = max(1, min(nprobe or self.nprobe, self.nlist))
+        depth = max(1, (rerank or self.rerank) * top_k)
+        B, dim = Q.shape
+
+        coarse = Q @ self.centroids.T                                  # (B, nlist)
+        probes = np.argpartition(coarse, -nprobe, axis=1)[:, -nprobe:]
+        luts = np.einsum(
+            "bmd,mkd->bmk", Q.reshape(B, self.m, dim // self.m), self.codebooks,
+        )                                                              # (B, M, K)
+        sub_idx = np.arange(self.m)
+
+        out: list[list[tuple[int, float]]] = []
+        for b in range(B):
+            lists = probes[b]
+            starts = self.offsets[lists]
+            sizes = self.offsets[lists + 1] - starts
+            if not sizes.sum():
+                out.append([])
+                continue
+            pos = np.concatenate([
+                np.arange(s, s + n) for s, n in zip(starts, sizes) if n
+            ])
+            rows = np.asarray(self.rows[pos])
+            approx = luts[b][sub_idx, np.asarray(self.codes[pos])].sum(axis=1)
+            approx += np.repeat(coarse[b, lists], sizes)
+            cand_sys = sys_arr[rows]
+
+            picked: list[tuple[int, float]] = []
+            for sys_int in target_codes:
+                idx = np.flatnonzero(cand_sys == sys_int)
+                if idx.size == 0:
+                    continue
+                if idx.size > depth:
+                    idx = idx[np.argpartition(approx[idx], -depth)[-depth:]]
+                # Sorted rows keep the mmap gather sequential.
+                cand_rows = np.sort(rows[idx])
+                exact = embs[cand_rows].astype(np.float32) @ Q[b]
+                k = min(top_k, cand_rows.size)
+                top = np.argpartition(exact, -k)[-k:]
+                picked.extend((int(cand_rows[i]), float(exact[i])) for i in top)
+            out.append(picked)
+        return out
+
+
+def load(emb_path: str, n_rows: int) -> IvfPqIndex | None:
+    """Load the index built for *emb_path*. Returns None when absent, or
+    when it was built against a different emb npy (row count, file size
+    or content fingerprint changed since) — a stale index would map to
+    the wrong rows."""
+    paths = index_paths(emb_path)
+    if not os.path.isfile(paths["meta"]):
+        return None
+    try:
+        with open(paths["meta"], encoding="utf-8") as f:
+            meta = json.load(f)
+        if (
+            meta["n"] != n_rows
+            or meta["emb_size"] != os.path.getsize(emb_path)
+            or meta.get("emb_fingerprint") != emb_fingerprint(emb_path)
+        ):
+            log.warning(
+                "%s was built for a different %s; ignoring it, re-run `ivfpq`",
+                paths["meta"], os.path.basename(emb_path),
+            )
+            return None
+        index = IvfPqIndex(
+            centroids=np.load(paths["centroids"]),
+            offsets=np.load(paths["offsets"]),
+            rows=np.load(paths["rows"], mmap_mode="r"),
+            codebooks=np.load(paths["codebooks"]),
+            codes=np.load(paths["codes"], mmap_mode="r"),
+            nprobe=int(meta.get("nprobe", DEFAULT_NPROBE)),
+            rerank=int(meta.get("rerank", DEFAULT_RERANK)),
+        )
+    except Exception:
+        log.exception("failed to load %s", paths["meta"])
+        return None
+    if (
+        index.offsets.shape != (index.nlist + 1,)
+        or int(index.offsets[-1]) != n_rows
+        or index.rows.shape != (n_rows,)
+        or index.codes.shape != (n_rows, index.m)
+    ):
+        log.warning("%s is inconsistent with its parts; ignoring it", paths["meta"])
+        return None
+    log.info("loaded fhir ivfpq index: nlist=%d, M=%d, nprobe=%d",
+             index.nlist, index.m, index.nprobe)
+    return index
+
+
+# ─── Builder ─────────────────────────────────────────────────────────
+
+def _nearest(x: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Index of the L2-nearest row of *c* for every row of *x*."""
+    half_sq = 0.5 * np.einsum("kd,kd->k", c, c)
+    out = np.empty(x.shape[0], dtype=np.int32)
+    for s in range(0, x.shape[0], _CHUNK):
+        e = min(s + _CHUNK, x.shape[0])
+        out[s:e] = np.argmax(x[s:e] @ c.T - half_sq, axis=1)
+    return out
+
+
+def _kmeans(x: np.ndarray, k: int, iters: int, rng: np.random.Generator) -> np.ndarray:
+    """Plain Lloyd's k-means; empty clusters are re-seeded from *x*."""
+    k = min(k, x.shape[0])
+    c = x[rng.choice(x.shape[0], size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = _nearest(x, c)
+        counts = np.bincount(assign, minlength=k)
+        sums = np.zeros_like(c)
+        np.add.at(sums, assign, x)
+        filled = counts > 0
+        c[filled] = sums[filled] / counts[filled, None]
+        n_empty = int((~filled).sum())
+        if n_empty:
+            c[~filled] = x[rng.choice(x.shape[0], size=n_empty, replace=False)]
+    return c
+
+
+def default_nlist(n: int) -> int:
+    """~√N coarse lists, rounded to a power of two (1024 for ~700k rows)."""
+    return max(1, min(n, 1 << round(math.log2(max(1.0, math.sqrt(n))))))
+
+
+def build(
+    emb_path: str,
+    *,
+    nlist: int | None = None,
+    m: int = DEFAULT_M,
+    train_size: int = DEFAULT_TRAIN_SIZE,
+    iters: int = DEFAULT_ITERS,
+    nprobe: int = DEFAULT_NPROBE,
+    rerank: int = DEFAULT_RERANK,
+    seed: int = 0,
+) -> dict:
+    """Train and write the IVF-PQ index for *emb_path*. Returns its meta.
+
+    Training runs on a random sample of *train_size* rows; assignment and
+    encoding then stream over the whole mmap in fp32 blocks, so peak RAM
+    stays at the sample plus the (N × M) code array.
+    """
+    arr = np.load(emb_path, mmap_mode="r")
+    embs = arr["emb"]
+    n, dim = embs.shape
+    if n == 0:
+        raise ValueError(f"{emb_path} has no rows")
+    if dim % m:
+        raise ValueError(f"embedding dim {dim} is not divisible by m={m}")
+    nlist = min(nlist or default_nlist(n), n)
+    dsub = dim // m
+    rng = np.random.default_rng(seed)
+
+    paths = index_paths(emb_path)
+    # Drop the completion marker first: an interrupted rebuild must not
+    # leave an old meta pointing at new parts.
+    if os.path.isfile(paths["meta"]):
+        os.remove(paths["meta"])
+
+    sample_rows = np.sort(rng.choice(n, size=min(train_size, n), replace=False))
+    sample = embs[sample_rows].astype(np.float32)
+
+    log.info("ivfpq: training %d coarse centroids on %d rows", nlist, sample.shape[0])
+    centroids = _kmeans(sample, nlist, iters, rng)
+
+    log.info("ivfpq: training %d×%d PQ codebooks on residuals", m, _KSUB)
+    residual = sample - centroids[_nearest(sample, centroids)]
+    codebooks = np.zeros((m, _KSUB, dsub), dtype=np.float32)
+    for j in range(m):
+        cb = _kmeans(residual[:, j * dsub:(j + 1) * dsub], _KSUB, iters, rng)
+        codebooks[j, :cb.shape[0]] = cb
+    del sample, residual
+
+    log.info("ivfpq: assigning and encoding %d rows", n)
+    assign = np.empty(n, dtype=np.int32)
+    codes_by_row = np.empty((n, m), dtype=np.uint8)
+    for s in range(0, n, _CHUNK):
+        e = min(s + _CHUNK, n)
+        x = embs[s:e].astype(np.float32)
+        a = _nearest(x, centroids)
+        assign[s:e] = a
+        x -= centroids[a]
+        for j in range(m):
+            codes_by_row[s:e, j] = _nearest(x[:, j * dsub:(j + 1) * dsub], codebooks[j])
+
+    order = np.argsort(assign, kind="stable").astype(np.int32)
+    offsets = np.zeros(nlist + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(assign, minlength=nlist))
+
+    parts = {
+        "centroids": centroids,
+        "offsets": offsets,
+        "rows": order,
+        "codebooks": codebooks,
+        "codes": codes_by_row[order],
+    }
+    for part, data in parts.items():
+        tmp = tmp_path(paths[part])
+        np.save(tmp, data)
+        os.replace(tmp, paths[part])
+
+    meta = {
+        "n": int(n),
+        "dim": int(dim),
+        "emb_size": os.path.getsize(emb_path),
+        "emb_fingerprint": emb_fingerprint(emb_path),
+        "nlist": int(nlist),
+        "m": int(m),
+        "ksub": _KSUB,
+        "train_size": int(sample_rows.shape[0]),
+        "iters": int(iters),
+        "nprobe": int(nprobe),
+        "rerank": int(rerank),
+        "seed": int(seed),
+    }
+    tmp = tmp_path(paths["meta"])
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, paths["meta"])
+    return meta
+
+
+async def cmd_ivfpq(args: Namespace) -> None:
+    """Subcommand: ivfpq — build the IVF-PQ index next to the active
+    provider's emb npy. ``FhirAdapter.resolve`` picks it up on next load;
+    delete the ``.ivfpq.*`` files to go back to brute force.
+    """
+    res_dir = args.res_dir or RES_DIR
+    emb_path = os.path.join(res_dir, emb_basename())
+    if not os.path.isfile(emb_path):
+        log.error("ivfpq: %s not found; run `embeddings` first", emb_path)
+        return
+    meta = build(
+        emb_path,
+        nlist=args.nlist,
+        m=args.m,
+        train_size=args.train_size,
+        iters=args.iters,
+        nprobe=args.nprobe,
+        rerank=args.rerank,
+    )
+    size = sum(os.path.getsize(p) for p in index_paths(emb_path).values())
+    log.info("ivfpq: N=%d nlist=%d M=%d → %s.ivfpq.* (%.1f MB)",
+             meta["n"], meta["nlist"], meta["m"],
+             emb_path[:-len(".npy")], size / 1e6)
@@ -19,6 +19,10 @@ subcommands (or one-shot :mod:`migrate_fhir_id`):
                           OPTIONAL — present in compat mode (DB still keys
                           th_series_data.fhir_id by DB pk); absent in
                           terminal mode (DB has been backfilled to canonical)
+
+    <emb stem>.ivfpq.*    IVF-PQ approximate index, built by the ``ivfpq``
+                          subcommand (see :mod:`ivfpq`)
+                          OPTIONAL — without it, resolve is brute force
 """
 
 from __future__ import annotations
@@ -176,6 +180,8 @@ def load(
                           for DCM/THETA hash rows; None when meta missing
                           or load_meta=False
       has_id_map        : bool — whether the sidecar was loaded
+      ivfpq             : IvfPqIndex | None — approximate index for
+                          resolve, None when not built (or stale)
     """
     anchor = emb_basename()
     resolved = _resolve_bundle_dir(bundle_dir, anchor)
@@ -273,6 +279,9 @@ def _load_base(bundle_dir: str, anchor: str) -> dict | None:
         def to_output_id(canonical_id: int) -> int:
             return canonical_id
 
+    from .ivfpq import load as load_ivfpq
+    ivfpq = load_ivfpq(emb_path, n)
+
     cache = {
         "arr": arr,
         "embs": arr["emb"],
@@ -282,10 +291,12 @@ def _load_base(bundle_dir: str, anchor: str) -> dict | None:
         "names": None,
         "code_strs": None,
         "has_id_map": has_id_map,
+        "ivfpq": ivfpq,
         "_bundle_dir": bundle_dir,
     }
-    log.info("loaded local fhir bundle (base) from %s: N=%d, id_map=%s",
-             bundle_dir, n, "yes" if has_id_map else "no")
+    log.info("loaded local fhir bundle (base) from %s: N=%d, id_map=%s, ivfpq=%s",
+             bundle_dir, n, "yes" if has_id_map else "no",
+             "yes" if ivfpq is not None else "no")
     return cache
 
 
@@ -475,7 +475,7 @@ async def _phase2_embed(
     async def flush() -> None:
         if not buf_text:
             return
-        embs = await text_embedding(buf_text, provider="gemini")
+        embs = await text_embedding(buf_text, provider="gemini", use_cache=False)
         for i, emb in zip(buf_idx, embs):
             if emb is None:
                 raise RuntimeError(
@@ -0,0 +1,121 @@
+"""Unit tests for the IVF-PQ index in ivfpq.py."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from ..common import _CODE_BITS, EMBEDDING_DIM
+from .ivfpq import build, index_paths, load, search_exact
+from .local import EMB_DTYPE
+
+_N = 2000
+_SYSTEMS = (0, 1, 2)
+
+
+@pytest.fixture(scope="module")
+def bundle(tmp_path_factory) -> tuple[str, np.ndarray, np.ndarray]:
+    """Clustered unit-norm rows spread over three systems, plus their index."""
+    rng = np.random.default_rng(7)
+    centers = rng.standard_normal((40, EMBEDDING_DIM)).astype(np.float32)
+    x = centers[rng.integers(0, 40, _N)] + 0.3 * rng.standard_normal((_N, EMBEDDING_DIM)).astype(np.float32)
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    sys_arr = np.asarray([_SYSTEMS[i % len(_SYSTEMS)] for i in range(_N)], dtype=np.int8)
+
+    arr = np.zeros(_N, dtype=EMB_DTYPE)
+    arr["fhir_id"] = (sys_arr.astype(np.int64) << _CODE_BITS) | np.arange(_N)
+    arr["emb"] = x.astype(np.float16)
+    emb_path = str(tmp_path_factory.mktemp("bundle") / "fhir_embeddings.npy")
+    np.save(emb_path, arr)
+
+    build(emb_path, nlist=16, m=16, train_size=_N, iters=5)
+    return emb_path, sys_arr, np.load(emb_path, mmap_mode="r")["emb"]
+
+
+def _queries(embs: np.ndarray, count: int = 20) -> np.ndarray:
+    rng = np.random.default_rng(3)
+    q = embs[rng.choice(embs.shape[0], size=count, replace=False)].astype(np.float32)
+    q += 0.02 * rng.standard_normal(q.shape).astype(np.float32)
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+class TestBuildAndLoad:
+    def test_layout(self, bundle) -> None:
+        emb_path, _, _ = bundle
+        index = load(emb_path, _N)
+        assert index is not None
+        assert index.nlist == 16 and index.m == 16
+        assert int(index.offsets[-1]) == _N
+        # Every emb row lands in exactly one list.
+        assert sorted(int(r) for r in index.rows) == list(range(_N))
+
+    def test_row_count_mismatch_ignored(self, bundle) -> None:
+        emb_path, _, _ = bundle
+        assert load(emb_path, _N + 1) is None
+
+    def test_stale_source_ignored(self, bundle) -> None:
+        emb_path, _, _ = bundle
+        meta_path = index_paths(emb_path)["meta"]
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        try:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(dict(meta, emb_size=meta["emb_size"] + 1), f)
+            assert load(emb_path, _N) is None
+        finally:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+
+    def test_regenerated_source_of_the_same_size_ignored(self, tmp_path) -> None:
+        rng = np.random.default_rng(11)
+        arr = np.zeros(300, dtype=EMB_DTYPE)
+        arr["fhir_id"] = np.arange(300)
+        x = rng.standard_normal((300, EMBEDDING_DIM)).astype(np.float32)
+        arr["emb"] = (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float16)
+        emb_path = str(tmp_path / "fhir_embeddings.npy")
+        np.save(emb_path, arr)
+        build(emb_path, nlist=4, m=16, train_size=300, iters=2)
+        assert load(emb_path, 300) is not None
+
+        # Same row count and dimension, so the same file size: new vectors
+        arr["emb"] = -arr["emb"]
+        np.save(emb_path, arr)
+        assert load(emb_path, 300) is None
+
+    def test_missing_index(self, tmp_path) -> None:
+        assert load(str(tmp_path / "fhir_embeddings.npy"), _N) is None
+
+
+class TestSearch:
+    def test_full_probe_matches_exact(self, bundle) -> None:
+        # Probing every list and re-ranking every candidate is brute force.
+        emb_path, sys_arr, embs = bundle
+        index = load(emb_path, _N)
+        Q = _queries(embs)
+        exact = search_exact(Q, embs, sys_arr, list(_SYSTEMS), 5)
+        approx = index.search(Q, embs, sys_arr, list(_SYSTEMS), 5, nprobe=16, rerank=_N)
+        for e, a in zip(exact, approx):
+            assert {r for r, _ in e} == {r for r, _ in a}
+            scores = dict(e)
+            for r, s in a:
+                assert s == pytest.approx(scores[r], abs=1e-5)
+
+    def test_per_system_top_k(self, bundle) -> None:
+        emb_path, sys_arr, embs = bundle
+        index = load(emb_path, _N)
+        for picked in index.search(_queries(embs), embs, sys_arr, [0, 2], 3, nprobe=4):
+            systems = [int(sys_arr[r]) for r, _ in picked]
+            assert set(systems) <= {0, 2}
+            assert all(systems.count(s) <= 3 for s in (0, 2))
+
+    def test_recall_at_default_probe(self, bundle) -> None:
+        emb_path, sys_arr, embs = bundle
+        index = load(emb_path, _N)
+        Q = _queries(embs)
+        exact = search_exact(Q, embs, sys_arr, list(_SYSTEMS), 5)
+        approx = index.search(Q, embs, sys_arr, list(_SYSTEMS), 5, nprobe=8)
+        want = sum(len(e) for e in exact)
+        found = sum(len({r for r, _ in e} & {r for r, _ in a}) for e, a in zip(exact, approx))
+        assert found / want >= 0.9
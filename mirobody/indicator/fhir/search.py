@@ -19,6 +19,7 @@ from .common import (
     SYSTEMS, SYSTEM_TO_CODE, _CODE_BITS, _CODE_MASK, int_to_code,
     resolve_fhir_embedding_column,
 )
+from .embeddings.ivfpq import search_exact
 from .embeddings.local import RES_DIR as _RES_DIR, load as _load_local_fhir_cache
 from .graph_builder import FHIR_GRAPH_BIN
 
@@ -379,12 +380,12 @@ class FhirAdapter(DomainAdapter):
         top_k: int,
         systems: list[str] | None,
     ) -> list[list[ResolveResult]]:
-        """Batched cosine search: one chunked GEMM for the whole batch.
+        """Batched cosine search, per-system top-k.
 
-        For B queries against N rows × 1024 fp16 embeddings, this keeps peak
-        fp32 working set at ~256 MB (one row chunk) plus the (B × N) score
-        matrix, instead of allocating ~256 MB per query × B queries. The
-        GEMM call (vs B independent GEMVs) also lifts BLAS throughput.
+        Uses the bundle's IVF-PQ index when one has been built (see
+        :mod:`.embeddings.ivfpq`) and falls back to one chunked GEMM over
+        every row otherwise. Both paths return exact cosine scores for the
+        rows they pick; the index only narrows which rows are scored.
 
         Positions in ``embs_in`` that are ``None`` map to an empty result
         list at the same index.
@@ -413,41 +414,23 @@ class FhirAdapter(DomainAdapter):
         sys_arr = _systems_array(cache)
 
         Q = np.stack(q_rows, axis=0)              # (B, 1024) fp32
-        B = Q.shape[0]
-        n_rows = embs.shape[0]
-        scores_all = np.empty((B, n_rows), dtype=np.float32)
-
-        # Chunked fp16→fp32 GEMM to cap peak RAM regardless of N (and B).
-        chunk = 1 << 16
-        for s in range(0, n_rows, chunk):
-            e = min(s + chunk, n_rows)
-            chunk_fp32 = embs[s:e].astype(np.float32)            # (chunk, 1024)
-            np.matmul(Q, chunk_fp32.T, out=scores_all[:, s:e])   # (B, chunk)
 
         target_codes = (
             [SYSTEM_TO_CODE[s] for s in systems]
             if systems else list(range(len(SYSTEMS)))
         )
 
-        # Per-query top-k pick (cheap once scores_all is computed).
-        for b, qi in enumerate(valid_idx):
-            scores = scores_all[b]
-
-            picked_rows: list[int] = []
-            for sys_int in target_codes:
-                mask = sys_arr == sys_int
-                n_in_sys = int(mask.sum())
-                if n_in_sys == 0:
-                    continue
-                sys_scores = np.where(mask, scores, -np.inf)
-                k = min(top_k, n_in_sys)
-                top = np.argpartition(sys_scores, -k)[-k:]
-                picked_rows.extend(int(r) for r in top)
+        index = cache.get("ivfpq")
+        if index is not None:
+            hits = index.search(Q, embs, sys_arr, target_codes, top_k)
+        else:
+            hits = search_exact(Q, embs, sys_arr, target_codes, top_k)
 
-            picked_rows.sort(key=lambda r: scores[r], reverse=True)
+        for qi, picked in zip(valid_idx, hits):
+            picked.sort(key=lambda h: h[1], reverse=True)
 
             results: list[ResolveResult] = []
-            for r_int in picked_rows:
+            for r_int, score in picked:
                 sys_name = SYSTEMS[int(sys_arr[r_int])]
                 if sys_name in ("DCM", "THETA"):
                     code = code_strs.get(r_int, "") if code_strs is not None else ""
@@ -458,7 +441,7 @@ class FhirAdapter(DomainAdapter):
                     system=sys_name,
                     code=code,
                     name=name,
-                    score=round(float(scores[r_int]), 4),
+                    score=round(score, 4),
                 ))
             out[qi] = results
         return out
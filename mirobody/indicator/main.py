@@ -7,6 +7,7 @@ Subcommands:
     search   — Search concepts by keywords (requires DB).
     resolve  — Resolve free-text term to LOINC / RxNorm / SNOMED CT codes.
     embed    — Batch-fill embedding_gemini for th_series_dim / fhir_indicators.
+    ivfpq    — Build the IVF-PQ approximate index next to fhir_embeddings.npy.
     test     — Verify concepts.csv against known test cases.
 
 Usage:
@@ -15,6 +16,7 @@ Usage:
     python -m mirobody.indicator merge    -o out/
     python -m mirobody.indicator search   -o out/ <user_id> <keywords...>
     python -m mirobody.indicator resolve  "blood glucose"
+    python -m mirobody.indicator ivfpq
 
 Required external data (default location: ~/ref/):
   UMLS Metathesaurus   — https://www.nlm.nih.gov/research/umls/licensedcontent/umlsknowledgesources.html
@@ -47,6 +49,14 @@ from .fhir.embeddings import (
     cmd_embeddings_db,
     cmd_embeddings_ref,
     cmd_id_map,
+    cmd_ivfpq,
+)
+from .fhir.embeddings.ivfpq import (
+    DEFAULT_ITERS,
+    DEFAULT_M,
+    DEFAULT_NPROBE,
+    DEFAULT_RERANK,
+    DEFAULT_TRAIN_SIZE,
 )
 from .search import cmd_search, cmd_resolve
 from .embed import cmd_embed
@@ -275,6 +285,43 @@ def main() -> None:
     p_names.add_argument("--rxnorm-dir", default=None, help="RxNorm release dir")
     p_names.add_argument("--dicom-dir",  default=None, help="DICOM PS3.16 dir containing part16.xml")
 
+    # ── ivfpq ─────────────────────────────────────────────────────────
+    p_ivfpq = sub.add_parser(
+        "ivfpq",
+        help="Build the IVF-PQ approximate index (<emb stem>.ivfpq.*) next "
+             "to the active provider's emb npy. `resolve` uses it when "
+             "present instead of scanning every embedding.",
+    )
+    p_ivfpq.add_argument(
+        "--res-dir", default=None,
+        help="Bundle dir holding the emb npy (default: mirobody/res)",
+    )
+    p_ivfpq.add_argument(
+        "--nlist", type=int, default=None,
+        help="Coarse k-means lists (default: ~sqrt(N), power of two)",
+    )
+    p_ivfpq.add_argument(
+        "--m", type=int, default=DEFAULT_M,
+        help=f"PQ subspaces; must divide the embedding dim (default: {DEFAULT_M})",
+    )
+    p_ivfpq.add_argument(
+        "--train-size", type=int, default=DEFAULT_TRAIN_SIZE,
+        help=f"Rows sampled for k-means training (default: {DEFAULT_TRAIN_SIZE})",
+    )
+    p_ivfpq.add_argument(
+        "--iters", type=int, default=DEFAULT_ITERS,
+        help=f"k-means iterations (default: {DEFAULT_ITERS})",
+    )
+    p_ivfpq.add_argument(
+        "--nprobe", type=int, default=DEFAULT_NPROBE,
+        help=f"Lists probed per query, stored with the index (default: {DEFAULT_NPROBE})",
+    )
+    p_ivfpq.add_argument(
+        "--rerank", type=int, default=DEFAULT_RERANK,
+        help="Candidates re-scored exactly per system, as a multiple of "
+             f"top_k, stored with the index (default: {DEFAULT_RERANK})",
+    )
+
     # ── test ──────────────────────────────────────────────────────────
     p_test = sub.add_parser(
         "test",
@@ -317,6 +364,8 @@ def main() -> None:
         asyncio.run(_run_async(cmd_id_map(args)))
     elif args.command == "code-names":
         asyncio.run(_run_async(cmd_code_names(args)))
+    elif args.command == "ivfpq":
+        asyncio.run(_run_async(cmd_ivfpq(args)))
     elif args.command == "test":
         cmd_test(args)
 
@@ -16,6 +16,11 @@ from .tool import (
     get_private_functions
 )
 
+from .policy import (
+    ToolPolicy,
+    tool_policy
+)
+
 from .resource import (
     load_resources_from_directory,
     load_resources_from_directories,
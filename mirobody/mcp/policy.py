@@ -0,0 +1,176 @@
+"""Execution policies for MCP tool calls.
+
+A tool declares how it runs with the @tool_policy decorator, which stores a
+ToolPolicy on the function (like `inputSchema` / `meta`) for parse_function()
+to pick up:
+
+    @tool_policy(executor="process", timeout=60, max_concurrency=2)
+    def parse_docx(self, file_key: str, user_info: dict) -> dict: ...
+
+    @tool_policy(cache_ttl=300)
+    async def get_indicator_catalog(self) -> dict: ...
+
+Undecorated sync tools run on the shared thread pool and undecorated async
+tools on the event loop, both with the MCP_TOOL_TIMEOUT default, so no tool
+can block the loop. Process-pool tools and their arguments must pickle.
+
+Config:
+- MCP_TOOL_TIMEOUT: default hard timeout in seconds (default 300, 0 = none)
+- MCP_TOOL_THREADS: size of the shared thread pool (default min(32, cpus + 4))
+- MCP_TOOL_PROCESSES: size of the shared process pool (default cpus)
+"""
+
+import asyncio, concurrent.futures, contextvars, copy, functools, hashlib, json, logging, os
+
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from cachetools import TTLCache
+
+#-----------------------------------------------------------------------------
+
+EXECUTORS = ("inline", "thread", "process")
+
+DEFAULT_TIMEOUT = 300
+
+@dataclass(frozen=True)
+class ToolPolicy:
+    executor        : str = ""              # "inline" | "thread" | "process"; "" picks by sync/async
+    max_concurrency : int = 0               # Concurrent calls of this tool per worker; 0 = unbounded
+    timeout         : float | None = None   # Seconds; None = MCP_TOOL_TIMEOUT, 0 = no timeout
+    cache_ttl       : float = 0             # Seconds to cache results; only for pure / read-only tools
+    cache_size      : int = 256             # Cached results kept per tool
+
+def tool_policy(
+    executor        : str = "",
+    max_concurrency : int = 0,
+    timeout         : float | None = None,
+    cache_ttl       : float = 0,
+    cache_size      : int = 256,
+) -> Callable:
+    """Attach a ToolPolicy to a tool function (see module docstring)."""
+    if executor and executor not in EXECUTORS:
+        raise ValueError(f"Unknown tool executor: {executor}")
+
+    policy = ToolPolicy(executor, max_concurrency, timeout, cache_ttl, cache_size)
+
+    def decorator(function):
+        function.policy = policy
+        return function
+    return decorator
+
+#-----------------------------------------------------------------------------
+
+class ToolTimeoutError(Exception):
+    pass
+
+class ToolRunner:
+    """
+    Runs one tool under its policy: concurrency limit, executor, timeout and
+    result cache. Built once per tool by the loaders and reused for every call.
+    """
+
+    def __init__(self, name: str, function: Callable, policy: ToolPolicy | None = None):
+        self.name = name
+        self.function = function
+        self.policy = policy or ToolPolicy()
+
+        self._is_async = asyncio.iscoroutinefunction(function)
+        self._executor = self.policy.executor or ("inline" if self._is_async else "thread")
+        if self._is_async and self._executor != "inline":
+            logging.warning(f"Tool {name} is async, ignoring executor={self._executor}")
+            self._executor = "inline"
+
+        self._semaphore = asyncio.Semaphore(self.policy.max_concurrency) if self.policy.max_concurrency > 0 else None
+        self._cache = TTLCache(maxsize=self.policy.cache_size, ttl=self.policy.cache_ttl) if self.policy.cache_ttl > 0 else None
+
+    @property
+    def timeout(self) -> float | None:
+        timeout = self.policy.timeout
+        if timeout is None:
+            from ..utils import safe_read_cfg
+            timeout = float(safe_read_cfg("MCP_TOOL_TIMEOUT", str(DEFAULT_TIMEOUT)))
+        return timeout if timeout > 0 else None
+
+    async def __call__(self, kwargs: dict, user_id: str = "") -> Any:
+        key = None
+        if self._cache is not None:
+            key = self._cache_key(kwargs, user_id)
+            if key in self._cache:
+                return copy.deepcopy(self._cache[key])
+
+        if self._semaphore is None:
+            result = await self._run(kwargs)
+        else:
+            async with self._semaphore:
+                result = await self._run(kwargs)
+
+        if key is not None and not (isinstance(result, dict) and result.get("success") is False):
+            self._cache[key] = copy.deepcopy(result)
+        return result
+
+    async def _run(self, kwargs: dict) -> Any:
+        timeout = self.timeout
+
+        if self._executor == "inline":
+            if self._is_async:
+                coro = self.function(**kwargs)
+            else:
+                return self.function(**kwargs)
+
+        elif self._executor == "thread":
+            # A timed-out thread cannot be interrupted; the caller gets the
+            # timeout while the call finishes in the background.
+            ctx = contextvars.copy_context()
+            coro = asyncio.get_running_loop().run_in_executor(
+                _thread_pool(), functools.partial(ctx.run, self.function, **kwargs)
+            )
+
+        else:
+            pool = _process_pool()
+            coro = asyncio.wrap_future(pool.submit(self.function, **kwargs))
+
+        try:
+            return await asyncio.wait_for(coro, timeout=timeout)
+        except asyncio.TimeoutError:
+            if self._executor == "process":
+                # The worker is stuck in user code; kill it so the slot is freed.
+                _reset_process_pool(pool)
+            raise ToolTimeoutError(f"Tool {self.name} timed out after {timeout:g}s")
+
+    def _cache_key(self, kwargs: dict, user_id: str) -> str:
+        arguments = {k: v for k, v in kwargs.items() if k != "user_info"}
+        canonical = json.dumps(arguments, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        return hashlib.sha256(f"{self.name}\x1f{user_id}\x1f{canonical}".encode("utf-8")).hexdigest()
+
+#-----------------------------------------------------------------------------
+
+_threads: concurrent.futures.ThreadPoolExecutor | None = None
+_processes: concurrent.futures.ProcessPoolExecutor | None = None
+
+def _thread_pool() -> concurrent.futures.ThreadPoolExecutor:
+    global _threads
+    if _threads is None:
+        from ..utils import safe_read_cfg
+        size = int(safe_read_cfg("MCP_TOOL_THREADS", "0")) or min(32, (os.cpu_count() or 1) + 4)
+        _threads = concurrent.futures.ThreadPoolExecutor(max_workers=size, thread_name_prefix="mcp_tool_")
+    return _threads
+
+def _process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _processes
+    if _processes is None:
+        from ..utils import safe_read_cfg
+        size = int(safe_read_cfg("MCP_TOOL_PROCESSES", "0")) or (os.cpu_count() or 1)
+        _processes = concurrent.futures.ProcessPoolExecutor(max_workers=size)
+    return _processes
+
+def _reset_process_pool(pool: concurrent.futures.ProcessPoolExecutor) -> None:
+    global _processes
+    if _processes is pool:
+        _processes = None
+
+    # ProcessPoolExecutor cannot cancel a running call; terminate its workers
+    # (other in-flight calls on this pool fail with BrokenProcessPool).
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
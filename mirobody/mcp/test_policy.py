@@ -0,0 +1,188 @@
+"""Tool execution policy tests: event-loop latency, timeouts, concurrency, caching."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from .policy import ToolRunner, tool_policy
+from .tool import call_tool, parse_function
+
+
+def _burn(seconds: float) -> int:
+    """Pure-Python CPU work, the kind of thing pandas / docx parsing does."""
+    end, n = time.perf_counter() + seconds, 0
+    while time.perf_counter() < end:
+        n += sum(i * i for i in range(200))
+    return n
+
+
+def crunch(seconds: float) -> dict:
+    _burn(seconds)
+    return {"success": True, "pid": os.getpid()}
+
+
+def hang(seconds: float) -> dict:
+    time.sleep(seconds)
+    return {"success": True}
+
+
+def _tools(**functions) -> dict:
+    tools = {}
+    for name, function in functions.items():
+        description, auth, parameters, policy = parse_function(function)
+        tools[name] = {
+            "description"   : description,
+            "auth"          : auth,
+            "instance"      : function,
+            "parameters"    : parameters,
+            "runner"        : ToolRunner(name, function, policy),
+        }
+    return tools
+
+
+async def _max_loop_lag(work) -> tuple[float, list]:
+    """Run work() while a ticker measures how late the event loop wakes it."""
+    lag, done = 0.0, asyncio.Event()
+
+    async def ticker():
+        nonlocal lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - start - 0.01)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    try:
+        results = await work()
+    finally:
+        done.set()
+        await tick
+    return lag, results
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("executor", ["thread", "process"])
+async def test_cpu_heavy_sync_tools_keep_loop_responsive(executor) -> None:
+    def tool(seconds: float) -> dict:
+        return crunch(seconds)
+
+    tools = _tools(tool=tool_policy(executor=executor, timeout=30)(crunch if executor == "process" else tool))
+    lag, results = await _max_loop_lag(
+        lambda: asyncio.gather(*(call_tool(tools, "tool", {"seconds": 0.5}) for _ in range(4)))
+    )
+    assert all(r["success"] for r in results)
+    # Inline, the loop would stall for the full 4 x 0.5 s; threads still
+    # share the GIL with the loop, so allow a few switch intervals of jitter.
+    assert lag < 0.25
+
+
+@pytest.mark.asyncio
+async def test_inline_sync_tool_blocks_loop() -> None:
+    # The old behaviour, still available explicitly: the loop stalls for the whole call.
+    def tool(seconds: float) -> dict:
+        return crunch(seconds)
+
+    tools = _tools(tool=tool_policy(executor="inline")(tool))
+    lag, _ = await _max_loop_lag(lambda: call_tool(tools, "tool", {"seconds": 0.3}))
+    assert lag >= 0.25
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("executor", ["thread", "process"])
+async def test_timeout(executor) -> None:
+    def tool(seconds: float) -> dict:
+        return hang(seconds)
+
+    tools = _tools(tool=tool_policy(executor=executor, timeout=0.2)(hang if executor == "process" else tool))
+    start = time.perf_counter()
+    result = await call_tool(tools, "tool", {"seconds": 5})
+    assert time.perf_counter() - start < 2
+    assert result["success"] is False and "timed out" in result["error"]
+
+    if executor == "process":
+        # The stuck worker was killed; the next call gets a fresh pool.
+        assert (await call_tool(tools, "tool", {"seconds": 0}))["success"]
+
+
+@pytest.mark.asyncio
+async def test_async_tool_timeout_cancels() -> None:
+    cancelled = asyncio.Event()
+
+    async def tool() -> dict:
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return {"success": True}
+
+    tools = _tools(tool=tool_policy(timeout=0.1)(tool))
+    result = await call_tool(tools, "tool")
+    assert result["success"] is False
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_max_concurrency() -> None:
+    running, peak = 0, 0
+
+    async def tool() -> dict:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return {"success": True}
+
+    tools = _tools(tool=tool_policy(max_concurrency=2)(tool))
+    await asyncio.gather(*(call_tool(tools, "tool") for _ in range(8)))
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_result_cache() -> None:
+    calls = []
+
+    async def tool(code: str, user_info: dict = None) -> dict:
+        calls.append(code)
+        if code == "bad":
+            return {"success": False, "error": "nope"}
+        return {"success": True, "code": code, "items": [1, 2]}
+
+    tools = _tools(tool=tool_policy(cache_ttl=0.3)(tool))
+
+    first = await call_tool(tools, "tool", {"code": "a"}, user_id="1")
+    first["items"].append(3)  # Callers cannot mutate the cached copy.
+    assert await call_tool(tools, "tool", {"code": "a"}, user_id="1") == {"success": True, "code": "a", "items": [1, 2]}
+    assert calls == ["a"]
+
+    await call_tool(tools, "tool", {"code": "a"}, user_id="2")
+    await call_tool(tools, "tool", {"code": "bad"}, user_id="1")
+    await call_tool(tools, "tool", {"code": "bad"}, user_id="1")
+    assert calls == ["a", "a", "bad", "bad"]
+
+    await asyncio.sleep(0.35)
+    await call_tool(tools, "tool", {"code": "a"}, user_id="1")
+    assert calls[-1] == "a" and len(calls) == 5
+
+
+def test_parse_function_discovers_policy() -> None:
+    @tool_policy(executor="process", max_concurrency=3, timeout=10)
+    def decorated(x: int) -> dict:
+        """Doc."""
+        return {}
+
+    def plain(x: int) -> dict:
+        return {}
+
+    *_, policy = parse_function(decorated)
+    assert (policy.executor, policy.max_concurrency, policy.timeout) == ("process", 3, 10)
+    assert parse_function(plain)[3] is None
+
+    with pytest.raises(ValueError):
+        tool_policy(executor="gpu")
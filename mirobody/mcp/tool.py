@@ -3,6 +3,8 @@ import importlib, importlib.util, inspect, logging, os
 
 from types import ModuleType, FunctionType
 
+from .policy import ToolPolicy, ToolRunner, ToolTimeoutError
+
 #-----------------------------------------------------------------------------
 
 # For MCP tools.
@@ -69,7 +71,12 @@ def _parse_type(s: str) -> tuple[str, str]:
     # Unknown type.
     return "string", ""
 
-def parse_function(function: FunctionType, private: bool = False) -> tuple[dict, bool, dict]:
+def parse_function(function: FunctionType, private: bool = False) -> tuple[dict, bool, dict, ToolPolicy | None]:
+    # Execution policy declared with @tool_policy, if any.
+    policy = getattr(function, "policy", None)
+    if not isinstance(policy, ToolPolicy):
+        policy = None
+
     # 🆕 Check if function has custom inputSchema attribute
     if hasattr(function, 'inputSchema') and isinstance(function.inputSchema, dict):
         # Use custom inputSchema
@@ -120,7 +127,7 @@ def parse_function(function: FunctionType, private: bool = False) -> tuple[dict,
             for param_name in param_names:
                 parameters[param_name] = None
 
-        return tool, require_user_info, parameters
+        return tool, require_user_info, parameters, policy
 
     # Original auto-generation logic
     tool = {
@@ -224,7 +231,7 @@ def parse_function(function: FunctionType, private: bool = False) -> tuple[dict,
     #-----------------------------------------------------
 
     if not function.__doc__ or not isinstance(function.__doc__, str):
-        return tool, require_user_info, parameters
+        return tool, require_user_info, parameters, policy
 
     #-----------------------------------------------------
     # User's descriptions.
@@ -321,7 +328,7 @@ def parse_function(function: FunctionType, private: bool = False) -> tuple[dict,
     if "required" in schema and not schema["required"]:
         del schema["required"]
 
-    return tool, require_user_info, parameters
+    return tool, require_user_info, parameters, policy
 
 #-----------------------------------------------------------------------------
 
@@ -377,13 +384,15 @@ def load_tools_from_class(klass, module_name: str, private: bool = False) -> dic
 
         #-------------------------------------
 
-        tool_description, require_user_info, parameters = parse_function(function)
+        tool_description, require_user_info, parameters, policy = parse_function(function)
+        instance = getattr(class_instance, function_name)
 
         tools[function_name] = {
             "description"   : tool_description,
             "auth"          : require_user_info,
-            "instance"      : getattr(class_instance, function_name),
+            "instance"      : instance,
             "parameters"    : parameters,
+            "runner"        : ToolRunner(function_name, instance, policy),
         }
 
         logging.info(f"Loaded tool: {function_name}")
@@ -438,13 +447,14 @@ def load_tools_from_module(module: ModuleType, module_name: str, private: bool =
             logging.debug(f"Ignore function: {function_name}")
             continue
 
-        tool_description, require_user_info, parameters = parse_function(function)
+        tool_description, require_user_info, parameters, policy = parse_function(function)
 
         module_tools[function_name] = {
             "description"   : tool_description,
             "auth"          : require_user_info,
             "instance"      : function,
             "parameters"    : parameters,
+            "runner"        : ToolRunner(function_name, function, policy),
         }
 
         logging.info(f"Loaded tool: {function_name}")
@@ -668,14 +678,22 @@ async def call_tool(tools: dict, tool_name: str, arguments: dict | None = None,
         }
 
     #-----------------------------------------------------
-    # Invoke the function.
+    # Invoke the function under its execution policy.
+
+    runner = tool.get("runner")
+    if not isinstance(runner, ToolRunner):
+        runner = tool["runner"] = ToolRunner(tool_name, tool["instance"])
 
     try:
-        if inspect.iscoroutinefunction(tool["instance"]):
-            result = await tool["instance"](**kwargs)
+        result = await runner(kwargs, user_id=user_id)
 
-        else:
-            result = tool["instance"](**kwargs)
+    except ToolTimeoutError as e:
+        logging.warning(str(e))
+
+        return {
+            "success"   : False,
+            "error"     : str(e)
+        }
 
     except Exception as e:
         logging.error(str(e))
@@ -34,6 +34,7 @@ from deepagents.backends.utils import (
     perform_string_replacement,
 )
 
+from .pattern import glob_to_sql, to_pg_regex
 from .utils import get_file_type
 from ..utils import CACHE_TTL_GLOBAL, CACHE_MAX_FILES, CACHE_MAX_WORKERS
 
@@ -695,11 +696,19 @@ class PostgresBackend(SandboxBackendProtocol):
         )
 
 
+    def _sql_name_filter(self, glob_pattern: str) -> Optional[tuple[str, str]] | bool:
+        """glob_to_sql() for a name glob; None means no filter, False untranslatable."""
+        if not glob_pattern or glob_pattern == "*":
+            return None
+        return glob_to_sql(glob_pattern) or False
+
     async def agrep_raw(self, pattern: str, path: Optional[str] = None,
                         glob: Optional[str] = None) -> list[GrepMatch] | str:
         """Search for a literal text pattern in files.
 
-        Uses database search with regex pattern matching.
+        Runs in PostgreSQL (pg_trgm-prefiltered `~*`, matching lines only)
+        when the pattern and glob translate; otherwise loads the workspace
+        and matches in Python.
 
         Args:
             pattern: Literal string to search for (NOT regex).
@@ -721,6 +730,21 @@ class PostgresBackend(SandboxBackendProtocol):
 
         try:
             search_path = self._normalize_path(search_path)
+
+            pg_regex = to_pg_regex(pattern)
+            name_filter = self._sql_name_filter(glob_pattern)
+            if pg_regex is not None and name_filter is not False:
+                try:
+                    rows = await self.store.grep(
+                        (self.session_id, self.user_id), pg_regex, search_path, name_filter,
+                    )
+                    return [
+                        GrepMatch(path=row["path"], line=int(row["line"]), text=str(row["text"]))
+                        for row in rows
+                    ]
+                except Exception as e:
+                    logger.warning(f"Server-side grep failed, matching in Python: {e}")
+
             items = await self.store.search((self.session_id, self.user_id))
             matches: list[GrepMatch] = []
             for item in items:
@@ -742,6 +766,9 @@ class PostgresBackend(SandboxBackendProtocol):
     async def aglob_info(self, pattern: str, path: str = "/") -> list[FileInfo]:
         """Find files matching a glob pattern.
 
+        The name match runs in PostgreSQL as LIKE / SIMILAR TO when the
+        pattern translates, so file content is never loaded.
+
         Args:
             pattern: Glob pattern to match files against (e.g., `'*.py'`, `'**/*.txt'`).
             path: Base directory to search from. Defaults to root (`/`).
@@ -752,6 +779,25 @@ class PostgresBackend(SandboxBackendProtocol):
         """
         try:
             path = self._normalize_path(path)
+
+            name_filter = self._sql_name_filter(pattern)
+            if name_filter is not False:
+                try:
+                    rows = await self.store.glob((self.session_id, self.user_id), path, name_filter)
+                    results = [
+                        FileInfo(
+                            path=row["path"],
+                            is_dir=False,
+                            size=int(row["size"]),
+                            modified_at=row["modified_at"],
+                        )
+                        for row in rows
+                    ]
+                    results.sort(key=lambda x: x.get("path", ""))
+                    return results
+                except Exception as e:
+                    logger.warning(f"Server-side glob failed, matching in Python: {e}")
+
             items = await self.store.search((self.session_id, self.user_id))
             results = []
             for item in items:
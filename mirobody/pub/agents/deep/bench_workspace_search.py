@@ -0,0 +1,124 @@
+"""
+DeepAgent Workspace Grep / Glob Benchmark
+
+Fills a throw-away deep_agent_workspace session with synthetic text files
+(default 500 files, 50 MB) and times PostgresBackend grep / glob on it two
+ways:
+
+  - python: the previous path, store.search() loads every file and matches
+    line by line in Python (still the fallback for untranslatable patterns)
+  - sql:    glob as LIKE / SIMILAR TO, grep as a pg_trgm-prefiltered `~*`
+    that returns only the matching lines
+
+Both paths must return the same matches; the benchmark asserts it. The
+session is deleted afterwards.
+
+Usage:
+    python3 -m mirobody.pub.agents.deep.bench_workspace_search \\
+        [--files 500] [--mb 50] [--repeat 5] [--config config.yaml]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+import uuid
+
+from mirobody.utils import Config
+
+from .backend import PostgresBackend
+from .store import PostgresLangGraphStore
+
+_WORDS = (
+    "glucose insulin cholesterol ferritin vitamin sodium potassium creatinine "
+    "hemoglobin platelet cortisol thyroid lipid protein albumin bilirubin"
+).split()
+
+_GREPS = [
+    ("rare literal", "HbA1c_marker_7731"),
+    ("common word", "glucose"),
+    ("anchored", r"^def \w+\("),
+    ("word boundary", r"\bferritin\b"),
+]
+_GLOBS = ["*.md", "note_1??.md", "*.[pP][yY]"]
+
+
+class _PythonOnlyStore(PostgresLangGraphStore):
+    """Store without server-side search, so the backend takes the fallback."""
+
+    async def grep(self, *args, **kwargs):
+        raise NotImplementedError
+
+    async def glob(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+def _file_content(rng: random.Random, size: int, index: int) -> str:
+    lines, total = [], 0
+    while total < size:
+        if rng.random() < 0.01:
+            line = f"def fn_{index}_{len(lines)}(x):"
+        else:
+            line = " ".join(rng.choices(_WORDS, k=12))
+        lines.append(line)
+        total += len(line) + 1
+    if index % 50 == 0:
+        lines[rng.randrange(len(lines))] += " HbA1c_marker_7731"
+    return "\n".join(lines)
+
+
+async def _fill(store: PostgresLangGraphStore, namespace: tuple[str, str], files: int, mb: float) -> None:
+    rng = random.Random(42)
+    size = int(mb * 1024 * 1024 / files)
+    for i in range(files):
+        ext = ".py" if i % 10 == 0 else ".md"
+        content = _file_content(rng, size, i)
+        await store.put(namespace, f"/docs/note_{i}{ext}", {"content": content.split("\n"), "modified_at": "2026-01-01T00:00:00"})
+
+
+async def _time(fn, repeat: int) -> tuple[float, object]:
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--mb", type=float, default=50, help="Total workspace size")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--config", nargs="*", default=None, help="Extra config yaml files")
+    args = parser.parse_args()
+
+    await Config.init(yaml_filenames=args.config)
+    logging.getLogger().setLevel(logging.ERROR)
+
+    session_id, user_id = f"bench_{uuid.uuid4().hex[:8]}", "bench"
+    store = PostgresLangGraphStore()
+    sql_backend = PostgresBackend(session_id, user_id, store)
+    py_backend = PostgresBackend(session_id, user_id, _PythonOnlyStore())
+
+    try:
+        start = time.perf_counter()
+        await _fill(store, (session_id, user_id), args.files, args.mb)
+        print(f"workspace: {args.files} files, {args.mb:g} MB, filled in {time.perf_counter() - start:.1f}s")
+        print(f"{'op':<26} {'matches':>8} {'python ms':>10} {'sql ms':>10} {'speedup':>8}")
+
+        cases = [(f"grep {name}", lambda b, p=p: b.agrep_raw(p, "/")) for name, p in _GREPS]
+        cases += [(f"glob {g}", lambda b, g=g: b.aglob_info(g, "/")) for g in _GLOBS]
+        for name, run in cases:
+            py_ms, py_result = await _time(lambda: run(py_backend), args.repeat)
+            sql_ms, sql_result = await _time(lambda: run(sql_backend), args.repeat)
+            assert py_result == sql_result, f"{name}: results differ"
+            print(f"{name:<26} {len(sql_result):>8} {py_ms:>10.1f} {sql_ms:>10.1f} {py_ms / sql_ms:>7.1f}x")
+    finally:
+        await store.delete_session(session_id, user_id)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
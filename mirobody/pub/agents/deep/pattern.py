@@ -0,0 +1,142 @@
+"""Translate workspace glob / grep patterns into PostgreSQL predicates.
+
+PostgresBackend pushes glob and grep down into SQL when the pattern can be
+expressed there with the same meaning as in Python:
+
+- glob (fnmatch on the file name) -> LIKE, or SIMILAR TO when it uses [seq]
+- grep (Python `re`, case-insensitive) -> ARE for `~*`, newline-sensitive
+
+Both translators return None for anything they cannot map faithfully
+(named groups, back-references, POSIX classes, `\\x` escapes, ...); the
+backend then falls back to matching in Python.
+"""
+
+from typing import Optional
+
+# Characters that are special in SIMILAR TO (on top of LIKE's % and _).
+_SIMILAR_SPECIAL = set("|*+?{}()[]")
+
+# Escapes whose meaning is the same in Python `re` and a PostgreSQL ARE.
+_SAME_ESCAPES = set("dDwWsSntrfv")
+_SAME_CLASS_ESCAPES = set("dwsntrfv")
+
+# Python-only escapes with a line-level equivalent in the ARE.
+_MAPPED_ESCAPES = {"b": "\\y", "B": "\\Y", "A": "^", "Z": "$"}
+
+
+def glob_to_sql(pattern: str) -> Optional[tuple[str, str]]:
+    """Map an fnmatch pattern to ("LIKE" | "SIMILAR TO", sql_pattern).
+
+    The SQL pattern uses backslash as its escape character. Returns None when
+    a bracket expression is too subtle to translate.
+    """
+    if not pattern:
+        pattern = "*"
+
+    out: list[str] = []
+    similar = False
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            out.append("%")
+        elif c == "?":
+            out.append("_")
+        elif c == "[":
+            # fnmatch: "[!" negates, a "]" right after the opener is literal.
+            j = i
+            if j < n and pattern[j] == "!":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            j = pattern.find("]", j)
+            if j < 0:
+                out.append("\\[")
+                continue
+
+            body = pattern[i:j]
+            i = j + 1
+            if "\\" in body or "[" in body or body.startswith("^"):
+                return None
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            similar = True
+        elif c in "%_\\" or c in _SIMILAR_SPECIAL:
+            out.append("\\" + c)
+        else:
+            out.append(c)
+
+    return ("SIMILAR TO" if similar else "LIKE"), "".join(out)
+
+
+def to_pg_regex(pattern: str) -> Optional[str]:
+    """Rewrite a Python regex for PostgreSQL `~*`, or None if it cannot be.
+
+    `\\b` / `\\B` become `\\y` / `\\Y`, `\\A` / `\\Z` become `^` / `$`, and a
+    leading `(?i)` is dropped since the match is case-insensitive anyway. The
+    result starts with `(?n)` so `^`, `$` and `.` keep line semantics when run
+    against a whole file.
+    """
+    if pattern.startswith("(?i)"):
+        pattern = pattern[4:]
+
+    out: list[str] = ["(?n)"]
+    in_class = False
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+
+        if c == "\\":
+            if i + 1 >= n:
+                return None
+            e = pattern[i + 1]
+            i += 2
+            if e.isalnum():
+                if in_class:
+                    if e not in _SAME_CLASS_ESCAPES:
+                        return None
+                elif e in _MAPPED_ESCAPES:
+                    out.append(_MAPPED_ESCAPES[e])
+                    continue
+                elif e not in _SAME_ESCAPES:
+                    return None
+            out.append("\\" + e)
+            continue
+
+        if in_class:
+            if c == "[" and i + 1 < n and pattern[i + 1] in ":=.":
+                return None
+            if c == "]":
+                in_class = False
+            out.append(c)
+            i += 1
+            continue
+
+        if c == "[":
+            in_class = True
+            out.append(c)
+            i += 1
+            # "[^]" / "[]": a leading "]" is a literal in both dialects.
+            if i < n and pattern[i] == "^":
+                out.append("^")
+                i += 1
+            if i < n and pattern[i] == "]":
+                out.append("]")
+                i += 1
+            continue
+
+        # Only plain non-capturing groups: lookarounds would peek across line
+        # ends in the whole-file prefilter and drop files that do match.
+        if c == "(" and pattern.startswith("(?", i) and not pattern.startswith("(?:", i):
+            return None
+        elif c == "{" and pattern.startswith("{,", i):
+            return None
+
+        out.append(c)
+        i += 1
+
+    if in_class:
+        return None
+    return "".join(out)
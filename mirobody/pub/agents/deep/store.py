@@ -305,6 +305,113 @@ class PostgresLangGraphStore(BaseStore):
             logger.error(f"Failed to search {session_id}/{user_id}: {e}", exc_info=True)
             return []
     
+    # ========================================================================
+    # Server-side glob / grep
+    # ========================================================================
+
+    # Keys are normalised to a leading "/" like PostgresBackend._normalize_path.
+    _PATH_SQL = "CASE WHEN left(key, 1) = '/' THEN key ELSE '/' || key END"
+
+    @staticmethod
+    def _name_filter(name_filter: Optional[tuple[str, str]]) -> str:
+        """SQL predicate on the file name for a ("LIKE" | "SIMILAR TO", pattern) pair."""
+        if not name_filter:
+            return ""
+        op = name_filter[0]
+        if op not in ("LIKE", "SIMILAR TO"):
+            raise ValueError(f"Unsupported name filter operator: {op}")
+        return f"AND regexp_replace(w.path, '^.*/', '') {op} :name_pattern ESCAPE '\\'"
+
+    async def glob(
+        self,
+        namespace: tuple[str, ...],
+        path: str = "/",
+        name_filter: Optional[tuple[str, str]] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        List files under path whose name matches name_filter, without loading content.
+
+        Args:
+            namespace: (session_id, user_id)
+            path: Normalised path prefix
+            name_filter: Output of pattern.glob_to_sql(), or None for all files
+
+        Returns:
+            Dicts with path, size (line count) and modified_at, ordered by key
+        """
+        session_id, user_id = self._extract_ids(namespace)
+
+        query = f"""
+            SELECT w.path,
+                   CASE WHEN COALESCE(w.content, '') = '' THEN 0
+                        ELSE length(w.content) - length(replace(w.content, chr(10), '')) + 1
+                   END AS size,
+                   w.metadata->>'modified_at' AS modified_at
+            FROM (
+                SELECT {self._PATH_SQL} AS path, key, content, metadata
+                FROM deep_agent_workspace
+                WHERE session_id = :session_id AND user_id = :user_id
+            ) w
+            WHERE starts_with(w.path, :path)
+              {self._name_filter(name_filter)}
+            ORDER BY w.key
+        """
+
+        params = {"session_id": session_id, "user_id": user_id, "path": path}
+        if name_filter:
+            params["name_pattern"] = name_filter[1]
+
+        return await execute_query(query=query, params=params, log_sql=False) or []
+
+    async def grep(
+        self,
+        namespace: tuple[str, ...],
+        pg_regex: str,
+        path: str = "/",
+        name_filter: Optional[tuple[str, str]] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Case-insensitive regex search returning only the matching lines.
+
+        The whole-file `content ~* pattern` test is answered from the pg_trgm
+        index (res/sql/95_deep_agent_workspace_trgm.sql), so only candidate
+        files are split into lines.
+
+        Args:
+            namespace: (session_id, user_id)
+            pg_regex: Output of pattern.to_pg_regex()
+            path: Normalised path prefix
+            name_filter: Output of pattern.glob_to_sql(), or None for all files
+
+        Returns:
+            Dicts with path, line (1-based) and text, ordered by key and line.
+            Unlike search(), errors (e.g. a regex Postgres rejects) propagate
+            so the caller can fall back to matching in Python.
+        """
+        session_id, user_id = self._extract_ids(namespace)
+
+        query = f"""
+            SELECT w.path, l.line_no AS line, l.text
+            FROM (
+                SELECT {self._PATH_SQL} AS path, key, content
+                FROM deep_agent_workspace
+                WHERE session_id = :session_id AND user_id = :user_id
+                  AND content ~* :pattern
+            ) w
+            CROSS JOIN LATERAL unnest(string_to_array(w.content, chr(10)))
+                WITH ORDINALITY AS l(text, line_no)
+            WHERE starts_with(w.path, :path)
+              {self._name_filter(name_filter)}
+              AND l.text ~* :pattern
+            ORDER BY w.key, l.line_no
+        """
+
+        params = {"session_id": session_id, "user_id": user_id, "pattern": pg_regex, "path": path}
+        if name_filter:
+            params["name_pattern"] = name_filter[1]
+
+        return await execute_query(query=query, params=params, log_sql=False) or []
+
     # ========================================================================
     # Batch Operations
     # ========================================================================
@@ -0,0 +1,76 @@
+"""Unit tests for the glob / regex translators in pattern.py."""
+
+from __future__ import annotations
+
+import fnmatch
+import re
+
+import pytest
+
+from mirobody.pub.agents.deep.pattern import glob_to_sql, to_pg_regex
+
+_NAMES = [
+    "report.pdf", "notes.md", "a.md", "b.md", "test_1.txt", "test_12.txt",
+    "50%_off.csv", "a(b)|c.txt", "[draft].md", "script.py", "x", "",
+]
+
+
+def _sql_to_python(op: str, sql: str) -> re.Pattern:
+    """Evaluate a LIKE / SIMILAR TO pattern (escape '\\') the way Postgres does."""
+    out, i = [], 0
+    while i < len(sql):
+        c = sql[i]
+        if c == "\\":
+            out.append(re.escape(sql[i + 1]))
+            i += 2
+            continue
+        if c == "%":
+            out.append(".*")
+        elif c == "_":
+            out.append(".")
+        elif c == "[" and op == "SIMILAR TO":
+            j = sql.index("]", i + 2)
+            out.append(sql[i:j + 1])
+            i = j
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return re.compile("".join(out), re.DOTALL)
+
+
+@pytest.mark.parametrize("glob", [
+    "*", "*.md", "?.md", "test_?.txt", "test_*.txt", "50%_*", "a(b)|c.*",
+    "[ab].md", "[!ab]*.md", "[]x]", "[draft.md", "*.[pP][dD][fF]",
+])
+def test_glob_matches_fnmatch(glob) -> None:
+    op, sql = glob_to_sql(glob)
+    rx = _sql_to_python(op, sql)
+    for name in _NAMES:
+        assert bool(rx.fullmatch(name)) == fnmatch.fnmatchcase(name, glob), (glob, name)
+
+
+def test_glob_untranslatable() -> None:
+    assert glob_to_sql("[^a]*") is None
+    assert glob_to_sql("[a\\]]") is None
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("TODO", "(?n)TODO"),
+    ("(?i)todo", "(?n)todo"),
+    (r"\bdef\b", r"(?n)\ydef\y"),
+    (r"^import \w+$", r"(?n)^import \w+$"),
+    (r"\Aabc\Z", "(?n)^abc$"),
+    (r"[\d.-]+\s*mg", r"(?n)[\d.-]+\s*mg"),
+    (r"(?:foo|bar){2,3}?", r"(?n)(?:foo|bar){2,3}?"),
+    (r"[^]a]", r"(?n)[^]a]"),
+])
+def test_regex_translated(pattern, expected) -> None:
+    assert to_pg_regex(pattern) == expected
+
+
+@pytest.mark.parametrize("pattern", [
+    r"(?P<x>a)", r"(a)\1", r"a(?=b)", r"(?<!a)b", r"[[:alpha:]]", r"x{,3}",
+    r"\x41", r"\p{L}", r"[\b]", r"[\W]", "[abc", "a\\", "(?s)a.b",
+])
+def test_regex_falls_back(pattern) -> None:
+    assert to_pg_regex(pattern) is None
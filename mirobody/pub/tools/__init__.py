@@ -47,6 +47,10 @@ tools/
 ├── todo_service.py                  # TodoService (write_todos)
 ├── chart_service.py                 # ChartService
 ├── _chart_service_schema_loader.py  # Helper (underscore prefix → not loaded)
+├── render-chart.js                  # Node.js chart renderer (one-shot or --serve worker)
+├── chart_utils/                     # ChartService utilities (subdirectory → not scanned)
+│   ├── __init__.py
+│   └── renderer_pool.py             # Warm pool of render-chart.js --serve workers
 └── files_utils/                     # Shared utilities (subdirectory → not scanned)
     ├── __init__.py
     ├── backend.py
@@ -8,7 +8,6 @@ import asyncio
 import base64
 import json
 import logging
-import os
 
 from pathlib import Path
 from typing import Any, Dict, Optional
@@ -17,6 +16,7 @@ from ...utils.config.storage import get_storage_client
 from ...utils.utils_files.utils_s3 import create_thumbnail
 from ...utils.config import safe_read_cfg
 from ...utils.config.storage.constants import DEFAULT_LOCAL_CHARTS_PATH
+from .chart_utils import get_renderer_pool, render_once
 
 
 class ChartService:
@@ -383,54 +383,11 @@ class ChartService:
             }
 
     async def _call_node_renderer(self, chart_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Call Node.js rendering script"""
-        try:
-            config_json = json.dumps(chart_config)
-
-            # Set NODE_PATH environment variable to ensure mirobody's node_modules can be found
-            env = os.environ.copy()
-            env['NODE_PATH'] = '/app/mirobody/node_modules'
-
-            # Call Node.js script
-            process = await asyncio.create_subprocess_exec(
-                "node",
-                str(self.render_script),
-                config_json,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                env=env
-            )
-
-            stdout, stderr = await process.communicate()
-
-            # Parse output - Node.js script returns JSON even on failure
-            output = stdout.decode()
-
-            # Try to parse stdout first (contains structured error info)
-            try:
-                result = json.loads(output)
-                # If parsing succeeds, return the result (even if success=false)
-                return result
-            except json.JSONDecodeError:
-                # If stdout is not valid JSON, check stderr
-                if stderr:
-                    error_msg = stderr.decode()
-                    logging.error(f"Node.js renderer failed: {error_msg}")
-                    return {"success": False, "error": error_msg}
-                elif process.returncode != 0:
-                    # Process failed but no error info available
-                    logging.error(f"Node.js renderer failed with code {process.returncode}")
-                    return {"success": False, "error": f"Renderer failed with exit code {process.returncode}"}
-                else:
-                    # Output is not JSON but process succeeded
-                    logging.error(f"Invalid renderer output: {output[:200]}")
-                    return {"success": False, "error": "Invalid renderer output format"}
-
-        except FileNotFoundError:
-            return {"success": False, "error": "Node.js not found. Please install Node.js."}
-        except Exception as e:
-            logging.error(f"Renderer execution failed: {str(e)}")
-            return {"success": False, "error": f"Renderer execution failed: {str(e)}"}
+        """Render through the warm Node.js worker pool, or a fresh process if the pool is disabled"""
+        pool = get_renderer_pool(str(self.render_script))
+        if pool is None:
+            return await render_once(str(self.render_script), chart_config)
+        return await pool.render(chart_config)
 
     async def generate_pie_chart(
         self,
@@ -0,0 +1,22 @@
+"""
+Chart Utils - Shared utilities for ChartService.
+
+This package provides:
+- Warm Node.js renderer worker pool (renderer_pool.py)
+"""
+
+from .renderer_pool import (
+    RendererPool,
+    RendererWorker,
+    RendererWorkerError,
+    get_renderer_pool,
+    render_once,
+)
+
+__all__ = [
+    "RendererPool",
+    "RendererWorker",
+    "RendererWorkerError",
+    "get_renderer_pool",
+    "render_once",
+]
@@ -0,0 +1,91 @@
+"""
+Chart Renderer Benchmark: warm worker pool vs node-per-chart
+
+Fires N concurrent chart renders (default 200) at render-chart.js two ways:
+
+  - spawn: render_once(), a fresh `node` process per chart that loads
+    @antv/gpt-vis-ssr every time (CHART_RENDER_WORKERS=0, the old path)
+  - pool:  RendererPool with --workers long-lived `--serve` workers; the
+    pool is warmed up first, as it is after the first chart in production
+
+Reports wall time, per-chart latency percentiles and failures for each.
+Needs node and @antv/gpt-vis-ssr installed (see render-chart.js).
+
+Usage:
+    python3 -m mirobody.pub.tools.chart_utils.bench_renderer_pool \\
+        [--requests 200] [--workers 4] [--timeout 60] [--skip-spawn]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from pathlib import Path
+
+from .renderer_pool import RendererPool, render_once, renderer_command, renderer_env
+
+_SCRIPT = Path(__file__).parent.parent / "render-chart.js"
+
+
+def _chart(i: int) -> dict:
+    return {
+        "type": "line",
+        "title": f"Glucose #{i}",
+        "data": [{"time": f"2026-01-{d:02d}", "value": 90 + (i * 7 + d * 13) % 40} for d in range(1, 29)],
+    }
+
+
+async def _run(render, requests: int) -> tuple[float, list[float], int]:
+    latencies: list[float] = []
+
+    async def one(i: int) -> bool:
+        start = time.perf_counter()
+        result = await render(_chart(i))
+        latencies.append((time.perf_counter() - start) * 1000)
+        return bool(result.get("success"))
+
+    start = time.perf_counter()
+    ok = await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - start, sorted(latencies), ok.count(False)
+
+
+def _report(name: str, wall: float, latencies: list[float], failed: int) -> None:
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    print(
+        f"{name:<6} {wall:>8.2f}s {len(latencies) / wall:>9.1f}/s "
+        f"{statistics.median(latencies):>9.0f} {p(0.95):>9.0f} {p(0.99):>9.0f} {failed:>7}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--skip-spawn", action="store_true", help="Only run the pool")
+    args = parser.parse_args()
+
+    print(f"{args.requests} concurrent charts, {args.workers} pool workers, {os.cpu_count()} cpus")
+    print(f"{'mode':<6} {'wall':>9} {'charts':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'failed':>7}")
+
+    if not args.skip_spawn:
+        _report("spawn", *await _run(lambda c: render_once(str(_SCRIPT), c), args.requests))
+
+    pool = RendererPool(
+        renderer_command(str(_SCRIPT)),
+        size=args.workers,
+        timeout=args.timeout,
+        max_queue=args.requests,
+        env=renderer_env(),
+    )
+    try:
+        await asyncio.gather(*(pool.render(_chart(i)) for i in range(args.workers)))
+        _report("pool", *await _run(pool.render, args.requests))
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
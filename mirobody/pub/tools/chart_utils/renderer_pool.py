@@ -0,0 +1,297 @@
+"""
+Warm pool of chart renderer workers.
+
+Each worker is a long-lived `node render-chart.js --serve` process that has
+already loaded @antv/gpt-vis-ssr. Jobs and results travel as one JSON object
+per line over the worker's stdin / stdout:
+
+    -> {"id": 1, "config": {...}}
+    <- {"id": 1, "success": true, "filename": ..., "data": ..., "rss": 123456}
+
+A worker handles one job at a time. When every worker is busy, callers wait
+for a free one (backpressure); once `max_queue` callers are already waiting,
+new jobs are rejected immediately instead of piling up. A worker is killed and
+replaced when a job times out, when it exits or writes garbage, and after a
+job that leaves its RSS above `max_rss_mb` or brings it to `max_jobs`.
+
+Config:
+- CHART_RENDER_WORKERS: number of workers (default 2, 0 = spawn node per chart)
+- CHART_RENDER_TIMEOUT: seconds per chart (default 30)
+- CHART_RENDER_MAX_QUEUE: callers allowed to wait for a worker (default 100)
+- CHART_RENDER_MAX_RSS_MB: recycle a worker above this RSS (default 512)
+- CHART_RENDER_MAX_JOBS: recycle a worker after this many charts (default 1000)
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+
+from typing import Any, Dict, Optional, Sequence
+
+from ....utils.config import safe_read_cfg
+
+# Rendered PNGs come back base64-encoded on a single line.
+_LINE_LIMIT = 64 * 1024 * 1024
+
+_STARTUP_TIMEOUT = 30
+
+
+class RendererWorkerError(Exception):
+    pass
+
+
+class RendererWorker:
+    """One renderer process; not safe for concurrent jobs (the pool ensures that)."""
+
+    def __init__(self, command: Sequence[str], env: Optional[Dict[str, str]] = None):
+        self.command = list(command)
+        self.env = env
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.jobs = 0
+        self.rss = 0
+        self._ids = itertools.count(1)
+        self._stderr_task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=self.env,
+            limit=_LINE_LIMIT,
+        )
+        # Keep stderr drained so a chatty renderer never blocks on a full pipe.
+        self._stderr_task = asyncio.create_task(self._drain_stderr(self.process))
+
+        try:
+            ready = await asyncio.wait_for(self._read_message(), timeout=_STARTUP_TIMEOUT)
+        except BaseException:
+            await self.stop()
+            raise
+        if not ready.get("ready"):
+            await self.stop()
+            raise RendererWorkerError(ready.get("error") or "Renderer worker failed to start")
+        self.rss = ready.get("rss") or 0
+
+    async def render(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = next(self._ids)
+        self.process.stdin.write(json.dumps({"id": job_id, "config": config}).encode() + b"\n")
+        await self.process.stdin.drain()
+
+        result = await self._read_message()
+        if result.get("id") != job_id:
+            raise RendererWorkerError(f"Renderer worker answered job {result.get('id')}, expected {job_id}")
+
+        self.jobs += 1
+        self.rss = result.pop("rss", 0) or 0
+        result.pop("id", None)
+        return result
+
+    async def stop(self) -> None:
+        process, self.process = self.process, None
+        if process is None:
+            return
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        await process.wait()
+        if self._stderr_task is not None:
+            await self._stderr_task
+
+    async def _read_message(self) -> Dict[str, Any]:
+        try:
+            line = await self.process.stdout.readline()
+        except (ValueError, asyncio.LimitOverrunError) as e:
+            raise RendererWorkerError(f"Renderer output too large: {e}")
+        if not line:
+            await self.process.wait()
+            raise RendererWorkerError(f"Renderer worker exited with code {self.process.returncode}")
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            raise RendererWorkerError(f"Invalid renderer output: {line[:200]!r}")
+
+    @staticmethod
+    async def _drain_stderr(process: asyncio.subprocess.Process) -> None:
+        async for line in process.stderr:
+            logging.debug(f"Chart renderer [{process.pid}]: {line.decode(errors='replace').rstrip()}")
+
+
+class RendererPool:
+    """Fixed-size pool of RendererWorker processes, started lazily."""
+
+    def __init__(
+        self,
+        command: Sequence[str],
+        size: int = 2,
+        timeout: float = 30,
+        max_queue: int = 100,
+        max_rss_mb: float = 512,
+        max_jobs: int = 1000,
+        env: Optional[Dict[str, str]] = None,
+    ):
+        self.command = list(command)
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self.max_jobs = max_jobs
+        self.env = env
+
+        self.restarts = 0
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._workers = [RendererWorker(self.command, env) for _ in range(self.size)]
+        for worker in self._workers:
+            self._idle.put_nowait(worker)
+        self._waiting = 0
+        self._closed = False
+        self._tasks: set[asyncio.Task] = set()
+
+    async def render(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Render one chart; returns the renderer's result dict or {"success": False, "error": ...}."""
+        if self._closed:
+            return {"success": False, "error": "Chart renderer pool is closed"}
+        if self._idle.empty() and self._waiting >= self.max_queue:
+            return {"success": False, "error": "Chart renderer is busy, please retry later"}
+
+        self._waiting += 1
+        try:
+            worker = await self._idle.get()
+        finally:
+            self._waiting -= 1
+
+        recycle = True
+        try:
+            if not worker.alive:
+                await worker.start()
+            result = await asyncio.wait_for(worker.render(config), timeout=self.timeout)
+            recycle = worker.rss > self.max_rss or worker.jobs >= self.max_jobs
+            if recycle:
+                logging.info(f"Recycling chart renderer: jobs={worker.jobs}, rss={worker.rss / 1048576:.0f}MB")
+            return result
+        except asyncio.TimeoutError:
+            logging.warning(f"Chart renderer timed out after {self.timeout:g}s, restarting worker")
+            return {"success": False, "error": f"Chart rendering timed out after {self.timeout:g}s"}
+        except FileNotFoundError:
+            return {"success": False, "error": "Node.js not found. Please install Node.js."}
+        except (RendererWorkerError, OSError) as e:
+            logging.error(f"Chart renderer worker failed, restarting: {e}")
+            return {"success": False, "error": f"Renderer execution failed: {e}"}
+        finally:
+            if recycle:
+                # Also covers cancellation: the worker may be mid-job, so replace
+                # it; the release still happens if this caller is cancelled again.
+                task = asyncio.ensure_future(self._release(worker, recycle=True))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                await asyncio.shield(task)
+            else:
+                await self._release(worker)
+
+    async def close(self) -> None:
+        self._closed = True
+        await asyncio.gather(*(worker.stop() for worker in self._workers), return_exceptions=True)
+
+    async def _release(self, worker: RendererWorker, recycle: bool = False) -> None:
+        if recycle:
+            if worker.process is not None:
+                self.restarts += 1
+            # The next job restarts it; a worker that can't start fails that job, not this one.
+            try:
+                await worker.stop()
+            finally:
+                worker.jobs = 0
+                worker.rss = 0
+        self._idle.put_nowait(worker)
+
+
+#-----------------------------------------------------------------------------
+
+_pool: Optional[RendererPool] = None
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def renderer_command(script: str) -> list[str]:
+    return ["node", str(script), "--serve"]
+
+
+def renderer_env() -> Dict[str, str]:
+    # Ensure mirobody's node_modules can be found
+    env = os.environ.copy()
+    env["NODE_PATH"] = "/app/mirobody/node_modules"
+    return env
+
+
+async def render_once(script: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Render one chart in a fresh `node` process (CHART_RENDER_WORKERS=0)."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "node",
+            str(script),
+            json.dumps(config),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=renderer_env(),
+        )
+
+        stdout, stderr = await process.communicate()
+
+        # Parse output - Node.js script returns JSON even on failure
+        output = stdout.decode()
+
+        # Try to parse stdout first (contains structured error info)
+        try:
+            return json.loads(output)
+        except json.JSONDecodeError:
+            # If stdout is not valid JSON, check stderr
+            if stderr:
+                error_msg = stderr.decode()
+                logging.error(f"Node.js renderer failed: {error_msg}")
+                return {"success": False, "error": error_msg}
+            elif process.returncode != 0:
+                # Process failed but no error info available
+                logging.error(f"Node.js renderer failed with code {process.returncode}")
+                return {"success": False, "error": f"Renderer failed with exit code {process.returncode}"}
+            else:
+                # Output is not JSON but process succeeded
+                logging.error(f"Invalid renderer output: {output[:200]}")
+                return {"success": False, "error": "Invalid renderer output format"}
+
+    except FileNotFoundError:
+        return {"success": False, "error": "Node.js not found. Please install Node.js."}
+    except Exception as e:
+        logging.error(f"Renderer execution failed: {str(e)}")
+        return {"success": False, "error": f"Renderer execution failed: {str(e)}"}
+
+
+def get_renderer_pool(script: str) -> Optional[RendererPool]:
+    """Shared pool for the running event loop, or None when CHART_RENDER_WORKERS is 0."""
+    global _pool, _pool_loop
+
+    size = int(safe_read_cfg("CHART_RENDER_WORKERS", "2"))
+    if size <= 0:
+        return None
+
+    # Worker pipes belong to the loop that started them.
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool_loop is not loop:
+        _pool = RendererPool(
+            renderer_command(script),
+            size=size,
+            timeout=float(safe_read_cfg("CHART_RENDER_TIMEOUT", "30")),
+            max_queue=int(safe_read_cfg("CHART_RENDER_MAX_QUEUE", "100")),
+            max_rss_mb=float(safe_read_cfg("CHART_RENDER_MAX_RSS_MB", "512")),
+            max_jobs=int(safe_read_cfg("CHART_RENDER_MAX_JOBS", "1000")),
+            env=renderer_env(),
+        )
+        _pool_loop = loop
+    return _pool
@@ -0,0 +1,127 @@
+"""Renderer pool tests against a fake NDJSON worker written in Python."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import textwrap
+
+import pytest
+
+from .renderer_pool import RendererPool
+
+# Speaks the render-chart.js --serve protocol; the config drives its behaviour.
+_FAKE_WORKER = textwrap.dedent("""
+    import json, os, sys, time
+
+    def send(message):
+        sys.stdout.write(json.dumps(message) + "\\n")
+        sys.stdout.flush()
+
+    send({"ready": True, "rss": 1})
+    for line in sys.stdin:
+        job = json.loads(line)
+        config = job["config"]
+        if config.get("crash"):
+            os._exit(3)
+        time.sleep(config.get("sleep", 0))
+        send({"id": job["id"], "success": True, "pid": os.getpid(), "echo": config.get("echo"), "rss": config.get("rss", 1)})
+""")
+
+
+@pytest.fixture
+def command(tmp_path) -> list[str]:
+    script = tmp_path / "fake_worker.py"
+    script.write_text(_FAKE_WORKER)
+    return [sys.executable, str(script)]
+
+
+@pytest.mark.asyncio
+async def test_workers_stay_warm(command) -> None:
+    pool = RendererPool(command, size=2)
+    try:
+        results = await asyncio.gather(*(pool.render({"echo": i}) for i in range(20)))
+        assert [r["echo"] for r in results] == list(range(20))
+        assert all(r["success"] and "rss" not in r and "id" not in r for r in results)
+        assert len({r["pid"] for r in results}) == 2
+        assert pool.restarts == 0
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_timeout_restarts_worker(command) -> None:
+    pool = RendererPool(command, size=1, timeout=0.5)
+    try:
+        first = await pool.render({})
+        result = await pool.render({"sleep": 5})
+        assert result["success"] is False and "timed out" in result["error"]
+
+        after = await pool.render({"echo": "ok"})
+        assert after["echo"] == "ok" and after["pid"] != first["pid"]
+        assert pool.restarts == 1
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_crash_restarts_worker(command) -> None:
+    pool = RendererPool(command, size=1)
+    try:
+        result = await pool.render({"crash": True})
+        assert result["success"] is False and "exited with code 3" in result["error"]
+        assert (await pool.render({"echo": 1}))["success"]
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_recycles_on_memory_growth_and_job_count(command) -> None:
+    pool = RendererPool(command, size=1, max_rss_mb=1, max_jobs=3)
+    try:
+        a = await pool.render({"rss": 2 * 1024 * 1024})
+        b = await pool.render({})
+        assert a["success"] and a["pid"] != b["pid"]
+
+        pids = [(await pool.render({}))["pid"] for _ in range(3)]
+        assert pids[0] == pids[1] == b["pid"] and pids[2] != b["pid"]
+        assert pool.restarts == 2
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_backpressure_rejects_beyond_queue(command) -> None:
+    pool = RendererPool(command, size=1, max_queue=2)
+    try:
+        results = await asyncio.gather(*(pool.render({"sleep": 0.2}) for _ in range(5)))
+        ok = [r for r in results if r["success"]]
+        busy = [r for r in results if not r["success"]]
+        assert len(ok) == 3 and len(busy) == 2
+        assert all("busy" in r["error"] for r in busy)
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_releases_worker(command) -> None:
+    pool = RendererPool(command, size=1)
+    try:
+        task = asyncio.create_task(pool.render({"sleep": 5}))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        result = await asyncio.wait_for(pool.render({"echo": "next"}), timeout=5)
+        assert result["echo"] == "next"
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_missing_binary() -> None:
+    pool = RendererPool(["/nonexistent/node", "render-chart.js", "--serve"], size=1)
+    result = await pool.render({})
+    assert result == {"success": False, "error": "Node.js not found. Please install Node.js."}
+    await pool.close()
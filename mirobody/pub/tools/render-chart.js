@@ -4,6 +4,13 @@
  * Uses @antv/gpt-vis-ssr to render charts
  * 
  * Usage: node render-chart.js <chart-config-json>
+ *        node render-chart.js --serve
+ *
+ * --serve keeps the process alive as a renderer pool worker: it reads one
+ * JSON job per line on stdin ({"id": 1, "config": {...}}) and writes one
+ * JSON result per line on stdout ({"id": 1, "success": true, ...}), plus
+ * the process RSS so the pool can recycle workers that grow. A
+ * {"ready": true} line is written once the renderer module is loaded.
  * 
  * Environment Requirements:
  * - Docker: npm install is already in /app/node_modules
@@ -12,6 +19,14 @@
 
 const fs = require('fs');
 const path = require('path');
+const readline = require('readline');
+
+const SERVE = process.argv[2] === '--serve';
+
+// In serve mode stdout carries the protocol only; route library logging to stderr.
+if (SERVE) {
+  console.log = console.info = console.warn = console.debug = console.error;
+}
 
 // Module loading — search all known paths in order
 const MODULE_NAME = '@antv/gpt-vis-ssr';
@@ -97,9 +112,44 @@ async function main() {
   }
 }
 
+// Worker loop for the renderer pool
+function serve() {
+  const send = (message) => {
+    message.rss = process.memoryUsage().rss;
+    process.stdout.write(JSON.stringify(message) + '\n');
+  };
+
+  const rl = readline.createInterface({ input: process.stdin, terminal: false });
+  let queue = Promise.resolve();
+
+  rl.on('line', (line) => {
+    if (!line.trim()) {
+      return;
+    }
+    // Jobs are rendered one at a time, in arrival order.
+    queue = queue.then(async () => {
+      let job;
+      try {
+        job = JSON.parse(line);
+      } catch (error) {
+        send({ id: null, success: false, error: 'Invalid job: ' + error.message });
+        return;
+      }
+      send({ id: job.id, ...(await renderChart(job.config)) });
+    });
+  });
+  rl.on('close', () => queue.then(() => process.exit(0)));
+
+  send({ ready: true });
+}
+
 // If this script is run directly
 if (require.main === module) {
-  main();
+  if (SERVE) {
+    serve();
+  } else {
+    main();
+  }
 }
 
 module.exports = { renderChart };
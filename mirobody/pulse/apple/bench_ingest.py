@@ -0,0 +1,181 @@
+"""
+Apple Health Ingest Benchmark: buffered request vs streaming pipeline
+
+Builds a synthetic gzip upload (--mb MB of JSON once decompressed) and posts
+it, in 64 KB chunks, to a FastAPI app running the upload handler in one of
+two modes, each in a fresh process so peak RSS is comparable:
+
+  - buffered:  the previous handler; request.body(), gzip.decompress,
+    json.loads, AppleHealthRequest validation, then hand-off
+  - streaming: stream_apple_health; incremental gunzip + parse, records
+    validated APPLE_HEALTH_INGEST_BATCH at a time, each batch serialized
+    as it would be for AppleHealthIngestTask
+
+Hand-off goes to an in-memory sink (no Redis, no database) so only the
+request path is measured. While the upload runs, a probe calls /ping on
+the same event loop on a 5 ms schedule; its p99 (measured from when each
+ping was due) is how long the rest of the API waits behind a large upload.
+
+Usage:
+    python3 -m mirobody.pulse.apple.bench_ingest [--mb 200] [--batch 1000]
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from typing import Any, AsyncIterator, Dict, List
+
+import httpx
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from .ingest import stream_apple_health
+from .models import AppleHealthRequest
+
+_CHUNK = 64 * 1024
+
+
+def _write_payload(path: str, mb: int) -> int:
+    """Gzip a healthData array of ~`mb` MB straight to `path`; returns the record count."""
+    target = mb * 1024 * 1024
+    written = count = 0
+    with gzip.open(path, "wb", compresslevel=6) as f:
+        head = b'{"request_id": "bench", "metaInfo": {"timezone": "America/Los_Angeles", "taskId": "bench"}, "healthData": ['
+        f.write(head)
+        written += len(head)
+        while written < target:
+            lines = []
+            for i in range(count, count + 1000):
+                lines.append(json.dumps({
+                    "uuid": f"bench-{i:09d}", "type": "HEART_RATE" if i % 3 else "STEPS",
+                    "dateFrom": 1705284600000 + i * 1000, "dateTo": 1705284600000 + i * 1000,
+                    "value": {"numericValue": 60 + i % 50}, "unitSymbol": "bpm",
+                    "sourceName": "Apple Watch", "sourceId": "com.apple.health", "timezone": "America/Los_Angeles",
+                }))
+            chunk = (b"," if count else b"") + ",".join(lines).encode()
+            f.write(chunk)
+            written += len(chunk)
+            count += 1000
+        f.write(b"]}")
+    return count
+
+
+def _build_app(mode: str, batch_size: int, sink: Dict[str, int]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping() -> Dict[str, bool]:
+        return {"ok": True}
+
+    @app.post("/health")
+    async def health(request: Request) -> JSONResponse:
+        if mode == "buffered":
+            raw = await request.body()
+            data = json.loads(gzip.decompress(raw).decode("utf-8"))
+            validated = AppleHealthRequest(**data)
+            sink["records"] += len(validated.healthData)
+            return JSONResponse({"request_id": validated.request_id})
+
+        async def on_batch(result, index, records) -> None:
+            payload = json.dumps({"batch": index, "records": [r.model_dump(mode="json") for r in records]})
+            sink["records"] += len(records)
+            sink["bytes"] += len(payload)
+
+        result = await stream_apple_health(request.stream(), True, on_batch, batch_size)
+        return JSONResponse({"request_id": result.request_id}, status_code=202)
+
+    return app
+
+
+async def _file_chunks(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK):
+            yield chunk
+            await asyncio.sleep(0)
+
+
+async def _child(mode: str, path: str, batch_size: int) -> Dict[str, Any]:
+    sink = {"records": 0, "bytes": 0}
+    app = _build_app(mode, batch_size, sink)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    latencies: List[float] = []
+    done = asyncio.Event()
+
+    async def ping(due: float) -> None:
+        await client.get("/ping")
+        latencies.append(time.perf_counter() - due)
+
+    async def probe() -> None:
+        # Open loop: a ping falls due every 5 ms whether or not earlier ones
+        # returned, and latency counts from the due time, so every ping a
+        # stalled loop delays is counted.
+        due = time.perf_counter() + 0.005
+        pings = []
+        while not done.is_set():
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            while due <= time.perf_counter():
+                pings.append(asyncio.create_task(ping(due)))
+                due += 0.005
+        await asyncio.gather(*pings)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    response = await client.post("/health", content=_file_chunks(path), headers={"content-encoding": "gzip"})
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    await client.aclose()
+
+    latencies.sort()
+    return {
+        "status": response.status_code,
+        "seconds": elapsed,
+        "records": sink["records"],
+        "rss_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024,
+        "probe_p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1e3 if latencies else 0.0,
+        "probe_max_ms": latencies[-1] * 1e3 if latencies else 0.0,
+    }
+
+
+def _run_child(mode: str, path: str, batch_size: int, results: Any) -> None:
+    results.put(asyncio.run(_child(mode, path, batch_size)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "apple_health.json.gz")
+        records = _write_payload(path, args.mb)
+        print(f"{args.mb} MB JSON, {records} records, {os.path.getsize(path) / 2**20:.1f} MB gzip, batch {args.batch}")
+        print(f"{'mode':<10} {'status':>6} {'seconds':>8} {'records':>9} {'peak RSS MB':>12} {'ping p99 ms':>12} {'ping max ms':>12}")
+
+        for mode in ("buffered", "streaming"):
+            # Fresh process per mode: ru_maxrss never goes down.
+            ctx = multiprocessing.get_context("fork")
+            results = ctx.Queue()
+            child = ctx.Process(target=_run_child, args=(mode, path, args.batch, results))
+            child.start()
+            r = results.get()
+            child.join()
+            print(
+                f"{mode:<10} {r['status']:>6} {r['seconds']:>8.2f} {r['records']:>9} {r['rss_mb']:>12.0f} "
+                f"{r['probe_p99_ms']:>12.1f} {r['probe_max_ms']:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Apple Health streaming ingest
+
+Large backfills (hundreds of MB) are never held in memory whole:
+
+- the request body is read chunk by chunk and gunzipped incrementally
+- JsonMemberStream parses the top-level object event by event, yielding
+  every element of `healthData` as soon as it is complete
+- records are validated APPLE_HEALTH_INGEST_BATCH (default 1000) at a time
+  and each batch is handed to a callback, normally AppleHealthIngestTask
+  (durable Redis queue, processed by the worker)
+
+Clients should send `metaInfo` before `healthData` (as every documented
+example does); otherwise batches are held until `metaInfo` arrives.
+"""
+
+import asyncio
+import codecs
+import json
+import logging
+import zlib
+
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from .models import AppleHealthRecord, MetaInfo
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "-+.eE0123456789"
+
+# Largest undecodable tail (one record, or garbage) before the body is rejected
+MAX_PENDING_CHARS = 8 * 1024 * 1024
+
+# Cap on bytes inflated (and parsed) per step, so a gzip bomb can't balloon
+# memory and one input chunk can't hold the event loop for long
+_INFLATE_STEP = 256 * 1024
+
+_records_adapter = TypeAdapter(List[AppleHealthRecord])
+
+
+class StreamingJsonError(ValueError):
+    """The body is not a well-formed JSON object (or ended early)."""
+
+
+class JsonMemberStream:
+    """
+    Incremental parser for one top-level JSON object
+
+    feed() text as it arrives and get events back:
+    - ("member", key, value) for every top-level member
+    - ("item", key, value) for each element of the arrays named in
+      `stream_keys`, which are never materialized whole, then
+      ("items_end", key, None) when such an array closes
+
+    Values are decoded with json.JSONDecoder.raw_decode once complete.
+    """
+
+    def __init__(self, stream_keys: Iterable[str] = (), max_pending: int = MAX_PENDING_CHARS):
+        self.stream_keys = set(stream_keys)
+        self.max_pending = max_pending
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._key: Optional[str] = None
+        self._final = False
+
+    def feed(self, text: str) -> List[Tuple[str, str, Any]]:
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        events = self._parse()
+        if len(self._buf) - self._pos > self.max_pending:
+            raise StreamingJsonError(f"JSON value larger than {self.max_pending} characters or malformed")
+        return events
+
+    def close(self) -> List[Tuple[str, str, Any]]:
+        self._final = True
+        events = self.feed("")
+        if self._state != "end":
+            raise StreamingJsonError("Unexpected end of JSON body")
+        return events
+
+    def _skip_ws(self) -> Optional[str]:
+        buf, pos = self._buf, self._pos
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return buf[pos] if pos < len(buf) else None
+
+    def _decode(self) -> Tuple[bool, Any]:
+        """(True, value) if a complete value starts at _pos, (False, None) to wait for more."""
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError as e:
+            if self._final:
+                raise StreamingJsonError(f"Invalid JSON: {e}")
+            return False, None
+        # A number may still be growing until something other than a number char follows it ("-3" + ".5e2").
+        if not self._final and self._buf[self._pos] in _NUMBER_CHARS:
+            if end == len(self._buf) or self._buf[end] in _NUMBER_CHARS:
+                return False, None
+        self._pos = end
+        return True, value
+
+    def _expect(self, char: Optional[str], allowed: str) -> None:
+        if char not in allowed:
+            raise StreamingJsonError(f"Expected one of {allowed!r} in JSON body, got {char!r}")
+
+    def _parse(self) -> List[Tuple[str, str, Any]]:
+        events: List[Tuple[str, str, Any]] = []
+        while True:
+            char = self._skip_ws()
+            if char is None:
+                return events
+            state = self._state
+
+            if state == "start":
+                self._expect(char, "{")
+                self._pos += 1
+                self._state = "first_key"
+            elif state in ("first_key", "key"):
+                if char == "}" and state == "first_key":
+                    self._pos += 1
+                    self._state = "end"
+                    continue
+                self._expect(char, '"')
+                ok, key = self._decode()
+                if not ok:
+                    return events
+                self._key = key
+                self._state = "colon"
+            elif state == "colon":
+                self._expect(char, ":")
+                self._pos += 1
+                self._state = "value"
+            elif state == "value":
+                if char == "[" and self._key in self.stream_keys:
+                    self._pos += 1
+                    self._state = "first_item"
+                    continue
+                ok, value = self._decode()
+                if not ok:
+                    return events
+                events.append(("member", self._key, value))
+                self._state = "after_value"
+            elif state == "after_value":
+                self._expect(char, ",}")
+                self._pos += 1
+                self._state = "key" if char == "," else "end"
+            elif state in ("first_item", "item"):
+                if char == "]" and state == "first_item":
+                    self._pos += 1
+                    self._state = "after_value"
+                    events.append(("items_end", self._key, None))
+                    continue
+                ok, value = self._decode()
+                if not ok:
+                    return events
+                events.append(("item", self._key, value))
+                self._state = "after_item"
+            elif state == "after_item":
+                self._expect(char, ",]")
+                self._pos += 1
+                if char == ",":
+                    self._state = "item"
+                else:
+                    self._state = "after_value"
+                    events.append(("items_end", self._key, None))
+            else:  # end
+                raise StreamingJsonError(f"Unexpected data after JSON body: {char!r}")
+
+
+async def iter_text_chunks(chunks: AsyncIterator[bytes], gzipped: bool) -> AsyncIterator[str]:
+    """Gunzip (optionally) and UTF-8 decode a byte stream without buffering it."""
+    inflater = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS) if gzipped else None
+    decoder = codecs.getincrementaldecoder("utf-8")()
+
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            if inflater is None:
+                yield decoder.decode(chunk)
+                continue
+            data = chunk
+            while data:
+                out = inflater.decompress(data, _INFLATE_STEP)
+                data = inflater.unconsumed_tail
+                if out:
+                    yield decoder.decode(out)
+        if inflater is not None:
+            tail = inflater.flush()
+            if not inflater.eof:
+                raise ValueError("Failed to decompress gzip data: truncated stream")
+            if tail:
+                yield decoder.decode(tail)
+        yield decoder.decode(b"", final=True)
+    except zlib.error as e:
+        raise ValueError(f"Failed to decompress gzip data: {str(e)}")
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Failed to decode request body as UTF-8: {str(e)}")
+
+
+def validate_records(raw_records: List[Any]) -> Tuple[List[AppleHealthRecord], int]:
+    """Validate one batch; returns (valid records, invalid count)."""
+    try:
+        return _records_adapter.validate_python(raw_records), 0
+    except ValidationError:
+        pass
+
+    # Slow path only for batches that contain bad records
+    valid: List[AppleHealthRecord] = []
+    for raw in raw_records:
+        try:
+            valid.append(AppleHealthRecord.model_validate(raw))
+        except ValidationError as e:
+            logging.warning(f"Dropping invalid Apple Health record: {str(e)[:200]}")
+    return valid, len(raw_records) - len(valid)
+
+
+@dataclass
+class IngestResult:
+    request_id: Optional[str] = None
+    meta_info: Optional[MetaInfo] = None
+    records: int = 0
+    invalid_records: int = 0
+    batches: int = 0
+    bytes_read: int = 0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+BatchHandler = Callable[[IngestResult, int, List[AppleHealthRecord]], Awaitable[None]]
+
+
+async def stream_apple_health(
+    chunks: AsyncIterator[bytes],
+    gzipped: bool,
+    on_batch: BatchHandler,
+    batch_size: int = 1000,
+) -> IngestResult:
+    """
+    Parse an Apple Health request body and hand validated records to `on_batch`
+
+    `on_batch(result, batch_index, records)` is awaited for every full batch
+    (and the last partial one) once metaInfo is known; `result` carries
+    request_id / meta_info and running counters.
+
+    Raises:
+        ValueError: body is not gzip / UTF-8 / a JSON object, or metaInfo is
+            missing or invalid
+    """
+    result = IngestResult()
+    parser = JsonMemberStream(stream_keys=("healthData",))
+    pending: List[Any] = []
+    held: List[List[AppleHealthRecord]] = []  # validated batches waiting for metaInfo
+    saw_health_data = False
+
+    async def counted(source: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        async for chunk in source:
+            result.bytes_read += len(chunk)
+            yield chunk
+
+    async def flush() -> None:
+        records, invalid = validate_records(pending)
+        pending.clear()
+        result.invalid_records += invalid
+        if not records:
+            return
+        if result.meta_info is None:
+            held.append(records)
+            return
+        await emit(records)
+
+    async def emit(records: List[AppleHealthRecord]) -> None:
+        index = result.batches
+        result.batches += 1
+        result.records += len(records)
+        await on_batch(result, index, records)
+        # Parsing and validation are CPU-bound; let other requests run between batches.
+        await asyncio.sleep(0)
+
+    async def handle(events: List[Tuple[str, str, Any]]) -> None:
+        nonlocal saw_health_data
+        for kind, key, value in events:
+            if kind == "item":
+                pending.append(value)
+                if len(pending) >= batch_size:
+                    await flush()
+                continue
+            if kind == "items_end":
+                saw_health_data = True
+                continue
+
+            if key == "healthData":
+                # Not streamed: only reached for a non-array value
+                raise ValueError("Invalid request data: healthData must be a list")
+            if key == "metaInfo":
+                try:
+                    result.meta_info = MetaInfo.model_validate(value)
+                except ValidationError as e:
+                    raise ValueError(f"Invalid request data: metaInfo: {str(e)}")
+                for records in held:
+                    await emit(records)
+                held.clear()
+            elif key == "request_id":
+                result.request_id = value
+            else:
+                result.extra[key] = value
+
+    try:
+        async for text in iter_text_chunks(counted(chunks), gzipped):
+            await handle(parser.feed(text))
+        await handle(parser.close())
+    except StreamingJsonError as e:
+        raise ValueError(f"Failed to parse JSON data: {str(e)}")
+
+    if pending:
+        await flush()
+    if result.meta_info is None:
+        raise ValueError("Invalid request data: metaInfo is required")
+    if not saw_health_data:
+        raise ValueError("Invalid request data: healthData is required")
+    return result
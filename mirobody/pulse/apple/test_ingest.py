@@ -0,0 +1,232 @@
+"""Streaming Apple Health ingest: incremental parser, batching, and the 202 + job queue path."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import gzip
+import importlib
+import json
+
+from typing import Any, AsyncIterator, Dict, List
+
+import httpx
+import pytest
+
+from fastapi import FastAPI
+from redis.asyncio import Redis
+
+from mirobody.task.apple_health_ingest import AppleHealthIngestTask
+from mirobody.task.base import BaseRedisTask
+from mirobody.utils.config.redis_compat.server import RedisCompatServer
+from mirobody.utils.utils_auth import verify_token
+
+from .ingest import JsonMemberStream, StreamingJsonError, stream_apple_health
+
+# The router package re-exports the APIRouter under the module's name.
+apple_router = importlib.import_module("mirobody.pulse.router.apple_router")
+
+
+def _record(i: int) -> Dict[str, Any]:
+    return {
+        "uuid": f"r-{i}", "type": "HEART_RATE", "dateFrom": 1705284600000 + i, "dateTo": 1705284600000 + i,
+        "value": {"numericValue": 60 + i % 40}, "unitSymbol": "bpm", "sourceName": "Watch ⌚",
+    }
+
+
+def _body(count: int, meta_first: bool = True, **extra: Any) -> bytes:
+    members = {"request_id": "req-1", "healthData": [_record(i) for i in range(count)], **extra}
+    meta = {"metaInfo": {"timezone": "Asia/Shanghai", "taskId": "t-1"}}
+    doc = {**meta, **members} if meta_first else {**members, **meta}
+    return json.dumps(doc, indent=1, ensure_ascii=False).encode()
+
+
+async def _chunks(data: bytes, size: int) -> AsyncIterator[bytes]:
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def _collect(data: bytes, size: int, gzipped: bool = False, batch_size: int = 4):
+    batches: List[List[str]] = []
+
+    async def on_batch(result, index, records):
+        assert result.meta_info.timezone == "Asia/Shanghai"
+        assert index == len(batches)
+        batches.append([r.uuid for r in records])
+
+    result = await stream_apple_health(_chunks(data, size), gzipped, on_batch, batch_size)
+    return result, batches
+
+
+# ========== Parser ==========
+
+def test_parser_yields_the_same_events_at_every_split_point() -> None:
+    text = '{"a": 12, "s": [1, {"x": "y}]"}, [2], -3.5e2] , "b" : {"c": [true, null]}, "e": []}'
+    parser = JsonMemberStream(stream_keys=("s", "e"))
+    expected = parser.feed(text) + parser.close()
+    assert expected == [
+        ("member", "a", 12), ("item", "s", 1), ("item", "s", {"x": "y}]"}), ("item", "s", [2]),
+        ("item", "s", -350.0), ("items_end", "s", None), ("member", "b", {"c": [True, None]}),
+        ("items_end", "e", None),
+    ]
+
+    for cut in range(len(text) + 1):
+        parser = JsonMemberStream(stream_keys=("s", "e"))
+        assert parser.feed(text[:cut]) + parser.feed(text[cut:]) + parser.close() == expected, cut
+
+    parser = JsonMemberStream(stream_keys=("s", "e"))
+    assert [e for ch in text for e in parser.feed(ch)] + parser.close() == expected
+
+
+@pytest.mark.parametrize("text", ['{"a": 1', '{"a" 1}', '[1]', '{"a": 1}}', '{"s": [1 2]}', '{"a": tru}'])
+def test_parser_rejects_malformed_bodies(text: str) -> None:
+    parser = JsonMemberStream(stream_keys=("s",))
+    with pytest.raises(StreamingJsonError):
+        parser.feed(text)
+        parser.close()
+
+
+def test_parser_bounds_an_unterminated_value() -> None:
+    parser = JsonMemberStream(stream_keys=("s",), max_pending=64)
+    parser.feed('{"s": [')
+    with pytest.raises(StreamingJsonError):
+        parser.feed('"' + "x" * 100)
+
+
+# ========== Streaming ingest ==========
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("gzipped", [False, True])
+@pytest.mark.parametrize("size", [1, 7, 4096])
+async def test_records_are_batched_across_chunk_boundaries(gzipped: bool, size: int) -> None:
+    data = _body(10)
+    result, batches = await _collect(gzip.compress(data) if gzipped else data, size, gzipped)
+
+    assert batches == [["r-0", "r-1", "r-2", "r-3"], ["r-4", "r-5", "r-6", "r-7"], ["r-8", "r-9"]]
+    assert (result.request_id, result.records, result.batches, result.invalid_records) == ("req-1", 10, 3, 0)
+    assert result.meta_info.taskId == "t-1"
+
+
+@pytest.mark.asyncio
+async def test_batches_wait_for_late_meta_info_and_invalid_records_are_dropped() -> None:
+    doc = json.loads(_body(9, meta_first=False))
+    doc["healthData"][5].pop("uuid")
+    result, batches = await _collect(json.dumps(doc).encode(), 50)
+
+    # Batches are cut on raw records, so the one with the bad record is short.
+    assert [len(b) for b in batches] == [4, 3, 1]
+    assert "r-5" not in batches[1]
+    assert (result.records, result.invalid_records) == (8, 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("data, gzipped, message", [
+    (b'{"metaInfo": {}}', False, "healthData is required"),
+    (b'{"healthData": []}', False, "metaInfo is required"),
+    (b'{"metaInfo": {}, "healthData": {}}', False, "healthData must be a list"),
+    (b'{"metaInfo": {}, "healthData": [', False, "Failed to parse JSON"),
+    (b'not gzip', True, "Failed to decompress"),
+    (gzip.compress(b'{"metaInfo": {}, "healthData": []}')[:-4], True, "truncated"),
+])
+async def test_structural_errors_raise_value_error(data: bytes, gzipped: bool, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        await _collect(data, 5, gzipped)
+
+
+# ========== 202 + durable queue ==========
+
+class _FakePlatform:
+    def __init__(self) -> None:
+        self.calls: List[Dict[str, Any]] = []
+
+    async def post_data(self, provider_slug: str, data: Dict[str, Any], msg_id: str) -> bool:
+        self.calls.append(data)
+        return data["health_data"][0].uuid != "r-4"  # Second batch fails
+
+
+@contextlib.asynccontextmanager
+async def _app(monkeypatch):
+    compat = RedisCompatServer()
+    server = await asyncio.start_server(compat.handle_client, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    redis = Redis(host="127.0.0.1", port=port, decode_responses=True, protocol=2)
+    monkeypatch.setattr(BaseRedisTask, "_producer_redis", redis)
+    monkeypatch.setattr(apple_router, "safe_read_cfg", lambda key, default="": "4" if key == "APPLE_HEALTH_INGEST_BATCH" else default)
+
+    app = FastAPI()
+    app.include_router(apple_router.router)
+    app.dependency_overrides[verify_token] = lambda: "user-1"
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    try:
+        yield client, redis
+    finally:
+        await client.aclose()
+        await redis.aclose()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_upload_returns_202_and_worker_progress_is_reported(monkeypatch) -> None:
+    async with _app(monkeypatch) as (client, redis):
+        response = await client.post(
+            "/apple/health", content=_chunks(gzip.compress(_body(10)), 1000),
+            headers={"content-encoding": "gzip", "content-type": "application/json"},
+        )
+        assert response.status_code == 202
+        data = response.json()["data"]
+        assert (data["request_id"], data["records"]) == ("req-1", 10)
+        assert await redis.llen(AppleHealthIngestTask.queue_key) == 3
+        assert await redis.llen(AppleHealthIngestTask.staged_key(data["job_id"])) == 0
+
+        status = (await client.get(data["status_url"])).json()["data"]
+        assert (status["status"], status["batches"], status["batches_done"]) == ("processing", 3, 0)
+
+        platform = _FakePlatform()
+        monkeypatch.setattr(AppleHealthIngestTask, "_get_platform", classmethod(lambda cls: platform))
+        task = AppleHealthIngestTask(redis, consumer_id="w1")
+        for _ in range(3):
+            await task._consume_leased(await task._pop_batch())
+
+        assert sorted(r.uuid for c in platform.calls for r in c["health_data"]) == sorted(f"r-{i}" for i in range(10))
+        assert platform.calls[0]["meta_info"].timezone == "Asia/Shanghai"
+        assert platform.calls[0]["user_id"] == "user-1"
+
+        status = (await client.get(data["status_url"])).json()["data"]
+        assert status["status"] == "completed_with_errors"
+        assert (status["batches_done"], status["batches_failed"], status["records_done"]) == (2, 1, 6)
+
+        client._transport.app.dependency_overrides[verify_token] = lambda: "someone-else"
+        assert (await client.get(data["status_url"])).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_malformed_upload_is_400_and_none_of_its_batches_are_queued(monkeypatch) -> None:
+    async with _app(monkeypatch) as (client, redis):
+        broken = _body(10)[:-40]
+        response = await client.post("/apple/health", content=broken)
+        assert response.status_code == 400
+        job_id = response.json()["data"]["job_id"]
+
+        # The batches parsed before the error were staged, never queued, and are dropped.
+        assert await redis.llen(AppleHealthIngestTask.queue_key) == 0
+        assert await redis.llen(AppleHealthIngestTask.staged_key(job_id)) == 0
+
+        status = (await client.get(f"/apple/health/jobs/{job_id}")).json()["data"]
+        assert status["status"] == "failed" and "parsing failed" in status["error"]
+
+
+@pytest.mark.asyncio
+async def test_sync_mode_writes_nothing_from_a_malformed_upload(monkeypatch) -> None:
+    async with _app(monkeypatch) as (client, redis):
+        config = {"APPLE_HEALTH_INGEST_BATCH": "4", "APPLE_HEALTH_ASYNC_INGEST": "false"}
+        monkeypatch.setattr(apple_router, "safe_read_cfg", lambda key, default="": config.get(key, default))
+        platform = _FakePlatform()
+        monkeypatch.setattr(apple_router.platform_manager, "get_platform", lambda name: platform)
+
+        response = await client.post("/apple/health", content=_body(10)[:-40])
+        assert response.status_code == 400
+        assert platform.calls == []
+
+        response = await client.post("/apple/health", content=_body(3))
+        assert response.status_code == 200 and response.json()["success"]
+        assert [r.uuid for c in platform.calls for r in c["health_data"]] == ["r-0", "r-1", "r-2"]
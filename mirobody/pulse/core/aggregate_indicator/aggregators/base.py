@@ -6,9 +6,9 @@ Uses Protocol (PEP 544) for duck typing instead of ABC for more flexibility.
 """
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Protocol, Set
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Protocol, Set, Tuple
 
-from ..models import CalculationTask
+from ..models import CalculationTask, RecalcUnit
 
 
 class AggregatorProtocol(Protocol):
@@ -40,6 +40,22 @@ class AggregatorProtocol(Protocol):
         """
         ...
 
+    def get_bucket_tasks(
+            self,
+            buckets: List[Dict[str, Any]]
+    ) -> List[CalculationTask]:
+        """
+        Get trigger tasks for claimed dirty buckets
+
+        Args:
+            buckets: aggregate_dirty_bucket rows claimed by
+                AggregateDatabaseService.claim_dirty_buckets
+
+        Returns:
+            List of CalculationTask objects
+        """
+        ...
+
     async def calculate_batch_aggregations(
             self,
             tasks: List[CalculationTask]
@@ -65,21 +81,58 @@ class AggregatorProtocol(Protocol):
             self,
             start_date: datetime,
             end_date: datetime,
-            user_id: str
+            user_id: Optional[str]
     ) -> List[Dict[str, Any]]:
         """
         Calculate aggregations for a time range
         
-        This method handles historical data processing:
-        1. If time range > 30 days, split by 30-day chunks and recurse
-        2. If time range <= 30 days, execute direct aggregation for the entire range
+        Collects iter_time_range_aggregations over plan_time_range_units.
         
         Args:
             start_date: Start date for aggregation
-            end_date: End date for aggregation
-            user_id: Single user ID to process
+            end_date: End date for aggregation (inclusive)
+            user_id: Single user ID to process (None = all users)
             
         Returns:
             List of summary record dicts ready for database insertion
         """
         ...
+
+    async def plan_time_range_units(
+            self,
+            start_date: datetime,
+            end_date: datetime,
+            user_id: Optional[str] = None,
+            completed: Iterable[Dict[str, Any]] = ()
+    ) -> List[RecalcUnit]:
+        """
+        Split a time range into units of at most 30 days and a slice of users
+        
+        Args:
+            start_date: Start date for aggregation
+            end_date: End date for aggregation (inclusive)
+            user_id: Single user ID to process (None = all users)
+            completed: Checkpoints of units already saved, to leave out
+            
+        Returns:
+            List of RecalcUnit objects
+        """
+        ...
+
+    def iter_time_range_aggregations(
+            self,
+            units: List[RecalcUnit],
+            concurrency: Optional[int] = None
+    ) -> AsyncIterator[Tuple[RecalcUnit, List[Dict[str, Any]], bool]]:
+        """
+        Aggregate units concurrently, streaming their summaries
+        
+        Args:
+            units: Units from plan_time_range_units
+            concurrency: Maximum units in flight
+            
+        Yields:
+            (unit, summaries, finished) - finished is True once, after all
+            of the unit's summaries
+        """
+        ...
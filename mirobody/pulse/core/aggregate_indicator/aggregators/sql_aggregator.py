@@ -5,15 +5,16 @@ Uses PostgreSQL native aggregation functions for maximum performance.
 Handles all complex grouping and batching logic internally.
 """
 
+import asyncio
 import logging
 import re
 from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
 
 from .....utils import execute_query
-from ..models import CalculationTask
-from ..rule_generator import get_rules_by_source_indicator
+from ..models import CalculationTask, RecalcUnit
+from ..rule_generator import get_rules_by_source_indicator, get_source_indicators
 from ...indicators_info import StandardIndicator, HealthDataType
 from ...fhir_mapping import get_fhir_id
 
@@ -36,6 +37,12 @@ class SQLAggregator:
         """
         self.MAX_TASKS_PER_SQL = 5000
         self.MAX_DAYS_PER_MONTH = 30
+        # Time-range recalculation: units run concurrently, each on its own
+        # pooled connection (keep below the engine's pool size); finished
+        # summaries wait in a bounded queue for the saver
+        self.RECALC_CONCURRENCY = 4
+        self.RECALC_USERS_PER_UNIT = 50
+        self.RECALC_QUEUE_SIZE = 16
 
         self._supported_methods = {
             'avg', 'max', 'min', 'sum', 'total', 'count',
@@ -149,41 +156,59 @@ class SQLAggregator:
 
             logging.info(f"Fetched {len(result)} grouped series_data records since timestamp {since_timestamp} ({since_time.isoformat()})")
 
-            # Convert to CalculationTask objects
-            tasks = []
+            return self._tasks_from_buckets(result, update_time_key='max_update_time')
 
-            for record in result:
-                user_id = record.get('user_id')
-                indicator = record.get('indicator')
-                timezone = record.get('timezone')
-                data_begin_utc = record.get('data_begin_utc')  # datetime type in UTC
+        except Exception as e:
+            logging.error(f"Error fetching trigger tasks: {e}")
+            return []
 
-                if not all([user_id, indicator, timezone, data_begin_utc]):
-                    continue
+    def get_bucket_tasks(self, buckets: List[Dict[str, Any]]) -> List[CalculationTask]:
+        """
+        Build trigger tasks from claimed dirty buckets
 
-                # Find rules for this indicator
-                rules = get_rules_by_source_indicator(indicator)
-                if not rules:
-                    continue
+        Args:
+            buckets: aggregate_dirty_bucket rows (user_id, indicator, timezone,
+                data_begin_utc, marked_at) as returned by
+                AggregateDatabaseService.claim_dirty_buckets
 
-                # Create tasks for each rule
-                for rule in rules:
-                    task = CalculationTask(
-                        user_id=user_id,
-                        source_indicator=indicator,
-                        target_indicator=rule.target_indicator,
-                        aggregation_type=rule.aggregation_type,
-                        data_begin_utc=data_begin_utc,
-                        timezone=timezone,
-                        update_time=record.get('max_update_time')
-                    )
-                    tasks.append(task)
+        Returns:
+            List of CalculationTask objects
+        """
+        return self._tasks_from_buckets(buckets, update_time_key='marked_at')
 
-            return tasks
+    @staticmethod
+    def _tasks_from_buckets(records: List[Dict[str, Any]], update_time_key: str) -> List[CalculationTask]:
+        """Expand (user, indicator, timezone, data_begin_utc) records into one task per aggregation rule."""
+        tasks = []
 
-        except Exception as e:
-            logging.error(f"Error fetching trigger tasks: {e}")
-            return []
+        for record in records:
+            user_id = record.get('user_id')
+            indicator = record.get('indicator')
+            timezone = record.get('timezone')
+            data_begin_utc = record.get('data_begin_utc')  # datetime type in UTC
+
+            if not all([user_id, indicator, timezone, data_begin_utc]):
+                continue
+
+            # Find rules for this indicator
+            rules = get_rules_by_source_indicator(indicator)
+            if not rules:
+                continue
+
+            # Create tasks for each rule
+            for rule in rules:
+                task = CalculationTask(
+                    user_id=user_id,
+                    source_indicator=indicator,
+                    target_indicator=rule.target_indicator,
+                    aggregation_type=rule.aggregation_type,
+                    data_begin_utc=data_begin_utc,
+                    timezone=timezone,
+                    update_time=record.get(update_time_key)
+                )
+                tasks.append(task)
+
+        return tasks
 
     async def calculate_batch_aggregations(self, tasks: List[CalculationTask]) -> List[Dict[str, Any]]:
         """
@@ -200,11 +225,16 @@ class SQLAggregator:
         Returns:
             List of summary record dicts ready for database insertion
         """
-        if not tasks:
-            return []
-
         all_summaries = []
+        async for summaries in self._iter_batch_aggregations(tasks):
+            all_summaries.extend(summaries)
 
+        if tasks:
+            logging.info(f"Generated {len(all_summaries)} summary records from {len(tasks)} tasks")
+        return all_summaries
+
+    async def _iter_batch_aggregations(self, tasks: List[CalculationTask]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield the summary records of `tasks` one data_begin_utc group at a time."""
         # Step 1: Group tasks by data_begin_utc first
         data_begin_groups = defaultdict(list)
         for task in tasks:
@@ -213,19 +243,14 @@ class SQLAggregator:
         # Step 2: Process each data_begin_utc group
         for data_begin_utc, data_begin_tasks in data_begin_groups.items():
             logging.info(f"Processing {len(data_begin_tasks)} tasks for data_begin_utc {data_begin_utc}")
-            
+
             # Decide whether to use single SQL or split by indicator
             if len(data_begin_tasks) <= self.MAX_TASKS_PER_SQL:
                 # Single SQL query for all users and indicators on this data_begin
-                summaries = await self._process_data_begin_aggregations(data_begin_tasks)
-                all_summaries.extend(summaries)
+                yield await self._process_data_begin_aggregations(data_begin_tasks)
             else:
                 # Split by indicator to avoid SQL complexity
-                summaries = await self._process_data_begin_split_aggregations(data_begin_tasks)
-                all_summaries.extend(summaries)
-
-        logging.info(f"Generated {len(all_summaries)} summary records from {len(tasks)} tasks")
-        return all_summaries
+                yield await self._process_data_begin_split_aggregations(data_begin_tasks)
 
     async def calculate_time_range_aggregations(
             self,
@@ -234,166 +259,200 @@ class SQLAggregator:
             user_id: Optional[str]
     ) -> List[Dict[str, Any]]:
         """
-        Calculate aggregations over a time range.
+        Calculate aggregations over a time range, start_date to end_date inclusive.
 
         When user_id is provided, processes that single user.
         When user_id is None, processes all users whose series_data falls in the range.
 
-        Splits ranges > 30 days into chunks and recurses.
+        Collects iter_time_range_aggregations into a list; long ranges should
+        stream it instead (see AggregateIndicatorService.recalculate_date_range).
         """
-        days_diff = (end_date - start_date).days + 1
+        units = await self.plan_time_range_units(start_date, end_date, user_id)
 
-        if days_diff > self.MAX_DAYS_PER_MONTH:
-            return await self._process_30_day_chunks(start_date, end_date, user_id)
-        else:
-            return await self._process_single_user_range(start_date, end_date, user_id)
+        all_summaries = []
+        async for _, summaries, _ in self.iter_time_range_aggregations(units):
+            all_summaries.extend(summaries)
+        return all_summaries
 
-    async def _process_30_day_chunks(
+    async def plan_time_range_units(
             self,
             start_date: datetime,
             end_date: datetime,
-            user_id: Optional[str]
-    ) -> List[Dict[str, Any]]:
-        """Process time range by splitting into 30-day chunks"""
+            user_id: Optional[str] = None,
+            completed: Iterable[Dict[str, Any]] = ()
+    ) -> List[RecalcUnit]:
+        """
+        Split start_date to end_date (whole days, inclusive) into RecalcUnits
 
-        all_summaries = []
-        current_start = start_date
-        user_label = user_id or "all users"
+        Each MAX_DAYS_PER_MONTH-day chunk is split further into slices of
+        RECALC_USERS_PER_UNIT users (all users with series_data in the range
+        when user_id is None).
 
-        while current_start <= end_date:
-            # Calculate chunk end (30 days later or end_date, whichever is earlier)
-            chunk_end = min(current_start + timedelta(days=self.MAX_DAYS_PER_MONTH - 1), end_date)
+        Args:
+            start_date: First day of the range
+            end_date: Last day of the range
+            user_id: Single user to plan for (None = all users)
+            completed: Checkpoints of units already saved (range_start,
+                user_ids); those users are left out of that chunk, so users
+                that got data since are still planned
 
-            logging.info(f"Processing 30-day chunk: {current_start.strftime('%Y-%m-%d')} to {chunk_end.strftime('%Y-%m-%d')} for {user_label}")
+        Returns:
+            Units in range order
+        """
+        range_start = datetime.combine(start_date.date(), datetime.min.time())
+        range_end = datetime.combine(end_date.date(), datetime.min.time()) + timedelta(days=1)
 
-            # Recursively call calculate_time_range_aggregations for this chunk
-            chunk_summaries = await self.calculate_time_range_aggregations(current_start, chunk_end, user_id)
-            all_summaries.extend(chunk_summaries)
+        user_ids = [user_id] if user_id else sorted(await self._get_users_in_range(range_start, range_end))
 
-            # Move to next chunk
-            current_start = chunk_end + timedelta(days=1)
+        done = defaultdict(set)
+        for checkpoint in completed:
+            done[checkpoint["range_start"]].update(checkpoint["user_ids"])
 
-        return all_summaries
+        units = []
+        chunk_start = range_start
+        while chunk_start < range_end:
+            chunk_end = min(chunk_start + timedelta(days=self.MAX_DAYS_PER_MONTH), range_end)
 
-    async def _process_single_user_range(
-            self,
-            start_date: datetime,
-            end_date: datetime,
-            user_id: Optional[str]
-    ) -> List[Dict[str, Any]]:
-        """Process data over a time range (≤30 days).
+            remaining = [uid for uid in user_ids if uid not in done[chunk_start]]
+            for i in range(0, len(remaining), self.RECALC_USERS_PER_UNIT):
+                units.append(RecalcUnit(chunk_start, chunk_end, remaining[i:i + self.RECALC_USERS_PER_UNIT]))
 
-        user_id=None means all users; otherwise a single user.
-        """
+            chunk_start = chunk_end
 
-        tasks = await self._get_tasks_for_user_date_range(start_date, end_date, user_id)
+        return units
 
-        if not tasks:
-            logging.debug(f"No tasks found for {user_id or 'all users'} from {start_date} to {end_date}")
-            return []
-        
-        # Use calculate_batch_aggregations to handle the tasks
-        # This will group by data_begin and process accordingly
-        return await self.calculate_batch_aggregations(tasks)
+    async def iter_time_range_aggregations(
+            self,
+            units: List[RecalcUnit],
+            concurrency: Optional[int] = None
+    ) -> AsyncIterator[Tuple[RecalcUnit, List[Dict[str, Any]], bool]]:
+        """
+        Aggregate `units` with up to `concurrency` of them in flight
+
+        Yields (unit, summaries, finished): the summaries of one data_begin_utc
+        group of `unit`, then (unit, [], True) once all of the unit's summaries
+        have been yielded. Workers block while RECALC_QUEUE_SIZE results wait,
+        so memory stays bounded by the consumer's pace. The first worker error
+        cancels the others and is raised to the consumer; closing the stream
+        early (contextlib.aclosing) cancels the workers.
+        """
+        if not units:
+            return
+
+        concurrency = concurrency or self.RECALC_CONCURRENCY
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.RECALC_QUEUE_SIZE)
+        pending = iter(units)
+
+        async def work() -> None:
+            for unit in pending:
+                tasks = await self._get_tasks_for_user_date_range(unit.range_start, unit.range_end, unit.user_ids)
+                async for summaries in self._iter_batch_aggregations(tasks):
+                    if summaries:
+                        await queue.put((unit, summaries, False))
+                await queue.put((unit, [], True))
+
+        async def produce() -> None:
+            try:
+                await asyncio.gather(*workers)
+            except asyncio.CancelledError:
+                raise  # The consumer closed the stream; nobody waits for the end marker
+            except BaseException:
+                await queue.put(None)
+                raise
+            await queue.put(None)
+
+        workers = [asyncio.create_task(work()) for _ in range(min(concurrency, len(units)))]
+        producer = asyncio.create_task(produce())
+        try:
+            while (item := await queue.get()) is not None:
+                yield item
+            await producer
+        finally:
+            for task in (*workers, producer):
+                task.cancel()
+
+    async def _get_users_in_range(self, range_start: datetime, range_end: datetime) -> List[str]:
+        """Ids of the users with series_data of a rule's source indicator in [range_start, range_end)."""
+        result = await execute_query(
+            """
+            SELECT DISTINCT user_id
+            FROM series_data
+            WHERE indicator = ANY(:indicators)
+              AND time >= :range_start
+              AND time < :range_end
+            """,
+            {"indicators": get_source_indicators(), "range_start": range_start, "range_end": range_end},
+        )
+        return [record["user_id"] for record in result]
 
     async def _get_tasks_for_user_date_range(
             self,
-            start_date: datetime,
-            end_date: datetime,
-            user_id: Optional[str]
+            range_start: datetime,
+            range_end: datetime,
+            user_ids: List[str]
     ) -> List[CalculationTask]:
-        """Get tasks for a date range.
+        """Get tasks for the series_data of `user_ids` in [range_start, range_end)."""
 
-        user_id=None means all users; otherwise filter to that user.
-        """
+        # Use UNION to separate sleep data and normal data. Only indicators
+        # with rules can produce tasks, and naming them lets the scan use the
+        # whole (user_id, indicator, source, time) key instead of reading
+        # every row of each user.
+        # Note: time field is stored as UTC timestamp, we explicitly specify 'UTC' first
+        query = """
+        -- Sleep data query: data_begin_utc is 18:00 in user's local time, converted to UTC (naive)
+        SELECT
+            user_id,
+            indicator,
+            timezone,
+            (((((time AT TIME ZONE 'UTC') AT TIME ZONE timezone) - INTERVAL '18 hours')::date::text || ' 18:00:00')::timestamp AT TIME ZONE timezone) AT TIME ZONE 'UTC' AS data_begin_utc,
+            MIN(update_time) as min_update_time,
+            MAX(update_time) as max_update_time
+        FROM series_data
+        WHERE user_id = ANY(:user_ids)
+          AND indicator = ANY(:indicators)
+          AND time >= :range_start
+          AND time < :range_end
+          AND LOWER(indicator) LIKE '%sleep%'
+          AND (task_id IS NULL OR task_id != 'filtered_out_of_range')
+        GROUP BY user_id, indicator, timezone, data_begin_utc
 
-        try:
-            # Build query to get all data in the date range.
-            # user_id filter is only applied when user_id is not None.
-            # Use UNION to separate sleep data and normal data.
-            # Note: time field is stored as UTC timestamp, we explicitly specify 'UTC' first
-            query = """
-            -- Sleep data query: data_begin_utc is 18:00 in user's local time, converted to UTC (naive)
-            SELECT
-                user_id,
-                indicator,
-                timezone,
-                (((((time AT TIME ZONE 'UTC') AT TIME ZONE timezone) - INTERVAL '18 hours')::date::text || ' 18:00:00')::timestamp AT TIME ZONE timezone) AT TIME ZONE 'UTC' AS data_begin_utc,
-                MIN(update_time) as min_update_time,
-                MAX(update_time) as max_update_time
-            FROM series_data
-            WHERE (:user_id IS NULL OR user_id = :user_id)
-              AND time >= :start_date
-              AND time <= :end_date
-              AND LOWER(indicator) LIKE '%sleep%'
-              AND (task_id IS NULL OR task_id != 'filtered_out_of_range')
-            GROUP BY user_id, indicator, timezone, data_begin_utc
+        UNION ALL
 
-            UNION ALL
+        -- Normal data query: data_begin_utc is 00:00 in user's local time, converted to UTC (naive)
+        SELECT
+            user_id,
+            indicator,
+            timezone,
+            ((((time AT TIME ZONE 'UTC') AT TIME ZONE timezone)::date::text || ' 00:00:00')::timestamp AT TIME ZONE timezone) AT TIME ZONE 'UTC' AS data_begin_utc,
+            MIN(update_time) as min_update_time,
+            MAX(update_time) as max_update_time
+        FROM series_data
+        WHERE user_id = ANY(:user_ids)
+          AND indicator = ANY(:indicators)
+          AND time >= :range_start
+          AND time < :range_end
+          AND LOWER(indicator) NOT LIKE '%sleep%'
+          AND (task_id IS NULL OR task_id != 'filtered_out_of_range')
+        GROUP BY user_id, indicator, timezone, data_begin_utc
 
-            -- Normal data query: data_begin_utc is 00:00 in user's local time, converted to UTC (naive)
-            SELECT
-                user_id,
-                indicator,
-                timezone,
-                ((((time AT TIME ZONE 'UTC') AT TIME ZONE timezone)::date::text || ' 00:00:00')::timestamp AT TIME ZONE timezone) AT TIME ZONE 'UTC' AS data_begin_utc,
-                MIN(update_time) as min_update_time,
-                MAX(update_time) as max_update_time
-            FROM series_data
-            WHERE (:user_id IS NULL OR user_id = :user_id)
-              AND time >= :start_date
-              AND time <= :end_date
-              AND LOWER(indicator) NOT LIKE '%sleep%'
-              AND (task_id IS NULL OR task_id != 'filtered_out_of_range')
-            GROUP BY user_id, indicator, timezone, data_begin_utc
+        ORDER BY min_update_time ASC
+        """
 
-            ORDER BY min_update_time ASC
-            """
+        params = {
+            "user_ids": user_ids,
+            "indicators": get_source_indicators(),
+            "range_start": range_start,
+            "range_end": range_end,
+        }
 
-            params = {
-                "user_id": user_id,
-                "start_date": start_date,
-                "end_date": end_date,
-            }
+        result = await execute_query(query, params, log_sql=False)
 
-            result = await execute_query(query, params)
+        logging.info(
+            f"Fetched {len(result)} grouped series_data records for {len(user_ids)} users "
+            f"from {range_start.date()} to {range_end.date()}"
+        )
 
-            logging.info(f"Fetched {len(result)} grouped series_data records for {user_id or 'all users'} from {start_date.date()} to {end_date.date()}")
-            
-            # Convert to CalculationTask objects
-            tasks = []
-            
-            for record in result:
-                indicator = record.get('indicator')
-                timezone = record.get('timezone')
-                data_begin_utc = record.get('data_begin_utc')
-                
-                if not all([indicator, timezone, data_begin_utc]):
-                    continue
-                
-                # Find rules for this indicator
-                rules = get_rules_by_source_indicator(indicator)
-                if not rules:
-                    continue
-                
-                # Create tasks for each rule
-                for rule in rules:
-                    task = CalculationTask(
-                        user_id=user_id,
-                        source_indicator=indicator,
-                        target_indicator=rule.target_indicator,
-                        aggregation_type=rule.aggregation_type,
-                        data_begin_utc=data_begin_utc,
-                        timezone=timezone,
-                        update_time=record.get('max_update_time')
-                    )
-                    tasks.append(task)
-            
-            return tasks
-            
-        except Exception as e:
-            logging.error(f"Error fetching tasks for user {user_id} date range: {e}")
-            return []
+        return self._tasks_from_buckets(result, update_time_key='max_update_time')
 
     async def _process_data_begin_aggregations(self, data_begin_tasks: List[CalculationTask]) -> List[Dict[str, Any]]:
         """
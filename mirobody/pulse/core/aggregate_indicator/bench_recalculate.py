@@ -0,0 +1,171 @@
+"""
+Aggregate Recalculation Benchmark: sequential in-memory vs streamed concurrent units
+
+Seeds --users throwaway users with --days days of series_data (heartRates
+every hour, steps every 4 hours; users spread over 3 timezones) on the
+configured Postgres, then recalculates the whole range for all users with
+
+  - previous: 30-day chunks one after another over all users, every summary
+              held in memory until a single save at the end (the old
+              recalculate_date_range, with the all-users task query fixed)
+  - stream:   AggregateIndicatorService.recalculate_date_range (concurrent
+              units, batched saves, checkpoints)
+
+Each mode runs in a forked process and reports its wall time and peak RSS
+(VmHWM), and the th_series_data rows it wrote. Seeded rows and summaries are
+deleted afterwards. Recalculates every user with data in the range, so point
+it at a scratch database with res/sql applied.
+
+Usage:
+    PG_HOST=127.0.0.1 PG_USER=postgres PG_DBNAME=mirobody PG_SCHEMA=public \\
+        python3 -m mirobody.pulse.core.aggregate_indicator.bench_recalculate [--users 1000] [--days 730] [--modes previous stream]
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import time
+import uuid
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from ....utils import execute_query
+from ....utils.config import Config
+from ....utils.db import global_engines
+from .aggregators import SQLAggregator
+from .service import AggregateIndicatorService
+
+_SEED_USERS = 20
+_SEED = """
+    INSERT INTO series_data (user_id, indicator, source, time, value, timezone, task_id, source_id, create_time, update_time)
+    SELECT :prefix || '-' || u, i.indicator, 'bench',
+           CAST(:start AS timestamp) + h * INTERVAL '1 hour',
+           CAST(CASE WHEN i.indicator = 'heartRates' THEN 50 + (u * 7 + h * 13) % 60 ELSE (u * 31 + h * 17) % 900 END AS text),
+           (ARRAY['UTC', 'America/Los_Angeles', 'Asia/Shanghai'])[1 + u % 3], NULL, NULL, now(), now()
+    FROM generate_series(CAST(:first AS int), CAST(:last AS int)) AS u,
+         generate_series(0, CAST(:hours AS int) - 1) AS h,
+         (VALUES ('heartRates'), ('steps')) AS i(indicator)
+    WHERE i.indicator = 'heartRates' OR h % 4 = 0
+"""
+
+
+def _vm_mb(field: str) -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def _dispose_engines() -> None:
+    for engine in global_engines.values():
+        await engine.dispose()
+    global_engines.clear()
+
+
+async def _seed(prefix: str, users: int, start: datetime, days: int) -> None:
+    for first in range(0, users, _SEED_USERS):
+        await execute_query(_SEED, {
+            "prefix": prefix, "first": first, "last": min(first + _SEED_USERS, users) - 1,
+            "start": start, "hours": days * 24,
+        }, log_sql=False)
+    await execute_query("ANALYZE series_data", log_sql=False)
+
+
+async def _previous(start: datetime, end: datetime) -> None:
+    """The recalculation before streaming, over all users."""
+    service = AggregateIndicatorService()
+    aggregator: SQLAggregator = service.aggregator
+
+    all_summaries: List[Dict[str, Any]] = []
+    chunk_start, range_end = start, end + timedelta(days=1)
+    user_ids = sorted(await aggregator._get_users_in_range(chunk_start, range_end))
+    while chunk_start < range_end:
+        chunk_end = min(chunk_start + timedelta(days=aggregator.MAX_DAYS_PER_MONTH), range_end)
+        tasks = await aggregator._get_tasks_for_user_date_range(chunk_start, chunk_end, user_ids)
+        all_summaries.extend(await aggregator.calculate_batch_aggregations(tasks))
+        chunk_start = chunk_end
+
+    await service._register_missing_fhir_indicators()
+    service._backfill_fhir_ids(all_summaries)
+    if not await service.db_service.batch_save_summary_data(all_summaries):
+        raise RuntimeError("save failed")
+
+
+async def _stream(start: datetime, end: datetime) -> None:
+    result = await AggregateIndicatorService().recalculate_date_range(start, end, resume=False)
+    if result["status"] != "success":
+        raise RuntimeError(result.get("error"))
+
+
+def _run_mode(mode: str, start: datetime, end: datetime, pipe) -> None:
+    """Forked child: one recalculation on fresh engines, timed, with its peak RSS."""
+    start_rss = _vm_mb("VmRSS")
+
+    async def run() -> float:
+        begin = time.perf_counter()
+        await (_previous if mode == "previous" else _stream)(start, end)
+        elapsed = time.perf_counter() - begin
+        await _dispose_engines()
+        return elapsed
+
+    elapsed = asyncio.run(run())
+    pipe.send({"seconds": elapsed, "start_rss_mb": start_rss, "peak_rss_mb": _vm_mb("VmHWM")})
+
+
+async def _written(prefix: str) -> int:
+    rows = await execute_query(
+        "SELECT COUNT(*) AS n FROM th_series_data WHERE user_id LIKE :prefix", {"prefix": f"{prefix}-%"}, log_sql=False,
+    )
+    await _dispose_engines()
+    return rows[0]["n"]
+
+
+async def _cleanup(prefix: str, tables: List[str]) -> None:
+    for table in tables:
+        await execute_query(f"DELETE FROM {table} WHERE user_id LIKE :prefix", {"prefix": f"{prefix}-%"}, log_sql=False)
+    await _dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--modes", nargs="+", default=["previous", "stream"], choices=["previous", "stream"])
+    parser.add_argument("--config", nargs="*", default=None, help="Extra config yaml files")
+    args = parser.parse_args()
+
+    asyncio.run(Config.init(yaml_filenames=args.config))
+    logging.getLogger().setLevel(logging.WARNING)
+    prefix = f"bench-recalc-{uuid.uuid4().hex[:8]}"
+    end = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    start = end - timedelta(days=args.days - 1)
+    fork = multiprocessing.get_context("fork")
+
+    try:
+        begin = time.perf_counter()
+        asyncio.run(_seed(prefix, args.users, start, args.days))
+        asyncio.run(_dispose_engines())
+        print(f"seeded {args.users:,} users x {args.days} days of series_data in {time.perf_counter() - begin:.1f}s")
+
+        print(f"{'mode':<9} {'summaries':>10} {'seconds':>9} {'start RSS MB':>13} {'peak RSS MB':>12}")
+        for mode in args.modes:
+            receive, send = fork.Pipe(duplex=False)
+            child = fork.Process(target=_run_mode, args=(mode, start, end, send))
+            child.start()
+            child.join()
+            if child.exitcode != 0:
+                print(f"{mode:<9} failed with exit code {child.exitcode}")
+            else:
+                stats = receive.recv()
+                written = asyncio.run(_written(prefix))
+                print(f"{mode:<9} {written:>10,} {stats['seconds']:>9.1f} {stats['start_rss_mb']:>13.0f} {stats['peak_rss_mb']:>12.0f}")
+            asyncio.run(_cleanup(prefix, ["th_series_data"]))
+    finally:
+        asyncio.run(_cleanup(prefix, ["series_data", "th_series_data"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,18 @@ Database Service for Aggregate Indicator
 
 Handles database operations for aggregate indicator:
 - Batch saving summary data to th_series_data (UPSERT)
+- Seeding, claiming and completing aggregate_dirty_bucket rows
+- Time-range recalculation checkpoints and run leases (aggregate_recalc_checkpoint, aggregate_recalc_run)
 """
 
 import logging
 
+from datetime import datetime
 from typing import Any, Dict, List
 
 from ....utils import execute_query
+from .dirty_buckets import DIRTY_BUCKET_CLAIM, DIRTY_BUCKET_COMPLETE, DIRTY_BUCKET_SEED
+from .models import RecalcUnit
 
 
 class AggregateDatabaseService:
@@ -83,3 +88,178 @@ class AggregateDatabaseService:
         except Exception as e:
             logging.error(f"Error batch saving summary records: {e}")
             return False
+
+    async def seed_dirty_buckets(self, since: datetime) -> None:
+        """
+        Mark the buckets of every series_data row updated after `since`
+
+        Used on cold start, when buckets marked before the table existed (or
+        while the task was down for longer than it keeps them) may be missing.
+
+        Args:
+            since: Naive update_time lower bound
+        """
+        await execute_query(DIRTY_BUCKET_SEED, {"since": since}, log_sql=False)
+
+    async def claim_dirty_buckets(
+            self,
+            worker_id: str,
+            limit: int,
+            lease_seconds: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Claim up to `limit` dirty buckets for `worker_id`, oldest first
+
+        Buckets leased by another worker, or locked by a series_data write
+        that has not committed yet, are skipped. A lease that runs out makes
+        the bucket claimable again.
+
+        Args:
+            worker_id: Claim owner, passed back to complete_dirty_buckets
+            limit: Maximum number of buckets to claim
+            lease_seconds: How long the claim holds
+
+        Returns:
+            Claimed bucket rows (user_id, indicator, timezone, local_day,
+            data_begin_utc, version, marked_at)
+        """
+        return await execute_query(
+            DIRTY_BUCKET_CLAIM,
+            {"worker": worker_id, "limit": limit, "lease_seconds": lease_seconds},
+            log_sql=False,
+        ) or []
+
+    async def complete_dirty_buckets(
+            self,
+            worker_id: str,
+            buckets: List[Dict[str, Any]],
+            done: bool = True
+    ) -> Dict[str, int]:
+        """
+        Finish `worker_id`'s claim on `buckets`
+
+        When `done`, buckets whose version did not move since the claim are
+        deleted; buckets marked again meanwhile, or all of them when not
+        `done`, are released for the next claim.
+
+        Args:
+            worker_id: Owner the buckets were claimed by
+            buckets: Rows returned by claim_dirty_buckets
+            done: Whether their aggregates were saved
+
+        Returns:
+            {"completed": int, "released": int}
+        """
+        if not buckets:
+            return {"completed": 0, "released": 0}
+
+        rows = await execute_query(
+            DIRTY_BUCKET_COMPLETE,
+            {
+                "worker": worker_id,
+                "done": done,
+                "user_ids": [b["user_id"] for b in buckets],
+                "indicators": [b["indicator"] for b in buckets],
+                "timezones": [b["timezone"] for b in buckets],
+                "local_days": [b["local_day"] for b in buckets],
+            },
+            log_sql=False,
+        )
+        row = rows[0] if rows else {}
+        return {"completed": int(row.get("completed") or 0), "released": int(row.get("released") or 0)}
+
+    async def get_recalc_checkpoints(self, run_key: str) -> List[Dict[str, Any]]:
+        """
+        Units of the recalculation `run_key` already saved
+
+        Returns:
+            Rows with range_start, user_ids and summaries
+        """
+        return await execute_query(
+            """
+            SELECT range_start, user_ids, summaries
+            FROM aggregate_recalc_checkpoint
+            WHERE run_key = :run_key
+            """,
+            {"run_key": run_key},
+            log_sql=False,
+        ) or []
+
+    async def save_recalc_checkpoint(self, run_key: str, unit: RecalcUnit, summaries: int) -> None:
+        """Record that all `summaries` of `unit` are saved."""
+        await execute_query(
+            """
+            INSERT INTO aggregate_recalc_checkpoint
+                (run_key, range_start, range_end, first_user_id, user_ids, summaries)
+            VALUES (:run_key, :range_start, :range_end, :first_user_id, CAST(:user_ids AS varchar[]), :summaries)
+            ON CONFLICT (run_key, range_start, first_user_id) DO UPDATE SET
+                range_end = EXCLUDED.range_end,
+                user_ids = EXCLUDED.user_ids,
+                summaries = EXCLUDED.summaries,
+                completed_at = now()
+            """,
+            {
+                "run_key": run_key,
+                "range_start": unit.range_start,
+                "range_end": unit.range_end,
+                "first_user_id": unit.first_user_id,
+                "user_ids": list(unit.user_ids),
+                "summaries": summaries,
+            },
+            log_sql=False,
+        )
+
+    async def clear_recalc_checkpoints(self, run_key: str) -> None:
+        """Forget the saved units of `run_key`."""
+        await execute_query(
+            "DELETE FROM aggregate_recalc_checkpoint WHERE run_key = :run_key",
+            {"run_key": run_key},
+            log_sql=False,
+        )
+
+    async def acquire_recalc_run(self, run_key: str, owner: str, lease_seconds: int) -> bool:
+        """
+        Take the lease on `run_key` for `owner`
+
+        Succeeds if no run holds it or the holder's lease expired.
+
+        Returns:
+            True if `owner` now holds the lease
+        """
+        rows = await execute_query(
+            """
+            INSERT INTO aggregate_recalc_run AS r (run_key, owner, lease_until)
+            VALUES (:run_key, :owner, now() + make_interval(secs => :lease_seconds))
+            ON CONFLICT (run_key) DO UPDATE SET
+                owner = EXCLUDED.owner,
+                started_at = now(),
+                lease_until = EXCLUDED.lease_until
+            WHERE r.lease_until < now()
+            RETURNING owner
+            """,
+            {"run_key": run_key, "owner": owner, "lease_seconds": lease_seconds},
+            log_sql=False,
+        )
+        return bool(rows)
+
+    async def renew_recalc_run(self, run_key: str, owner: str, lease_seconds: int) -> bool:
+        """Extend `owner`'s lease on `run_key`; False if it no longer holds it."""
+        rows = await execute_query(
+            """
+            UPDATE aggregate_recalc_run
+            SET lease_until = now() + make_interval(secs => :lease_seconds)
+            WHERE run_key = :run_key AND owner = :owner
+            RETURNING owner
+            """,
+            {"run_key": run_key, "owner": owner, "lease_seconds": lease_seconds},
+            log_sql=False,
+        )
+        return bool(rows)
+
+    async def release_recalc_run(self, run_key: str, owner: str) -> None:
+        """Drop `owner`'s lease on `run_key`."""
+        await execute_query(
+            "DELETE FROM aggregate_recalc_run WHERE run_key = :run_key AND owner = :owner",
+            {"run_key": run_key, "owner": owner},
+            log_sql=False,
+        )
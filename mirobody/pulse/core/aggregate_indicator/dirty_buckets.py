@@ -0,0 +1,107 @@
+"""
+Aggregate Dirty Buckets
+
+SQL shared by the series_data writers and AggregateDatabaseService for
+aggregate_dirty_bucket (res/sql/99): the (user, indicator, timezone, local
+day) buckets whose aggregates need recalculating, and their claim/complete
+protocol.
+"""
+
+
+def dirty_bucket_mark(rows: str) -> str:
+    """
+    Upsert the buckets of `rows` (a relation with user_id, indicator, timezone,
+    time and task_id), bumping the version of existing ones.
+
+    Same row filter and day boundaries as SQLAggregator.get_trigger_tasks
+    (sleep days run 18:00 to 18:00 local time); rows whose timezone is not
+    valid are skipped. Buckets are upserted in key order so that concurrent
+    writes lock them in the same order.
+    """
+    return f"""
+    INSERT INTO aggregate_dirty_bucket AS b (user_id, indicator, timezone, local_day, data_begin_utc)
+    SELECT user_id, indicator, timezone, local_day,
+           (CAST(local_day AS timestamp) + day_offset) AT TIME ZONE timezone AT TIME ZONE 'UTC' AS data_begin_utc
+    FROM (
+        SELECT DISTINCT user_id, indicator, timezone, day_offset,
+               CAST((time AT TIME ZONE 'UTC') AT TIME ZONE timezone - day_offset AS date) AS local_day
+        FROM (
+            SELECT r.user_id, r.indicator, r.timezone, r.time,
+                   CASE WHEN LOWER(r.indicator) LIKE '%sleep%' THEN INTERVAL '18 hours'
+                        ELSE INTERVAL '0 hours' END AS day_offset
+            FROM {rows} r
+            JOIN (SELECT DISTINCT timezone FROM {rows}) zones
+              ON zones.timezone = r.timezone AND is_valid_timezone(zones.timezone)
+            WHERE r.time >= NOW() - INTERVAL '3 months'
+              AND (r.task_id IS NULL OR r.task_id != 'filtered_out_of_range')
+        ) marked
+    ) touched
+    ORDER BY user_id, indicator, timezone, local_day
+    ON CONFLICT (user_id, indicator, timezone, local_day) DO UPDATE SET
+        version   = b.version + 1,
+        marked_at = now()
+"""
+
+
+# Marks the buckets of every row updated after :since (cold start)
+DIRTY_BUCKET_SEED = dirty_bucket_mark(
+    "(SELECT user_id, indicator, timezone, time, task_id FROM series_data WHERE update_time > :since)"
+)
+
+# Claims up to :limit unleased buckets, oldest first, for :worker until the
+# lease expires. Buckets locked by a write still in progress are skipped.
+DIRTY_BUCKET_CLAIM = """
+    WITH picked AS (
+        SELECT user_id, indicator, timezone, local_day
+        FROM aggregate_dirty_bucket
+        WHERE lease_until IS NULL OR lease_until < now()
+        ORDER BY marked_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE aggregate_dirty_bucket b
+    SET claimed_by      = :worker,
+        claimed_version = b.version,
+        lease_until     = now() + make_interval(secs => :lease_seconds)
+    FROM picked p
+    WHERE b.user_id = p.user_id AND b.indicator = p.indicator
+      AND b.timezone = p.timezone AND b.local_day = p.local_day
+    RETURNING b.user_id, b.indicator, b.timezone, b.local_day, b.data_begin_utc, b.version, b.marked_at
+"""
+
+# Finishes :worker's claim on the given buckets: deletes those still at the
+# claimed version when :done, releases the rest (marked again meanwhile, or
+# not done) for the next claim. Locks in key order, like dirty_bucket_mark.
+DIRTY_BUCKET_COMPLETE = """
+    WITH mine AS (
+        SELECT b.user_id, b.indicator, b.timezone, b.local_day,
+               CAST(:done AS boolean) AND b.version = b.claimed_version AS clean
+        FROM aggregate_dirty_bucket b
+        JOIN unnest(CAST(:user_ids AS text[]), CAST(:indicators AS text[]),
+                    CAST(:timezones AS text[]), CAST(:local_days AS date[])) AS k(user_id, indicator, timezone, local_day)
+          ON b.user_id = k.user_id AND b.indicator = k.indicator
+         AND b.timezone = k.timezone AND b.local_day = k.local_day
+        WHERE b.claimed_by = :worker
+        ORDER BY b.user_id, b.indicator, b.timezone, b.local_day
+        FOR UPDATE OF b
+    ),
+    completed AS (
+        DELETE FROM aggregate_dirty_bucket b
+        USING mine m
+        WHERE m.clean
+          AND b.user_id = m.user_id AND b.indicator = m.indicator
+          AND b.timezone = m.timezone AND b.local_day = m.local_day
+        RETURNING 1
+    ),
+    released AS (
+        UPDATE aggregate_dirty_bucket b
+        SET claimed_by = NULL, claimed_version = NULL, lease_until = NULL
+        FROM mine m
+        WHERE NOT m.clean
+          AND b.user_id = m.user_id AND b.indicator = m.indicator
+          AND b.timezone = m.timezone AND b.local_day = m.local_day
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM completed) AS completed,
+           (SELECT COUNT(*) FROM released)  AS released
+"""
@@ -116,6 +116,25 @@ class CalculationTask:
     update_time: datetime  # Update time from trigger record
 
 
+@dataclass
+class RecalcUnit:
+    """
+    One unit of work of a time-range recalculation
+
+    Covers the series_data times in [range_start, range_end) (at most
+    MAX_DAYS_PER_MONTH days) for the users in user_ids, sorted. Units are
+    checkpointed with their user_ids so an interrupted recalculation skips
+    exactly the users already saved for each chunk.
+    """
+    range_start: datetime
+    range_end: datetime
+    user_ids: List[str]
+
+    @property
+    def first_user_id(self) -> str:
+        return self.user_ids[0]
+
+
 @dataclass
 class AggregationResult:
     """Result of aggregation calculation"""
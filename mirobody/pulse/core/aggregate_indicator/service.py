@@ -5,11 +5,18 @@ Pure business logic for aggregate indicator calculation.
 No longer manages locks, timestamps, or stats caching - these are handled by Task layer.
 """
 
+import asyncio
 import logging
+import os
+import socket
 import time
+import uuid
+from collections import defaultdict
+from contextlib import aclosing
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+from ....utils.config import safe_read_cfg
 from .aggregators import SQLAggregator, AggregatorProtocol
 from .database_service import AggregateDatabaseService
 from .rule_generator import get_rules_by_source_indicator
@@ -31,6 +38,17 @@ class AggregateIndicatorService:
     - Stats caching (handled by Task via PullTask base class)
     """
 
+    # Concurrent dirty-bucket workers (AGGREGATE_DRAIN_WORKERS overrides)
+    DRAIN_WORKERS = 4
+    # Buckets per claim (AGGREGATE_CLAIM_BATCH overrides)
+    CLAIM_BATCH = 500
+    # A bucket claim or recalculation run lease not completed or renewed within this is free again
+    LEASE_SECONDS = 600
+    # Stop claiming after this, well inside the task's 12-minute lock
+    DRAIN_BUDGET_SECONDS = 480
+    # Summaries per bulk save during a time-range recalculation
+    RECALC_SAVE_BATCH = 5000
+
     def __init__(
             self,
             aggregator: Optional[AggregatorProtocol] = None,
@@ -58,16 +76,25 @@ class AggregateIndicatorService:
         """
         Main incremental processing function - Pure business logic
 
+        Drains aggregate_dirty_bucket, which every series_data write marks in
+        its own transaction, with DRAIN_WORKERS concurrent workers. Each
+        worker claims a batch of buckets, aggregates and saves them, then
+        completes its claim; buckets marked again in the meantime stay dirty
+        for the next claim. On cold start (no last_timestamp) the buckets of
+        the last 24 hours of series_data updates are marked first.
+
         Args:
-            last_timestamp: Last processing timestamp (float, seconds with
-                sub-second precision; provided by Task layer)
+            last_timestamp: Last processing timestamp (float seconds; provided
+                by Task layer). Only its absence matters: it selects cold start.
             user_id: Optional user ID filter (None = all users)
 
         Returns:
             Dict with processing results:
             {
-                "status": "success" | "no_data" | "error",
+                "status": "success" | "no_data" | "save_failed" | "error",
                 "mode": "normal" | "cold_start",
+                "buckets_processed": int,
+                "buckets_failed": int,
                 "summaries_created": int,
                 "users_affected": int,
                 "execution_time_ms": float,
@@ -77,10 +104,11 @@ class AggregateIndicatorService:
         start_time = time.time()
 
         try:
-            # Determine mode and fallback timestamp if needed
             if last_timestamp is None:
-                last_timestamp = time.time() - 86400
                 mode = "cold_start"
+                await self.db_service.seed_dirty_buckets(
+                    datetime.fromtimestamp(start_time - 86400)
+                )
             else:
                 mode = "normal"
 
@@ -89,66 +117,96 @@ class AggregateIndicatorService:
                 f"last_timestamp={last_timestamp}"
             )
 
-            # Business logic: Get trigger tasks
-            tasks = await self.aggregator.get_trigger_tasks(
-                since_timestamp=last_timestamp
+            stats = await self._drain_dirty_buckets(
+                deadline=start_time + self.DRAIN_BUDGET_SECONDS
             )
 
-            if not tasks:
-                logging.info("[AggregateIndicator] No trigger tasks found")
+            if not stats["buckets_processed"] and not stats["buckets_failed"]:
+                logging.info("[AggregateIndicator] No dirty buckets found")
                 return {"status": "no_data", "mode": mode}
 
-            logging.info(f"[AggregateIndicator] Found {len(tasks)} trigger tasks")
-
-            # Business logic: Calculate aggregations
-            all_summaries = await self.aggregator.calculate_batch_aggregations(tasks)
-
-            # Register missing FHIR indicators BEFORE saving, then backfill fhir_id
-            if all_summaries:
-                await self._register_missing_fhir_indicators()
-                self._backfill_fhir_ids(all_summaries)
-
-            # Business logic: Save to database
-            if all_summaries:
-                save_success = await self.db_service.batch_save_summary_data(
-                    all_summaries
-                )
-                if not save_success:
-                    logging.error("[AggregateIndicator] Failed to save data")
-                    return {"status": "save_failed", "mode": mode}
-
-            # Calculate new timestamp for Task to cache.
-            # Keep sub-second precision: series_data.update_time is
-            # millisecond-precise, and truncating the cursor to an int
-            # second would roll it backwards within the same second,
-            # causing the next run to re-process the same batch.
-            new_timestamp = max(
-                task.update_time.timestamp() for task in tasks
-            )
+            if not stats["buckets_processed"]:
+                logging.error("[AggregateIndicator] Failed to save data")
+                return {"status": "save_failed", "mode": mode}
 
             # Calculate execution time
             execution_time_ms = (time.time() - start_time) * 1000
 
             logging.info(
                 f"[AggregateIndicator] Completed: "
-                f"{len(all_summaries)} summaries created, "
-                f"{len(set(task.user_id for task in tasks))} users affected, "
+                f"{stats['buckets_processed']} buckets, "
+                f"{stats['summaries_created']} summaries created, "
+                f"{len(stats['users'])} users affected, "
+                f"{stats['buckets_failed']} buckets failed, "
                 f"execution_time={execution_time_ms:.1f}ms"
             )
 
             return {
                 "status": "success",
                 "mode": mode,
-                "summaries_created": len(all_summaries),
-                "users_affected": len(set(task.user_id for task in tasks)),
+                "buckets_processed": stats["buckets_processed"],
+                "buckets_failed": stats["buckets_failed"],
+                "summaries_created": stats["summaries_created"],
+                "users_affected": len(stats["users"]),
                 "execution_time_ms": execution_time_ms,
-                "new_timestamp": new_timestamp  # Task will cache this
+                "new_timestamp": start_time  # Task will cache this
             }
 
         except Exception as e:
             logging.error(f"[AggregateIndicator] Error during processing: {e}")
             return {"status": "error", "error": str(e)}
 
+    async def _drain_dirty_buckets(self, deadline: float) -> Dict[str, Any]:
+        """
+        Claim, aggregate, save and complete dirty buckets until none are left
+        or `deadline` (epoch seconds) passes
+
+        A worker whose batch fails releases it and stops, so a bucket that
+        cannot be aggregated is retried by the next run rather than in a loop.
+        """
+        workers = int(safe_read_cfg("AGGREGATE_DRAIN_WORKERS") or self.DRAIN_WORKERS)
+        claim_batch = int(safe_read_cfg("AGGREGATE_CLAIM_BATCH") or self.CLAIM_BATCH)
+        run_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        stats: Dict[str, Any] = {
+            "buckets_processed": 0, "buckets_failed": 0, "summaries_created": 0, "users": set(),
+        }
+
+        async def drain(worker_id: str) -> None:
+            while time.time() < deadline:
+                buckets = await self.db_service.claim_dirty_buckets(
+                    worker_id, claim_batch, self.LEASE_SECONDS
+                )
+                if not buckets:
+                    return
+
+                done = False
+                summaries: List[Dict[str, Any]] = []
+                try:
+                    tasks = self.aggregator.get_bucket_tasks(buckets)
+                    if tasks:
+                        summaries = await self.aggregator.calculate_batch_aggregations(tasks)
+                    if summaries:
+                        await self._register_missing_fhir_indicators()
+                        self._backfill_fhir_ids(summaries)
+                        done = await self.db_service.batch_save_summary_data(summaries)
+                    else:
+                        done = True
+                except Exception as e:
+                    logging.error(f"[AggregateIndicator] Worker {worker_id} failed on {len(buckets)} buckets: {e}")
+                finally:
+                    await self.db_service.complete_dirty_buckets(worker_id, buckets, done=done)
+
+                if not done:
+                    stats["buckets_failed"] += len(buckets)
+                    return
+
+                stats["buckets_processed"] += len(buckets)
+                stats["summaries_created"] += len(summaries)
+                stats["users"].update(bucket["user_id"] for bucket in buckets)
+
+        await asyncio.gather(*(drain(f"{run_id}:{n}") for n in range(max(1, workers))))
+        return stats
+
     @staticmethod
     def _backfill_fhir_ids(summaries: List[Dict[str, Any]]):
         """Re-fill fhir_id on summaries that were None (cache was updated by register_missing)."""
@@ -205,65 +263,144 @@ class AggregateIndicatorService:
             self,
             start_date: datetime,
             end_date: datetime,
-            user_id: Optional[str] = None
+            user_id: Optional[str] = None,
+            resume: bool = True
     ) -> Dict[str, Any]:
         """
         Recalculate aggregations for a specific date range
         
-        This method handles historical data processing by delegating to the aggregator.
+        Streams the aggregator's units into the bulk saver RECALC_SAVE_BATCH
+        summaries at a time, checkpointing each unit once its summaries are
+        saved. A run that fails or is interrupted keeps its checkpoints, and
+        running the same range again resumes after them. Only one run per
+        range and user filter at a time: a second caller gets status "busy".
         
         Args:
             start_date: Start date for recalculation
-            end_date: End date for recalculation
+            end_date: End date for recalculation (inclusive)
             user_id: Optional user ID filter
+            resume: Skip the units a previous run of this range saved
             
         Returns:
             Dict with processing results
         """
-        # Guard against unbounded all-users backfills. 30 days is the
-        # chunk size used internally by calculate_time_range_aggregations;
-        # beyond this the DB load grows linearly with active user count.
-        if user_id is None:
-            days_span = (end_date - start_date).days + 1
-            if days_span > 30:
-                return {
-                    "status": "error",
-                    "error": (
-                        f"Range {days_span} days exceeds 30-day limit for "
-                        f"all-users backfill. Narrow the range or pass user_id."
-                    ),
-                }
+        run_key = f"{start_date:%Y-%m-%d}..{end_date:%Y-%m-%d}:{user_id or '*'}"
+        owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        if not await self.db_service.acquire_recalc_run(run_key, owner, self.LEASE_SECONDS):
+            logging.warning(f"Historical recalculation {run_key} is already running, not starting another")
+            return {"status": "busy", "error": f"Recalculation {run_key} is already running"}
+
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._hold_recalc_lease(run_key, owner, lease_lost))
+        try:
+            return await self._recalculate_units(run_key, start_date, end_date, user_id, resume, lease_lost)
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            await self.db_service.release_recalc_run(run_key, owner)
+
+    async def _hold_recalc_lease(self, run_key: str, owner: str, lost: asyncio.Event) -> None:
+        """Renew the run lease every LEASE_SECONDS / 3; set `lost` once another owner has it."""
+        while True:
+            await asyncio.sleep(self.LEASE_SECONDS / 3)
+            try:
+                held = await self.db_service.renew_recalc_run(run_key, owner, self.LEASE_SECONDS)
+            except Exception as e:
+                logging.warning(f"Renewing recalculation lease {run_key} failed: {e}")
+                continue
+            if not held:
+                lost.set()
+                return
+
+    async def _recalculate_units(
+            self,
+            run_key: str,
+            start_date: datetime,
+            end_date: datetime,
+            user_id: Optional[str],
+            resume: bool,
+            lease_lost: asyncio.Event
+    ) -> Dict[str, Any]:
+        """Body of recalculate_date_range, run while holding the lease on run_key."""
+        if resume:
+            completed = await self.db_service.get_recalc_checkpoints(run_key)
+        else:
+            await self.db_service.clear_recalc_checkpoints(run_key)
+            completed = []
+
+        units = await self.aggregator.plan_time_range_units(
+            start_date, end_date, user_id, completed=completed
+        )
 
         logging.info(
             f"Starting historical recalculation: {start_date.isoformat()} to {end_date.isoformat()}, "
-            f"user={user_id or 'all'}"
+            f"user={user_id or 'all'}, {len(units)} units, {len(completed)} resumed"
         )
 
-        # Delegate to aggregator for time range processing
-        all_summaries = await self.aggregator.calculate_time_range_aggregations(
-            start_date=start_date,
-            end_date=end_date,
-            user_id=user_id
-        )
+        concurrency = int(safe_read_cfg("AGGREGATE_RECALC_CONCURRENCY") or 0) or None
+        pending: List[Dict[str, Any]] = []
+        unit_summaries: Dict[int, int] = defaultdict(int)
+        summaries_created = 0
+        units_done = 0
 
-        # Register missing FHIR indicators BEFORE saving, then backfill fhir_id
-        if all_summaries:
+        def check_lease() -> None:
+            if lease_lost.is_set():
+                raise RuntimeError(f"Lost the lease on {run_key} to another run")
+
+        async def save(batch: List[Dict[str, Any]]) -> None:
+            nonlocal summaries_created
+            check_lease()
+            # Register missing FHIR indicators BEFORE saving, then backfill fhir_id
             await self._register_missing_fhir_indicators()
-            self._backfill_fhir_ids(all_summaries)
+            self._backfill_fhir_ids(batch)
+            if not await self.db_service.batch_save_summary_data(batch):
+                raise RuntimeError("Failed to save summary data")
+            summaries_created += len(batch)
+
+        try:
+            # Closing the stream on a save error stops the aggregator's workers
+            async with aclosing(self.aggregator.iter_time_range_aggregations(units, concurrency)) as stream:
+                async for unit, summaries, finished in stream:
+                    pending.extend(summaries)
+                    unit_summaries[id(unit)] += len(summaries)
+                    while len(pending) >= self.RECALC_SAVE_BATCH:
+                        batch, pending = pending[:self.RECALC_SAVE_BATCH], pending[self.RECALC_SAVE_BATCH:]
+                        await save(batch)
+
+                    if finished:
+                        # The unit's summaries may still be pending
+                        if pending:
+                            batch, pending = pending, []
+                            await save(batch)
+                        check_lease()
+                        await self.db_service.save_recalc_checkpoint(run_key, unit, unit_summaries.pop(id(unit)))
+                        units_done += 1
+
+        except Exception as e:
+            logging.error(
+                f"Historical recalculation stopped after {units_done}/{len(units)} units, "
+                f"re-run to resume: {e}"
+            )
+            return {
+                "status": "error",
+                "error": str(e),
+                "summaries_created": summaries_created,
+                "units_completed": units_done,
+                "units_remaining": len(units) - units_done,
+            }
 
-        # Save summaries
-        if all_summaries:
-            save_success = await self.db_service.batch_save_summary_data(all_summaries)
-            if not save_success:
-                return {"status": "error", "error": "Failed to save summary data"}
+        await self.db_service.clear_recalc_checkpoints(run_key)
 
         logging.info(
-            f"Historical recalculation completed: {len(all_summaries)} summaries created"
+            f"Historical recalculation completed: {summaries_created} summaries created"
         )
 
         return {
             "status": "success",
-            "summaries_created": len(all_summaries),
+            "summaries_created": summaries_created,
+            "units_completed": units_done,
+            "units_resumed": len(completed),
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat()
         }
@@ -18,7 +18,9 @@ class AggregateIndicatorTask(PullTask):
     Aggregate Indicator task implementation
     
     Inherits from PullTask to integrate with the unified scheduler system.
-    Executes every 4 minutes to calculate aggregations from series_data.
+    Executes every 4 minutes to calculate aggregations for the dirty buckets
+    that series_data writes mark. The cached timestamp only tells a first (or
+    forced) run, which seeds the buckets from the last 24 hours of updates.
     """
 
     def __init__(self):
@@ -70,6 +72,8 @@ class AggregateIndicatorTask(PullTask):
                 # Define aggregate_indicator specific stats structure
                 stats_dict = {
                     "executed_at": datetime.now().isoformat(),
+                    "buckets_processed": result.get('buckets_processed', 0),
+                    "buckets_failed": result.get('buckets_failed', 0),
                     "summaries_created": result.get('summaries_created', 0),
                     "users_affected": result.get('users_affected', 0),
                     "execution_time_ms": result.get('execution_time_ms', 0),
@@ -112,7 +116,7 @@ class AggregateIndicatorTask(PullTask):
         # Add aggregate-specific metadata
         full_status.update({
             "task_name": "Aggregate Indicator Calculation",
-            "description": "Calculate summary indicators from series data",
+            "description": "Calculate summary indicators for dirty series data buckets",
             "execution_frequency": "Every 4 minutes",
         })
 
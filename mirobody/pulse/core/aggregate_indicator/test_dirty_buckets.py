@@ -0,0 +1,309 @@
+"""Dirty-bucket trigger discovery: the drain loop against an in-memory bucket table, and the
+mark/claim/complete SQL against Postgres (opt-in, PULSE_PG_TESTS=1 on a scratch database)."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import uuid
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Set, Tuple
+
+import pytest
+import pytest_asyncio
+
+from .database_service import AggregateDatabaseService
+from .models import CalculationTask
+from .service import AggregateIndicatorService
+
+Key = Tuple[str, str, str, str]
+
+
+class _BucketTable(AggregateDatabaseService):
+    """aggregate_dirty_bucket with the claim/complete semantics of dirty_buckets.py, in memory."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.rows: Dict[Key, Dict[str, Any]] = {}
+        self.seeded: List[datetime] = []
+        self.saved: List[Dict[str, Any]] = []
+        self.save_ok = True
+        self.in_flight: Set[Key] = set()
+
+    def mark(self, *keys: Key) -> None:
+        for key in keys:
+            row = self.rows.setdefault(key, {"version": 0, "claimed_by": None, "claimed_version": None})
+            row["version"] += 1
+
+    async def seed_dirty_buckets(self, since: datetime) -> None:
+        self.seeded.append(since)
+
+    async def claim_dirty_buckets(self, worker_id: str, limit: int, lease_seconds: int) -> List[Dict[str, Any]]:
+        await asyncio.sleep(0)
+        picked = [key for key, row in self.rows.items() if row["claimed_by"] is None][:limit]
+        buckets = []
+        for key in picked:
+            assert key not in self.in_flight
+            self.in_flight.add(key)
+            row = self.rows[key]
+            row.update(claimed_by=worker_id, claimed_version=row["version"])
+            user_id, indicator, timezone, local_day = key
+            buckets.append({
+                "user_id": user_id, "indicator": indicator, "timezone": timezone, "local_day": local_day,
+                "data_begin_utc": datetime.fromisoformat(local_day), "version": row["version"],
+                "marked_at": datetime(2025, 3, 1),
+            })
+        return buckets
+
+    async def complete_dirty_buckets(
+            self, worker_id: str, buckets: List[Dict[str, Any]], done: bool = True
+    ) -> Dict[str, int]:
+        await asyncio.sleep(0)
+        result = {"completed": 0, "released": 0}
+        for bucket in buckets:
+            key = (bucket["user_id"], bucket["indicator"], bucket["timezone"], bucket["local_day"])
+            row = self.rows[key]
+            assert row["claimed_by"] == worker_id
+            self.in_flight.discard(key)
+            if done and row["version"] == row["claimed_version"]:
+                del self.rows[key]
+                result["completed"] += 1
+            else:
+                row.update(claimed_by=None, claimed_version=None)
+                result["released"] += 1
+        return result
+
+    async def batch_save_summary_data(self, summary_records: List[Dict[str, Any]], batch_size: int = 1000) -> bool:
+        await asyncio.sleep(0)
+        if self.save_ok:
+            self.saved.extend(summary_records)
+        return self.save_ok
+
+
+class _RecordingAggregator:
+    """One task per bucket; each summary carries the bucket version its calculation saw."""
+
+    def __init__(self, table: _BucketTable, during_calculation=None) -> None:
+        self.table = table
+        self.during_calculation = during_calculation
+
+    def get_bucket_tasks(self, buckets: List[Dict[str, Any]]) -> List[CalculationTask]:
+        return [
+            CalculationTask(
+                user_id=b["user_id"], source_indicator=b["indicator"], target_indicator=f"dailyAvg{b['indicator']}",
+                aggregation_type="avg", data_begin_utc=b["data_begin_utc"], timezone=b["timezone"],
+                update_time=b["marked_at"],
+            )
+            for b in buckets
+        ]
+
+    async def calculate_batch_aggregations(self, tasks: List[CalculationTask]) -> List[Dict[str, Any]]:
+        keys = [(t.user_id, t.source_indicator, t.timezone, t.data_begin_utc.date().isoformat()) for t in tasks]
+        versions = {key: self.table.rows[key]["version"] for key in keys}
+        await asyncio.sleep(0)
+        if self.during_calculation:
+            self.during_calculation(keys)
+        return [{"key": key, "version": versions[key], "fhir_id": "fhir"} for key in keys]
+
+
+def _keys(users: int, days: int) -> List[Key]:
+    return [(f"u{u}", "heartRates", "UTC", f"2025-03-{d + 1:02d}") for u in range(users) for d in range(days)]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_workers_drain_every_bucket_once() -> None:
+    table = _BucketTable()
+    table.mark(*_keys(users=7, days=9))
+    service = AggregateIndicatorService(aggregator=_RecordingAggregator(table), db_service=table)
+    service.CLAIM_BATCH = 4
+
+    result = await service.process_incremental(last_timestamp=1.0)
+
+    assert result["status"] == "success" and result["mode"] == "normal"
+    assert result["buckets_processed"] == 63 and result["users_affected"] == 7
+    assert sorted(s["key"] for s in table.saved) == sorted(_keys(users=7, days=9))
+    assert not table.rows and not table.seeded
+
+
+@pytest.mark.asyncio
+async def test_bucket_marked_again_during_its_calculation_is_recalculated() -> None:
+    table = _BucketTable()
+    table.mark(*_keys(users=2, days=2))
+    remarked: List[Key] = []
+
+    def ingest_once(keys: List[Key]) -> None:
+        # A write lands on the first bucket while the first claim is being aggregated
+        if not remarked:
+            remarked.append(keys[0])
+            table.mark(keys[0])
+
+    service = AggregateIndicatorService(aggregator=_RecordingAggregator(table, ingest_once), db_service=table)
+
+    result = await service.process_incremental(last_timestamp=1.0)
+
+    assert result["buckets_processed"] == 5
+    saves = [s["version"] for s in table.saved if s["key"] == remarked[0]]
+    assert saves == [1, 2]
+    assert not table.rows
+
+
+@pytest.mark.asyncio
+async def test_failed_save_releases_the_claim_for_the_next_run() -> None:
+    table = _BucketTable()
+    table.mark(*_keys(users=3, days=1))
+    table.save_ok = False
+    service = AggregateIndicatorService(aggregator=_RecordingAggregator(table), db_service=table)
+
+    result = await service.process_incremental(last_timestamp=1.0)
+
+    assert result == {"status": "save_failed", "mode": "normal"}
+    assert len(table.rows) == 3 and not table.in_flight
+    assert all(row["claimed_by"] is None for row in table.rows.values())
+
+    table.save_ok = True
+    assert (await service.process_incremental(last_timestamp=1.0))["buckets_processed"] == 3
+    assert not table.rows
+
+
+@pytest.mark.asyncio
+async def test_cold_start_seeds_the_last_day_of_updates() -> None:
+    table = _BucketTable()
+    service = AggregateIndicatorService(aggregator=_RecordingAggregator(table), db_service=table)
+
+    result = await service.process_incremental(last_timestamp=None)
+
+    assert result == {"status": "no_data", "mode": "cold_start"}
+    (since,) = table.seeded
+    assert timedelta(hours=23) < datetime.now() - since < timedelta(hours=25)
+
+
+# ---------------------------------------------------------------------------
+# Postgres: the SQL in dirty_buckets.py, with real row locks and commit order
+# ---------------------------------------------------------------------------
+
+pg = pytest.mark.skipif(
+    os.environ.get("PULSE_PG_TESTS") != "1",
+    reason="set PULSE_PG_TESTS=1 and PG_* to a scratch database with res/sql applied",
+)
+
+
+@pytest_asyncio.fixture
+async def pg_user():
+    from ....utils.config import Config
+    from ....utils.db import global_engines
+    from ....utils import execute_query
+
+    await Config.init(yaml_filenames=None)
+    user_id = f"test-dirty-{uuid.uuid4().hex[:12]}"
+    yield user_id
+    for table in ("series_data", "series_ingest_ledger", "aggregate_dirty_bucket"):
+        await execute_query(f"DELETE FROM {table} WHERE user_id = :user_id", {"user_id": user_id}, log_sql=False)
+    # Engines are bound to this test's event loop
+    for engine in global_engines.values():
+        await engine.dispose()
+    global_engines.clear()
+
+
+def _record(user_id: str, at: datetime, value: int, source: str = "test") -> Dict[str, Any]:
+    return {
+        "user_id": user_id, "indicator": "heartRates", "source": source, "start_time": at,
+        "value": str(value), "timezone": "UTC", "task_id": "test", "source_id": f"{source}-{at.isoformat()}",
+    }
+
+
+async def _own_buckets(user_id: str) -> List[Dict[str, Any]]:
+    from ....utils import execute_query
+    return await execute_query(
+        "SELECT local_day, version, claimed_by FROM aggregate_dirty_bucket WHERE user_id = :user_id ORDER BY local_day",
+        {"user_id": user_id}, log_sql=False,
+    )
+
+
+@pg
+@pytest.mark.asyncio
+async def test_pg_write_committing_after_a_later_one_is_not_missed(pg_user: str) -> None:
+    from sqlalchemy import text
+    from ....utils.db import _get_engine
+    from ...data_upload.repositories.health_data import SERIES_DATA_UPSERT, HealthDataRepository
+    from .aggregators import SQLAggregator
+
+    db = AggregateDatabaseService()
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    early, late = today - timedelta(days=2), today - timedelta(days=1)
+
+    # Writer A starts first (its update_time is earlier) but commits last
+    engine = _get_engine("")
+    async with engine.connect() as slow:
+        transaction = await slow.begin()
+        row = _record(pg_user, early, 70)
+        row["time"] = row.pop("start_time")
+        await slow.execute(text(SERIES_DATA_UPSERT), {name: [value] for name, value in row.items()})
+
+        await asyncio.sleep(0.05)
+        assert await HealthDataRepository().save_health_records([_record(pg_user, late, 80)])
+
+        # A cursor run now sees only B and moves past A's update_time
+        cursor = max(t.update_time for t in await SQLAggregator().get_trigger_tasks(early.timestamp() - 86400 * 3)
+                     if t.user_id == pg_user).timestamp()
+        claimed = await db.claim_dirty_buckets("w1", 1000, 60)
+        assert [b["local_day"] for b in claimed if b["user_id"] == pg_user] == [late.date()]
+        await db.complete_dirty_buckets("w1", claimed)
+
+        await transaction.commit()
+
+    assert not [t for t in await SQLAggregator().get_trigger_tasks(cursor) if t.user_id == pg_user]
+    claimed = await db.claim_dirty_buckets("w2", 1000, 60)
+    assert [b["local_day"] for b in claimed if b["user_id"] == pg_user] == [early.date()]
+    assert (await db.complete_dirty_buckets("w2", claimed))["released"] == 0
+    assert await _own_buckets(pg_user) == []
+
+
+@pg
+@pytest.mark.asyncio
+async def test_pg_concurrent_ingest_and_drain_leave_nothing_behind(pg_user: str) -> None:
+    from ...data_upload.repositories.health_data import HealthDataRepository
+
+    db = AggregateDatabaseService()
+    repository = HealthDataRepository()
+    base = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=6)
+    in_flight: Set[Tuple[Any, ...]] = set()
+    last_ingest_start: Dict[Any, float] = {}
+    claims: Dict[Any, List[float]] = {}
+    ingesting = True
+
+    async def ingest(writer: int) -> None:
+        loop = asyncio.get_running_loop()
+        for n in range(12):
+            day = (writer + n) % 5
+            at = base + timedelta(days=day, minutes=writer * 60 + n)
+            last_ingest_start[(base + timedelta(days=day)).date()] = loop.time()
+            assert await repository.save_health_records([_record(pg_user, at, 60 + n, source=f"w{writer}")])
+            await asyncio.sleep(0.01)
+
+    async def drain(worker: str) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            claimed = await db.claim_dirty_buckets(worker, 2, 60)
+            claimed_at = loop.time()
+            keys = {b["local_day"] for b in claimed if b["user_id"] == pg_user}
+            assert not keys & in_flight, "a bucket was claimed twice"
+            in_flight.update(keys)
+            for key in keys:
+                claims.setdefault(key, []).append(claimed_at)
+            await asyncio.sleep(0.01)
+            await db.complete_dirty_buckets(worker, claimed)
+            in_flight.difference_update(keys)
+            if not claimed and not ingesting:
+                return
+
+    drains = [asyncio.create_task(drain(f"w{n}")) for n in range(3)]
+    await asyncio.gather(*(ingest(writer) for writer in range(4)))
+    ingesting = False
+    await asyncio.gather(*drains)
+
+    assert await _own_buckets(pg_user) == []
+    assert set(claims) == set(last_ingest_start)
+    # Every day's last write is followed by a claim that saw it
+    for day, started in last_ingest_start.items():
+        assert max(claims[day]) > started
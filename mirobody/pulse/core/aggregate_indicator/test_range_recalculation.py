@@ -0,0 +1,348 @@
+"""Time-range recalculation: unit planning, the concurrent summary stream, batched saves, resume and the
+run lease, against in-memory doubles; the checkpoint and lease SQL against Postgres (opt-in, PULSE_PG_TESTS=1)."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import uuid
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pytest
+import pytest_asyncio
+
+from .aggregators import SQLAggregator
+from .database_service import AggregateDatabaseService
+from .models import CalculationTask, RecalcUnit
+from .service import AggregateIndicatorService
+
+USERS = [f"u{n:02d}" for n in range(7)]
+
+
+class _RangeAggregator(SQLAggregator):
+    """SQLAggregator over synthetic series_data: one task per user and day, one summary per task."""
+
+    def __init__(self, fail_on: Optional[datetime] = None, users: Optional[List[str]] = None) -> None:
+        super().__init__()
+        self.fail_on = fail_on
+        self.users = list(users or USERS)
+        self.delay = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.units_fetched: List[RecalcUnit] = []
+
+    async def _get_users_in_range(self, range_start: datetime, range_end: datetime) -> List[str]:
+        return list(reversed(self.users))
+
+    async def _get_tasks_for_user_date_range(
+            self, range_start: datetime, range_end: datetime, user_ids: List[str]
+    ) -> List[CalculationTask]:
+        self.units_fetched.append(RecalcUnit(range_start, range_end, user_ids))
+        days = (range_end - range_start).days
+        return [
+            CalculationTask(
+                user_id=uid, source_indicator="heartRates", target_indicator="dailyAvgHeartRates",
+                aggregation_type="avg", data_begin_utc=range_start + timedelta(days=d), timezone="UTC",
+                update_time=range_start,
+            )
+            for d in range(days) for uid in user_ids
+        ]
+
+    async def _process_data_begin_aggregations(self, data_begin_tasks: List[CalculationTask]) -> List[Dict[str, Any]]:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if data_begin_tasks[0].data_begin_utc == self.fail_on:
+                raise RuntimeError("aggregation failed")
+            return [
+                {"user_id": t.user_id, "indicator": t.target_indicator, "start_time": t.data_begin_utc, "fhir_id": "f"}
+                for t in data_begin_tasks
+            ]
+        finally:
+            self.in_flight -= 1
+
+
+class _Saver(AggregateDatabaseService):
+    """Bulk saver, checkpoint table and run leases in memory."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.batches: List[List[Dict[str, Any]]] = []
+        self.checkpoints: Dict[str, List[Dict[str, Any]]] = {}
+        self.runs: Dict[str, str] = {}
+        self.events: List[Any] = []
+
+    async def batch_save_summary_data(self, summary_records: List[Dict[str, Any]], batch_size: int = 1000) -> bool:
+        self.batches.append(summary_records)
+        self.events.extend(("saved", s["user_id"], s["start_time"]) for s in summary_records)
+        return True
+
+    async def get_recalc_checkpoints(self, run_key: str) -> List[Dict[str, Any]]:
+        return list(self.checkpoints.get(run_key, []))
+
+    async def save_recalc_checkpoint(self, run_key: str, unit: RecalcUnit, summaries: int) -> None:
+        self.events.append(("checkpoint", unit.range_start, tuple(unit.user_ids)))
+        self.checkpoints.setdefault(run_key, []).append({
+            "range_start": unit.range_start, "user_ids": list(unit.user_ids), "summaries": summaries,
+        })
+
+    async def clear_recalc_checkpoints(self, run_key: str) -> None:
+        self.checkpoints.pop(run_key, None)
+
+    async def acquire_recalc_run(self, run_key: str, owner: str, lease_seconds: int) -> bool:
+        return self.runs.setdefault(run_key, owner) == owner
+
+    async def renew_recalc_run(self, run_key: str, owner: str, lease_seconds: int) -> bool:
+        return self.runs.get(run_key) == owner
+
+    async def release_recalc_run(self, run_key: str, owner: str) -> None:
+        if self.runs.get(run_key) == owner:
+            del self.runs[run_key]
+
+    def saved(self) -> List[tuple]:
+        return [(s["user_id"], s["start_time"]) for batch in self.batches for s in batch]
+
+
+def _aggregator(fail_on: Optional[datetime] = None) -> _RangeAggregator:
+    aggregator = _RangeAggregator(fail_on)
+    aggregator.MAX_DAYS_PER_MONTH = 10
+    aggregator.RECALC_USERS_PER_UNIT = 3
+    aggregator.RECALC_QUEUE_SIZE = 2
+    return aggregator
+
+
+START, END = datetime(2025, 1, 1), datetime(2025, 1, 25)
+ALL_ROWS = sorted((u, START + timedelta(days=d)) for u in USERS for d in range(25))
+
+
+@pytest.mark.asyncio
+async def test_units_cover_whole_days_in_chunks_and_user_slices() -> None:
+    aggregator = _aggregator()
+
+    units = await aggregator.plan_time_range_units(START, END)
+
+    assert [(u.range_start.day, u.range_end.day) for u in units[::3]] == [(1, 11), (11, 21), (21, 26)]
+    assert [u.user_ids for u in units[:3]] == [USERS[:3], USERS[3:6], USERS[6:]]
+    assert units[-1].range_end == datetime(2025, 1, 26)  # end date inclusive
+
+    single = await aggregator.plan_time_range_units(START, END, user_id="u03")
+    assert [u.user_ids for u in single] == [["u03"]] * 3
+
+    completed = [{"range_start": datetime(2025, 1, 11), "user_ids": USERS[:3]}]
+    resumed = await aggregator.plan_time_range_units(START, END, completed=completed)
+    assert [u.user_ids for u in resumed if u.range_start == datetime(2025, 1, 11)] == [USERS[3:6], USERS[6:]]
+    assert len(resumed) == len(units) - 1
+
+
+@pytest.mark.asyncio
+async def test_stream_runs_units_concurrently_and_finishes_each_after_its_summaries() -> None:
+    aggregator = _aggregator()
+    units = await aggregator.plan_time_range_units(START, END)
+    seen: Dict[int, int] = {}
+    finished: List[int] = []
+
+    async for unit, summaries, done in aggregator.iter_time_range_aggregations(units, concurrency=3):
+        assert id(unit) not in finished
+        if done:
+            finished.append(id(unit))
+            assert seen[id(unit)] == len(unit.user_ids) * (unit.range_end - unit.range_start).days
+        seen[id(unit)] = seen.get(id(unit), 0) + len(summaries)
+
+    assert sorted(finished) == sorted(id(u) for u in units)
+    assert 1 < aggregator.max_in_flight <= 3
+
+
+@pytest.mark.asyncio
+async def test_worker_error_reaches_the_consumer_and_stops_the_other_workers() -> None:
+    aggregator = _aggregator(fail_on=datetime(2025, 1, 4))
+    units = await aggregator.plan_time_range_units(START, END)
+
+    with pytest.raises(RuntimeError, match="aggregation failed"):
+        async for _ in aggregator.iter_time_range_aggregations(units, concurrency=2):
+            pass
+
+    await asyncio.sleep(0)
+    assert aggregator.in_flight == 0
+    assert len(aggregator.units_fetched) < len(units)
+
+
+@pytest.mark.asyncio
+async def test_recalculation_saves_fixed_size_batches_and_checkpoints_after_the_save() -> None:
+    saver = _Saver()
+    service = AggregateIndicatorService(aggregator=_aggregator(), db_service=saver)
+    service.RECALC_SAVE_BATCH = 8
+
+    result = await service.recalculate_date_range(START, END)
+
+    assert result["status"] == "success"
+    assert result["summaries_created"] == len(ALL_ROWS) and result["units_completed"] == 9
+    assert sorted(saver.saved()) == ALL_ROWS
+    assert max(len(batch) for batch in saver.batches) == 8
+    # A unit is checkpointed only once every one of its rows has been saved
+    saved_so_far = set()
+    for event in saver.events:
+        if event[0] == "saved":
+            saved_so_far.add(event[1:])
+        else:
+            _, range_start, user_ids = event
+            assert all((u, range_start + timedelta(days=d)) in saved_so_far for u in user_ids for d in range(10)
+                       if range_start + timedelta(days=d) <= END)
+    assert saver.checkpoints == {}
+
+
+@pytest.mark.asyncio
+async def test_interrupted_recalculation_resumes_after_its_checkpoints() -> None:
+    saver = _Saver()
+    failing = AggregateIndicatorService(aggregator=_aggregator(fail_on=datetime(2025, 1, 22)), db_service=saver)
+
+    first = await failing.recalculate_date_range(START, END)
+
+    assert first["status"] == "error" and first["units_completed"] >= 3
+    checkpoints = [dict(c) for run in saver.checkpoints.values() for c in run]
+    assert len(checkpoints) == first["units_completed"]
+
+    aggregator = _aggregator()
+    second = await AggregateIndicatorService(aggregator=aggregator, db_service=saver).recalculate_date_range(START, END)
+
+    assert second["status"] == "success" and second["units_resumed"] == first["units_completed"]
+    assert second["units_completed"] == 9 - first["units_completed"]
+    assert set(saver.saved()) == set(ALL_ROWS)
+    done = {(c["range_start"], uid) for c in checkpoints for uid in c["user_ids"]}
+    assert not [u for u in aggregator.units_fetched if any((u.range_start, uid) in done for uid in u.user_ids)]
+    assert saver.checkpoints == {} and saver.runs == {}
+
+
+@pytest.mark.asyncio
+async def test_user_with_new_data_inside_a_saved_unit_is_recalculated_on_resume() -> None:
+    saver = _Saver()
+    first = await AggregateIndicatorService(
+        aggregator=_aggregator(fail_on=datetime(2025, 1, 22)), db_service=saver
+    ).recalculate_date_range(START, END)
+    assert first["status"] == "error"
+
+    # u01a sorts between u01 and u02, inside the first saved unit of every chunk
+    aggregator = _aggregator()
+    aggregator.users = sorted(USERS + ["u01a"])
+    second = await AggregateIndicatorService(aggregator=aggregator, db_service=saver).recalculate_date_range(START, END)
+
+    assert second["status"] == "success"
+    assert {(s_user, day) for s_user, day in saver.saved() if s_user == "u01a"} == {
+        ("u01a", START + timedelta(days=d)) for d in range(25)
+    }
+
+
+@pytest.mark.asyncio
+async def test_second_run_of_the_same_range_is_turned_away_while_the_first_holds_the_lease() -> None:
+    saver = _Saver()
+    slow = _aggregator()
+    slow.delay = 0.005
+    running = asyncio.create_task(
+        AggregateIndicatorService(aggregator=slow, db_service=saver).recalculate_date_range(START, END)
+    )
+    while not saver.runs:
+        await asyncio.sleep(0)
+
+    other = _aggregator()
+    busy = await AggregateIndicatorService(aggregator=other, db_service=saver).recalculate_date_range(START, END)
+    # A different user filter is a different run
+    single = await AggregateIndicatorService(
+        aggregator=_aggregator(), db_service=saver
+    ).recalculate_date_range(START, END, user_id="u03")
+
+    assert busy["status"] == "busy" and other.units_fetched == []
+    assert single["status"] == "success"
+    assert (await running)["status"] == "success"
+    assert saver.runs == {}
+
+    again = await AggregateIndicatorService(aggregator=_aggregator(), db_service=saver).recalculate_date_range(START, END)
+    assert again["status"] == "success"
+
+
+@pytest.mark.asyncio
+async def test_run_stops_without_checkpointing_once_its_lease_is_taken_over() -> None:
+    saver = _Saver()
+    aggregator = _aggregator()
+    aggregator.delay = 0.01
+    service = AggregateIndicatorService(aggregator=aggregator, db_service=saver)
+    service.LEASE_SECONDS = 0.03  # Renewed every 10 ms
+
+    running = asyncio.create_task(service.recalculate_date_range(START, END))
+    while not saver.checkpoints:
+        await asyncio.sleep(0.001)
+    run_key = next(iter(saver.runs))
+    saver.runs[run_key] = "other-owner"  # The lease expired and another run took it
+    checkpointed = len(saver.checkpoints[run_key])
+
+    result = await running
+
+    assert result["status"] == "error" and "lease" in result["error"]
+    await asyncio.sleep(0)
+    assert aggregator.in_flight == 0  # Closing the stream stopped the workers
+    assert len(saver.checkpoints[run_key]) <= checkpointed + 1
+    assert saver.runs == {run_key: "other-owner"}
+
+
+# ========== Postgres ==========
+
+pg = pytest.mark.skipif(
+    os.environ.get("PULSE_PG_TESTS") != "1",
+    reason="set PULSE_PG_TESTS=1 and PG_* to a scratch database with res/sql applied",
+)
+
+
+@pytest_asyncio.fixture
+async def pg_run_key():
+    from ....utils.config import Config
+    from ....utils.db import global_engines
+    from ....utils import execute_query
+
+    await Config.init(yaml_filenames=None)
+    run_key = f"test-recalc-{uuid.uuid4().hex[:12]}"
+    yield run_key
+    for table in ("aggregate_recalc_checkpoint", "aggregate_recalc_run"):
+        await execute_query(f"DELETE FROM {table} WHERE run_key = :run_key", {"run_key": run_key}, log_sql=False)
+    # Engines are bound to this test's event loop
+    for engine in global_engines.values():
+        await engine.dispose()
+    global_engines.clear()
+
+
+@pg
+@pytest.mark.asyncio
+async def test_pg_run_lease_admits_one_owner_until_released_or_expired(pg_run_key: str) -> None:
+    db = AggregateDatabaseService()
+
+    results = await asyncio.gather(*(db.acquire_recalc_run(pg_run_key, f"owner-{n}", 60) for n in range(4)))
+    assert sorted(results) == [False, False, False, True]
+    owner = f"owner-{results.index(True)}"
+    assert await db.renew_recalc_run(pg_run_key, owner, 60)
+    assert not await db.renew_recalc_run(pg_run_key, "owner-x", 60)
+
+    await db.release_recalc_run(pg_run_key, "owner-x")  # Not the holder: no effect
+    assert not await db.acquire_recalc_run(pg_run_key, "owner-x", 60)
+    await db.release_recalc_run(pg_run_key, owner)
+    assert await db.acquire_recalc_run(pg_run_key, "owner-x", 0)
+
+    await asyncio.sleep(0.05)  # Expired leases can be taken over
+    assert await db.acquire_recalc_run(pg_run_key, "owner-y", 60)
+    assert not await db.renew_recalc_run(pg_run_key, "owner-x", 60)
+
+
+@pg
+@pytest.mark.asyncio
+async def test_pg_checkpoints_keep_the_exact_users_of_each_unit(pg_run_key: str) -> None:
+    db = AggregateDatabaseService()
+    unit = RecalcUnit(datetime(2025, 1, 1), datetime(2025, 1, 31), ["u00", "u02", "u05"])
+
+    await db.save_recalc_checkpoint(pg_run_key, unit, 12)
+    await db.save_recalc_checkpoint(pg_run_key, unit, 15)
+    rows = await db.get_recalc_checkpoints(pg_run_key)
+
+    assert [(r["range_start"], list(r["user_ids"]), r["summaries"]) for r in rows] == [
+        (datetime(2025, 1, 1), ["u00", "u02", "u05"], 15)
+    ]
+    await db.clear_recalc_checkpoints(pg_run_key)
+    assert await db.get_recalc_checkpoints(pg_run_key) == []
@@ -0,0 +1,82 @@
+"""
+Indicator Resolver Micro-benchmark
+
+Compares the former linear scan over StandardIndicator with the precompiled
+resolve_indicator() index on a synthetic stream of indicator names
+(canonical, differently-cased and unknown names).
+
+Usage:
+    python3 -m mirobody.pulse.core.bench_indicators_info [--names 1000000]
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from typing import Callable, List, Optional
+
+from .indicators_info import StandardIndicator, resolve_indicator
+
+
+def _linear_scan(indicator: str) -> Optional[StandardIndicator]:
+    """The pre-index implementation of get_indicator_by_str"""
+    if not indicator:
+        return None
+
+    for std_indicator in StandardIndicator:
+        if std_indicator.value.name == indicator:
+            return std_indicator
+    logging.warning(f"indicator {indicator} not found in StandardIndicator")
+    return None
+
+
+def _build_stream(count: int, seed: int = 42) -> List[str]:
+    """80% canonical, 10% lowercased, 10% drawn from 1000 unknown names"""
+    rnd = random.Random(seed)
+    names = [i.value.name for i in StandardIndicator if i.value.name]
+    unknown = [f"vendorMetric{i}" for i in range(1000)]
+
+    stream = []
+    for _ in range(count):
+        roll = rnd.random()
+        if roll < 0.8:
+            stream.append(rnd.choice(names))
+        elif roll < 0.9:
+            stream.append(rnd.choice(names).lower())
+        else:
+            stream.append(rnd.choice(unknown))
+    return stream
+
+
+def _measure(name: str, fn: Callable[[str], object], stream: List[str]) -> float:
+    start = time.perf_counter()
+    for item in stream:
+        fn(item)
+    elapsed = time.perf_counter() - start
+    rate = len(stream) / elapsed
+    print(f"{name:<18} {len(stream):>10,} lookups  {elapsed:8.3f}s  {rate:>14,.0f} lookups/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=1_000_000, help="Stream length")
+    parser.add_argument("--scan-names", type=int, default=None, help="Stream length for the (slow) linear scan, defaults to --names")
+    args = parser.parse_args()
+
+    stream = _build_stream(args.names)
+
+    # Misses would otherwise flood stderr on the linear scan
+    logging.disable(logging.WARNING)
+    try:
+        before = _measure("linear scan", _linear_scan, stream[:args.scan_names or args.names])
+        after = _measure("resolve_indicator", resolve_indicator, stream)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    print(f"speedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Query Cache Load Test: unbounded dict vs bounded QueryCache
+
+Pushes --keys distinct cache keys (one small result row each, as in
+per-user stats queries) through CacheableDatabaseService.cached_query with
+the database replaced by an in-memory responder, in a fresh process per
+mode, and prints resident memory every --keys/8 keys:
+
+  - previous: the former dict + timestamp dict, expired only on access
+  - bounded:  QueryCache with the default entry and byte limits
+
+Then, on a cache holding --invalidate-entries entries spread over 1000
+users, times dropping one user's entries (substring scan vs tag index), and
+fires --concurrency simultaneous misses on one key to count the queries run.
+
+Usage:
+    python3 -m mirobody.pulse.core.bench_query_cache [--keys 2000000] [--invalidate-entries 100000] [--concurrency 100]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+from typing import Any, Dict, List, Optional
+
+from .database import CacheableDatabaseService
+
+_PAGE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * _PAGE / 2**20
+
+
+class _Service(CacheableDatabaseService):
+    """Answers every query from memory, after yielding once like a real round trip."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.queries = 0
+
+    async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None, db_config: Any = None):
+        self.queries += 1
+        await asyncio.sleep(0)
+        return [{"user_id": params["user_id"], "total_records": self.queries, "source": "oura"}]
+
+
+class _PreviousService(_Service):
+    """The former CacheableDatabaseService cache: two unbounded dicts."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._cache: Dict[str, Any] = {}
+        self._cache_timestamps: Dict[str, float] = {}
+
+    def _get_cache(self, cache_key: str) -> Optional[Any]:
+        if cache_key in self._cache_timestamps and time.time() - self._cache_timestamps[cache_key] < self.cache_ttl:
+            return self._cache.get(cache_key)
+        return None
+
+    def _set_cache(self, cache_key: str, value: Any, ttl: Optional[float] = None, tags: Optional[Dict[str, Any]] = None) -> None:
+        self._cache[cache_key] = value
+        self._cache_timestamps[cache_key] = time.time()
+
+    def _clear_cache(self, pattern: Optional[str] = None) -> None:
+        for key in [key for key in self._cache.keys() if pattern in key]:
+            self._cache.pop(key, None)
+            self._cache_timestamps.pop(key, None)
+
+    async def cached_query(self, cache_key, query, params=None, use_cache=True, ttl=None, tags=None):
+        cached = self._get_cache(cache_key)
+        if cached is not None:
+            return cached
+        result = await self.execute_query(query, params)
+        self._set_cache(cache_key, result)
+        return result
+
+
+_QUERY = "SELECT COUNT(*) FROM th_series_data WHERE user_id = :user_id"
+
+
+async def _fill(service: _Service, start: int, count: int, users: int = 0) -> None:
+    for i in range(start, start + count):
+        user_id = f"user_{i % users if users else i}"
+        await service.cached_query(f"stats:{user_id}:{i}", _QUERY, {"user_id": user_id}, tags={"user_id": user_id})
+
+
+async def _child(mode: str, keys: int, invalidate_entries: int, concurrency: int) -> Dict[str, Any]:
+    service = _PreviousService() if mode == "previous" else _Service()
+    rss: List[float] = [_rss_mb()]
+    step = max(1, keys // 8)
+    start = time.perf_counter()
+    for done in range(0, keys, step):
+        await _fill(service, done, min(step, keys - done))
+        rss.append(_rss_mb())
+    fill_s = time.perf_counter() - start
+
+    # Invalidation on a cache that holds invalidate_entries entries for 1000 users
+    service = _PreviousService() if mode == "previous" else _Service(max_entries=invalidate_entries * 2)
+    await _fill(service, 0, invalidate_entries, users=1000)
+    start = time.perf_counter()
+    if mode == "previous":
+        service._clear_cache("stats:user_7:")
+    else:
+        service._invalidate_cache(user_id="user_7")
+    invalidate_ms = (time.perf_counter() - start) * 1e3
+
+    service = _PreviousService() if mode == "previous" else _Service()
+    await asyncio.gather(*(service.cached_query("stats:hot", _QUERY, {"user_id": "hot"}) for _ in range(concurrency)))
+
+    return {"rss": rss, "fill_s": fill_s, "invalidate_ms": invalidate_ms, "queries": service.queries}
+
+
+def _run_child(mode: str, args: argparse.Namespace, results: Any) -> None:
+    results.put(asyncio.run(_child(mode, args.keys, args.invalidate_entries, args.concurrency)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=2_000_000)
+    parser.add_argument("--invalidate-entries", type=int, default=100_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{args.keys:,} distinct keys; RSS MB sampled every {args.keys // 8:,} keys")
+    summary = []
+    for mode in ("previous", "bounded"):
+        # Fresh process per mode so one run's heap does not carry into the next.
+        ctx = multiprocessing.get_context("fork")
+        results = ctx.Queue()
+        child = ctx.Process(target=_run_child, args=(mode, args, results))
+        child.start()
+        r = results.get()
+        child.join()
+        print(f"{mode:<9} " + " ".join(f"{mb:>7.0f}" for mb in r["rss"]))
+        summary.append((mode, r))
+
+    print()
+    print(f"{'mode':<9} {'fill s':>8} {'invalidate 1 user ms':>21} {'queries for ' + str(args.concurrency) + ' misses':>22}")
+    for mode, r in summary:
+        print(f"{mode:<9} {r['fill_s']:>8.2f} {r['invalidate_ms']:>21.2f} {r['queries']:>22}")
+
+
+if __name__ == "__main__":
+    main()
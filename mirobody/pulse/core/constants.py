@@ -177,6 +177,12 @@ class CacheConfig:
     PROVIDER_CACHE_TTL = 24 * 60 * 60  # Provider cache 24 hours
     USER_CACHE_TTL = 5 * 60  # User info cache 5 minutes
 
+    # In-process query cache (CacheableDatabaseService), overridable with the
+    # QUERY_CACHE_MAX_ENTRIES / QUERY_CACHE_MAX_BYTES config keys
+    QUERY_CACHE_TTL = 5 * 60
+    QUERY_CACHE_MAX_ENTRIES = 10000
+    QUERY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
 
 class CommonConfig:
     """Common configuration"""
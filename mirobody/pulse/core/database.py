@@ -10,7 +10,12 @@ from abc import ABC
 from typing import Any, Dict, List, Optional
 
 from ...utils import execute_query
+from ...utils.config import safe_read_cfg
 from ...utils.db import global_engines, global_config
+from .constants import CacheConfig
+from .aggregate_indicator.dirty_buckets import dirty_bucket_mark
+from .monitor.ingest_ledger import LEDGER_APPEND
+from .query_cache import QueryCache
 
 from sqlalchemy import text
 
@@ -269,54 +274,69 @@ class BaseDatabaseService(ABC):
 class CacheableDatabaseService(BaseDatabaseService):
     """
     Cacheable database service base class
+
+    Results are kept in a bounded QueryCache (LRU by entry count and estimated
+    bytes, per-entry TTL). Tag entries with user_id/provider/table when storing
+    them so writes can invalidate just those entries with _invalidate_cache().
     """
 
-    def __init__(self, db_config=None, cache_ttl: int = 300):
+    def __init__(
+            self,
+            db_config=None,
+            cache_ttl: int = 300,
+            max_entries: Optional[int] = None,
+            max_bytes: Optional[int] = None,
+    ):
         """
         Initialize cacheable database service
 
         Args:
             db_config: Database configuration
             cache_ttl: Cache time to live (seconds)
+            max_entries: Maximum cached results, defaults to QUERY_CACHE_MAX_ENTRIES
+            max_bytes: Maximum estimated cache size in bytes, defaults to QUERY_CACHE_MAX_BYTES
         """
         super().__init__(db_config)
         self.cache_ttl = cache_ttl
-        self._cache: Dict[str, Any] = {}
-        self._cache_timestamps: Dict[str, float] = {}
+        self._cache = QueryCache(
+            max_entries=max_entries if max_entries is not None else int(
+                safe_read_cfg("QUERY_CACHE_MAX_ENTRIES") or CacheConfig.QUERY_CACHE_MAX_ENTRIES
+            ),
+            max_bytes=max_bytes if max_bytes is not None else int(
+                safe_read_cfg("QUERY_CACHE_MAX_BYTES") or CacheConfig.QUERY_CACHE_MAX_BYTES
+            ),
+            ttl=cache_ttl,
+        )
 
     def _is_cache_valid(self, cache_key: str) -> bool:
         """Check if cache is valid"""
-        import time
-
-        if cache_key not in self._cache_timestamps:
-            return False
-        return (time.time() - self._cache_timestamps[cache_key]) < self.cache_ttl
-
-    def _set_cache(self, cache_key: str, value: Any) -> None:
-        """Set cache"""
-        import time
+        return cache_key in self._cache
 
-        self._cache[cache_key] = value
-        self._cache_timestamps[cache_key] = time.time()
+    def _set_cache(
+            self,
+            cache_key: str,
+            value: Any,
+            ttl: Optional[float] = None,
+            tags: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Set cache, optionally with its own ttl and invalidation tags"""
+        self._cache.set(cache_key, value, ttl=ttl, tags=tags)
 
     def _get_cache(self, cache_key: str) -> Optional[Any]:
         """Get cache"""
-        if self._is_cache_valid(cache_key):
-            return self._cache.get(cache_key)
-        return None
+        return self._cache.get(cache_key)
 
     def _clear_cache(self, pattern: Optional[str] = None) -> None:
-        """Clear cache"""
-        if pattern:
-            # Clear caches matching pattern
-            keys_to_remove = [key for key in self._cache.keys() if pattern in key]
-            for key in keys_to_remove:
-                self._cache.pop(key, None)
-                self._cache_timestamps.pop(key, None)
-        else:
-            # Clear all caches
-            self._cache.clear()
-            self._cache_timestamps.clear()
+        """Clear cache, all of it or the keys containing pattern (scans every key)"""
+        self._cache.clear(pattern)
+
+    def _invalidate_cache(self, **tags: Any) -> int:
+        """Drop cached results tagged with any of the given tags, e.g. user_id=..., table=..."""
+        return self._cache.invalidate_tags(**tags)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size of the query cache"""
+        return self._cache.stats()
 
     async def cached_query(
             self,
@@ -324,33 +344,31 @@ class CacheableDatabaseService(BaseDatabaseService):
             query: str,
             params: Optional[Dict[str, Any]] = None,
             use_cache: bool = True,
+            ttl: Optional[float] = None,
+            tags: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Cached query support
 
+        Concurrent misses on the same cache key run the query once.
+
         Args:
             cache_key: Cache key
             query: SQL query
             params: Query parameters
             use_cache: Whether to use cache
+            ttl: Time to live (seconds), defaults to cache_ttl
+            tags: Invalidation tags, e.g. {"user_id": user_id, "table": "series_data"}
 
         Returns:
             Query result
         """
-        if use_cache:
-            cached_result = self._get_cache(cache_key)
-            if cached_result is not None:
-                logging.info(f"Cache hit for key: {cache_key}")
-                return cached_result
-
-        # Cache miss, execute query
-        result = await self.execute_query(query, params)
-
-        if use_cache:
-            self._set_cache(cache_key, result)
-            logging.info(f"Cache set for key: {cache_key}")
+        if not use_cache:
+            return await self.execute_query(query, params)
 
-        return result
+        return await self._cache.get_or_load(
+            cache_key, lambda: self.execute_query(query, params), ttl=ttl, tags=tags,
+        )
 
 
 class ManageDatabaseService(CacheableDatabaseService):
@@ -417,18 +435,18 @@ class ManageDatabaseService(CacheableDatabaseService):
         # overestimates I/O cost. With seqscan off, it uses Bitmap Scan (3s).
         # Note: random_page_cost=1.1 is worse here — it picks Index Scan (per-row
         # random lookup, 43s) instead of Bitmap Scan (batch sequential, 3s).
-        series_cache_key = "yearly_stats_series"
-        cached = self._get_cache(series_cache_key)
-        if cached is not None:
-            series_results = cached
-        else:
-            series_results = await self.execute_query_with_session_params(
+        series_results = await self._cache.get_or_load(
+            "yearly_stats_series",
+            lambda: self.execute_query_with_session_params(
                 series_query, params,
                 session_params=["SET LOCAL enable_seqscan = off"],
-            )
-            self._set_cache(series_cache_key, series_results)
+            ),
+            tags={"table": "series_data"},
+        )
 
-        summary_results = await self.cached_query("yearly_stats_summary", summary_query, params)
+        summary_results = await self.cached_query(
+            "yearly_stats_summary", summary_query, params, tags={"table": "th_series_data"},
+        )
 
         combined = (series_results or []) + (summary_results or [])
         combined.sort(key=lambda r: r.get("total_records", 0), reverse=True)
@@ -561,14 +579,26 @@ class ManageDatabaseService(CacheableDatabaseService):
               AND source_table = ''
             """
         else:
-            # Update series_data for series indicators
-            query = """
-            UPDATE series_data 
-            SET 
-                indicator = :new_indicator,
-                update_time = CURRENT_TIMESTAMP
-            WHERE indicator = :old_indicator 
-              AND source = :source
+            # Update series_data for series indicators, moving the rows'
+            # counts between indicators in the monitor ingest ledger and
+            # marking the renamed indicator's aggregate buckets dirty
+            query = f"""
+            WITH moved AS (
+                UPDATE series_data 
+                SET 
+                    indicator = :new_indicator,
+                    update_time = CURRENT_TIMESTAMP
+                WHERE indicator = :old_indicator 
+                  AND source = :source
+                RETURNING user_id, indicator, source, time, value, timezone, task_id
+            ),
+            dirty AS ({dirty_bucket_mark("moved")}),
+            changes AS (
+                SELECT user_id, indicator, source, time, value, task_id, 1 AS sign FROM moved
+                UNION ALL
+                SELECT user_id, CAST(:old_indicator AS varchar), source, time, value, task_id, -1 FROM moved
+            )
+            {LEDGER_APPEND}
             """
 
         params = {
@@ -578,6 +608,7 @@ class ManageDatabaseService(CacheableDatabaseService):
         }
 
         await self.execute_query(query, params)
+        self._invalidate_cache(table="th_series_data" if is_summary else "series_data")
 
         # Verify update result
         verify_result = await self.get_existing_indicator_count(new_indicator, source)
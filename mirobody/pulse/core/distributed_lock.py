@@ -2,11 +2,11 @@
 Distributed lock manager for Theta Pull tasks
 """
 
-import logging, uuid
+import asyncio, hashlib, logging, uuid
 import redis.asyncio
 
 from datetime import datetime
-from typing import Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
 
 #-----------------------------------------------------------------------------
 
@@ -306,5 +306,241 @@ class PullTaskLockManager:
             return {"locked": False, "error": str(e)}
 
 
+    # ==================== Per-bucket leases ====================
+    #
+    # Leasing mode replaces the one provider-wide lock with short leases on
+    # user buckets, so every instance can pull the same provider at once:
+    #
+    #   theta_pull_lease:{slug}:{bucket}          SET NX PX, value = holder token
+    #   theta_pull_done:{slug}:{round}:{bucket}   set once the bucket is pulled
+    #
+    # A round is one execution interval. Holders renew their leases with a
+    # heartbeat; when an instance dies its leases expire and the buckets it
+    # had not finished are claimed again by the others in the same round.
+
+    _RENEW_SCRIPT = 'if redis.call("get", KEYS[1]) == ARGV[1] then return redis.call("pexpire", KEYS[1], ARGV[2]) else return 0 end'
+    _RELEASE_SCRIPT = 'if redis.call("get", KEYS[1]) == ARGV[1] then return redis.call("del", KEYS[1]) else return 0 end'
+
+    def _get_lease_key(self, provider_slug: str, bucket: int) -> str:
+        return f"theta_pull_lease:{provider_slug}:{bucket}"
+
+    def _get_done_key(self, provider_slug: str, round_id: str, bucket: int) -> str:
+        return f"theta_pull_done:{provider_slug}:{round_id}:{bucket}"
+
+    async def claim_buckets(
+        self,
+        redis_client,
+        provider_slug: str,
+        round_id: str,
+        buckets: Sequence[int],
+        limit: int,
+        lease_ms: int,
+    ) -> Dict[int, str]:
+        """
+        Lease up to `limit` buckets of this round that are neither done nor leased
+
+        Returns:
+            {bucket: lease token} for the buckets acquired
+        """
+        if not buckets or limit <= 0:
+            return {}
+
+        done = await redis_client.mget([self._get_done_key(provider_slug, round_id, b) for b in buckets])
+        claimed: Dict[int, str] = {}
+        for bucket, is_done in zip(buckets, done):
+            if is_done:
+                continue
+            token = f"{self.instance_id}:{uuid.uuid4().hex[:12]}"
+            if await redis_client.set(self._get_lease_key(provider_slug, bucket), token, px=lease_ms, nx=True):
+                claimed[bucket] = token
+                if len(claimed) >= limit:
+                    break
+        return claimed
+
+    async def leased_elsewhere(self, redis_client, provider_slug: str, round_id: str, buckets: Sequence[int]) -> List[int]:
+        """Buckets of this round that are not done but currently leased."""
+        if not buckets:
+            return []
+        done = await redis_client.mget([self._get_done_key(provider_slug, round_id, b) for b in buckets])
+        leases = await redis_client.mget([self._get_lease_key(provider_slug, b) for b in buckets])
+        return [b for b, is_done, lease in zip(buckets, done, leases) if not is_done and lease]
+
+    async def renew_lease(self, redis_client, provider_slug: str, bucket: int, token: str, lease_ms: int) -> bool:
+        """Extend a lease we still hold; False means it expired and may belong to someone else."""
+        key = self._get_lease_key(provider_slug, bucket)
+        return bool(await redis_client.eval(self._RENEW_SCRIPT, 1, key, token, lease_ms))
+
+    async def release_lease(self, redis_client, provider_slug: str, bucket: int, token: str) -> bool:
+        key = self._get_lease_key(provider_slug, bucket)
+        return bool(await redis_client.eval(self._RELEASE_SCRIPT, 1, key, token))
+
+    async def mark_bucket_done(self, redis_client, provider_slug: str, round_id: str, bucket: int, ttl_seconds: int) -> None:
+        await redis_client.set(self._get_done_key(provider_slug, round_id, bucket), self.instance_id, ex=max(1, ttl_seconds))
+
+
+def user_bucket(user_id, bucket_count: int) -> int:
+    """Stable bucket of a user, identical on every instance."""
+    digest = hashlib.md5(str(user_id).encode()).digest()
+    return int.from_bytes(digest[:4], "big") % bucket_count
+
+
+class PullLeaseCoordinator:
+    """
+    Dispatches the user buckets of one provider round across instances
+
+    Every instance runs the coordinator for the same round. Each one keeps
+    `batch` buckets leased, works them concurrently, marks them done and
+    claims more until none are left, so throughput grows with the number
+    of instances. Bucket order is rotated per instance to reduce claim
+    contention. A bucket whose lease is lost mid-work is cancelled here and
+    left for whoever claims it next; a failed bucket is released undone, so
+    another instance retries it in the same round.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        provider_slug: str,
+        lock_manager: Optional["PullTaskLockManager"] = None,
+        lease_seconds: float = 60,
+        batch: int = 4,
+    ):
+        self.redis = redis_client
+        self.provider_slug = provider_slug
+        self.lock_manager = lock_manager or pull_task_lock_manager
+        self.lease_ms = max(1, int(lease_seconds * 1000))
+        self.batch = max(1, batch)
+
+        self.completed: List[int] = []
+        self.failed: List[int] = []
+        self.lost: List[int] = []
+
+    async def run(
+        self,
+        round_id: str,
+        buckets: Sequence[int],
+        work: Callable[[int], Awaitable[bool]],
+        round_ttl_seconds: int,
+    ) -> bool:
+        """
+        Pull buckets of `round_id` until none are left to claim
+
+        Args:
+            round_id: Identifier shared by all instances for this interval
+            buckets: Buckets that have users
+            work: Pulls one bucket; returns success
+            round_ttl_seconds: How long done markers are kept
+
+        Returns:
+            True if every bucket this instance worked on succeeded
+        """
+        if not buckets:
+            return True
+
+        offset = int(hashlib.md5(self.lock_manager.instance_id.encode()).hexdigest(), 16) % len(buckets)
+        order = list(buckets[offset:]) + list(buckets[:offset])
+        held: Dict[int, str] = {}
+        running: Dict[asyncio.Task, int] = {}
+        heartbeat = asyncio.create_task(self._heartbeat(held, running))
+        attempted: set = set()
+
+        try:
+            while True:
+                free = self.batch - len(running)
+                if free > 0:
+                    candidates = [b for b in order if b not in held and b not in attempted]
+                    claimed = await self.lock_manager.claim_buckets(
+                        self.redis, self.provider_slug, round_id, candidates, free, self.lease_ms
+                    )
+                    for bucket, token in claimed.items():
+                        held[bucket] = token
+                        attempted.add(bucket)
+                        running[asyncio.create_task(work(bucket))] = bucket
+
+                if not running:
+                    # Wait out buckets other instances are still working on:
+                    # if one of them dies, its leases expire and we take over.
+                    candidates = [b for b in order if b not in attempted]
+                    if not await self.lock_manager.leased_elsewhere(self.redis, self.provider_slug, round_id, candidates):
+                        break
+                    await asyncio.sleep(self.lease_ms / 3000)
+                    continue
+
+                finished, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    bucket = running.pop(task)
+                    token = held.pop(bucket, None)
+                    if task.cancelled():
+                        continue  # Lease lost; counted by the heartbeat
+                    if task.exception() is not None:
+                        logging.error(f"Pull bucket {self.provider_slug}/{bucket} failed: {task.exception()}")
+                        ok = False
+                    else:
+                        ok = bool(task.result())
+                    if ok:
+                        await self.lock_manager.mark_bucket_done(
+                            self.redis, self.provider_slug, round_id, bucket, round_ttl_seconds
+                        )
+                        self.completed.append(bucket)
+                    else:
+                        self.failed.append(bucket)
+                    if token:
+                        await self.lock_manager.release_lease(self.redis, self.provider_slug, bucket, token)
+        finally:
+            heartbeat.cancel()
+            for task in running:
+                task.cancel()
+            await asyncio.gather(heartbeat, *running, return_exceptions=True)
+            for bucket, token in list(held.items()):
+                try:
+                    await self.lock_manager.release_lease(self.redis, self.provider_slug, bucket, token)
+                except Exception:
+                    pass
+
+        logging.info(
+            f"Lease round {self.provider_slug}/{round_id}: {len(self.completed)} buckets done, "
+            f"{len(self.failed)} failed, {len(self.lost)} lost (instance {self.lock_manager.instance_id})"
+        )
+        return not self.failed and not self.lost
+
+    async def _heartbeat(self, held: Dict[int, str], running: Dict[asyncio.Task, int]) -> None:
+        interval = self.lease_ms / 3000
+        while True:
+            await asyncio.sleep(interval)
+            for bucket, token in list(held.items()):
+                try:
+                    renewed = await self.lock_manager.renew_lease(self.redis, self.provider_slug, bucket, token, self.lease_ms)
+                except Exception as e:
+                    logging.warning(f"Lease renewal failed for {self.provider_slug}/{bucket}: {e}")
+                    continue  # Retry on the next beat; the lease outlives several beats
+                if not renewed:
+                    logging.warning(f"Lease lost for {self.provider_slug}/{bucket}, abandoning bucket")
+                    held.pop(bucket, None)
+                    self.lost.append(bucket)
+                    for task, task_bucket in running.items():
+                        if task_bucket == bucket:
+                            task.cancel()
+
+
+async def run_leased_round(
+    provider_slug: str,
+    round_id: str,
+    buckets: Sequence[int],
+    work: Callable[[int], Awaitable[bool]],
+    round_ttl_seconds: int,
+    lease_seconds: float = 60,
+    batch: int = 4,
+) -> bool:
+    """Run a PullLeaseCoordinator round on the shared Redis client."""
+    redis_client = await get_redis_client()
+    if redis_client is None:
+        logging.warning(f"Redis not available for {provider_slug}, pulling every bucket locally")
+        results = [await work(bucket) for bucket in buckets]
+        return all(results)
+
+    coordinator = PullLeaseCoordinator(redis_client, provider_slug, lease_seconds=lease_seconds, batch=batch)
+    return await coordinator.run(round_id, buckets, work, round_ttl_seconds)
+
+
 # Global lock manager instance
 pull_task_lock_manager = PullTaskLockManager()
@@ -8,7 +8,8 @@ import logging
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional, Set, Any
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set, Tuple, Any
 
 
 # ============================================================================
@@ -2948,6 +2949,89 @@ def normalize_indicator_name(raw_name: str) -> str:
     return _INDICATOR_NAME_NORMALIZE.get(raw_name.lower(), raw_name)
 
 
+@dataclass(frozen=True)
+class IndicatorEntry:
+    """Precompiled flags for one StandardIndicator, resolved once at import time"""
+    indicator: 'StandardIndicator'
+    name: str
+    standard_unit: str
+    is_summary: bool
+    is_series: bool
+    aggregation_methods: Tuple[str, ...]
+
+
+def _compile_indicator_index() -> Mapping[str, IndicatorEntry]:
+    """
+    Build the frozen name → IndicatorEntry index
+
+    Keys are canonical names (first definition wins, as with the former linear
+    scan over StandardIndicator), enum aliases, and the lowercase keys of
+    _INDICATOR_NAME_NORMALIZE for case-insensitive resolution.
+    """
+    index: Dict[str, IndicatorEntry] = {}
+
+    # __members__ also yields enum aliases
+    for member in StandardIndicator.__members__.values():
+        info = member.value
+        if not info.name or info.name in index:
+            continue
+        index[info.name] = IndicatorEntry(
+            indicator=member,
+            name=info.name,
+            standard_unit=info.standard_unit,
+            is_summary=info.data_type in (HealthDataType.SUMMARY, HealthDataType.MIX),
+            is_series=info.data_type in (HealthDataType.SERIES, HealthDataType.MIX),
+            aggregation_methods=tuple(info.aggregation_methods or ()),
+        )
+
+    for lower_name, canonical_name in _INDICATOR_NAME_NORMALIZE.items():
+        index.setdefault(lower_name, index[canonical_name])
+
+    return MappingProxyType(index)
+
+
+_INDICATOR_INDEX: Mapping[str, IndicatorEntry] = _compile_indicator_index()
+
+# Unknown names already warned about; bounded so junk input cannot grow it forever
+_UNKNOWN_INDICATOR_CACHE_SIZE = 10000
+_unknown_indicators: Set[str] = set()
+
+
+def _warn_unknown_indicator(indicator: str) -> None:
+    """Log a miss at most once per name per process"""
+    if indicator in _unknown_indicators:
+        return
+    if len(_unknown_indicators) >= _UNKNOWN_INDICATOR_CACHE_SIZE:
+        return
+    _unknown_indicators.add(indicator)
+    logging.warning(f"indicator {indicator} not found in StandardIndicator")
+    if len(_unknown_indicators) == _UNKNOWN_INDICATOR_CACHE_SIZE:
+        logging.warning(f"Unknown indicator cache full ({_UNKNOWN_INDICATOR_CACHE_SIZE}), further misses will not be logged")
+
+
+def resolve_indicator(indicator: str) -> Optional[IndicatorEntry]:
+    """
+    Resolve an indicator string to its precompiled entry in O(1)
+
+    Exact canonical names are tried first, then a case-insensitive match.
+
+    Args:
+        indicator: The indicator string to search for
+
+    Returns:
+        IndicatorEntry if found, None otherwise
+    """
+    if not indicator or not isinstance(indicator, str):
+        return None
+
+    entry = _INDICATOR_INDEX.get(indicator)
+    if entry is None:
+        entry = _INDICATOR_INDEX.get(indicator.lower())
+        if entry is None:
+            _warn_unknown_indicator(indicator)
+    return entry
+
+
 def is_summary_indicator(indicator: str) -> bool:
     """
     Check if an indicator is a summary indicator
@@ -2958,12 +3042,8 @@ def is_summary_indicator(indicator: str) -> bool:
     if not indicator:
         return False
 
-    # First check if it's a defined standard indicator
-    std_indicator = get_indicator_by_str(indicator)
-    if std_indicator is not None:
-        return std_indicator.value.data_type == HealthDataType.SUMMARY or std_indicator.value.data_type == HealthDataType.MIX
-
-    return False
+    entry = resolve_indicator(indicator)
+    return entry is not None and entry.is_summary
 
 
 def is_series_indicator(indicator: str) -> bool:
@@ -2976,11 +3056,8 @@ def is_series_indicator(indicator: str) -> bool:
     if not indicator:
         return True
 
-    std_indicator = get_indicator_by_str(indicator)
-    if std_indicator is not None:
-        return std_indicator.value.data_type == HealthDataType.SERIES or std_indicator.value.data_type == HealthDataType.MIX
-
-    return False
+    entry = resolve_indicator(indicator)
+    return entry is not None and entry.is_series
 
 
 def is_valid_indicator(indicator: str) -> bool:
@@ -3006,14 +3083,8 @@ def get_indicator_by_str(indicator: str) -> Optional['StandardIndicator']:
     Returns:
         StandardIndicator enum member if found, None otherwise
     """
-    if not indicator:
-        return None
-
-    for std_indicator in StandardIndicator:
-        if std_indicator.value.name == indicator:
-            return std_indicator
-    logging.warning(f"indicator {indicator} not found in StandardIndicator")
-    return None
+    entry = resolve_indicator(indicator)
+    return entry.indicator if entry is not None else None
 
 
 def get_all_indicators_info() -> Dict[str, Any]:
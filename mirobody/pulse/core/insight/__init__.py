@@ -6,7 +6,7 @@ Recipe-based health insight detection system.
 Core modules:
 - models: All data structures (dataclass) for inter-module contracts
 - indicator_aliases: Indicator category -> actual DB indicator name mapping
-- baseline_engine: EWMA baseline computation + freeze + tag inference
+- baseline_engine: EWMA baseline computation + freeze + tag inference (batch kernel)
 - recipe_registry: Recipe registration + matching
 - recipes/: Individual recipe implementations
 - database_service: user_behavior_insight table read/write
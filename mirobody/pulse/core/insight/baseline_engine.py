@@ -6,11 +6,17 @@ Uses EWMA (Exponentially Weighted Moving Average) with freeze logic.
 
 Input:  user_id + target_date + raw daily values from th_series_data
 Output: UserProfile (baselines + tags + densities + available_categories)
+
+For many series and target dates at once (simulation, cohort runs)
+compute_baselines_batch() runs the same recurrence as a numpy kernel over all
+windows in lockstep.
 """
 
 import logging
 from datetime import date, timedelta
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
 
 from .indicator_aliases import resolve_all
 from .models import (
@@ -37,6 +43,108 @@ TAG_RULES = [
 ]
 
 
+# =============================================================================
+# Batch kernel
+# =============================================================================
+
+class BaselineBatch(NamedTuple):
+    """Per-window results of ewma_baseline_kernel, one element per window."""
+    mean: np.ndarray           # EWMA baseline (unrounded)
+    std: np.ndarray            # seed std, 1.0 when the seed had no spread
+    frozen: np.ndarray         # bool
+    frozen_at: np.ndarray      # index into values of the value that froze it, -1 if not frozen
+    data_days: np.ndarray      # values in the window
+    valid: np.ndarray          # False where the window has fewer than 3 values
+
+
+def ewma_baseline_kernel(
+    values: np.ndarray,
+    starts: np.ndarray,
+    counts: np.ndarray,
+    alpha: float = 0.1,
+    freeze_sigma: float = 2.0,
+    freeze_min_days: int = 3,
+    unfreeze_sigma: float = 1.0,
+    unfreeze_min_days: int = 7,
+) -> BaselineBatch:
+    """EWMA + freeze baseline for many windows at once.
+
+    Window i is values[starts[i]:starts[i] + counts[i]] (date order). All
+    windows are stepped in lockstep, longest first, so step j only touches
+    the windows that still have a j-th value. Same arithmetic, in the same
+    order, as BaselineEngine._compute_baseline; only the seed mean/std are
+    summed in float64 instead of statistics' exact arithmetic.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    rows = len(starts)
+
+    order = np.argsort(-counts, kind="stable")
+    starts_s, counts_s = starts[order], counts[order]
+    seed_n = np.minimum(np.maximum(counts_s // 3, 7), counts_s)
+    width = int(counts_s[0]) if rows else 0
+    active = np.searchsorted(-counts_s, -np.arange(width), side="left")  # active[j]: windows with > j values
+
+    # Seed: mean and sample std of the leading seed_n values
+    seed_width = int(seed_n.max()) if rows else 0
+    total = np.zeros(rows)
+    for j in range(seed_width):
+        m = active[j]
+        total[:m] += np.where(j < seed_n[:m], values.take(starts_s[:m] + j, mode="clip"), 0.0)
+    seed_mean = total / np.maximum(seed_n, 1)
+    squares = np.zeros(rows)
+    for j in range(seed_width):
+        m = active[j]
+        delta = values.take(starts_s[:m] + j, mode="clip") - seed_mean[:m]
+        squares[:m] += np.where(j < seed_n[:m], delta * delta, 0.0)
+    std = np.sqrt(squares / np.maximum(seed_n - 1, 1))
+    std = np.where(std > 0, std, 1.0)
+
+    baseline = seed_mean.copy()
+    frozen = np.zeros(rows, dtype=bool)
+    frozen_at = np.full(rows, -1, dtype=np.int64)
+    deviated = np.zeros(rows, dtype=np.int64)
+    normal = np.zeros(rows, dtype=np.int64)
+    freeze_limit = freeze_sigma * std
+    unfreeze_limit = unfreeze_sigma * std
+
+    for j in range(width):
+        m = active[j]
+        pos = starts_s[:m] + j
+        x = values.take(pos, mode="clip")
+        b, fz, dv, nm = baseline[:m], frozen[:m], deviated[:m], normal[:m]
+        deviation = np.abs(x - b)
+
+        # Not frozen: count deviated days (freeze) or fold the value in
+        exceed = ~fz & (deviation > freeze_limit[:m])
+        within = ~fz & ~exceed
+        # Frozen: count normal days until it thaws
+        back = fz & (deviation <= unfreeze_limit[:m])
+
+        dv[:] = np.where(exceed, dv + 1, np.where(within, 0, dv))
+        nm[:] = np.where(exceed | (fz & ~back), 0, np.where(within | back, nm + 1, nm))
+        freeze = exceed & (dv >= freeze_min_days)
+        thaw = back & (nm >= unfreeze_min_days)
+        dv[thaw] = 0
+
+        update = within | thaw
+        b[:] = np.where(update, alpha * x + (1 - alpha) * b, b)
+        fz[:] = (fz | freeze) & ~thaw
+        frozen_at[:m] = np.where(freeze, pos, np.where(thaw, -1, frozen_at[:m]))
+
+    inverse = np.empty(rows, dtype=np.int64)
+    inverse[order] = np.arange(rows)
+    return BaselineBatch(
+        mean=baseline[inverse],
+        std=std[inverse],
+        frozen=frozen[inverse],
+        frozen_at=frozen_at[inverse],
+        data_days=counts,
+        valid=counts >= 3,
+    )
+
+
 # =============================================================================
 # Baseline Engine
 # =============================================================================
@@ -209,6 +317,75 @@ class BaselineEngine:
             data_days=len(relevant),
         )
 
+    def compute_baselines_batch(
+        self,
+        series: Sequence[Tuple[str, str, List[Tuple[date, float]]]],
+        target_dates: Sequence[date],
+        batch_windows: int = 1 << 18,
+    ) -> List[List[Optional[BaselineResult]]]:
+        """Baselines for every series at every target date in one vectorized pass.
+
+        Equivalent to calling _compute_baseline(category, indicator_name, values, t)
+        for each series and each t, without the per-value Python loop.
+
+        Args:
+            series: (category, indicator_name, values sorted by date) per series
+            target_dates: Dates to compute baselines for
+            batch_windows: Windows per kernel call, bounds temporary memory
+
+        Returns:
+            result[i][t]: BaselineResult (or None) for series[i] at target_dates[t]
+        """
+        targets = np.array([t.toordinal() for t in target_dates], dtype=np.int64)
+        lookback = self.baseline_lookback_days
+
+        days_parts: List[np.ndarray] = []
+        values_parts: List[np.ndarray] = []
+        starts = np.empty((len(series), len(targets)), dtype=np.int64)
+        counts = np.empty((len(series), len(targets)), dtype=np.int64)
+        offset = 0
+        for i, (_, _, values) in enumerate(series):
+            days = np.fromiter((d.toordinal() for d, _ in values), dtype=np.int64, count=len(values))
+            lo = np.searchsorted(days, targets - lookback, side="left")
+            hi = np.searchsorted(days, targets, side="right")
+            starts[i] = offset + lo
+            counts[i] = hi - lo
+            days_parts.append(days)
+            values_parts.append(np.fromiter((v for _, v in values), dtype=np.float64, count=len(values)))
+            offset += len(values)
+
+        all_days = np.concatenate(days_parts) if days_parts else np.empty(0, dtype=np.int64)
+        all_values = np.concatenate(values_parts) if values_parts else np.empty(0)
+        starts, counts = starts.ravel(), counts.ravel()
+
+        width = len(targets)
+        categories = [category for category, _, _ in series]
+        indicator_names = [indicator_name for _, indicator_name, _ in series]
+        results: List[Optional[BaselineResult]] = []
+        for chunk in range(0, len(starts), batch_windows):
+            batch = ewma_baseline_kernel(
+                all_values, starts[chunk:chunk + batch_windows], counts[chunk:chunk + batch_windows],
+                alpha=self.alpha,
+                freeze_sigma=self.freeze_sigma,
+                freeze_min_days=self.freeze_min_days,
+                unfreeze_sigma=self.unfreeze_sigma,
+                unfreeze_min_days=self.unfreeze_min_days,
+            )
+            owners = (chunk + np.arange(len(batch.mean))) // width
+            frozen_since = np.where(batch.frozen_at >= 0, all_days.take(batch.frozen_at, mode="clip"), 0)
+            results.extend(
+                BaselineResult(
+                    categories[i], indicator_names[i], round(mean, 4), round(std, 4),
+                    frozen, date.fromordinal(since) if frozen else None, data_days,
+                ) if valid else None
+                for i, valid, mean, std, frozen, since, data_days in zip(
+                    owners.tolist(), batch.valid.tolist(), batch.mean.tolist(), batch.std.tolist(),
+                    batch.frozen.tolist(), frozen_since.tolist(), batch.data_days.tolist(),
+                )
+            )
+
+        return [results[i * width:(i + 1) * width] for i in range(len(series))]
+
     def _compute_density(
         self,
         category: str,
@@ -221,25 +398,90 @@ class BaselineEngine:
         recent = [(d, v) for d, v in values if cutoff <= d <= target_date]
         days_with_data = len(set(d for d, _ in recent))
 
-        if days_with_data >= 12:
-            level = DensityLevel.CONTINUOUS
-        elif days_with_data >= 7:
-            level = DensityLevel.INTERMITTENT
-        elif days_with_data > 0:
-            level = DensityLevel.SPARSE
-        else:
-            level = DensityLevel.NONE
-
         last_date = max((d for d, _ in recent), default=None) if recent else None
 
         return IndicatorDensity(
             category=category,
             indicator_name=indicator_name,
             days_with_data=days_with_data,
-            level=level,
+            level=self._density_level(days_with_data),
             last_data_date=last_date,
         )
 
+    @staticmethod
+    def _density_level(days_with_data: int) -> DensityLevel:
+        if days_with_data >= 12:
+            return DensityLevel.CONTINUOUS
+        elif days_with_data >= 7:
+            return DensityLevel.INTERMITTENT
+        elif days_with_data > 0:
+            return DensityLevel.SPARSE
+        return DensityLevel.NONE
+
+    def compute_profiles_batch(
+        self,
+        users: Dict[str, Tuple[Set[str], DailyValues]],
+        target_dates: Sequence[date],
+    ) -> Dict[str, List[UserProfile]]:
+        """Profiles for many users at many target dates in one vectorized pass.
+
+        Same profiles as compute(user_id, t, user_indicators, values in the
+        lookback window ending at t) for every user and t, with the baselines of
+        all users, categories and dates from one compute_baselines_batch() call
+        and densities counted with searchsorted over each series' days.
+
+        Args:
+            users: user_id -> (indicator names, daily values sorted by date); values
+                   may span the lookback before the first target date up to the last
+            target_dates: Dates to build profiles for
+
+        Returns:
+            user_id -> profiles aligned with target_dates
+        """
+        series: List[Tuple[str, str, List[Tuple[date, float]]]] = []
+        owners: List[str] = []
+        for user_id, (user_indicators, daily_values) in users.items():
+            for category, indicator_name in resolve_all(user_indicators).items():
+                values = daily_values.get(indicator_name)
+                if values:
+                    series.append((category, indicator_name, values))
+                    owners.append(user_id)
+
+        baselines = self.compute_baselines_batch(series, target_dates)
+        targets = np.array([t.toordinal() for t in target_dates], dtype=np.int64)
+        profiles = {
+            user_id: [UserProfile(user_id=user_id, target_date=t) for t in target_dates]
+            for user_id in users
+        }
+
+        for user_id, (category, indicator_name, values), row in zip(owners, series, baselines):
+            days = np.unique(np.fromiter((d.toordinal() for d, _ in values), dtype=np.int64, count=len(values)))
+            hi = np.searchsorted(days, targets, side="right")
+            in_lookback = (hi - np.searchsorted(days, targets - self.baseline_lookback_days, side="left")).tolist()
+            days_with_data = (hi - np.searchsorted(days, targets - self.density_lookback_days, side="left")).tolist()
+            last_days = days.take(hi - 1, mode="clip").tolist()
+
+            for profile, baseline, window, recent, last_day in zip(
+                profiles[user_id], row, in_lookback, days_with_data, last_days,
+            ):
+                if not window:
+                    continue  # No values in the lookback window: compute() skips the category too
+                if baseline and baseline.data_days >= 7:
+                    profile.baselines[category] = baseline
+                    profile.available_categories.append(category)
+                profile.densities[category] = IndicatorDensity(
+                    category=category,
+                    indicator_name=indicator_name,
+                    days_with_data=recent,
+                    level=self._density_level(recent),
+                    last_data_date=date.fromordinal(last_day) if recent else None,
+                )
+
+        for user_profiles in profiles.values():
+            for profile in user_profiles:
+                profile.tags = self._infer_tags(profile.baselines)
+        return profiles
+
     def _infer_tags(self, baselines: Dict[str, BaselineResult]) -> List[str]:
         """Infer user tags from baseline values."""
         tags = []
@@ -0,0 +1,94 @@
+"""
+Baseline Engine Benchmark: per-day scalar recompute vs batch kernel
+
+Simulates --users users with daily resting heart rate (gaps, anomaly
+episodes) over 90 days of history plus --days simulated days, and computes
+the baseline for every user at every simulated day, as the insight engine's
+simulation mode does when it slides one day at a time:
+
+  - scalar:      BaselineEngine._compute_baseline per user per day
+                 (recomputes the 90-day EWMA from scratch each time)
+  - batch:       BaselineEngine.compute_baselines_batch over --chunk users
+                 and all days per call (numpy kernel)
+
+scalar runs on the first --sample users and is extrapolated
+to --users; batch runs on all of them. Batch results for the sample are
+checked against scalar.
+
+Usage:
+    python3 -m mirobody.pulse.core.insight.bench_baseline_engine [--users 10000] [--days 365] [--sample 200]
+"""
+
+import argparse
+import random
+import time
+
+from datetime import date, timedelta
+from typing import List, Tuple
+
+from .baseline_engine import BaselineEngine
+
+_HISTORY_DAYS = 90
+_START = date(2024, 1, 1)
+
+
+def _user_values(seed: int, days: int) -> List[Tuple[date, float]]:
+    rng = random.Random(seed)
+    level = rng.uniform(50, 80)
+    values = []
+    episode = 0
+    for i in range(days):
+        if rng.random() < 0.1:
+            continue
+        if episode == 0 and rng.random() < 0.02:
+            episode = rng.randint(3, 12)
+        shift = 20 if episode else 0
+        episode = max(episode - 1, 0)
+        values.append((_START + timedelta(days=i), round(level + shift + rng.gauss(0, 3), 1)))
+    return values
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--sample", type=int, default=200)
+    parser.add_argument("--chunk", type=int, default=1000)
+    args = parser.parse_args()
+
+    total_days = _HISTORY_DAYS + args.days
+    targets = [_START + timedelta(days=_HISTORY_DAYS + i) for i in range(args.days)]
+    series = [("heartRate", "RestingHeartRate-RHR", _user_values(u, total_days)) for u in range(args.users)]
+    sample = series[:args.sample]
+    windows = args.users * args.days
+    print(f"{args.users:,} users x {args.days} days = {windows:,} baselines, {_HISTORY_DAYS}-day lookback")
+    print(f"{'mode':<12} {'users run':>10} {'seconds':>9} {'baselines/s':>13} {'est. full run s':>16}")
+
+    engine = BaselineEngine()
+    start = time.perf_counter()
+    expected = [[engine._compute_baseline(c, n, v, t) for t in targets] for c, n, v in sample]
+    scalar_s = time.perf_counter() - start
+    rate = len(sample) * args.days / scalar_s
+    print(f"{'scalar':<12} {len(sample):>10,} {scalar_s:>9.2f} {rate:>13,.0f} {windows / rate:>16.1f}")
+
+    engine = BaselineEngine()
+    start = time.perf_counter()
+    sample_batch = []
+    for i in range(0, args.users, args.chunk):
+        results = engine.compute_baselines_batch(series[i:i + args.chunk], targets)
+        if i < args.sample:
+            sample_batch.extend(results)
+    batch_s = time.perf_counter() - start
+    print(f"{'batch':<12} {args.users:>10,} {batch_s:>9.2f} {windows / batch_s:>13,.0f} {batch_s:>16.1f}")
+
+    mismatches = sum(
+        1
+        for expected_row, batch_row in zip(expected, sample_batch)
+        for e, b in zip(expected_row, batch_row)
+        if (e is None) != (b is None) or (e and (e.frozen != b.frozen or abs(e.mean - b.mean) > 1e-4))
+    )
+    print(f"batch vs scalar on {len(sample):,} users: {mismatches} mismatches")
+
+
+if __name__ == "__main__":
+    main()
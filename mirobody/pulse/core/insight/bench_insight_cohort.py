@@ -0,0 +1,252 @@
+"""
+Insight Engine Benchmark: per-user, per-day pipeline vs batched cohort mode
+
+Seeds --users throwaway users (daily resting heart rate, HRV, deep sleep and
+steps with anomaly episodes, --history days up to the last target date) into
+th_series_data on the configured Postgres, then runs Layer 1 (skip_llm) over
+--days target dates both ways:
+
+  - per-user: InsightEnginePullTask._process_user_layer1_only per user per day
+              (indicator, daily-value and cooldown queries per user-day)
+  - cohort:   InsightEnginePullTask._process_cohort over --cohort-size users
+              (one indicator query, one value query per date chunk, one
+              cooldown prefetch; vectorized profiles; bounded recipe pool)
+
+per-user runs on the first --sample users and is extrapolated to --users.
+Prints the seconds spent in each query and stage, checks that both modes
+saved the same insights for the sample, and deletes the seeded rows and
+insights afterwards. Expects res/sql/97_th_series_data_numeric_value_idx.sql
+to be applied.
+
+--in-memory answers the same queries from a Python responder instead, to
+time the CPU stages (profiles, recipes) without a database.
+
+Usage:
+    PG_HOST=127.0.0.1 PG_USER=postgres PG_DBNAME=mirobody PG_SCHEMA=public \\
+        python3 -m mirobody.pulse.core.insight.bench_insight_cohort [--users 5000] [--days 7] [--sample 100]
+    python3 -m mirobody.pulse.core.insight.bench_insight_cohort --in-memory
+"""
+
+import argparse
+import asyncio
+import bisect
+import logging
+import random
+import time
+import uuid
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Set, Tuple
+
+from ....utils.config import Config
+from ..database import execute_query
+from .database_service import InsightDatabaseService
+from .engine_task import InsightEnginePullTask
+
+_INDICATORS = ["RestingHeartRate-RHR", "HeartRateVariability-HRV", "DeepSleepDuration", "DailyStepCount"]
+_END = date(2025, 6, 30)
+
+Series = Dict[str, List[Tuple[date, float]]]
+
+
+def _user_series(seed: int, first: date, days: int) -> Series:
+    rng = random.Random(seed)
+    level = rng.uniform(50, 80)
+    series: Series = {name: [] for name in _INDICATORS}
+    episode = 0
+    for i in range(days):
+        if rng.random() < 0.1:
+            continue
+        if episode == 0 and rng.random() < 0.03:
+            episode = rng.randint(4, 12)
+        shift = 1.0 if episode else 0.0
+        episode = max(episode - 1, 0)
+        day = first + timedelta(days=i)
+        series["RestingHeartRate-RHR"].append((day, round(level + 15 * shift + rng.gauss(0, 2), 1)))
+        series["HeartRateVariability-HRV"].append((day, round(50 - 20 * shift + rng.gauss(0, 4), 1)))
+        series["DeepSleepDuration"].append((day, round(90 - 40 * shift + rng.gauss(0, 8), 1)))
+        series["DailyStepCount"].append((day, round(8000 + rng.gauss(0, 900) + 15 * i * (seed % 2), 1)))
+    return series
+
+
+class _Timed:
+    """Proxies a database service, adding the seconds spent in each method to seconds[name]."""
+
+    def __init__(self, db: Any) -> None:
+        self._db = db
+        self.seconds: Dict[str, float] = defaultdict(float)
+
+    def __getattr__(self, name: str) -> Any:
+        method = getattr(self._db, name)
+
+        async def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                self.seconds[name] += time.perf_counter() - start
+
+        return timed
+
+
+class _MemoryDB:
+    """Answers the task's queries from in-memory series (--in-memory)."""
+
+    def __init__(self, data: Dict[str, Series]) -> None:
+        self.data = data
+        self.days = {uid: {ind: [d for d, _ in vals] for ind, vals in s.items()} for uid, s in data.items()}
+        self.insights: List[Dict[str, Any]] = []
+        self.insight_dates: Dict[Tuple[str, str], Set[date]] = defaultdict(set)
+
+    def _slice(self, uid: str, ind: str, start: date, end: date) -> List[Tuple[date, float]]:
+        days = self.days[uid].get(ind, [])
+        return self.data[uid][ind][bisect.bisect_left(days, start):bisect.bisect_right(days, end)]
+
+    async def get_user_indicators(self, user_id: str) -> Set[str]:
+        return set(self.data.get(user_id, {}))
+
+    async def get_daily_values(self, user_id: str, indicators: List[str], target_date: date, lookback_days: int = 60) -> Series:
+        result = {ind: self._slice(user_id, ind, target_date - timedelta(days=lookback_days), target_date) for ind in indicators}
+        return {ind: vals for ind, vals in result.items() if vals}
+
+    async def check_cooldown(self, user_id: str, recipe_name: str, target_date: date, cooldown_days: int) -> bool:
+        cooldown_start = target_date - timedelta(days=cooldown_days)
+        return any(cooldown_start < d < target_date for d in self.insight_dates[(user_id, recipe_name)])
+
+    async def get_users_indicators(self, user_ids: List[str]) -> Dict[str, Set[str]]:
+        return {uid: set(self.data[uid]) for uid in user_ids if uid in self.data}
+
+    async def get_cohort_daily_values(self, user_ids: List[str], indicators: List[str], start_date: date, end_date: date) -> Dict[str, Series]:
+        return {uid: {ind: self._slice(uid, ind, start_date, end_date) for ind in indicators} for uid in user_ids}
+
+    async def get_insight_dates(self, user_ids: List[str], start_date: date, end_date: date) -> Dict[Tuple[str, str], Set[date]]:
+        return {}
+
+    async def save_insight(self, **kwargs: Any) -> None:
+        self.insights.append(kwargs)
+        self.insight_dates[(kwargs["user_id"], kwargs["recipe_name"])].add(kwargs["target_date"])
+
+
+async def _seed(user_ids: List[str], first: date, days: int) -> None:
+    for u, uid in enumerate(user_ids):
+        rows = [
+            {"user_id": uid, "indicator": ind, "value": str(v),
+             "start_time": datetime.combine(d, datetime.min.time()), "end_time": datetime.combine(d, datetime.max.time())}
+            for ind, vals in _user_series(u, first, days).items()
+            for d, v in vals
+        ]
+        await execute_query(
+            "INSERT INTO th_series_data (user_id, indicator, value, start_time, end_time, source) "
+            "VALUES (:user_id, :indicator, :value, :start_time, :end_time, 'bench')",
+            rows,
+            log_sql=False,
+        )
+
+
+async def _saved(user_ids: List[str]) -> List[Tuple[Any, ...]]:
+    rows = await execute_query(
+        "SELECT user_id, target_date, recipe_name FROM user_behavior_insight WHERE user_id = ANY(:user_ids)",
+        {"user_ids": user_ids},
+        log_sql=False,
+    )
+    return sorted((r["user_id"], r["target_date"], r["recipe_name"]) for r in rows)
+
+
+async def _cleanup(user_ids: List[str], series: bool = True) -> None:
+    await execute_query("DELETE FROM user_behavior_insight WHERE user_id = ANY(:user_ids)", {"user_ids": user_ids}, log_sql=False)
+    if series:
+        await execute_query("DELETE FROM th_series_data WHERE user_id = ANY(:user_ids)", {"user_ids": user_ids}, log_sql=False)
+
+
+async def _per_user(task: InsightEnginePullTask, user_ids: List[str], targets: List[date]) -> float:
+    start = time.perf_counter()
+    for uid in user_ids:
+        for t in targets:
+            await task._process_user_layer1_only(uid, t)
+    return time.perf_counter() - start
+
+
+async def _cohort(task: InsightEnginePullTask, user_ids: List[str], targets: List[date], cohort_size: int, timings: Dict[str, float]) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(user_ids), cohort_size):
+        await task._process_cohort(user_ids[i:i + cohort_size], targets[0], targets[-1], True, timings)
+    return time.perf_counter() - start
+
+
+def _print_stages(mode: str, seconds: Dict[str, float], scale: float = 1.0) -> None:
+    for name, s in sorted(seconds.items(), key=lambda kv: -kv[1]):
+        print(f"  {mode:<9} {name:<26} {s * scale:>9.2f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=7, help="Target dates to run")
+    parser.add_argument("--history", type=int, default=120, help="Days of seeded data up to the last target date")
+    parser.add_argument("--sample", type=int, default=100)
+    parser.add_argument("--cohort-size", type=int, default=1000)
+    parser.add_argument("--in-memory", action="store_true")
+    parser.add_argument("--config", nargs="*", default=None, help="Extra config yaml files")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    first = _END - timedelta(days=args.history - 1)
+    targets = [_END - timedelta(days=args.days - 1 - i) for i in range(args.days)]
+    prefix = f"bench-insight-{uuid.uuid4().hex[:8]}"
+    user_ids = [f"{prefix}-{u:05d}" for u in range(args.users)]
+    sample = user_ids[:args.sample]
+    scale = args.users / len(sample)
+
+    if args.in_memory:
+        data = {uid: _user_series(u, first, args.history) for u, uid in enumerate(user_ids)}
+        per_user_db: Any = _MemoryDB(data)
+        cohort_db: Any = _MemoryDB(data)
+    else:
+        await Config.init(yaml_filenames=args.config)
+        per_user_db = cohort_db = InsightDatabaseService()
+        start = time.perf_counter()
+        await _seed(user_ids, first, args.history)
+        print(f"seeded {args.users:,} users x {args.history} days in {time.perf_counter() - start:.1f}s")
+
+    try:
+        print(f"{args.users:,} users x {args.days} target dates, Layer 1 only; per-user on {len(sample):,} users, x{scale:.0f}")
+
+        task = InsightEnginePullTask()
+        task._ensure_recipes()
+        per_user_timed = task.db = _Timed(per_user_db)
+        per_user_s = await _per_user(task, sample, targets)
+        expected = sorted((i["user_id"], i["target_date"], i["recipe_name"]) for i in per_user_db.insights) \
+            if args.in_memory else await _saved(sample)
+        if not args.in_memory:
+            await _cleanup(sample, series=False)
+
+        task = InsightEnginePullTask()
+        task._ensure_recipes()
+        cohort_timed = task.db = _Timed(cohort_db)
+        timings: Dict[str, float] = defaultdict(float)
+        cohort_s = await _cohort(task, user_ids, targets, args.cohort_size, timings)
+        actual = [i for i in (
+            sorted((i["user_id"], i["target_date"], i["recipe_name"]) for i in cohort_db.insights)
+            if args.in_memory else await _saved(sample)
+        ) if i[0] in set(sample)]
+
+        print(f"{'mode':<9} {'users run':>10} {'seconds':>9} {'user-days/s':>13} {'est. full run s':>16}")
+        rate = len(sample) * args.days / per_user_s
+        print(f"{'per-user':<9} {len(sample):>10,} {per_user_s:>9.2f} {rate:>13,.0f} {per_user_s * scale:>16.1f}")
+        rate = args.users * args.days / cohort_s
+        print(f"{'cohort':<9} {args.users:>10,} {cohort_s:>9.2f} {rate:>13,.0f} {cohort_s:>16.1f}")
+
+        print("stage seconds (per-user extrapolated to --users):")
+        per_user_stages = {f"db.{k}": v for k, v in per_user_timed.seconds.items()}
+        per_user_stages["profiles + recipes"] = per_user_s - sum(per_user_timed.seconds.values())
+        _print_stages("per-user", per_user_stages, scale)
+        _print_stages("cohort", {**dict(timings), **{f"db.{k}": v for k, v in cohort_timed.seconds.items()}})
+        print(f"sample insights: per-user {len(expected)}, cohort {len(actual)}, identical: {actual == expected}")
+    finally:
+        if not args.in_memory:
+            await _cleanup(user_ids)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -121,6 +121,100 @@ class InsightDatabaseService:
 
         return result
 
+    # =========================================================================
+    # Cohort Queries (batched run mode)
+    # =========================================================================
+
+    async def get_users_indicators(self, user_ids: List[str]) -> Dict[str, Set[str]]:
+        """get_user_indicators for many users in one query.
+
+        Returns:
+            user_id -> set of indicator names (users without data are absent)
+        """
+        sql = """
+            SELECT DISTINCT user_id::text AS user_id, indicator
+            FROM th_series_data
+            WHERE user_id = ANY(:user_ids)
+              AND deleted = 0
+              AND indicator NOT LIKE 'event.%'
+        """
+        rows = await execute_query(sql, {"user_ids": list(user_ids)})
+
+        result: Dict[str, Set[str]] = {}
+        for row in rows:
+            result.setdefault(row["user_id"], set()).add(row["indicator"])
+        return result
+
+    async def get_cohort_daily_values(
+        self,
+        user_ids: List[str],
+        indicators: List[str],
+        start_date: date,
+        end_date: date,
+    ) -> Dict[str, Dict[str, List[Tuple[date, float]]]]:
+        """Daily values of many users between start_date and end_date (inclusive).
+
+        The numeric guard is the predicate of idx_th_series_data_numeric_value
+        (res/sql/97), so the scan runs on that partial index and never casts a
+        non-numeric value; the time range is sargable on start_time.
+
+        Returns:
+            user_id -> indicator_name -> [(date, value), ...] sorted by date
+        """
+        sql = """
+            SELECT user_id::text AS user_id, indicator, start_time::date AS day,
+                   value::double precision AS val
+            FROM th_series_data
+            WHERE user_id = ANY(:user_ids)
+              AND indicator = ANY(:indicators)
+              AND deleted = 0
+              AND start_time >= :start_date
+              AND start_time < :end_date
+              AND value ~ '^-?[0-9]+\\.?[0-9]*$'
+            ORDER BY user_id, indicator, start_time
+        """
+        rows = await execute_query(
+            sql,
+            {
+                "user_ids": list(user_ids),
+                "indicators": list(indicators),
+                "start_date": str(start_date),
+                "end_date": str(end_date + timedelta(days=1)),
+            },
+            log_sql=False,
+        )
+
+        result: Dict[str, Dict[str, List[Tuple[date, float]]]] = {}
+        for row in rows:
+            result.setdefault(row["user_id"], {}).setdefault(row["indicator"], []).append((row["day"], row["val"]))
+        return result
+
+    async def get_insight_dates(
+        self, user_ids: List[str], start_date: date, end_date: date
+    ) -> Dict[Tuple[str, str], Set[date]]:
+        """Target dates of saved insights per (user_id, recipe_name), for in-memory cooldown checks.
+
+        Returns:
+            (user_id, recipe_name) -> target dates in [start_date, end_date]
+        """
+        sql = """
+            SELECT user_id, recipe_name, target_date
+            FROM user_behavior_insight
+            WHERE user_id = ANY(:user_ids)
+              AND target_date >= :start_date
+              AND target_date <= :end_date
+        """
+        rows = await execute_query(sql, {
+            "user_ids": list(user_ids),
+            "start_date": str(start_date),
+            "end_date": str(end_date),
+        })
+
+        result: Dict[Tuple[str, str], Set[date]] = {}
+        for row in rows:
+            result.setdefault((row["user_id"], row["recipe_name"]), set()).add(row["target_date"])
+        return result
+
     # =========================================================================
     # Cooldown Check
     # =========================================================================
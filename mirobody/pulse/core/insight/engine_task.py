@@ -6,10 +6,15 @@ The main scheduler entry point that orchestrates the insight pipeline:
 2. For each user: compute baseline → match recipes → run detection → save results
 """
 
+import asyncio
+import bisect
 import logging
+import time
+from collections import defaultdict
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
+from ....utils.config import safe_read_cfg
 from ..scheduler import PullTask, ScheduleType
 from .baseline_engine import BaselineEngine
 from .database_service import InsightDatabaseService
@@ -20,6 +25,13 @@ from .insight_agent import InsightAgent
 from .recipes import register_all_recipes
 
 
+# R02 (single_sustained_anomaly) is demoted to supporting evidence only —
+# it participates in Layer 2 context but does not produce standalone insights.
+DEMOTED_RECIPES = {"single_sustained_anomaly"}
+
+BASELINE_LOOKBACK_DAYS = 90
+
+
 class InsightEnginePullTask(PullTask):
     """Runs insight detection for demo users."""
 
@@ -27,6 +39,11 @@ class InsightEnginePullTask(PullTask):
     LOOKBACK_CAP_DAYS = 7        # max days to backfill on long outage
     STATS_TTL_SECONDS = 30 * 86400  # keep last_target_date for 30 days
 
+    # Batched run mode (INSIGHT_COHORT_SIZE > 0): users per cohort query,
+    # target dates per profile pass, users evaluated concurrently
+    COHORT_DATE_CHUNK = 31
+    COHORT_CONCURRENCY = 16
+
     def __init__(self):
         super().__init__(
             provider_slug="insight_engine",
@@ -51,6 +68,7 @@ class InsightEnginePullTask(PullTask):
         target_date_str: Optional[str] = None,
         end_date_str: Optional[str] = None,
         skip_llm: bool = False,
+        cohort_size: Optional[int] = None,
     ) -> bool:
         """Run insight detection pipeline.
 
@@ -60,6 +78,15 @@ class InsightEnginePullTask(PullTask):
             end_date_str: End date for simulation range (YYYY-MM-DD). If provided,
                           slides day by day from target_date_str to end_date_str.
             skip_llm: If True, only run Layer 1 (no LLM calls). Faster for simulation.
+            cohort_size: Users per batch in batched mode (default INSIGHT_COHORT_SIZE,
+                         0 = one user and one day at a time).
+
+        Batched mode (cohort_size > 0):
+            - One query for the cohort's indicators and one per COHORT_DATE_CHUNK
+              target dates for its daily values, instead of one of each per user-day.
+            - Profiles for the whole cohort and chunk from one vectorized pass.
+            - Recipes evaluated for up to COHORT_CONCURRENCY users at a time;
+              cooldowns checked in memory against one prefetch.
 
         Scheduled path (no explicit target_date_str):
             - Reads last_target_date from task_stats.
@@ -131,23 +158,39 @@ class InsightEnginePullTask(PullTask):
             total_insights = 0
             total_users_with_insights = 0
 
-            for uid in user_ids:
-                user_insights = 0
-                current_date = start_date
-                while current_date <= end_date:
+            if cohort_size is None:
+                cohort_size = int(safe_read_cfg("INSIGHT_COHORT_SIZE") or 0)
+
+            timings: Dict[str, float] = defaultdict(float)
+            if cohort_size > 0:
+                for i in range(0, len(user_ids), cohort_size):
+                    cohort = user_ids[i:i + cohort_size]
                     try:
-                        if skip_llm:
-                            n = await self._process_user_layer1_only(uid, current_date)
-                        else:
-                            n = await self._process_user(uid, current_date)
-                        user_insights += n
+                        counts = await self._process_cohort(cohort, start_date, end_date, skip_llm, timings)
                     except Exception as e:
-                        logging.error(f"[InsightEngine] Error user={uid} date={current_date}: {e}")
-                    current_date += timedelta(days=1)
-
-                if user_insights > 0:
-                    total_insights += user_insights
-                    total_users_with_insights += 1
+                        logging.error(f"[InsightEngine] Error cohort of {len(cohort)} users from {cohort[0]}: {e}")
+                        continue
+                    total_insights += sum(counts.values())
+                    total_users_with_insights += sum(1 for n in counts.values() if n > 0)
+                logging.info(f"[InsightEngine] Cohort stage seconds: {dict(timings)}")
+            else:
+                for uid in user_ids:
+                    user_insights = 0
+                    current_date = start_date
+                    while current_date <= end_date:
+                        try:
+                            if skip_llm:
+                                n = await self._process_user_layer1_only(uid, current_date)
+                            else:
+                                n = await self._process_user(uid, current_date)
+                            user_insights += n
+                        except Exception as e:
+                            logging.error(f"[InsightEngine] Error user={uid} date={current_date}: {e}")
+                        current_date += timedelta(days=1)
+
+                    if user_insights > 0:
+                        total_insights += user_insights
+                        total_users_with_insights += 1
 
             logging.info(
                 f"[InsightEngine] Done: {total_insights} insights for "
@@ -162,6 +205,8 @@ class InsightEnginePullTask(PullTask):
                 "users_with_insights": total_users_with_insights,
                 "total_insights": total_insights,
                 "skip_llm": skip_llm,
+                "cohort_size": cohort_size,
+                "stage_seconds": {k: round(v, 3) for k, v in timings.items()},
             }
             # Only the scheduled path advances the pointer. Explicit calls
             # (manual /pulse/insight/run with target_date) shouldn't shift the
@@ -208,22 +253,71 @@ class InsightEnginePullTask(PullTask):
         if not profile.available_categories:
             return 0
 
-        # Step 5: Match recipes
+        # Step 5-8: Match recipes, run them (Layer 1), InsightAgent (Layer 2+3), save
+        saved = await self._evaluate_profile(
+            user_id, target_date, profile, daily_values, skip_llm=False,
+            in_cooldown=lambda recipe: self.db.check_cooldown(
+                user_id, recipe.name, target_date, recipe.cooldown_days
+            ),
+        )
+        return len(saved)
+
+    async def _process_user_layer1_only(self, user_id: str, target_date: date) -> int:
+        """Process a single user with Layer 1 only (no LLM calls). Fast path for simulation."""
+        self._ensure_recipes()
+
+        user_indicators = await self.db.get_user_indicators(user_id)
+        if not user_indicators:
+            return 0
+
+        category_map = resolve_all(user_indicators)
+        if not category_map:
+            return 0
+
+        indicator_names = list(category_map.values())
+        daily_values = await self.db.get_daily_values(
+            user_id, indicator_names, target_date, lookback_days=90
+        )
+        if not daily_values:
+            return 0
+
+        # Freshness check — skip if latest data is >7 days before target_date
+        latest_data_date = max(d for vals in daily_values.values() for d, _ in vals)
+        if (target_date - latest_data_date).days > 7:
+            return 0
+
+        profile = self.engine.compute(user_id, target_date, user_indicators, daily_values)
+        saved = await self._evaluate_profile(
+            user_id, target_date, profile, daily_values, skip_llm=True,
+            in_cooldown=lambda recipe: self.db.check_cooldown(
+                user_id, recipe.name, target_date, recipe.cooldown_days
+            ),
+        )
+        return len(saved)
+
+    async def _evaluate_profile(
+        self,
+        user_id: str,
+        target_date: date,
+        profile: UserProfile,
+        daily_values: DailyValues,
+        skip_llm: bool,
+        in_cooldown: Callable[[InsightRecipe], Awaitable[bool]],
+    ) -> List[str]:
+        """Match recipes, run detection (Layer 1), InsightAgent (Layer 2+3) and save.
+
+        Returns: names of the recipes whose insight was saved
+        """
         matched_recipes = recipe_registry.match(profile)
         if not matched_recipes:
-            return 0
+            return []
 
-        # Step 6: Run each recipe (Layer 1) with cooldown check
-        insights_count = 0
+        # Run each recipe (Layer 1) with cooldown check
         detections = []  # collect for Layer 2
         for recipe in matched_recipes:
             try:
-                if recipe.cooldown_days > 1:
-                    in_cooldown = await self.db.check_cooldown(
-                        user_id, recipe.name, target_date, recipe.cooldown_days
-                    )
-                    if in_cooldown:
-                        continue
+                if recipe.cooldown_days > 1 and await in_cooldown(recipe):
+                    continue
 
                 detection = recipe.detect(profile, daily_values)
                 if detection and detection.triggered:
@@ -232,9 +326,9 @@ class InsightEnginePullTask(PullTask):
                 logging.error(f"[InsightEngine] Recipe {recipe.name} failed for user {user_id}: {e}")
                 continue
 
-        # Step 7: Layer 2+3 — InsightAgent (only if L1 detected something)
+        # Layer 2+3 — InsightAgent (only if L1 detected something)
         agent_result = None
-        if detections:
+        if detections and not skip_llm:
             try:
                 detections.sort(key=lambda x: {"severe": 3, "moderate": 2, "mild": 1}.get(
                     x[1].severity.value if x[1].severity else "", 0), reverse=True)
@@ -265,10 +359,8 @@ class InsightEnginePullTask(PullTask):
         touch_message = agent_result.get("touch_message") if agent_result else None
         touch_compliant = agent_result.get("touch_compliant") if agent_result else None
 
-        # Step 8: Save detections with Layer 2+3 results
-        # R02 (single_sustained_anomaly) is demoted to supporting evidence only —
-        # it participates in Layer 2 context but does not produce standalone insights.
-        DEMOTED_RECIPES = {"single_sustained_anomaly"}
+        # Save detections with Layer 2+3 results
+        saved = []
         for recipe, detection in detections:
             if recipe.name in DEMOTED_RECIPES:
                 continue
@@ -280,68 +372,134 @@ class InsightEnginePullTask(PullTask):
                     touch_message=touch_message,
                     touch_compliant=touch_compliant,
                 )
-                insights_count += 1
+                saved.append(recipe.name)
             except Exception as e:
                 logging.error(f"[InsightEngine] Save failed for {recipe.name}: {e}")
 
-        return insights_count
-
-    async def _process_user_layer1_only(self, user_id: str, target_date: date) -> int:
-        """Process a single user with Layer 1 only (no LLM calls). Fast path for simulation."""
-        self._ensure_recipes()
-
-        user_indicators = await self.db.get_user_indicators(user_id)
-        if not user_indicators:
-            return 0
+        return saved
 
-        category_map = resolve_all(user_indicators)
-        if not category_map:
-            return 0
+    # =========================================================================
+    # Batched run mode
+    # =========================================================================
 
-        indicator_names = list(category_map.values())
-        daily_values = await self.db.get_daily_values(
-            user_id, indicator_names, target_date, lookback_days=90
+    async def _process_cohort(
+        self,
+        user_ids: List[str],
+        start_date: date,
+        end_date: date,
+        skip_llm: bool,
+        timings: Dict[str, float],
+    ) -> Dict[str, int]:
+        """Run every user of a cohort over [start_date, end_date].
+
+        Each user's dates still run in order (cooldowns depend on the insights
+        of earlier dates); users run concurrently.
+
+        Returns: user_id -> insights saved
+        """
+        t0 = time.perf_counter()
+        indicators = await self.db.get_users_indicators(user_ids)
+        category_maps = {uid: resolve_all(names) for uid, names in indicators.items()}
+        category_maps = {uid: cmap for uid, cmap in category_maps.items() if cmap}
+        if not category_maps:
+            return {}
+        cohort = list(category_maps)
+        indicator_names = sorted({name for cmap in category_maps.values() for name in cmap.values()})
+
+        max_cooldown = max((r.cooldown_days for r in recipe_registry.all()), default=1)
+        insight_dates = await self.db.get_insight_dates(
+            cohort, start_date - timedelta(days=max_cooldown), end_date
         )
+        timings["indicators"] += time.perf_counter() - t0
+
+        insights: Dict[str, int] = defaultdict(int)
+        concurrency = int(safe_read_cfg("INSIGHT_CONCURRENCY") or self.COHORT_CONCURRENCY)
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + timedelta(days=self.COHORT_DATE_CHUNK - 1), end_date)
+            targets = [chunk_start + timedelta(days=i) for i in range((chunk_end - chunk_start).days + 1)]
+
+            t0 = time.perf_counter()
+            daily = await self.db.get_cohort_daily_values(
+                cohort, indicator_names, chunk_start - timedelta(days=BASELINE_LOOKBACK_DAYS), chunk_end
+            )
+            timings["daily_values"] += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            users: Dict[str, Tuple[Set[str], DailyValues]] = {}
+            for uid, cmap in category_maps.items():
+                values = daily.get(uid, {})
+                own = {name: values[name] for name in cmap.values() if name in values}
+                if own:
+                    users[uid] = (indicators[uid], own)
+            profiles = self.engine.compute_profiles_batch(users, targets)
+            timings["profiles"] += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def run_user(uid: str) -> None:
+                async with semaphore:
+                    values = users[uid][1]
+                    days = {name: [d for d, _ in vals] for name, vals in values.items()}
+                    for profile in profiles[uid]:
+                        try:
+                            insights[uid] += await self._evaluate_cohort_profile(
+                                uid, profile, values, days, insight_dates, skip_llm
+                            )
+                        except Exception as e:
+                            logging.error(f"[InsightEngine] Error user={uid} date={profile.target_date}: {e}")
+
+            await asyncio.gather(*(run_user(uid) for uid in profiles))
+            timings["recipes"] += time.perf_counter() - t0
+
+            chunk_start = chunk_end + timedelta(days=1)
+
+        return dict(insights)
+
+    async def _evaluate_cohort_profile(
+        self,
+        user_id: str,
+        profile: UserProfile,
+        values: DailyValues,
+        days: Dict[str, List[date]],
+        insight_dates: Dict[Tuple[str, str], Set[date]],
+        skip_llm: bool,
+    ) -> int:
+        """_process_user steps 3.5-8 on a precomputed profile; returns insights saved."""
+        target_date = profile.target_date
+
+        # The lookback window ending at target_date, as get_daily_values would return it
+        cutoff = target_date - timedelta(days=BASELINE_LOOKBACK_DAYS)
+        daily_values: DailyValues = {}
+        for name, vals in values.items():
+            lo = bisect.bisect_left(days[name], cutoff)
+            hi = bisect.bisect_right(days[name], target_date)
+            if hi > lo:
+                daily_values[name] = vals[lo:hi]
         if not daily_values:
             return 0
 
         # Freshness check — skip if latest data is >7 days before target_date
-        latest_data_date = max(d for vals in daily_values.values() for d, _ in vals)
+        latest_data_date = max(vals[-1][0] for vals in daily_values.values())
         if (target_date - latest_data_date).days > 7:
             return 0
-
-        profile = self.engine.compute(user_id, target_date, user_indicators, daily_values)
         if not profile.available_categories:
             return 0
 
-        matched_recipes = recipe_registry.match(profile)
-        if not matched_recipes:
-            return 0
-
-        insights_count = 0
-        for recipe in matched_recipes:
-            try:
-                # Cooldown check
-                if recipe.cooldown_days > 1:
-                    in_cooldown = await self.db.check_cooldown(
-                        user_id, recipe.name, target_date, recipe.cooldown_days
-                    )
-                    if in_cooldown:
-                        continue
-
-                detection = recipe.detect(profile, daily_values)
-                if detection and detection.triggered:
-                    if recipe.name in ("single_sustained_anomaly",):
-                        continue  # demoted: supporting evidence only
-                    await self._save_detection(
-                        user_id, target_date, recipe, detection, profile
-                    )
-                    insights_count += 1
-            except Exception as e:
-                logging.error(f"[InsightEngine] Recipe {recipe.name} failed: {e}")
-                continue
+        async def in_cooldown(recipe: InsightRecipe) -> bool:
+            cooldown_start = target_date - timedelta(days=recipe.cooldown_days)
+            return any(
+                cooldown_start < d < target_date
+                for d in insight_dates.get((user_id, recipe.name), ())
+            )
 
-        return insights_count
+        saved = await self._evaluate_profile(
+            user_id, target_date, profile, daily_values, skip_llm, in_cooldown
+        )
+        for name in saved:
+            insight_dates.setdefault((user_id, name), set()).add(target_date)
+        return len(saved)
 
     async def _save_detection(
         self,
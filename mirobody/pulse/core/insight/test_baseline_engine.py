@@ -0,0 +1,117 @@
+"""Baseline engine: the scalar path and the batch kernel match the original EWMA + freeze loop."""
+
+from __future__ import annotations
+
+import random
+import statistics
+
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+import pytest
+
+from .baseline_engine import BaselineEngine
+from .models import BaselineResult
+
+_START = date(2024, 1, 1)
+
+
+def _original_baseline(
+    engine: BaselineEngine, category: str, indicator_name: str, values: List[Tuple[date, float]], target_date: date,
+) -> Optional[BaselineResult]:
+    """BaselineEngine._compute_baseline before the state/kernel refactor, verbatim minus logging."""
+    cutoff = target_date - timedelta(days=engine.baseline_lookback_days)
+    relevant = [(d, v) for d, v in values if cutoff <= d <= target_date]
+    if len(relevant) < 3:
+        return None
+    vals = [v for _, v in relevant]
+    normal_vals = vals[:max(len(vals) // 3, 7)]
+    if len(normal_vals) < 2:
+        return None
+    initial_mean = statistics.mean(normal_vals)
+    initial_std = statistics.stdev(normal_vals) if len(normal_vals) >= 2 else 0.0
+    baseline = initial_mean
+    current_std = initial_std if initial_std > 0 else 1.0
+    frozen, frozen_since, consecutive_deviated, consecutive_normal = False, None, 0, 0
+    for d, v in relevant:
+        deviation = abs(v - baseline)
+        if not frozen:
+            if current_std > 0 and deviation > engine.freeze_sigma * current_std:
+                consecutive_deviated += 1
+                consecutive_normal = 0
+                if consecutive_deviated >= engine.freeze_min_days:
+                    frozen, frozen_since = True, d
+            else:
+                consecutive_deviated = 0
+                consecutive_normal += 1
+                baseline = engine.alpha * v + (1 - engine.alpha) * baseline
+        else:
+            if current_std > 0 and deviation <= engine.unfreeze_sigma * current_std:
+                consecutive_normal += 1
+                if consecutive_normal >= engine.unfreeze_min_days:
+                    frozen, frozen_since, consecutive_deviated = False, None, 0
+                    baseline = engine.alpha * v + (1 - engine.alpha) * baseline
+            else:
+                consecutive_normal = 0
+    return BaselineResult(
+        category=category, indicator_name=indicator_name, mean=round(baseline, 4), std=round(current_std, 4),
+        frozen=frozen, frozen_since=frozen_since, data_days=len(relevant),
+    )
+
+
+def _series(seed: int, days: int = 200) -> List[Tuple[date, float]]:
+    """Resting heart rate with gaps, a few duplicate days and anomaly episodes that freeze and thaw."""
+    rng = random.Random(seed)
+    level = rng.uniform(50, 80)
+    values = []
+    episode = 0
+    for i in range(days):
+        if rng.random() < 0.15:
+            continue  # No data that day
+        if episode == 0 and rng.random() < 0.03:
+            episode = rng.randint(3, 15)
+        shift = 25 if episode else 0
+        episode = max(episode - 1, 0)
+        day = _START + timedelta(days=i)
+        values.append((day, round(level + shift + rng.gauss(0, 3), 1)))
+        if rng.random() < 0.02:
+            values.append((day, round(level + rng.gauss(0, 3), 1)))
+    if seed % 7 == 0:
+        values = [(d, 60.0) for d, _ in values]  # Flat series: std 0 -> 1.0
+    return values
+
+
+def _assert_same(actual: Optional[BaselineResult], expected: Optional[BaselineResult]) -> None:
+    if expected is None:
+        assert actual is None
+        return
+    assert actual is not None
+    assert (actual.frozen, actual.frozen_since, actual.data_days) == (expected.frozen, expected.frozen_since, expected.data_days)
+    assert actual.mean == pytest.approx(expected.mean, abs=1e-4) and actual.std == pytest.approx(expected.std, abs=1e-4)
+
+
+def test_scalar_path_matches_the_original_exactly() -> None:
+    engine = BaselineEngine()
+    targets = [_START + timedelta(days=i) for i in range(200)]
+    frozen_seen = 0
+    for seed in range(30):
+        values = _series(seed)
+        for t in targets:
+            expected = _original_baseline(engine, "heartRate", "RHR", values, t)
+            assert engine._compute_baseline("heartRate", "RHR", values, t) == expected
+            frozen_seen += bool(expected and expected.frozen)
+    assert frozen_seen > 50  # The data really exercises freeze/unfreeze
+
+
+def test_batch_kernel_matches_the_original_for_every_series_and_date() -> None:
+    engine = BaselineEngine()
+    series = [("heartRate", f"RHR-{seed}", _series(seed)) for seed in range(40)]
+    series.append(("bmi", "BMI", []))
+    targets = [_START + timedelta(days=i) for i in range(-5, 210, 3)]
+
+    batch = engine.compute_baselines_batch(series, targets, batch_windows=257)  # Several uneven kernel calls
+    assert len(batch) == len(series) and all(len(row) == len(targets) for row in batch)
+    for (category, indicator_name, values), row in zip(series, batch):
+        for t, actual in zip(targets, row):
+            _assert_same(actual, _original_baseline(engine, category, indicator_name, values, t))
+
@@ -0,0 +1,185 @@
+"""Insight engine task: the batched cohort mode saves exactly what the per-user, per-day path saves."""
+
+from __future__ import annotations
+
+import random
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pytest
+
+from .baseline_engine import BaselineEngine
+from .engine_task import InsightEnginePullTask
+
+_START = date(2024, 1, 1)
+_DAYS = 150
+
+Series = Dict[str, List[Tuple[date, float]]]
+
+
+class _MemoryDB:
+    """The InsightDatabaseService queries the task uses, answered from memory."""
+
+    def __init__(self, data: Dict[str, Series], insights: Optional[List[Dict[str, Any]]] = None) -> None:
+        self.data = data
+        self.insights = list(insights or [])
+        self.queries = 0
+
+    async def get_user_indicators(self, user_id: str) -> Set[str]:
+        self.queries += 1
+        return set(self.data.get(user_id, {}))
+
+    async def get_daily_values(self, user_id: str, indicators: List[str], target_date: date, lookback_days: int = 60) -> Series:
+        self.queries += 1
+        start = target_date - timedelta(days=lookback_days)
+        series = self.data.get(user_id, {})
+        result = {ind: [(d, v) for d, v in series.get(ind, []) if start <= d <= target_date] for ind in indicators}
+        return {ind: vals for ind, vals in result.items() if vals}
+
+    async def check_cooldown(self, user_id: str, recipe_name: str, target_date: date, cooldown_days: int) -> bool:
+        self.queries += 1
+        cooldown_start = target_date - timedelta(days=cooldown_days)
+        return any(
+            i["user_id"] == user_id and i["recipe_name"] == recipe_name and cooldown_start < i["target_date"] < target_date
+            for i in self.insights
+        )
+
+    async def get_users_indicators(self, user_ids: List[str]) -> Dict[str, Set[str]]:
+        self.queries += 1
+        return {uid: set(self.data[uid]) for uid in user_ids if self.data.get(uid)}
+
+    async def get_cohort_daily_values(
+        self, user_ids: List[str], indicators: List[str], start_date: date, end_date: date,
+    ) -> Dict[str, Series]:
+        self.queries += 1
+        result: Dict[str, Series] = {}
+        for uid in user_ids:
+            for ind in indicators:
+                vals = [(d, v) for d, v in self.data.get(uid, {}).get(ind, []) if start_date <= d <= end_date]
+                if vals:
+                    result.setdefault(uid, {})[ind] = vals
+        return result
+
+    async def get_insight_dates(self, user_ids: List[str], start_date: date, end_date: date) -> Dict[Tuple[str, str], Set[date]]:
+        self.queries += 1
+        result: Dict[Tuple[str, str], Set[date]] = {}
+        for i in self.insights:
+            if i["user_id"] in user_ids and start_date <= i["target_date"] <= end_date:
+                result.setdefault((i["user_id"], i["recipe_name"]), set()).add(i["target_date"])
+        return result
+
+    async def save_insight(self, **kwargs: Any) -> None:
+        self.insights.append(kwargs)
+
+    async def get_user_health_profile(self, user_id: str) -> Optional[str]:
+        return None
+
+    async def get_past_insights_with_feedback(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        return []
+
+
+class _Agent:
+    async def analyze(self, detection, profile, daily_values, **kwargs: Any) -> Dict[str, Any]:
+        return {"summary": f"{profile.user_id} {detection.severity}", "hypotheses": [{"confidence": 0.5}]}
+
+
+def _cohort_data(users: int = 14) -> Dict[str, Series]:
+    """Wearable series with gaps and anomaly episodes that move several signals at once."""
+    data: Dict[str, Series] = {}
+    for u in range(users):
+        rng = random.Random(u)
+        series: Series = {"RestingHeartRate-RHR": [], "HeartRateVariability-HRV": [], "DeepSleepDuration": [], "DailyStepCount": []}
+        if u % 4 == 0:
+            series["FastingBloodGlucose-FBG"] = []
+        last_day = _DAYS - 25 if u % 5 == 3 else _DAYS  # Stale user: freshness check kicks in
+        episode = 0
+        for i in range(last_day):
+            if rng.random() < 0.12:
+                continue
+            if episode == 0 and rng.random() < 0.04:
+                episode = rng.randint(4, 12)
+            shift = 1.0 if episode else 0.0
+            episode = max(episode - 1, 0)
+            day = _START + timedelta(days=i)
+            weekend = day.weekday() >= 5 and u % 3 == 0
+            series["RestingHeartRate-RHR"].append((day, round(60 + u + 15 * shift + rng.gauss(0, 2), 1)))
+            series["HeartRateVariability-HRV"].append((day, round(50 - 20 * shift + rng.gauss(0, 4), 1)))
+            series["DeepSleepDuration"].append((day, round(90 - 40 * shift - 20 * weekend + rng.gauss(0, 8), 1)))
+            series["DailyStepCount"].append((day, round(8000 + 2000 * weekend + rng.gauss(0, 900) + 20 * i * (u % 2), 1)))
+            if "FastingBloodGlucose-FBG" in series:
+                series["FastingBloodGlucose-FBG"].append((day, round(95 + 30 * shift + rng.gauss(0, 5), 1)))
+        data[f"user_{u}"] = series
+    data["user_unknown"] = {"someVendorMetric": [(_START + timedelta(days=i), 1.0) for i in range(_DAYS)]}
+    return data
+
+
+def _task(db: _MemoryDB) -> InsightEnginePullTask:
+    task = InsightEnginePullTask()
+    task.db = db
+    task.insight_agent = _Agent()
+    return task
+
+
+def _saved(db: _MemoryDB) -> List[Tuple[Any, ...]]:
+    return sorted(
+        (i["user_id"], i["target_date"], i["recipe_name"], i["severity"], i["observation"], i["hypothesis"])
+        for i in db.insights
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("skip_llm", [True, False])
+async def test_cohort_mode_saves_the_same_insights_as_the_per_user_path(skip_llm: bool) -> None:
+    data = _cohort_data()
+    # An insight saved before the run keeps its recipe in cooldown on the first run days
+    earlier = [{"user_id": "user_1", "target_date": _START + timedelta(days=99), "recipe_name": "multi_signal_deterioration",
+                "severity": "mild", "observation": "earlier", "hypothesis": None}]
+    start, end = _START + timedelta(days=100), _START + timedelta(days=_DAYS + 2)
+    user_ids = sorted(data)
+
+    per_user = _MemoryDB(data, earlier)
+    task = _task(per_user)
+    task._ensure_recipes()
+    for uid in user_ids:
+        day = start
+        while day <= end:
+            if skip_llm:
+                await task._process_user_layer1_only(uid, day)
+            else:
+                await task._process_user(uid, day)
+            day += timedelta(days=1)
+
+    cohort = _MemoryDB(data, earlier)
+    task = _task(cohort)
+    task._ensure_recipes()
+    task.COHORT_DATE_CHUNK = 10  # Several chunks, the last one partial
+    timings: Dict[str, float] = {"indicators": 0.0, "daily_values": 0.0, "profiles": 0.0, "recipes": 0.0}
+    counts = await task._process_cohort(user_ids, start, end, skip_llm, timings)
+
+    expected = _saved(per_user)
+    assert len({r[2] for r in expected}) >= 3  # The data triggers several recipes, with cooldowns in play
+    assert _saved(cohort) == expected
+    assert sum(counts.values()) == len(expected) - 1
+    assert "user_unknown" not in counts
+    assert cohort.queries < per_user.queries / 50
+    assert all(v > 0 for v in timings.values())
+
+
+def test_compute_profiles_batch_matches_compute() -> None:
+    data = _cohort_data(6)
+    targets = [_START + timedelta(days=i) for i in range(0, _DAYS + 5, 4)]
+    profiles = BaselineEngine().compute_profiles_batch({uid: (set(s), s) for uid, s in data.items()}, targets)
+
+    engine = BaselineEngine()
+    for uid, series in data.items():
+        for target, actual in zip(targets, profiles[uid]):
+            window = {ind: [(d, v) for d, v in vals if target - timedelta(days=90) <= d <= target] for ind, vals in series.items()}
+            expected = engine.compute(uid, target, set(series), {ind: vals for ind, vals in window.items() if vals})
+            assert (actual.user_id, actual.target_date, actual.tags) == (expected.user_id, expected.target_date, expected.tags)
+            assert sorted(actual.available_categories) == sorted(expected.available_categories)
+            assert actual.densities == expected.densities
+            assert actual.baselines.keys() == expected.baselines.keys()
+            for category, baseline in expected.baselines.items():
+                assert actual.baselines[category].mean == pytest.approx(baseline.mean, abs=1e-4)
+                assert actual.baselines[category].data_days == baseline.data_days
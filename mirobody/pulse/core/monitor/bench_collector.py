@@ -0,0 +1,255 @@
+"""
+Monitor Collector Benchmark: series_data rescans vs ingest ledger folds
+
+Seeds --rows series_data rows (--users throwaway users with one of 4 sources
+each, 8 indicators, spread evenly over the last --days days; ~1% non-numeric,
+~1% filtered) on the configured Postgres and seeds series_ingest_ledger from
+them with rebuild_ledger. Then simulates one collector tick: --batch records
+written through HealthDataRepository.save_health_records into the last hours
+(a tenth of them overwriting seeded rows), followed by
+
+  - previous: the update_time change detection and per-hour / per-day
+              aggregation queries the collector ran against series_data
+              before the ledger (read side only)
+  - ledger:   MonitorCollectorService.collect_changed_hourly_stats and
+              collect_changed_daily_profiles (including their upserts)
+
+Checks that both produce the same hourly and daily counts for the changed
+slots, and deletes the seeded rows, ledger rows and report rows afterwards.
+Expects res/sql/98_series_ingest_ledger.sql to be applied.
+
+Usage:
+    PG_HOST=127.0.0.1 PG_USER=postgres PG_DBNAME=mirobody PG_SCHEMA=public \\
+        python3 -m mirobody.pulse.core.monitor.bench_collector [--rows 100000000] [--batch 20000]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+import uuid
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from ....utils import execute_query
+from ....utils.config import Config
+from ...data_upload.repositories.health_data import HealthDataRepository
+from .collector_service import MonitorCollectorService
+
+_INDICATORS = ["heartRates", "steps", "respiratoryRate", "bloodOxygen",
+               "activeEnergy", "bodyTemperature", "hrv", "sleepAnalysis_Asleep(Deep)"]
+_PLATFORMS = ["garmin", "oura", "renpho", "apple"]
+_SEED_CHUNK = 2_000_000
+_NUMERIC = "value ~ '^-?[0-9]+\\.?[0-9]*$'"
+
+# The previous collector, read side: change detection on update_time, then
+# one aggregation per changed hour and three per changed day
+PREVIOUS_CHANGED_HOURS = """
+    SELECT DISTINCT date_trunc('hour', time) AS hour_slot
+    FROM series_data
+    WHERE update_time >= :cutoff_update AND time >= :cutoff_time
+"""
+PREVIOUS_HOUR = """
+    SELECT source, COUNT(*) AS records_ingested, COUNT(DISTINCT user_id) AS unique_users,
+           COUNT(DISTINCT indicator) AS unique_indicators,
+           COUNT(*) FILTER (WHERE task_id = 'filtered_out_of_range') AS filtered_count
+    FROM series_data
+    WHERE time >= :hour_start AND time < :hour_end
+    GROUP BY source
+"""
+PREVIOUS_CHANGED_DAYS = """
+    SELECT DISTINCT CAST(time AS date) AS day_slot
+    FROM series_data
+    WHERE update_time >= :cutoff_update AND CAST(time AS date) >= :cutoff_time
+"""
+PREVIOUS_DAY = [
+    f"""
+    SELECT indicator, source, COUNT(*) AS record_count,
+           MIN(CAST(value AS numeric)) AS min_val, MAX(CAST(value AS numeric)) AS max_val,
+           PERCENTILE_CONT(0.50) WITHIN GROUP (ORDER BY CAST(value AS numeric)) AS median_val
+    FROM series_data
+    WHERE time >= CAST(:date_start AS date) AND time < CAST(:date_start AS date) + INTERVAL '1 day'
+      AND {_NUMERIC} AND (task_id IS NULL OR task_id != 'filtered_out_of_range')
+    GROUP BY indicator, source
+    """,
+    f"""
+    SELECT indicator, source, COUNT(*) AS non_numeric_count
+    FROM series_data
+    WHERE time >= CAST(:date_start AS date) AND time < CAST(:date_start AS date) + INTERVAL '1 day'
+      AND NOT ({_NUMERIC})
+    GROUP BY indicator, source
+    """,
+    """
+    SELECT indicator, source, COUNT(*) AS filtered_count
+    FROM series_data
+    WHERE time >= CAST(:date_start AS date) AND time < CAST(:date_start AS date) + INTERVAL '1 day'
+      AND task_id = 'filtered_out_of_range'
+    GROUP BY indicator, source
+    """,
+]
+
+_SEED = """
+    INSERT INTO series_data (user_id, indicator, source, time, value, timezone, task_id, create_time, update_time)
+    SELECT :prefix || '-' || (g % :users),
+           (CAST(:indicators AS text[]))[1 + (g / :users) % 8],
+           (CAST(:sources AS text[]))[1 + (g % :users) % 4],
+           t, CASE WHEN g % 97 = 0 THEN 'n/a' ELSE CAST(40 + g % 120 AS text) END,
+           'UTC', CASE WHEN g % 89 = 0 THEN 'filtered_out_of_range' END, t, t
+    FROM generate_series(CAST(:first AS bigint), CAST(:last AS bigint)) AS g,
+         LATERAL (SELECT CAST(:end_time AS timestamp) - (g / :per_second) * INTERVAL '1 second' AS t) AS ts
+"""
+
+
+def _per_second(rows: int, days: int) -> int:
+    return max(1, rows // (days * 86400 - 1) + 1)
+
+
+async def _seed(prefix: str, sources: List[str], rows: int, users: int, days: int, end_time: datetime) -> None:
+    for first in range(0, rows, _SEED_CHUNK):
+        await execute_query(_SEED, {
+            "prefix": prefix, "users": users, "indicators": _INDICATORS, "sources": sources,
+            "first": first, "last": min(first + _SEED_CHUNK, rows) - 1,
+            "end_time": end_time, "per_second": _per_second(rows, days),
+        }, log_sql=False)
+    await execute_query("ANALYZE series_data", log_sql=False)
+
+
+def _tick_records(prefix: str, sources: List[str], args: argparse.Namespace, end_time: datetime) -> List[Dict[str, Any]]:
+    """--batch records in the last 6 hours; every tenth overwrites a seeded row (the _SEED key of row g)."""
+    rng = random.Random(7)
+    per_second = _per_second(args.rows, args.days)
+    records = []
+    for i in range(args.batch):
+        if i % 10 == 0:
+            g = rng.randrange(min(args.rows, 5 * 3600 * per_second))
+            user, indicator = g % args.users, _INDICATORS[(g // args.users) % 8]
+            source, t = sources[(g % args.users) % 4], end_time - timedelta(seconds=g // per_second)
+        else:
+            user, indicator = rng.randrange(args.users), rng.choice(_INDICATORS)
+            source = sources[user % 4]
+            t = end_time - timedelta(seconds=rng.randrange(6 * 3600), milliseconds=rng.randrange(1, 1000))
+        records.append({
+            "user_id": f"{prefix}-{user}", "indicator": indicator, "source": source, "start_time": t,
+            "value": str(rng.randint(40, 160)), "timezone": "UTC", "task_id": None, "source_id": None,
+        })
+    return records
+
+
+async def _previous(service: MonitorCollectorService, since: datetime) -> Tuple[float, Dict[Any, Any]]:
+    """Runs the previous collector's read side for changes since `since`; returns (seconds, results)."""
+    session = ["SET LOCAL enable_seqscan = off"]
+    start = time.perf_counter()
+    hourly: Dict[Any, Any] = {}
+    rows = await service.execute_query_with_session_params(
+        PREVIOUS_CHANGED_HOURS, {"cutoff_update": since, "cutoff_time": datetime.utcnow() - timedelta(days=7)}, session,
+    )
+    for row in rows:
+        hour = row["hour_slot"]
+        for r in await service.execute_query_with_session_params(
+            PREVIOUS_HOUR, {"hour_start": hour, "hour_end": hour + timedelta(hours=1)}, session,
+        ):
+            hourly[(hour, r["source"] or "")] = (r["records_ingested"], r["unique_users"], r["unique_indicators"], r["filtered_count"])
+
+    daily: Dict[Any, Any] = {}
+    rows = await service.execute_query_with_session_params(
+        PREVIOUS_CHANGED_DAYS, {"cutoff_update": since, "cutoff_time": str(date.today() - timedelta(days=30))}, session,
+    )
+    for row in rows:
+        params = {"date_start": row["day_slot"].isoformat()}
+        stats, non_numeric, filtered = [
+            {(r["indicator"], r["source"] or ""): r for r in await service.execute_query_with_session_params(q, params, session)}
+            for q in PREVIOUS_DAY
+        ]
+        for key in set(stats) | set(non_numeric) | set(filtered):
+            daily[(row["day_slot"],) + key] = (
+                stats[key]["record_count"] if key in stats else 0,
+                non_numeric[key]["non_numeric_count"] if key in non_numeric else 0,
+                filtered[key]["filtered_count"] if key in filtered else 0,
+            )
+    return time.perf_counter() - start, {"hourly": hourly, "daily": daily}
+
+
+async def _reported(previous: Dict[Any, Any], sources: List[str]) -> Dict[Any, Any]:
+    """The ledger-built report rows for the bench's slots among those `previous` computed."""
+    rows = await execute_query(
+        "SELECT stat_hour, source, records_ingested, unique_users, unique_indicators, filtered_count "
+        "FROM platform_hourly_profile WHERE source = ANY(:sources)", {"sources": sources}, log_sql=False,
+    )
+    hourly = {(r["stat_hour"], r["source"]): (r["records_ingested"], r["unique_users"], r["unique_indicators"], r["filtered_count"])
+              for r in rows}
+    rows = await execute_query(
+        "SELECT stat_date, indicator, source, record_count, non_numeric_count, filtered_count "
+        "FROM indicator_daily_profile WHERE source = ANY(:sources)", {"sources": sources}, log_sql=False,
+    )
+    daily = {(r["stat_date"], r["indicator"], r["source"]): (r["record_count"], r["non_numeric_count"], r["filtered_count"])
+             for r in rows}
+    return {
+        "hourly": {k: hourly.get(k) for k in previous["hourly"] if k[1] in sources},
+        "daily": {k: daily.get(k) for k in previous["daily"] if k[2] in sources},
+    }
+
+
+async def _cleanup(prefix: str, sources: List[str]) -> None:
+    for table, column in (("series_data", "user_id"), ("series_ingest_ledger", "user_id")):
+        await execute_query(f"DELETE FROM {table} WHERE {column} LIKE :prefix", {"prefix": f"{prefix}-%"}, log_sql=False)
+    for table in ("platform_hourly_profile", "indicator_daily_profile"):
+        await execute_query(f"DELETE FROM {table} WHERE source = ANY(:sources)", {"sources": sources}, log_sql=False)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000_000)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--batch", type=int, default=20_000, help="Records written in the simulated tick")
+    parser.add_argument("--config", nargs="*", default=None, help="Extra config yaml files")
+    args = parser.parse_args()
+
+    await Config.init(yaml_filenames=args.config)
+    logging.getLogger().setLevel(logging.WARNING)
+    prefix = f"bench-collector-{uuid.uuid4().hex[:8]}"
+    sources = [f"{prefix}.{platform}" for platform in _PLATFORMS]
+    service = MonitorCollectorService(db_config="")
+    now = datetime.utcnow().replace(microsecond=0)
+
+    try:
+        start = time.perf_counter()
+        await _seed(prefix, sources, args.rows, args.users, args.days, now - timedelta(hours=1))
+        print(f"seeded {args.rows:,} series_data rows over {args.days} days in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        await service.rebuild_ledger(days=args.days + 1)
+        print(f"rebuild_ledger (one-off seeding) {time.perf_counter() - start:.1f}s")
+        # Bring both watermarks up to date, so the tick below is all that changed
+        start = time.perf_counter()
+        await service.collect_changed_hourly_stats(max_days=7)
+        await service.collect_changed_daily_profiles(max_days=30)
+        print(f"first ledger fold of the seeded history {time.perf_counter() - start:.1f}s")
+
+        since = datetime.now().astimezone()
+        records = _tick_records(prefix, sources, args, now - timedelta(hours=1))
+        start = time.perf_counter()
+        await HealthDataRepository().save_health_records(records)
+        print(f"tick: saved {len(records):,} records (with ledger append) in {time.perf_counter() - start:.2f}s")
+
+        previous_s, previous = await _previous(service, since)
+        start = time.perf_counter()
+        hourly = await service.collect_changed_hourly_stats(max_days=7)
+        daily = await service.collect_changed_daily_profiles(max_days=30)
+        ledger_s = time.perf_counter() - start
+
+        print(f"{'mode':<9} {'hours':>6} {'days':>5} {'seconds':>9}")
+        print(f"{'previous':<9} {len({k[0] for k in previous['hourly']}):>6} {len({k[0] for k in previous['daily']}):>5} {previous_s:>9.2f}")
+        print(f"{'ledger':<9} {hourly.get('hours_recalculated', 0):>6} {daily.get('days_recalculated', 0):>5} {ledger_s:>9.2f}")
+        expected = {
+            "hourly": {k: v for k, v in previous["hourly"].items() if k[1] in sources},
+            "daily": {k: v for k, v in previous["daily"].items() if k[2] in sources},
+        }
+        print(f"speedup x{previous_s / ledger_s:.1f}; same counts for the changed slots: {await _reported(previous, sources) == expected}")
+    finally:
+        await _cleanup(prefix, sources)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,149 +1,235 @@
 """
 Monitor Collector Service (TH-141)
 
-Pre-computes report tables from series_data for fast API reads:
+Pre-computes report tables for fast API reads:
 - platform_hourly_profile: hourly ingestion stats by platform/source
 - indicator_daily_profile: daily value distribution per indicator/source
+
+Counts come from series_ingest_ledger (see ingest_ledger.py), which the
+series_data writers append to; each report folds the ledger rows past its
+xid watermark, recomputing only the hours / indicator×source days they
+touch. series_data itself is read only for the value distribution
+(min/max/mean/stddev/percentiles) of changed daily slices, which cannot be
+folded from counts.
 """
 
 import json
 import logging
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..database import BaseDatabaseService
+from .ingest_ledger import FILTERED_TASK_ID, LEDGER_COMPACT_DAY, LEDGER_REBUILD
 from .platform_mapping import resolve_platform
 
 # Anomaly detection thresholds (aligned with data_quality_service.py)
 SUSPICIOUS_MULTIPLIER = 10
 CROSS_SOURCE_RATIO_THRESHOLD = 100
 
+# Hour slots folded per query
+HOURLY_FOLD_CHUNK = 168
+
+# Ledger days older than this are compacted to one row per key
+LEDGER_COMPACT_AFTER_DAYS = 31
+
+HOURLY_UPSERT = """
+    INSERT INTO platform_hourly_profile
+        (stat_hour, platform, source, records_ingested, unique_users,
+         unique_indicators, filtered_count, updated_at)
+    VALUES
+        (:stat_hour, :platform, :source, :records_ingested, :unique_users,
+         :unique_indicators, :filtered_count, now())
+    ON CONFLICT (stat_hour, platform, source) DO UPDATE SET
+        records_ingested  = EXCLUDED.records_ingested,
+        unique_users      = EXCLUDED.unique_users,
+        unique_indicators = EXCLUDED.unique_indicators,
+        filtered_count    = EXCLUDED.filtered_count,
+        updated_at        = now()
+"""
+
+DAILY_UPSERT = """
+    INSERT INTO indicator_daily_profile
+        (stat_date, indicator, source, record_count, non_numeric_count,
+         filtered_count, min_val, max_val, mean_val, stddev_val,
+         p1, p5, p25, median_val, p75, p95, p99, issues, health, updated_at)
+    VALUES
+        (:stat_date, :indicator, :source, :record_count, :non_numeric_count,
+         :filtered_count, :min_val, :max_val, :mean_val, :stddev_val,
+         :p1, :p5, :p25, :median_val, :p75, :p95, :p99, :issues, :health, now())
+    ON CONFLICT (stat_date, indicator, source) DO UPDATE SET
+        record_count      = EXCLUDED.record_count,
+        non_numeric_count = EXCLUDED.non_numeric_count,
+        filtered_count    = EXCLUDED.filtered_count,
+        min_val           = EXCLUDED.min_val,
+        max_val           = EXCLUDED.max_val,
+        mean_val          = EXCLUDED.mean_val,
+        stddev_val        = EXCLUDED.stddev_val,
+        p1                = EXCLUDED.p1,
+        p5                = EXCLUDED.p5,
+        p25               = EXCLUDED.p25,
+        median_val        = EXCLUDED.median_val,
+        p75               = EXCLUDED.p75,
+        p95               = EXCLUDED.p95,
+        p99               = EXCLUDED.p99,
+        issues            = EXCLUDED.issues,
+        health            = EXCLUDED.health,
+        updated_at        = now()
+"""
+
+# Restricts a daily query to the changed indicator×source pairs of `alias`
+_PAIR_JOIN = """
+    JOIN unnest(CAST(:indicators AS text[]), CAST(:sources AS text[])) AS changed(indicator, source)
+      ON {alias}.indicator = changed.indicator AND COALESCE({alias}.source, '') = changed.source
+"""
+
+_STAT_COLUMNS = ("min_val", "max_val", "mean_val", "stddev_val", "p1", "p5", "p25", "median_val", "p75", "p95", "p99")
+
 
 class MonitorCollectorService(BaseDatabaseService):
-    """Collects aggregated stats from series_data into report tables."""
+    """Folds the series ingest ledger (and daily value distributions) into report tables."""
 
     # ------------------------------------------------------------------
-    # Hourly: platform_hourly_profile
+    # Ledger watermarks
     # ------------------------------------------------------------------
 
-    async def collect_hourly_stats(self, target_hour: datetime) -> Dict[str, Any]:
+    async def _changed_slots(self, watermark: str, columns: str, cutoff: datetime) -> Tuple[List[Dict[str, Any]], str]:
         """
-        Aggregate series_data for a single hour into platform_hourly_profile.
+        Distinct `columns` of the ledger rows written since the watermark.
 
         Args:
-            target_hour: The hour to collect (truncated to hour boundary)
+            watermark: Watermark name (one per report)
+            columns: SELECT list over series_ingest_ledger
+            cutoff: Ignore rows for stat_hour before this
 
         Returns:
-            Dict with rows_upserted count
-        """
-        hour_start = target_hour.replace(minute=0, second=0, microsecond=0)
-        hour_end = hour_start + timedelta(hours=1)
-
-        query = """
-            SELECT source,
-                   COUNT(*)                                              AS records_ingested,
-                   COUNT(DISTINCT user_id)                               AS unique_users,
-                   COUNT(DISTINCT indicator)                             AS unique_indicators,
-                   COUNT(*) FILTER (WHERE task_id = 'filtered_out_of_range') AS filtered_count
-            FROM series_data
-            WHERE time >= :hour_start AND time < :hour_end
-            GROUP BY source
+            (rows, horizon) — pass horizon to _advance_watermark once folded
         """
-        params = {"hour_start": hour_start, "hour_end": hour_end}
+        horizon, since = await self._watermark(watermark)
+
+        rows = await self.execute_query(
+            f"""
+            SELECT DISTINCT {columns}
+            FROM series_ingest_ledger
+            WHERE xid >= CAST(:since AS xid8) AND xid < CAST(:horizon AS xid8)
+              AND stat_hour >= :cutoff
+            """,
+            {"since": since, "horizon": horizon, "cutoff": cutoff},
+        )
+        return rows, horizon
 
-        rows = await self.execute_query_with_session_params(
-            query, params, session_params=["SET LOCAL enable_seqscan = off"]
+    async def _watermark(self, watermark: str) -> Tuple[str, str]:
+        """(horizon, since): ledger rows with since <= xid < horizon are new and committed."""
+        marks = await self.execute_query(
+            """
+            SELECT CAST(pg_snapshot_xmin(pg_current_snapshot()) AS text) AS horizon,
+                   COALESCE((SELECT CAST(last_xid AS text) FROM monitor_ledger_watermark
+                             WHERE name = :name), '0') AS since
+            """,
+            {"name": watermark},
         )
+        return marks[0]["horizon"], marks[0]["since"]
 
-        upserted = 0
-        for row in rows:
-            src = row["source"] or ""
-            platform = resolve_platform(src)
-
-            upsert_sql = """
-                INSERT INTO platform_hourly_profile
-                    (stat_hour, platform, source, records_ingested, unique_users,
-                     unique_indicators, filtered_count, updated_at)
-                VALUES
-                    (:stat_hour, :platform, :source, :records_ingested, :unique_users,
-                     :unique_indicators, :filtered_count, now())
-                ON CONFLICT (stat_hour, platform, source) DO UPDATE SET
-                    records_ingested  = EXCLUDED.records_ingested,
-                    unique_users      = EXCLUDED.unique_users,
-                    unique_indicators = EXCLUDED.unique_indicators,
-                    filtered_count    = EXCLUDED.filtered_count,
-                    updated_at        = now()
+    async def _advance_watermark(self, watermark: str, horizon: str) -> None:
+        await self.execute_query(
             """
-            upsert_params = {
-                "stat_hour": hour_start,
-                "platform": platform,
-                "source": src,
-                "records_ingested": row["records_ingested"],
+            INSERT INTO monitor_ledger_watermark (name, last_xid, updated_at)
+            VALUES (:name, CAST(:horizon AS xid8), now())
+            ON CONFLICT (name) DO UPDATE SET
+                last_xid   = EXCLUDED.last_xid,
+                updated_at = now()
+            """,
+            {"name": watermark, "horizon": horizon},
+        )
+
+    # ------------------------------------------------------------------
+    # Hourly: platform_hourly_profile
+    # ------------------------------------------------------------------
+
+    async def _fold_hourly(self, hours: List[datetime]) -> int:
+        """Recompute platform_hourly_profile for the given hour slots from the ledger."""
+        if not hours:
+            return 0
+
+        # Net rows per user×indicator first: unique counts only include
+        # users/indicators that still have rows in the slot.
+        query = """
+            WITH net AS (
+                SELECT stat_hour, source, indicator, user_id,
+                       SUM(records) AS records, SUM(filtered) AS filtered
+                FROM series_ingest_ledger
+                WHERE stat_hour = ANY(:hours)
+                GROUP BY stat_hour, source, indicator, user_id
+            )
+            SELECT stat_hour, source,
+                   SUM(records)                                        AS records_ingested,
+                   COUNT(DISTINCT user_id) FILTER (WHERE records > 0)   AS unique_users,
+                   COUNT(DISTINCT indicator) FILTER (WHERE records > 0) AS unique_indicators,
+                   SUM(filtered)                                       AS filtered_count
+            FROM net
+            GROUP BY stat_hour, source
+        """
+        rows = await self.execute_query(query, {"hours": hours})
+
+        params = [
+            {
+                "stat_hour": row["stat_hour"],
+                "platform": resolve_platform(row["source"]),
+                "source": row["source"],
+                "records_ingested": int(row["records_ingested"]),
                 "unique_users": row["unique_users"],
                 "unique_indicators": row["unique_indicators"],
-                "filtered_count": row["filtered_count"],
+                "filtered_count": int(row["filtered_count"]),
             }
-            await self.execute_query(upsert_sql, upsert_params)
-            upserted += 1
+            for row in rows
+        ]
+        if params:
+            await self.execute_query(HOURLY_UPSERT, params)
+        return len(params)
+
+    async def collect_hourly_stats(self, target_hour: datetime) -> Dict[str, Any]:
+        """
+        Fold the ledger for a single hour into platform_hourly_profile.
+
+        Args:
+            target_hour: The hour to collect (truncated to hour boundary)
+
+        Returns:
+            Dict with rows_upserted count
+        """
+        hour_start = target_hour.replace(minute=0, second=0, microsecond=0)
+        upserted = await self._fold_hourly([hour_start])
 
         logging.info(
-            f"[MonitorCollector] hourly stats collected: hour={hour_start.isoformat()}, "
-            f"sources={len(rows)}, upserted={upserted}"
+            f"[MonitorCollector] hourly stats collected: hour={hour_start.isoformat()}, upserted={upserted}"
         )
         return {"hour": hour_start.isoformat(), "rows_upserted": upserted}
 
-    async def collect_changed_hourly_stats(
-        self, lookback_hours: int = 2, max_days: int = 7
-    ) -> Dict[str, Any]:
+    async def collect_changed_hourly_stats(self, max_days: int = 7) -> Dict[str, Any]:
         """
-        Find hours with recently modified data and recalculate their stats.
-
-        Uses update_time to detect changes, then recalculates the affected
-        hour slots based on the data's original time field.
+        Recalculate the hour slots with ledger rows written since the last run.
 
         Args:
-            lookback_hours: How far back to check update_time (default 2h)
             max_days: Only recalculate hour slots within this many recent days (default 7d)
 
         Returns:
             Dict with hours_recalculated count
         """
-        cutoff_update = datetime.utcnow() - timedelta(hours=lookback_hours)
         cutoff_time = datetime.utcnow() - timedelta(days=max_days)
+        rows, horizon = await self._changed_slots("hourly", "stat_hour", cutoff_time)
+        hour_slots = sorted(row["stat_hour"] for row in rows)
 
-        # Find distinct hour slots that have been modified recently
-        query = """
-            SELECT DISTINCT date_trunc('hour', time) AS hour_slot
-            FROM series_data
-            WHERE update_time >= :cutoff_update
-              AND time >= :cutoff_time
-            ORDER BY hour_slot
-        """
-        rows = await self.execute_query_with_session_params(
-            query,
-            {"cutoff_update": cutoff_update, "cutoff_time": cutoff_time},
-            session_params=["SET LOCAL enable_seqscan = off"],
-        )
-
-        hour_slots = [row["hour_slot"] for row in rows]
+        total_upserted = 0
+        for i in range(0, len(hour_slots), HOURLY_FOLD_CHUNK):
+            total_upserted += await self._fold_hourly(hour_slots[i:i + HOURLY_FOLD_CHUNK])
+        await self._advance_watermark("hourly", horizon)
 
         if not hour_slots:
             logging.info("[MonitorCollector] No changed hour slots found")
             return {"hours_recalculated": 0}
 
-        logging.info(
-            f"[MonitorCollector] Found {len(hour_slots)} changed hour slots "
-            f"(lookback={lookback_hours}h, max_days={max_days}d)"
-        )
-
-        total_upserted = 0
-        for hour_slot in hour_slots:
-            result = await self.collect_hourly_stats(hour_slot)
-            total_upserted += result.get("rows_upserted", 0)
-
         logging.info(
             f"[MonitorCollector] Changed hourly stats done: "
-            f"{len(hour_slots)} hours, {total_upserted} rows upserted"
+            f"{len(hour_slots)} hours (max_days={max_days}d), {total_upserted} rows upserted"
         )
         return {"hours_recalculated": len(hour_slots), "rows_upserted": total_upserted}
 
@@ -151,187 +237,108 @@ class MonitorCollectorService(BaseDatabaseService):
     # Daily: indicator_daily_profile
     # ------------------------------------------------------------------
 
-    async def collect_daily_profile(self, target_date: date) -> Dict[str, Any]:
+    async def _fold_daily(self, target_date: date, pairs: Optional[List[Tuple[str, str]]] = None) -> int:
         """
-        Aggregate series_data for a single day into indicator_daily_profile.
+        Recompute indicator_daily_profile rows for one day.
 
-        Computes value distribution (min/max/mean/stddev/percentiles),
-        non-numeric count, filtered count, and anomaly detection per indicator×source.
+        Counts come from the ledger; the value distribution of clean numeric
+        rows from series_data.
 
         Args:
             target_date: The date to profile
+            pairs: Only these (indicator, source) pairs; all of the day's if None
 
         Returns:
-            Dict with rows_upserted count
+            Rows upserted
+        """
+        params: Dict[str, Any] = {"date_start": target_date.isoformat()}
+        if pairs is not None:
+            if not pairs:
+                return 0
+            params["indicators"] = [ind for ind, _ in pairs]
+            params["sources"] = [src for _, src in pairs]
+
+        counts_query = f"""
+            SELECT l.indicator, l.source,
+                   SUM(l.numeric_clean) AS record_count,
+                   SUM(l.non_numeric)   AS non_numeric_count,
+                   SUM(l.filtered)      AS filtered_count
+            FROM series_ingest_ledger l
+            {_PAIR_JOIN.format(alias="l") if pairs is not None else ""}
+            WHERE l.stat_hour >= CAST(:date_start AS date)
+              AND l.stat_hour < CAST(:date_start AS date) + INTERVAL '1 day'
+            GROUP BY l.indicator, l.source
+            HAVING SUM(l.numeric_clean) != 0 OR SUM(l.non_numeric) != 0 OR SUM(l.filtered) != 0
         """
-        date_str = target_date.isoformat()
 
-        # SQL 1: numeric value stats with percentiles (clean data only)
         # Use CAST() instead of :: to avoid SQLAlchemy param-parsing conflicts
         # Exclude filtered records so stats reflect clean data only.
-        # When W1.1 marks dirty data, these stats will automatically be clean.
-        stats_query = """
-            SELECT indicator, source,
-                   COUNT(*)                                    AS record_count,
-                   MIN(CAST(value AS numeric))                 AS min_val,
-                   MAX(CAST(value AS numeric))                 AS max_val,
-                   ROUND(CAST(AVG(CAST(value AS numeric)) AS numeric), 4) AS mean_val,
-                   ROUND(CAST(STDDEV(CAST(value AS numeric)) AS numeric), 4) AS stddev_val,
-                   PERCENTILE_CONT(0.01) WITHIN GROUP (ORDER BY CAST(value AS numeric)) AS p1,
-                   PERCENTILE_CONT(0.05) WITHIN GROUP (ORDER BY CAST(value AS numeric)) AS p5,
-                   PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY CAST(value AS numeric)) AS p25,
-                   PERCENTILE_CONT(0.50) WITHIN GROUP (ORDER BY CAST(value AS numeric)) AS median_val,
-                   PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY CAST(value AS numeric)) AS p75,
-                   PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY CAST(value AS numeric)) AS p95,
-                   PERCENTILE_CONT(0.99) WITHIN GROUP (ORDER BY CAST(value AS numeric)) AS p99
-            FROM series_data
-            WHERE time >= CAST(:date_start AS date)
-              AND time < CAST(:date_start AS date) + INTERVAL '1 day'
-              AND value ~ '^-?[0-9]+\\.?[0-9]*$'
-              AND (task_id IS NULL OR task_id != 'filtered_out_of_range')
-            GROUP BY indicator, source
-        """
-
-        # SQL 2: non-numeric counts
-        non_numeric_query = """
-            SELECT indicator, source,
-                   COUNT(*) AS non_numeric_count
-            FROM series_data
-            WHERE time >= CAST(:date_start AS date)
-              AND time < CAST(:date_start AS date) + INTERVAL '1 day'
-              AND NOT (value ~ '^-?[0-9]+\\.?[0-9]*$')
-            GROUP BY indicator, source
+        stats_query = f"""
+            SELECT s.indicator, COALESCE(s.source, '') AS source,
+                   MIN(CAST(s.value AS numeric))                 AS min_val,
+                   MAX(CAST(s.value AS numeric))                 AS max_val,
+                   ROUND(CAST(AVG(CAST(s.value AS numeric)) AS numeric), 4) AS mean_val,
+                   ROUND(CAST(STDDEV(CAST(s.value AS numeric)) AS numeric), 4) AS stddev_val,
+                   PERCENTILE_CONT(0.01) WITHIN GROUP (ORDER BY CAST(s.value AS numeric)) AS p1,
+                   PERCENTILE_CONT(0.05) WITHIN GROUP (ORDER BY CAST(s.value AS numeric)) AS p5,
+                   PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY CAST(s.value AS numeric)) AS p25,
+                   PERCENTILE_CONT(0.50) WITHIN GROUP (ORDER BY CAST(s.value AS numeric)) AS median_val,
+                   PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY CAST(s.value AS numeric)) AS p75,
+                   PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY CAST(s.value AS numeric)) AS p95,
+                   PERCENTILE_CONT(0.99) WITHIN GROUP (ORDER BY CAST(s.value AS numeric)) AS p99
+            FROM series_data s
+            {_PAIR_JOIN.format(alias="s") if pairs is not None else ""}
+            WHERE s.time >= CAST(:date_start AS date)
+              AND s.time < CAST(:date_start AS date) + INTERVAL '1 day'
+              AND s.value ~ '^-?[0-9]+\\.?[0-9]*$'
+              AND (s.task_id IS NULL OR s.task_id != '{FILTERED_TASK_ID}')
+            GROUP BY s.indicator, COALESCE(s.source, '')
         """
 
-        # SQL 3: filtered counts
-        filtered_query = """
-            SELECT indicator, source,
-                   COUNT(*) AS filtered_count
-            FROM series_data
-            WHERE time >= CAST(:date_start AS date)
-              AND time < CAST(:date_start AS date) + INTERVAL '1 day'
-              AND task_id = 'filtered_out_of_range'
-            GROUP BY indicator, source
-        """
-
-        params = {"date_start": date_str}
-
+        count_rows = await self.execute_query(counts_query, params)
+        if not count_rows:
+            return 0
         stats_rows = await self.execute_query_with_session_params(
             stats_query, params, session_params=["SET LOCAL enable_seqscan = off"]
         )
-        non_numeric_rows = await self.execute_query_with_session_params(
-            non_numeric_query, params, session_params=["SET LOCAL enable_seqscan = off"]
-        )
-        filtered_rows = await self.execute_query_with_session_params(
-            filtered_query, params, session_params=["SET LOCAL enable_seqscan = off"]
-        )
-
-        # Index lookup helpers
-        stats_map: Dict[str, Dict] = {}
-        for r in stats_rows:
-            key = f"{r['indicator']}|{r['source'] or ''}"
-            stats_map[key] = r
-
-        nn_map: Dict[str, int] = {}
-        for r in non_numeric_rows:
-            nn_map[f"{r['indicator']}|{r['source'] or ''}"] = r["non_numeric_count"]
-
-        fl_map: Dict[str, int] = {}
-        for r in filtered_rows:
-            fl_map[f"{r['indicator']}|{r['source'] or ''}"] = r["filtered_count"]
-
-        # Collect all indicator×source keys (union of numeric + non-numeric + filtered)
-        all_keys = set(stats_map.keys()) | set(nn_map.keys()) | set(fl_map.keys())
-
-        upsert_sql = """
-            INSERT INTO indicator_daily_profile
-                (stat_date, indicator, source, record_count, non_numeric_count,
-                 filtered_count, min_val, max_val, mean_val, stddev_val,
-                 p1, p5, p25, median_val, p75, p95, p99, issues, health, updated_at)
-            VALUES
-                (:stat_date, :indicator, :source, :record_count, :non_numeric_count,
-                 :filtered_count, :min_val, :max_val, :mean_val, :stddev_val,
-                 :p1, :p5, :p25, :median_val, :p75, :p95, :p99, :issues, :health, now())
-            ON CONFLICT (stat_date, indicator, source) DO UPDATE SET
-                record_count      = EXCLUDED.record_count,
-                non_numeric_count = EXCLUDED.non_numeric_count,
-                filtered_count    = EXCLUDED.filtered_count,
-                min_val           = EXCLUDED.min_val,
-                max_val           = EXCLUDED.max_val,
-                mean_val          = EXCLUDED.mean_val,
-                stddev_val        = EXCLUDED.stddev_val,
-                p1                = EXCLUDED.p1,
-                p5                = EXCLUDED.p5,
-                p25               = EXCLUDED.p25,
-                median_val        = EXCLUDED.median_val,
-                p75               = EXCLUDED.p75,
-                p95               = EXCLUDED.p95,
-                p99               = EXCLUDED.p99,
-                issues            = EXCLUDED.issues,
-                health            = EXCLUDED.health,
-                updated_at        = now()
-        """
+        stats_map = {(r["indicator"], r["source"]): r for r in stats_rows}
 
-        upserted = 0
-        for key in all_keys:
-            ind, src = key.split("|", 1)
+        upserts = []
+        for counts in count_rows:
+            key = (counts["indicator"], counts["source"])
             row = stats_map.get(key)
+            stats = {col: _to_float(row[col]) if row else None for col in _STAT_COLUMNS}
 
-            if row:
-                min_v = _to_float(row["min_val"])
-                max_v = _to_float(row["max_val"])
-                mean_v = _to_float(row["mean_val"])
-                std_v = _to_float(row["stddev_val"])
-                record_count = row["record_count"]
-                p1 = _to_float(row["p1"])
-                p5 = _to_float(row["p5"])
-                p25 = _to_float(row["p25"])
-                median_v = _to_float(row["median_val"])
-                p75 = _to_float(row["p75"])
-                p95 = _to_float(row["p95"])
-                p99 = _to_float(row["p99"])
-            else:
-                # Non-numeric only or filtered-only — no stats
-                min_v = max_v = mean_v = std_v = None
-                record_count = 0
-                p1 = p5 = p25 = median_v = p75 = p95 = p99 = None
-
-            issues = _detect_anomalies(min_v, max_v, mean_v, std_v)
+            issues = _detect_anomalies(stats["min_val"], stats["max_val"], stats["mean_val"], stats["stddev_val"])
             health = "ok"
             if len(issues) == 1:
                 health = "warning"
             elif len(issues) > 1:
                 health = "critical"
 
-            upsert_params = {
+            upserts.append({
                 "stat_date": target_date,
-                "indicator": ind,
-                "source": src,
-                "record_count": record_count,
-                "non_numeric_count": nn_map.get(key, 0),
-                "filtered_count": fl_map.get(key, 0),
-                "min_val": min_v,
-                "max_val": max_v,
-                "mean_val": mean_v,
-                "stddev_val": std_v,
-                "p1": p1,
-                "p5": p5,
-                "p25": p25,
-                "median_val": median_v,
-                "p75": p75,
-                "p95": p95,
-                "p99": p99,
+                "indicator": key[0],
+                "source": key[1],
+                # Non-numeric only or filtered-only slices have no stats
+                "record_count": int(counts["record_count"]) if row else 0,
+                "non_numeric_count": int(counts["non_numeric_count"]),
+                "filtered_count": int(counts["filtered_count"]),
+                **stats,
                 "issues": json.dumps(issues),
                 "health": health,
-            }
-            await self.execute_query(upsert_sql, upsert_params)
-            upserted += 1
-
-        # ------------------------------------------------------------------
-        # Phase 2: Collect aggregated/derived/daily_stats from th_series_data
-        # These indicators live in th_series_data, not series_data.
-        # Source = task_id value for identification.
-        # ------------------------------------------------------------------
+            })
+
+        await self.execute_query(DAILY_UPSERT, upserts)
+        return len(upserts)
+
+    async def _collect_th_series_profile(self, target_date: date) -> int:
+        """
+        Collect aggregated/derived/daily_stats from th_series_data.
+
+        These indicators live in th_series_data, not series_data.
+        Source = task_id value for identification.
+        """
         th_stats_query = """
             SELECT indicator, source,
                    COUNT(*)                                    AS record_count,
@@ -349,16 +356,14 @@ class MonitorCollectorService(BaseDatabaseService):
             GROUP BY indicator, source
         """
         th_rows = await self.execute_query_with_session_params(
-            th_stats_query, params, session_params=[]
+            th_stats_query, {"date_start": target_date.isoformat()}, session_params=[]
         )
 
-        for r in th_rows:
-            ind = r["indicator"] or ""
-            src = r["source"] or ""
-            upsert_params = {
+        upserts = [
+            {
                 "stat_date": target_date,
-                "indicator": ind,
-                "source": src,
+                "indicator": r["indicator"] or "",
+                "source": r["source"] or "",
                 "record_count": r["record_count"],
                 "non_numeric_count": 0,
                 "filtered_count": 0,
@@ -376,78 +381,82 @@ class MonitorCollectorService(BaseDatabaseService):
                 "issues": "[]",
                 "health": "ok",
             }
-            await self.execute_query(upsert_sql, upsert_params)
-            upserted += 1
+            for r in th_rows
+        ]
+        if upserts:
+            await self.execute_query(DAILY_UPSERT, upserts)
+        return len(upserts)
+
+    async def collect_daily_profile(self, target_date: date) -> Dict[str, Any]:
+        """
+        Recompute indicator_daily_profile for a single day.
+
+        Computes value distribution (min/max/mean/stddev/percentiles),
+        non-numeric count, filtered count, and anomaly detection per indicator×source.
+
+        Args:
+            target_date: The date to profile
+
+        Returns:
+            Dict with rows_upserted count
+        """
+        date_str = target_date.isoformat()
+        series = await self._fold_daily(target_date)
+        th_series = await self._collect_th_series_profile(target_date)
 
         logging.info(
             f"[MonitorCollector] daily profile collected: date={date_str}, "
-            f"series={len(all_keys)}, th_series={len(th_rows)}, upserted={upserted}"
+            f"series={series}, th_series={th_series}, upserted={series + th_series}"
         )
-        return {"date": date_str, "rows_upserted": upserted}
+        return {"date": date_str, "rows_upserted": series + th_series}
 
-    async def collect_changed_daily_profiles(
-        self, lookback_hours: int = 12, max_days: int = 30
-    ) -> Dict[str, Any]:
+    async def collect_changed_daily_profiles(self, max_days: int = 30) -> Dict[str, Any]:
         """
-        Find days with recently modified data and recalculate their daily profiles.
+        Recalculate the indicator×source days with ledger rows written since the last run.
 
         Args:
-            lookback_hours: How far back to check update_time (default 12h)
             max_days: Only recalculate days within this many recent days (default 30d)
 
         Returns:
             Dict with days_recalculated count
         """
-        cutoff_update = datetime.utcnow() - timedelta(hours=lookback_hours)
-        cutoff_time = date.today() - timedelta(days=max_days)
-
-        query = """
-            SELECT DISTINCT time::date AS day_slot
-            FROM series_data
-            WHERE update_time >= :cutoff_update
-              AND time::date >= :cutoff_time
-            ORDER BY day_slot
-        """
-        rows = await self.execute_query_with_session_params(
-            query,
-            {"cutoff_update": cutoff_update, "cutoff_time": str(cutoff_time)},
-            session_params=["SET LOCAL enable_seqscan = off"],
+        cutoff_time = datetime.combine(date.today() - timedelta(days=max_days), datetime.min.time())
+        rows, horizon = await self._changed_slots(
+            "daily", "CAST(stat_hour AS date) AS stat_date, indicator, source", cutoff_time
         )
 
-        day_slots = [row["day_slot"] for row in rows]
+        changed: Dict[date, List[Tuple[str, str]]] = {}
+        for row in rows:
+            changed.setdefault(row["stat_date"], []).append((row["indicator"], row["source"]))
+
+        total_upserted = 0
+        for day_slot in sorted(changed):
+            total_upserted += await self._fold_daily(day_slot, changed[day_slot])
+            total_upserted += await self._collect_th_series_profile(day_slot)
+        await self._advance_watermark("daily", horizon)
 
-        if not day_slots:
+        if not changed:
             logging.info("[MonitorCollector] No changed day slots found")
             return {"days_recalculated": 0}
 
-        logging.info(
-            f"[MonitorCollector] Found {len(day_slots)} changed day slots "
-            f"(lookback={lookback_hours}h, max_days={max_days}d)"
-        )
-
-        total_upserted = 0
-        for day_slot in day_slots:
-            result = await self.collect_daily_profile(day_slot)
-            total_upserted += result.get("rows_upserted", 0)
-
         logging.info(
             f"[MonitorCollector] Changed daily profiles done: "
-            f"{len(day_slots)} days, {total_upserted} rows upserted"
+            f"{len(changed)} days, {len(rows)} indicator×source slices (max_days={max_days}d), "
+            f"{total_upserted} rows upserted"
         )
-        return {"days_recalculated": len(day_slots), "rows_upserted": total_upserted}
+        return {"days_recalculated": len(changed), "rows_upserted": total_upserted}
 
     # ------------------------------------------------------------------
-    # Backfill
+    # Backfill & ledger maintenance
     # ------------------------------------------------------------------
 
     async def backfill_hourly(self, days: int = 7) -> Dict[str, Any]:
         """Backfill platform_hourly_profile for the past N days."""
         now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        hours = [now - timedelta(hours=offset_hours + 1) for offset_hours in range(days * 24)]
         total = 0
-        for offset_hours in range(days * 24):
-            target = now - timedelta(hours=offset_hours + 1)
-            result = await self.collect_hourly_stats(target)
-            total += result.get("rows_upserted", 0)
+        for i in range(0, len(hours), HOURLY_FOLD_CHUNK):
+            total += await self._fold_hourly(hours[i:i + HOURLY_FOLD_CHUNK])
 
         logging.info(f"[MonitorCollector] hourly backfill done: {days} days, {total} rows")
         return {"days": days, "total_rows_upserted": total}
@@ -464,6 +473,52 @@ class MonitorCollectorService(BaseDatabaseService):
         logging.info(f"[MonitorCollector] daily backfill done: {days} days, {total} rows")
         return {"days": days, "total_rows_upserted": total}
 
+    async def rebuild_ledger(self, days: int = 30) -> Dict[str, Any]:
+        """
+        Rebuild the ledger for the past N days and today from series_data.
+
+        Seeds the ledger after it is first created, and repairs it after writes
+        that bypassed it. One series_data scan, in one transaction.
+        """
+        start = datetime.combine(date.today() - timedelta(days=days), datetime.min.time())
+        await self.execute_query(LEDGER_REBUILD, {"start": start, "end": start + timedelta(days=days + 1)})
+
+        logging.info(f"[MonitorCollector] ledger rebuilt: {days + 1} days")
+        return {"days": days + 1}
+
+    async def compact_ledger(self, after_days: int = LEDGER_COMPACT_AFTER_DAYS) -> Dict[str, Any]:
+        """
+        Collapse the ledger rows of every day older than after_days to one row per key.
+
+        Only days with ledger rows written since the last compaction are
+        visited, so a skipped run, or a late write into an old day, is picked
+        up by the next one. Compaction keeps the xid of the rows it leaves,
+        so it never shows up as a change to the collectors or to itself.
+        """
+        cutoff = datetime.combine(date.today() - timedelta(days=after_days), datetime.min.time())
+        horizon, since = await self._watermark("compact")
+
+        rows = await self.execute_query(
+            """
+            SELECT DISTINCT date_trunc('day', stat_hour) AS day_start
+            FROM series_ingest_ledger
+            WHERE xid >= CAST(:since AS xid8) AND xid < CAST(:horizon AS xid8)
+              AND stat_hour < :cutoff
+            ORDER BY 1
+            """,
+            {"since": since, "horizon": horizon, "cutoff": cutoff},
+        )
+        days = [row["day_start"] for row in rows]
+        for day_start in days:
+            await self.execute_query(
+                LEDGER_COMPACT_DAY, {"day_start": day_start, "day_end": day_start + timedelta(days=1)}
+            )
+        await self._advance_watermark("compact", horizon)
+
+        if days:
+            logging.info(f"[MonitorCollector] ledger compacted: {len(days)} days")
+        return {"days": [day.date().isoformat() for day in days]}
+
 
 # ------------------------------------------------------------------
 # Helpers
@@ -29,12 +29,10 @@ class HourlyCollectorTask(PullTask):
 
     async def execute(self) -> bool:
         try:
-            # Recalculate hour slots with recently modified data
-            # Looks at update_time in the last 2 hours, only recalculates slots within 7 days
+            # Recalculate hour slots with ledger rows written since the last run,
+            # only slots within 7 days
             logging.info("[HourlyCollectorTask] Collecting changed hour slots")
-            result = await self.service.collect_changed_hourly_stats(
-                lookback_hours=2, max_days=7
-            )
+            result = await self.service.collect_changed_hourly_stats(max_days=7)
 
             stats = {
                 "executed_at": datetime.now().isoformat(),
@@ -57,7 +55,7 @@ class HourlyCollectorTask(PullTask):
         full_status = await self.get_full_status()
         full_status.update({
             "task_name": "Monitor Hourly Collector",
-            "description": "Collect hourly platform ingestion stats from series_data",
+            "description": "Collect hourly platform ingestion stats from the series ingest ledger",
             "execution_frequency": "Every 1 hour",
         })
         return full_status
@@ -78,12 +76,12 @@ class DailyProfileTask(PullTask):
 
     async def execute(self) -> bool:
         try:
-            # Recalculate day slots with recently modified data
-            # Looks at update_time in the last 12 hours, only recalculates slots within 30 days
+            # Recalculate indicator×source days with ledger rows written since
+            # the last run, only days within 30 days; then compact the ledger
+            # days older than that window written since the last compaction
             logging.info("[DailyProfileTask] Collecting changed day slots")
-            result = await self.service.collect_changed_daily_profiles(
-                lookback_hours=12, max_days=30
-            )
+            result = await self.service.collect_changed_daily_profiles(max_days=30)
+            await self.service.compact_ledger()
 
             stats = {
                 "executed_at": datetime.now().isoformat(),
@@ -106,7 +104,7 @@ class DailyProfileTask(PullTask):
         full_status = await self.get_full_status()
         full_status.update({
             "task_name": "Monitor Daily Profile",
-            "description": "Collect daily indicator quality profiles from series_data",
+            "description": "Collect daily indicator quality profiles from the series ingest ledger and series_data",
             "execution_frequency": "Every 24 hours",
         })
         return full_status
@@ -0,0 +1,77 @@
+"""
+Series Ingest Ledger (TH-141)
+
+SQL shared by the series_data writers and MonitorCollectorService for
+series_ingest_ledger (res/sql/98): per (hour, source, indicator, user) row
+count deltas appended by each write, folded into the monitor report tables.
+"""
+
+FILTERED_TASK_ID = "filtered_out_of_range"
+
+NUMERIC_VALUE = "value ~ '^-?[0-9]+\\.?[0-9]*$'"
+
+# Appends the deltas of a write to the ledger. Runs as the last step of a
+# data-modifying statement that defines
+#   changes(user_id, indicator, source, time, value, task_id, sign)
+# with sign +1 for each row written and -1 for each overwritten version.
+LEDGER_APPEND = f"""
+    INSERT INTO series_ingest_ledger
+        (stat_hour, source, indicator, user_id, records, filtered, non_numeric, numeric_clean)
+    SELECT date_trunc('hour', time), COALESCE(source, ''), indicator, user_id,
+           SUM(sign),
+           SUM(CASE WHEN task_id = '{FILTERED_TASK_ID}' THEN sign ELSE 0 END),
+           SUM(CASE WHEN NOT ({NUMERIC_VALUE}) THEN sign ELSE 0 END),
+           SUM(CASE WHEN {NUMERIC_VALUE} AND (task_id IS NULL OR task_id != '{FILTERED_TASK_ID}')
+                    THEN sign ELSE 0 END)
+    FROM changes
+    GROUP BY 1, 2, 3, 4
+"""
+
+# Rebuilds the ledger rows of [:start, :end) from series_data in one scan.
+# DELETE and INSERT share one snapshot, so a write committed meanwhile is
+# counted exactly once: either its series_data rows are visible here, or its
+# ledger rows survive the DELETE.
+LEDGER_REBUILD = f"""
+    WITH dropped AS (
+        DELETE FROM series_ingest_ledger
+        WHERE stat_hour >= :start AND stat_hour < :end
+    ),
+    changes AS (
+        SELECT user_id, indicator, source, time, value, task_id, 1 AS sign
+        FROM series_data
+        WHERE time >= :start AND time < :end
+    )
+    {LEDGER_APPEND}
+"""
+
+# Collapses the ledger rows of one day to one row per key, in place: the
+# lowest-id row of each key takes the sums and keeps its xid, the rest are
+# deleted, so compaction writes no rows past any watermark. Keys that net to
+# zero are dropped entirely.
+LEDGER_COMPACT_DAY = """
+    WITH grouped AS (
+        SELECT MIN(id) AS keep_id, stat_hour, source, indicator, user_id,
+               SUM(records) AS records, SUM(filtered) AS filtered,
+               SUM(non_numeric) AS non_numeric, SUM(numeric_clean) AS numeric_clean,
+               SUM(records) = 0 AND SUM(filtered) = 0
+                   AND SUM(non_numeric) = 0 AND SUM(numeric_clean) = 0 AS empty
+        FROM series_ingest_ledger
+        WHERE stat_hour >= :day_start AND stat_hour < :day_end
+        GROUP BY stat_hour, source, indicator, user_id
+        HAVING COUNT(*) > 1
+            OR (SUM(records) = 0 AND SUM(filtered) = 0 AND SUM(non_numeric) = 0 AND SUM(numeric_clean) = 0)
+    ),
+    kept AS (
+        UPDATE series_ingest_ledger l SET
+            records = g.records, filtered = g.filtered,
+            non_numeric = g.non_numeric, numeric_clean = g.numeric_clean
+        FROM grouped g
+        WHERE l.id = g.keep_id AND NOT g.empty
+    )
+    DELETE FROM series_ingest_ledger l
+    USING grouped g
+    WHERE l.stat_hour = g.stat_hour AND l.source = g.source
+      AND l.indicator = g.indicator AND l.user_id = g.user_id
+      AND l.stat_hour >= :day_start AND l.stat_hour < :day_end
+      AND (l.id != g.keep_id OR g.empty)
+"""
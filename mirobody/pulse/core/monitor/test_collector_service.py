@@ -0,0 +1,138 @@
+"""Monitor collector: ledger folds, watermarks and daily profiles, against a scripted execute_query."""
+
+from __future__ import annotations
+
+import json
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from .collector_service import HOURLY_FOLD_CHUNK, MonitorCollectorService
+
+
+class _ScriptedCollector(MonitorCollectorService):
+    """Records every query and answers it with the first scripted rows whose key occurs in the SQL."""
+
+    def __init__(self, script: Dict[str, List[Dict[str, Any]]]) -> None:
+        super().__init__(db_config="")
+        self.script = script
+        self.calls: List[Tuple[str, Any, Optional[List[str]]]] = []
+
+    async def execute_query(self, query: str, params: Any = None, db_config: Any = None) -> List[Dict[str, Any]]:
+        self.calls.append((query, params, None))
+        return next((rows for key, rows in self.script.items() if key in query), [])
+
+    async def execute_query_with_session_params(
+        self, query: str, params: Any = None, session_params: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        self.calls.append((query, params, session_params))
+        return next((rows for key, rows in self.script.items() if key in query), [])
+
+    def queries(self, fragment: str) -> List[Tuple[str, Any, Optional[List[str]]]]:
+        return [call for call in self.calls if fragment in call[0]]
+
+
+_MARKS = {"pg_current_snapshot": [{"horizon": "905", "since": "870"}]}
+
+
+@pytest.mark.asyncio
+async def test_changed_hourly_stats_fold_ledger_slots_in_chunks_and_advance_the_watermark() -> None:
+    first = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=HOURLY_FOLD_CHUNK + 9)
+    hours = [first + timedelta(hours=h) for h in range(HOURLY_FOLD_CHUNK + 10)]
+    service = _ScriptedCollector({
+        **_MARKS,
+        "SELECT DISTINCT stat_hour": [{"stat_hour": h} for h in reversed(hours)],
+        "WITH net AS": [{"stat_hour": first, "source": "vital.garmin", "records_ingested": 12,
+                         "unique_users": 2, "unique_indicators": 3, "filtered_count": 1}],
+    })
+
+    result = await service.collect_changed_hourly_stats(max_days=7)
+
+    assert result == {"hours_recalculated": len(hours), "rows_upserted": 2}
+    (_, slot_params, _), = service.queries("SELECT DISTINCT stat_hour")
+    assert (slot_params["since"], slot_params["horizon"]) == ("870", "905")
+    folds = service.queries("WITH net AS")
+    assert [call[1]["hours"] for call in folds] == [hours[:HOURLY_FOLD_CHUNK], hours[HOURLY_FOLD_CHUNK:]]
+    upserts = service.queries("INSERT INTO platform_hourly_profile")
+    assert upserts[0][1] == [{"stat_hour": first, "platform": "vital", "source": "vital.garmin", "records_ingested": 12,
+                              "unique_users": 2, "unique_indicators": 3, "filtered_count": 1}]
+    # Rows are never read from series_data for the hourly report
+    assert not service.queries("FROM series_data")
+    (_, mark, _), = service.queries("INSERT INTO monitor_ledger_watermark")
+    assert mark == {"name": "hourly", "horizon": "905"}
+
+
+@pytest.mark.asyncio
+async def test_watermark_advances_when_nothing_changed() -> None:
+    service = _ScriptedCollector(dict(_MARKS))
+
+    assert await service.collect_changed_hourly_stats() == {"hours_recalculated": 0}
+    assert await service.collect_changed_daily_profiles() == {"days_recalculated": 0}
+
+    assert not service.queries("WITH net AS") and not service.queries("FROM series_data")
+    assert [call[1]["name"] for call in service.queries("INSERT INTO monitor_ledger_watermark")] == ["hourly", "daily"]
+
+
+@pytest.mark.asyncio
+async def test_changed_daily_profiles_rescan_only_changed_pairs() -> None:
+    day = datetime.utcnow().date() - timedelta(days=1)
+    service = _ScriptedCollector({
+        **_MARKS,
+        "SELECT DISTINCT CAST(stat_hour AS date)": [
+            {"stat_date": day, "indicator": "heartRates", "source": "vital.garmin"},
+            {"stat_date": day, "indicator": "notes", "source": ""},
+        ],
+        "FROM series_ingest_ledger l": [
+            {"indicator": "heartRates", "source": "vital.garmin", "record_count": 40, "non_numeric_count": 0, "filtered_count": 2},
+            {"indicator": "notes", "source": "", "record_count": 0, "non_numeric_count": 5, "filtered_count": 0},
+        ],
+        "FROM series_data s": [
+            {"indicator": "heartRates", "source": "vital.garmin", "min_val": 55, "max_val": 80000, "mean_val": 70,
+             "stddev_val": 2, "p1": 50, "p5": 52, "p25": 60, "median_val": 70, "p75": 75, "p95": 90, "p99": 110},
+        ],
+    })
+
+    result = await service.collect_changed_daily_profiles(max_days=30)
+
+    assert result["days_recalculated"] == 1
+    (_, stats_params, session), = service.queries("FROM series_data s")
+    assert stats_params == {"date_start": day.isoformat(), "indicators": ["heartRates", "notes"], "sources": ["vital.garmin", ""]}
+    assert session == ["SET LOCAL enable_seqscan = off"]
+
+    (_, rows, _), = service.queries("INSERT INTO indicator_daily_profile")
+    by_indicator = {row["indicator"]: row for row in rows}
+    assert by_indicator["heartRates"]["record_count"] == 40
+    assert by_indicator["heartRates"]["filtered_count"] == 2
+    assert by_indicator["heartRates"]["health"] == "warning"  # max above mean + 10σ
+    assert by_indicator["notes"]["record_count"] == 0
+    assert by_indicator["notes"]["min_val"] is None
+    assert json.loads(by_indicator["notes"]["issues"]) == []
+    assert service.queries("INSERT INTO monitor_ledger_watermark")[-1][1] == {"name": "daily", "horizon": "905"}
+
+
+@pytest.mark.asyncio
+async def test_fold_daily_skips_the_series_data_scan_for_days_without_ledger_rows() -> None:
+    service = _ScriptedCollector({})
+
+    assert await service._fold_daily(date(2025, 3, 1)) == 0
+    assert await service._fold_daily(date(2025, 3, 1), pairs=[]) == 0
+    assert not service.queries("FROM series_data")
+
+
+@pytest.mark.asyncio
+async def test_compaction_visits_every_old_day_written_since_the_last_one() -> None:
+    days = [datetime(2025, 3, 1), datetime(2025, 3, 9)]
+    service = _ScriptedCollector({**_MARKS, "date_trunc('day', stat_hour)": [{"day_start": day} for day in days]})
+
+    assert await service.compact_ledger(after_days=31) == {"days": ["2025-03-01", "2025-03-09"]}
+
+    (_, day_params, _), = service.queries("date_trunc('day', stat_hour)")
+    assert (day_params["since"], day_params["horizon"]) == ("870", "905")
+    assert day_params["cutoff"] == datetime.combine(date.today() - timedelta(days=31), datetime.min.time())
+    compactions = service.queries("WITH grouped AS")
+    assert [(call[1]["day_start"], call[1]["day_end"]) for call in compactions] == [
+        (day, day + timedelta(days=1)) for day in days
+    ]
+    assert service.queries("INSERT INTO monitor_ledger_watermark")[-1][1] == {"name": "compact", "horizon": "905"}
@@ -4,8 +4,8 @@ Encapsulated function call push service
 Used to simulate webhook pushes, avoiding HTTP overhead while providing the ability to switch to HTTP
 """
 
-import aiohttp, logging, uuid
-from typing import Any, Dict, Optional
+import aiohttp, asyncio, logging, uuid
+from typing import Any, Dict, List, Optional
 
 class PushService:
     """
@@ -56,6 +56,62 @@ class PushService:
             logging.error(f"Push data failed for {platform}/{provider_slug}: {str(e)}")
             return False
 
+    async def push_batch(
+        self,
+        platform: str,
+        provider_slug: str,
+        data_list: List[Dict[str, Any]],
+    ) -> List[bool]:
+        """
+        Push several records concurrently
+
+        Function call mode resolves the platform once; HTTP mode shares one
+        session. Each record gets its own msg_id.
+
+        Args:
+            platform: Platform identifier
+            provider_slug: Provider identifier
+            data_list: Raw data records
+
+        Returns:
+            Push success per record, in order
+        """
+        if not data_list:
+            return []
+
+        try:
+            if self.use_function_call:
+                from ...pulse.manager import platform_manager
+
+                platform_instance = platform_manager.get_platform(platform)
+                if not platform_instance:
+                    logging.error(f"platform not found in platformManager: {platform}")
+                    return [False] * len(data_list)
+
+                async def push_one(data: Dict[str, Any]) -> bool:
+                    try:
+                        return bool(await platform_instance.post_data(provider_slug, data, str(uuid.uuid4())))
+                    except Exception as e:
+                        logging.error(f"Function call push error for {platform}/{provider_slug}: {str(e)}")
+                        return False
+
+                results = await asyncio.gather(*(push_one(data) for data in data_list))
+            else:
+                async with aiohttp.ClientSession() as session:
+                    results = await asyncio.gather(*(
+                        self._push_via_http(platform, provider_slug, data, str(uuid.uuid4()), session)
+                        for data in data_list
+                    ))
+
+            logging.info(
+                f"Batch push for {platform}/{provider_slug}: {sum(results)}/{len(data_list)} succeeded"
+            )
+            return list(results)
+
+        except Exception as e:
+            logging.error(f"Batch push failed for {platform}/{provider_slug}: {str(e)}")
+            return [False] * len(data_list)
+
     async def _push_via_function_call(
         self, platform: str, provider_slug: str, data: Dict[str, Any], msg_id: str
     ) -> bool:
@@ -87,12 +143,23 @@ class PushService:
             logging.error(f"Function call push error for {platform}/{provider_slug}: {str(e)}")
             return False
 
-    async def _push_via_http(self, platform: str, provider_slug: str, data: Dict[str, Any], msg_id: str) -> bool:
+    async def _push_via_http(
+        self,
+        platform: str,
+        provider_slug: str,
+        data: Dict[str, Any],
+        msg_id: str,
+        session: Optional[aiohttp.ClientSession] = None,
+    ) -> bool:
         """
         Push data via HTTP
 
         As an alternative to function call
         """
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self._push_via_http(platform, provider_slug, data, msg_id, session)
+
         try:
             base_url = "http://localhost:18060"
             webhook_url = f"{base_url}/api/v1/pulse/{platform}/webhook"
@@ -102,18 +169,17 @@ class PushService:
                 "X-Message-ID": msg_id,
             }
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(webhook_url, json=data, headers=headers) as response:
-                    if response.status == 200:
-                        logging.info(f"HTTP push successful: {platform}/{provider_slug}, msg_id: {msg_id}")
-                        return True
-                    else:
-                        response_text = await response.text()
-
-                        logging.error(
-                            f"HTTP push failed: {platform}/{provider_slug}, status: {response.status}, response: {response_text}"
-                        )
-                        return False
+            async with session.post(webhook_url, json=data, headers=headers) as response:
+                if response.status == 200:
+                    logging.info(f"HTTP push successful: {platform}/{provider_slug}, msg_id: {msg_id}")
+                    return True
+                else:
+                    response_text = await response.text()
+
+                    logging.error(
+                        f"HTTP push failed: {platform}/{provider_slug}, status: {response.status}, response: {response_text}"
+                    )
+                    return False
 
         except Exception as e:
             logging.error(f"HTTP push error for {platform}/{provider_slug}: {str(e)}")
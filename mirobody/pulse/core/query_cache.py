@@ -0,0 +1,318 @@
+"""
+Bounded in-process query cache
+
+LRU keyed by cache key, bounded by entry count and by estimated bytes, with a
+TTL per entry and a tag index so invalidation touches only the entries that
+carry a tag (user_id, provider, table, ...) instead of scanning every key.
+
+Concurrent misses on the same key share one load (single-flight): the first
+caller runs the query, the others await its result. A load that overlaps an
+invalidation still returns its result to its callers but is not stored, so a
+stale read can never outlive the invalidation that should have removed it.
+"""
+
+import asyncio
+import logging
+import sys
+import time
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Mapping, NamedTuple, Optional, Set, Tuple
+
+from .constants import CacheConfig
+
+Tags = Optional[Mapping[str, Any]]
+
+_MISSING = object()
+_CONTAINERS = (list, tuple, set, frozenset)
+
+
+class _Entry(NamedTuple):
+    value: Any
+    expires_at: float
+    size: int
+    tags: Tuple[str, ...]
+
+
+def tag_keys(tags: Tags) -> Tuple[str, ...]:
+    """Normalize {"user_id": "u1", "table": "series_data"} into index keys."""
+    if not tags:
+        return ()
+    return tuple(f"{name}={value}" for name, value in tags.items() if value is not None)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Rough deep size of a query result in bytes
+
+    Walks lists/tuples/sets and dicts (rows) down to scalars. Shared objects,
+    such as column names repeated in every row, are counted once per reference,
+    which overestimates; that is the safe direction for a byte budget.
+    """
+    size = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        size += sys.getsizeof(item)
+        kind = type(item)
+        if kind is dict:
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif kind in _CONTAINERS:
+            stack.extend(item)
+    return size
+
+
+class QueryCache:
+    """
+    Size- and byte-bounded LRU with per-entry TTL, tag invalidation and single-flight loads
+    """
+
+    def __init__(
+            self,
+            max_entries: int = CacheConfig.QUERY_CACHE_MAX_ENTRIES,
+            max_bytes: int = CacheConfig.QUERY_CACHE_MAX_BYTES,
+            ttl: float = CacheConfig.QUERY_CACHE_TTL,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize query cache
+
+        Args:
+            max_entries: Maximum number of entries, least recently used are evicted first
+            max_bytes: Maximum estimated size of all values; a single larger value is not cached
+            ttl: Default time to live (seconds) for entries stored without an explicit ttl
+            clock: Monotonic time source
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._bytes = 0
+
+        # key -> (future shared by concurrent callers, tag keys of the load)
+        self._inflight: Dict[str, Tuple[asyncio.Future, Tuple[str, ...]]] = {}
+        self._epoch = 0  # Bumped by every invalidation; loads that span one are not stored
+
+        self._stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "oversize": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    # -- Entries ----------------------------------------------------------
+
+    def get(self, key: str, default: Any = None, count: bool = True) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= self._clock():
+            self._remove(key)
+            self._stats["expirations"] += 1
+            entry = None
+        if entry is None:
+            if count:
+                self._stats["misses"] += 1
+            return default
+        self._entries.move_to_end(key)
+        if count:
+            self._stats["hits"] += 1
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Tags = None) -> bool:
+        """
+        Store value under key
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Time to live (seconds), defaults to the cache ttl
+            tags: Invalidation tags, e.g. {"user_id": user_id, "table": "series_data"}
+
+        Returns:
+            Whether the value was stored (False if it alone exceeds max_bytes)
+        """
+        return self._store(key, value, ttl, tag_keys(tags))
+
+    def _store(self, key: str, value: Any, ttl: Optional[float], keys: Tuple[str, ...]) -> bool:
+        self._remove(key)
+        if self.max_entries <= 0:
+            return False
+        size = estimate_size(value) + sys.getsizeof(key)
+        if size > self.max_bytes:
+            self._stats["oversize"] += 1
+            return False
+
+        self._entries[key] = _Entry(value, self._clock() + (self.ttl if ttl is None else ttl), size, keys)
+        self._bytes += size
+        for tag in keys:
+            self._tag_index.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+        return True
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+    # -- Invalidation -----------------------------------------------------
+
+    def invalidate(self, keys: Iterable[str]) -> int:
+        """Drop the given keys; returns how many entries were removed"""
+        keys = set(keys)
+        removed = 0
+        for key in keys:
+            if key in self._entries:
+                self._remove(key)
+                removed += 1
+        self._detach_inflight(lambda k, _tags: k in keys)
+        self._epoch += 1
+        self._stats["invalidations"] += removed
+        return removed
+
+    def invalidate_tags(self, **tags: Any) -> int:
+        """
+        Drop every entry carrying any of the given tags
+
+        Cost is proportional to the number of matching entries, not the cache size.
+
+        Args:
+            **tags: e.g. user_id="u1" or table="series_data", provider="oura"
+
+        Returns:
+            Number of entries removed
+        """
+        wanted = tag_keys(tags)
+        keys: Set[str] = set()
+        for tag in wanted:
+            keys |= self._tag_index.get(tag, set())
+        removed = self.invalidate(keys)
+        self._detach_inflight(lambda _k, load_tags: any(t in load_tags for t in wanted))
+        return removed
+
+    def clear(self, pattern: Optional[str] = None) -> int:
+        """
+        Drop all entries, or those whose key contains pattern
+
+        Substring matching scans every key; prefer invalidate_tags.
+        """
+        if pattern:
+            return self.invalidate([key for key in self._entries if pattern in key])
+
+        removed = len(self._entries)
+        self._entries.clear()
+        self._tag_index.clear()
+        self._bytes = 0
+        self._inflight.clear()
+        self._epoch += 1
+        self._stats["invalidations"] += removed
+        return removed
+
+    def _detach_inflight(self, match: Callable[[str, Tuple[str, ...]], bool]) -> None:
+        # The running load still answers the callers already waiting on it, but
+        # callers arriving after the invalidation start a fresh one.
+        for key in [k for k, (_, load_tags) in self._inflight.items() if match(k, load_tags)]:
+            del self._inflight[key]
+
+    # -- Single-flight ----------------------------------------------------
+
+    async def get_or_load(
+            self,
+            key: str,
+            loader: Callable[[], Awaitable[Any]],
+            ttl: Optional[float] = None,
+            tags: Tags = None,
+    ) -> Any:
+        """
+        Return the cached value for key, loading it once for all concurrent callers on a miss
+
+        Args:
+            key: Cache key
+            loader: Coroutine function producing the value
+            ttl: Time to live (seconds), defaults to the cache ttl
+            tags: Invalidation tags for the stored value
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+
+            future = inflight[0]
+            self._stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The loading caller was cancelled, not us: try again
+
+        keys = tag_keys(tags)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (future, keys)
+        epoch = self._epoch
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved: no "never retrieved" warning when nobody else waits
+            raise
+        else:
+            future.set_result(value)
+            if value is not None and self._epoch == epoch:
+                self._store(key, value, ttl, keys)
+            elif value is not None:
+                logging.debug(f"Query cache: not storing {key}, invalidated while loading")
+            return value
+        finally:
+            if self._inflight.get(key, (None,))[0] is future:
+                del self._inflight[key]
+
+    # -- Stats ------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "tags": len(self._tag_index),
+            "inflight": len(self._inflight),
+        }
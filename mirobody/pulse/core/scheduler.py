@@ -44,6 +44,8 @@ class PullTask:
             lock_duration_hours: Distributed lock duration (hours), defaults to execution_interval_hours - 0.5
         """
         self.provider_slug = provider_slug
+        self.lock_slug = provider_slug  # Distributed lock name; sharded tasks lock per shard
+        self.use_leases = False  # execute() claims per-bucket leases itself, skip the provider lock
         self.schedule_type = schedule_type
         self.interval_minutes = interval_minutes
         self.execution_interval_hours = execution_interval_hours
@@ -105,9 +107,13 @@ class PullTask:
             logging.warning(f"No lock manager available for {self.provider_slug}, executing without lock")
             return await self._execute_internal()
 
+        if self.use_leases:
+            # Every instance runs; user buckets are leased inside execute()
+            return await self._execute_internal()
+
         # Try to acquire distributed lock
         execution_id = await pull_task_lock_manager.try_acquire_execution_lock(
-            self.provider_slug,
+            self.lock_slug,
             lock_duration_hours=self.lock_duration_hours,
             force=force,
         )
@@ -127,7 +133,7 @@ class PullTask:
         finally:
             # Ensure lock is released
             if execution_id:
-                await pull_task_lock_manager.release_execution_lock(self.provider_slug, execution_id)
+                await pull_task_lock_manager.release_execution_lock(self.lock_slug, execution_id)
                 self.current_execution_id = None
 
     async def _execute_internal(self) -> bool:
@@ -235,7 +241,7 @@ class PullTask:
         if not pull_task_lock_manager:
             return {"error": "Lock manager not available"}
 
-        return await pull_task_lock_manager.get_lock_status(self.provider_slug)
+        return await pull_task_lock_manager.get_lock_status(self.lock_slug)
     
     # ==================== Cache Service Interface ====================
     
@@ -0,0 +1,120 @@
+"""Per-bucket pull leases against redis_compat's in-process MemoryStore."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from collections import Counter
+
+import pytest
+
+from ...utils.config.redis_compat import RedisCompat
+from .distributed_lock import PullLeaseCoordinator, PullTaskLockManager, user_bucket
+
+_SLUG = "theta_test"
+
+
+def _coordinator(redis, lease_seconds: float = 0.3, batch: int = 2) -> PullLeaseCoordinator:
+    return PullLeaseCoordinator(redis, _SLUG, PullTaskLockManager(), lease_seconds=lease_seconds, batch=batch)
+
+
+def _work(pulled: Counter, seconds: float):
+    async def work(bucket: int) -> bool:
+        await asyncio.sleep(seconds)
+        pulled[bucket] += 1
+        return True
+    return work
+
+
+@pytest.mark.asyncio
+async def test_lease_is_exclusive_renewable_and_expires() -> None:
+    redis = RedisCompat()
+    a, b = PullTaskLockManager(), PullTaskLockManager()
+
+    held = await a.claim_buckets(redis, _SLUG, "r1", [0, 1, 2], limit=2, lease_ms=200)
+    assert sorted(held) == [0, 1]
+    assert sorted(await b.claim_buckets(redis, _SLUG, "r1", [0, 1, 2], limit=5, lease_ms=200)) == [2]
+
+    # Renewing keeps bucket 0; bucket 1 lapses and can be claimed by b.
+    for _ in range(3):
+        await asyncio.sleep(0.1)
+        assert await a.renew_lease(redis, _SLUG, 0, held[0], 200)
+    assert list(await b.claim_buckets(redis, _SLUG, "r1", [0, 1], limit=5, lease_ms=200)) == [1]
+    assert not await a.renew_lease(redis, _SLUG, 1, held[1], 200)
+
+    # Only the holder releases; done buckets are not claimed again this round.
+    assert not await b.release_lease(redis, _SLUG, 0, "someone-else")
+    assert await a.release_lease(redis, _SLUG, 0, held[0])
+    await a.mark_bucket_done(redis, _SLUG, "r1", 0, ttl_seconds=60)
+    assert await b.claim_buckets(redis, _SLUG, "r1", [0], limit=1, lease_ms=200) == {}
+    assert list(await b.claim_buckets(redis, _SLUG, "r2", [0], limit=1, lease_ms=200)) == [0]
+
+
+@pytest.mark.asyncio
+async def test_workers_share_buckets_and_scale() -> None:
+    buckets = list(range(32))
+
+    async def run(workers: int, round_id: str) -> tuple[float, Counter]:
+        redis, pulled = RedisCompat(), Counter()
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            _coordinator(redis).run(round_id, buckets, _work(pulled, 0.05), round_ttl_seconds=60)
+            for _ in range(workers)
+        ))
+        assert all(results)
+        return time.perf_counter() - start, pulled
+
+    one, pulled = await run(1, "solo")
+    assert pulled == Counter({b: 1 for b in buckets})
+
+    four, pulled = await run(4, "team")
+    assert pulled == Counter({b: 1 for b in buckets})
+    assert four < one / 2.5
+
+
+@pytest.mark.asyncio
+async def test_abandoned_buckets_are_reclaimed() -> None:
+    redis, pulled = RedisCompat(), Counter()
+
+    # A crashed instance: leases taken, never renewed, never released.
+    crashed = PullTaskLockManager()
+    assert len(await crashed.claim_buckets(redis, _SLUG, "r", [0, 1, 2, 3], limit=2, lease_ms=300)) == 2
+
+    start = time.perf_counter()
+    survivor = _coordinator(redis, lease_seconds=0.3)
+    assert await survivor.run("r", [0, 1, 2, 3], _work(pulled, 0.01), round_ttl_seconds=60)
+
+    assert pulled == Counter({0: 1, 1: 1, 2: 1, 3: 1})
+    assert time.perf_counter() - start >= 0.25
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_cancels_work_and_failures_stay_claimable() -> None:
+    redis, pulled = RedisCompat(), Counter()
+    coordinator = _coordinator(redis, lease_seconds=0.3, batch=1)
+
+    async def work(bucket: int) -> bool:
+        if bucket == 0:
+            # Someone else took over the lease (e.g. after a long GC pause).
+            await redis.set(f"theta_pull_lease:{_SLUG}:0", "other", px=10_000)
+            await asyncio.sleep(5)
+        if bucket == 1:
+            return False
+        pulled[bucket] += 1
+        return True
+
+    assert not await asyncio.wait_for(coordinator.run("r", [0, 1, 2], work, round_ttl_seconds=60), timeout=3)
+    assert coordinator.lost == [0] and coordinator.failed == [1] and coordinator.completed == [2]
+
+    # The failed bucket was released undone; another instance retries it.
+    await redis.delete(f"theta_pull_lease:{_SLUG}:0")
+    retry = _coordinator(redis)
+    assert await retry.run("r", [0, 1, 2], _work(pulled, 0), round_ttl_seconds=60)
+    assert sorted(retry.completed) == [0, 1]
+
+
+def test_user_bucket_is_stable() -> None:
+    assert user_bucket("42", 64) == user_bucket(42, 64)
+    counts = Counter(user_bucket(i, 16) for i in range(16000))
+    assert len(counts) == 16 and min(counts.values()) > 800
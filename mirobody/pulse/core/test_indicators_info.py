@@ -0,0 +1,74 @@
+"""Unit tests for the precompiled indicator resolver."""
+
+from __future__ import annotations
+
+import logging
+
+import pytest
+
+from . import indicators_info
+from .indicators_info import (
+    HealthDataType,
+    StandardIndicator,
+    get_indicator_by_str,
+    is_series_indicator,
+    is_summary_indicator,
+    resolve_indicator,
+)
+
+
+def _first_by_name(name: str):
+    for member in StandardIndicator:
+        if member.value.name == name:
+            return member
+    return None
+
+
+def test_every_canonical_name_matches_linear_scan() -> None:
+    for member in StandardIndicator:
+        name = member.value.name
+        assert get_indicator_by_str(name) is _first_by_name(name)
+
+
+def test_flags_match_data_type() -> None:
+    for member in StandardIndicator:
+        entry = resolve_indicator(member.value.name)
+        expected = _first_by_name(member.value.name).value.data_type
+        assert entry.is_summary == (expected in (HealthDataType.SUMMARY, HealthDataType.MIX))
+        assert entry.is_series == (expected in (HealthDataType.SERIES, HealthDataType.MIX))
+        assert entry.standard_unit == entry.indicator.value.standard_unit
+
+
+def test_case_insensitive_resolution() -> None:
+    assert get_indicator_by_str("HEARTRATES") is StandardIndicator.HEART_RATE
+    assert is_series_indicator("heartrates")
+    assert is_summary_indicator("dailysteps")
+
+
+def test_empty_and_unknown() -> None:
+    assert resolve_indicator("") is None
+    assert resolve_indicator(None) is None
+    assert not is_summary_indicator("")
+    assert is_series_indicator("")
+    assert not is_series_indicator("definitelyNotAnIndicator")
+
+
+def test_unknown_name_warns_once(caplog, monkeypatch) -> None:
+    monkeypatch.setattr(indicators_info, "_unknown_indicators", set())
+    with caplog.at_level(logging.WARNING):
+        for _ in range(5):
+            assert get_indicator_by_str("vendorOnlyMetric") is None
+    assert sum("vendorOnlyMetric" in r.message for r in caplog.records) == 1
+
+
+def test_negative_cache_is_bounded(monkeypatch) -> None:
+    monkeypatch.setattr(indicators_info, "_unknown_indicators", set())
+    monkeypatch.setattr(indicators_info, "_UNKNOWN_INDICATOR_CACHE_SIZE", 10)
+    for i in range(100):
+        resolve_indicator(f"junk{i}")
+    assert len(indicators_info._unknown_indicators) == 10
+
+
+def test_index_is_read_only() -> None:
+    with pytest.raises(TypeError):
+        indicators_info._INDICATOR_INDEX["x"] = None
@@ -0,0 +1,183 @@
+"""Bounded query cache: LRU by entries and bytes, per-entry TTL, tag invalidation and single-flight loads."""
+
+from __future__ import annotations
+
+import asyncio
+
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from .database import CacheableDatabaseService
+from .query_cache import QueryCache, estimate_size
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_is_bounded_by_entries_and_bytes() -> None:
+    cache = QueryCache(max_entries=3, max_bytes=10_000)
+    for key in "abc":
+        cache.set(key, [key])
+    assert cache.get("a") == ["a"]  # a is now the most recently used
+    cache.set("d", ["d"])
+    assert "b" not in cache and list(cache._entries) == ["c", "a", "d"]
+
+    row = [{"indicator": "heart_rate", "value": "x" * 500}]
+    assert estimate_size(row) > 500
+    cache = QueryCache(max_entries=100, max_bytes=estimate_size(row) * 3 + 200)
+    for i in range(10):
+        cache.set(f"k{i}", [{"indicator": "heart_rate", "value": str(i) * 500}])
+    assert len(cache) == 3 and cache.bytes <= cache.max_bytes
+    assert not cache.set("huge", ["x" * cache.max_bytes]) and "huge" not in cache
+
+    stats = cache.stats()
+    assert (stats["evictions"], stats["oversize"], stats["entries"]) == (7, 1, 3)
+
+
+def test_ttl_is_per_entry() -> None:
+    clock = _Clock()
+    cache = QueryCache(ttl=60, clock=clock)
+    cache.set("default", 1)
+    cache.set("short", 2, ttl=5)
+
+    clock.now += 10
+    assert cache.get("short") is None and cache.get("default") == 1
+    clock.now += 60
+    assert cache.get("default") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["entries"]) == (1, 2, 2, 0)
+
+
+def test_tag_invalidation_touches_only_tagged_entries() -> None:
+    cache = QueryCache()
+    cache.set("u1:oura:daily", 1, tags={"user_id": "u1", "provider": "oura", "table": "th_series_data"})
+    cache.set("u1:whoop:daily", 2, tags={"user_id": "u1", "provider": "whoop", "table": "th_series_data"})
+    cache.set("u2:oura:series", 3, tags={"user_id": "u2", "provider": "oura", "table": "series_data"})
+    cache.set("global", 4)
+
+    assert cache.invalidate_tags(provider="oura", table="nothing") == 2
+    assert [k for k in ("u1:oura:daily", "u1:whoop:daily", "u2:oura:series", "global") if k in cache] == [
+        "u1:whoop:daily", "global",
+    ]
+    assert cache.invalidate_tags(user_id="u1") == 1 and cache.invalidate_tags(user_id="u1") == 0
+    # Evicted and invalidated keys leave nothing behind in the index
+    assert cache._tag_index == {} and cache.stats()["tags"] == 0
+
+    cache.set("yearly_stats_series", 5)
+    assert cache.clear("yearly") == 1 and cache.clear() == 1 and len(cache) == 0 and cache.bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_run_one_load() -> None:
+    cache = QueryCache()
+    calls: List[str] = []
+    release = asyncio.Event()
+
+    async def load() -> List[Dict[str, Any]]:
+        calls.append("load")
+        await release.wait()
+        return [{"count": 1}]
+
+    tasks = [asyncio.create_task(cache.get_or_load("k", load)) for _ in range(50)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == ["load"] and all(r == [{"count": 1}] for r in results)
+    assert await cache.get_or_load("k", load) == [{"count": 1}] and calls == ["load"]
+    stats = cache.stats()
+    assert (stats["coalesced"], stats["inflight"]) == (49, 0)
+
+    # A failed load fails its waiters and caches nothing; the next miss retries
+    async def fail() -> None:
+        await asyncio.sleep(0)
+        raise RuntimeError("db down")
+
+    results = await asyncio.gather(*(cache.get_or_load("f", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results) and "f" not in cache
+    assert await cache.get_or_load("f", load) == [{"count": 1}]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_loader_hands_over_and_invalidation_wins() -> None:
+    cache = QueryCache()
+    started = asyncio.Event()
+
+    async def slow() -> str:
+        started.set()
+        await asyncio.sleep(10)
+        return "never"
+
+    async def fast() -> str:
+        return "fresh"
+
+    leader = asyncio.create_task(cache.get_or_load("k", slow))
+    await started.wait()
+    waiter = asyncio.create_task(cache.get_or_load("k", fast))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await waiter == "fresh"  # Took over after the leader was cancelled
+
+    # A result loaded across an invalidation is returned but not stored
+    release = asyncio.Event()
+
+    async def stale() -> str:
+        await release.wait()
+        return "stale"
+
+    task = asyncio.create_task(cache.get_or_load("u1:daily", stale, tags={"user_id": "u1"}))
+    await asyncio.sleep(0)
+    cache.invalidate_tags(user_id="u1")
+    assert await cache.get_or_load("u1:daily", fast, tags={"user_id": "u1"}) == "fresh"
+    release.set()
+    assert await task == "stale" and cache.get("u1:daily") == "fresh"
+
+
+def test_memory_is_flat_over_many_distinct_keys() -> None:
+    cache = QueryCache(max_entries=1000, max_bytes=256 * 1024)
+    peak = 0
+    for i in range(200_000):
+        cache.set(f"user_{i}:stats", [{"user_id": f"user_{i}", "total_records": i}], tags={"user_id": f"user_{i}"})
+        peak = max(peak, cache.bytes)
+    assert len(cache) <= 1000 and peak <= 256 * 1024
+    assert len(cache._tag_index) == len(cache) and cache.stats()["evictions"] == 200_000 - len(cache)
+
+
+class _Service(CacheableDatabaseService):
+    def __init__(self) -> None:
+        super().__init__(cache_ttl=60, max_entries=100, max_bytes=1 << 20)
+        self.queries = 0
+
+    async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None, db_config: Any = None):
+        self.queries += 1
+        await asyncio.sleep(0.01)
+        return [{"user_id": (params or {}).get("user_id"), "n": self.queries}]
+
+
+@pytest.mark.asyncio
+async def test_service_cached_query_coalesces_and_invalidates_by_tag() -> None:
+    service = _Service()
+    query = "SELECT COUNT(*) FROM series_data WHERE user_id = :user_id"
+
+    results = await asyncio.gather(*(
+        service.cached_query("stats:u1", query, {"user_id": "u1"}, tags={"user_id": "u1", "table": "series_data"})
+        for _ in range(10)
+    ))
+    assert service.queries == 1 and all(r == results[0] for r in results)
+    assert service._is_cache_valid("stats:u1") and service._get_cache("stats:u1") == results[0]
+
+    assert service._invalidate_cache(user_id="u1") == 1
+    assert (await service.cached_query("stats:u1", query, {"user_id": "u1"}))[0]["n"] == 2
+
+    assert (await service.cached_query("stats:u1", query, {"user_id": "u1"}, use_cache=False))[0]["n"] == 3
+    service._set_cache("legacy", [1])
+    service._clear_cache("legacy")
+    assert service._get_cache("legacy") is None
+    assert service.cache_stats()["coalesced"] == 9
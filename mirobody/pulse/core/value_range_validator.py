@@ -20,6 +20,8 @@ while keeping the data traceable and reversible.
 import json
 import logging
 import re
+import numpy as np
+
 from dataclasses import dataclass
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
@@ -156,6 +158,29 @@ class ValueRangeValidator:
 
         return ValidationResult(is_valid=True, indicator=indicator, value=num_val)
 
+    def validate_array(self, indicator: str, values: np.ndarray) -> np.ndarray:
+        """Vectorized validate() over a float64 column of one indicator.
+
+        Rules are applied with the same comparison operators, so results match
+        validate() element-wise (NaN fails every rule, as float('nan') does).
+
+        Args:
+            indicator: Indicator name shared by all values
+            values: Numeric values to validate
+
+        Returns:
+            Boolean mask, True where the value is valid or passthrough
+        """
+        valid = np.ones(len(values), dtype=bool)
+        parsed_rules = self._rules.get(indicator)
+        if parsed_rules is None:
+            return valid
+
+        for _, op_fn, threshold in parsed_rules:
+            valid &= op_fn(values, threshold)
+
+        return valid
+
     @property
     def is_loaded(self) -> bool:
         return self._loaded
@@ -0,0 +1,3 @@
+"""
+Health data upload package
+"""
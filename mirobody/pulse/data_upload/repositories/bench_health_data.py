@@ -0,0 +1,117 @@
+"""
+Health Data Bulk Loader Benchmark
+
+Times HealthDataRepository.save_health_records / save_summary_records with the
+COPY + merge path against the upsert statement (bound once over column arrays
+for series_data, executemany for th_series_data) on the configured Postgres.
+Rows are written under a throwaway user_id and deleted afterwards.
+
+Usage:
+    PG_HOST=127.0.0.1 PG_USER=postgres PG_DBNAME=mirobody PG_SCHEMA=public \\
+        python3 -m mirobody.pulse.data_upload.repositories.bench_health_data [--rows 10000 100000 1000000]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from ....utils import execute_query
+from ....utils.config import Config
+from .health_data import HealthDataRepository
+
+
+def _series_records(user_id: str, count: int) -> List[Dict[str, Any]]:
+    base = datetime(2025, 1, 1)
+    return [
+        {
+            "user_id": user_id,
+            "indicator": "heartRates",
+            "source": "bench",
+            "start_time": base + timedelta(seconds=i),
+            "value": str(60 + i % 40),
+            "timezone": "UTC",
+            "task_id": "bench",
+            "source_id": f"bench-{i}",
+        }
+        for i in range(count)
+    ]
+
+
+def _summary_records(user_id: str, count: int) -> List[Dict[str, Any]]:
+    base = datetime(2025, 1, 1)
+    return [
+        {
+            "user_id": user_id,
+            "indicator": "dailySteps",
+            "value": str(1000 + i),
+            "start_time": base + timedelta(minutes=i),
+            "end_time": base + timedelta(minutes=i + 1),
+            "source_table": "",
+            "source_table_id": f"bench-{i}",
+            "comment": f"Source: bench, Unit: count, timezone: UTC, #{i}",
+            "indicator_id": "",
+            "source": "bench",
+            "task_id": "bench",
+            "fhir_id": None,
+            "fhir_mapping_info": json.dumps({"unit": "count"}),
+        }
+        for i in range(count)
+    ]
+
+
+async def _cleanup(user_id: str) -> None:
+    await execute_query("DELETE FROM series_data WHERE user_id = :user_id", {"user_id": user_id}, log_sql=False)
+    await execute_query("DELETE FROM series_ingest_ledger WHERE user_id = :user_id", {"user_id": user_id}, log_sql=False)
+    await execute_query("DELETE FROM th_series_data WHERE user_id = :user_id", {"user_id": user_id}, log_sql=False)
+
+
+async def _run(rows: int, mode: str, table: str) -> float:
+    repository = HealthDataRepository(
+        summary_batch_size=HealthDataRepository.SERIES_BATCH_SIZE,
+        copy_min_rows=HealthDataRepository.COPY_MIN_ROWS if mode == "copy" else 0,
+    )
+    user_id = f"bench-{uuid.uuid4().hex[:12]}"
+
+    try:
+        if table == "series_data":
+            records = _series_records(user_id, rows)
+            start = time.perf_counter()
+            ok = await repository.save_health_records(records)
+            if not ok:
+                raise RuntimeError("save_health_records failed")
+        else:
+            records = _summary_records(user_id, rows)
+            start = time.perf_counter()
+            await repository.save_summary_records(records)
+        return time.perf_counter() - start
+    finally:
+        await _cleanup(user_id)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--tables", nargs="+", default=["series_data", "th_series_data"], choices=["series_data", "th_series_data"])
+    parser.add_argument("--modes", nargs="+", default=["upsert", "copy"], choices=["upsert", "copy"])
+    parser.add_argument("--config", nargs="*", default=None, help="Extra config yaml files")
+    args = parser.parse_args()
+
+    await Config.init(yaml_filenames=args.config)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"{'table':<16} {'rows':>10} {'mode':<12} {'seconds':>9} {'rows/s':>12}")
+    for table in args.tables:
+        for rows in args.rows:
+            for mode in args.modes:
+                elapsed = await _run(rows, mode, table)
+                print(f"{table:<16} {rows:>10,} {mode:<12} {elapsed:>9.2f} {rows / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,14 +4,262 @@ Health data repository
 
 import logging
 
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
-from ....utils import execute_query
+from ....utils import execute_copy, execute_query
+from ...core.aggregate_indicator.dirty_buckets import dirty_bucket_mark
+from ...core.monitor.ingest_ledger import LEDGER_APPEND
 
 
+def _series_data_merge(staged: str) -> str:
+    """Upsert the `staged` rows into series_data, append their deltas to series_ingest_ledger
+    and mark their aggregate buckets dirty.
+
+    Writes of one user are serialized on a transaction advisory lock taken
+    before any row is touched, so overlapping batches (COPY merges and
+    array upserts alike) apply one after the other instead of
+    interleaving, and cannot deadlock on each other's row locks. Existing rows
+    whose value or task_id changes are then locked (`locked`) and updated with
+    their old version as the ledger's -1; keys with no row are inserted.
+    Unchanged re-sends write nothing and leave the ledger untouched.
+    """
+    return f"""
+    WITH staged AS ({staged}),
+    locked AS (
+        SELECT d.user_id, d.indicator, d.source, d.time, d.value, d.task_id
+        FROM series_data d
+        JOIN staged s
+          ON d.user_id = s.user_id AND d.indicator = s.indicator
+         AND d.source = s.source AND d.time = s.time
+        WHERE d.value IS DISTINCT FROM s.value
+           OR d.task_id IS DISTINCT FROM s.task_id
+        ORDER BY d.user_id, d.indicator, d.source, d.time
+        FOR UPDATE OF d
+    ),
+    updated AS (
+        UPDATE series_data d
+        SET
+          value = s.value,
+          timezone = s.timezone,
+          task_id = s.task_id,
+          source_id = s.source_id,
+          update_time = now()
+        FROM locked l, staged s
+        WHERE d.user_id = l.user_id AND d.indicator = l.indicator
+          AND d.source = l.source AND d.time = l.time
+          AND s.user_id = l.user_id AND s.indicator = l.indicator
+          AND s.source = l.source AND s.time = l.time
+        RETURNING d.user_id, d.indicator, d.source, d.time, d.value, d.timezone, d.task_id,
+                  l.value AS old_value, l.task_id AS old_task_id
+    ),
+    inserted AS (
+        INSERT INTO series_data (user_id, indicator, source, time, value, timezone, task_id, source_id, create_time, update_time)
+        SELECT user_id, indicator, source, time, value, timezone, task_id, source_id, now(), now()
+        FROM staged
+        ON CONFLICT (user_id, indicator, source, time) DO NOTHING
+        RETURNING user_id, indicator, source, time, value, timezone, task_id
+    ),
+    merged AS (
+        SELECT user_id, indicator, source, time, value, timezone, task_id FROM updated
+        UNION ALL
+        SELECT user_id, indicator, source, time, value, timezone, task_id FROM inserted
+    ),
+    dirty AS ({dirty_bucket_mark("merged")}),
+    changes AS (
+        SELECT user_id, indicator, source, time, value, task_id, 1 AS sign
+        FROM merged
+        UNION ALL
+        SELECT user_id, indicator, source, time, old_value, old_task_id, -1
+        FROM updated
+    )
+    {LEDGER_APPEND}
+"""
+
+
+def _last_per_key(rows: str) -> str:
+    """The last occurrence (highest seq) of each series_data key in `rows`.
+
+    A batch keeps the last occurrence of a conflict key, as the rows would
+    when written one by one; ON CONFLICT cannot touch a row twice.
+    """
+    return f"""
+    SELECT DISTINCT ON (user_id, indicator, source, time)
+        user_id, indicator, source, time, value, timezone, task_id, source_id
+    FROM {rows}
+    ORDER BY user_id, indicator, source, time, seq DESC
+"""
+
+
+# Small batches: one statement over column arrays, bound once per batch
+SERIES_DATA_UPSERT = _series_data_merge(_last_per_key("""
+    unnest(
+        CAST(:user_id AS varchar[]), CAST(:indicator AS varchar[]), CAST(:source AS varchar[]),
+        CAST(:time AS timestamp[]), CAST(:value AS text[]), CAST(:timezone AS varchar[]),
+        CAST(:task_id AS varchar[]), CAST(:source_id AS varchar[])
+    ) WITH ORDINALITY AS r(user_id, indicator, source, time, value, timezone, task_id, source_id, seq)
+"""))
+
+SERIES_DATA_STAGING = "_stage_series_data"
+
+SERIES_DATA_STAGING_COLUMNS: List[Tuple[str, str]] = [
+    ("seq", "int8"),
+    ("user_id", "text"),
+    ("indicator", "text"),
+    ("source", "text"),
+    ("time", "timestamp"),
+    ("value", "text"),
+    ("timezone", "text"),
+    ("task_id", "text"),
+    ("source_id", "text"),
+]
+
+SERIES_DATA_MERGE = _series_data_merge(_last_per_key(SERIES_DATA_STAGING))
+
+# Serializes series_data writes per user, see _series_data_merge(). Run as its
+# own statement before the merge so the merge's snapshot is taken with the
+# lock held; users are locked in one order so multi-user batches cannot deadlock.
+SERIES_DATA_USER_LOCK = """
+    SELECT pg_advisory_xact_lock(hashtext('series_data:' || user_id))
+    FROM (SELECT DISTINCT user_id COLLATE "C" AS user_id FROM {users} ORDER BY 1) u
+"""
+SERIES_DATA_LOCK_STAGED = SERIES_DATA_USER_LOCK.format(users=SERIES_DATA_STAGING)
+SERIES_DATA_LOCK_USERS = SERIES_DATA_USER_LOCK.format(users="unnest(CAST(:user_ids AS varchar[])) AS t(user_id)")
+
+TH_SERIES_DATA_UPSERT = """
+    INSERT INTO th_series_data (
+        user_id, indicator, value, start_time, end_time, source_table,
+        source_table_id, comment, indicator_id, source, task_id,
+        fhir_id, fhir_mapping_info, create_time, update_time, deleted
+    ) VALUES (
+        :user_id, :indicator, :value, :start_time, :end_time, :source_table,
+        :source_table_id, encrypt_content(:comment), :indicator_id, :source, :task_id,
+        :fhir_id, :fhir_mapping_info, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 0
+    )
+    ON CONFLICT (user_id, indicator, start_time, end_time)
+    DO UPDATE SET
+        value = EXCLUDED.value,
+        source_table = EXCLUDED.source_table,
+        source_table_id = EXCLUDED.source_table_id,
+        comment = EXCLUDED.comment,
+        source = EXCLUDED.source,
+        task_id = EXCLUDED.task_id,
+        fhir_id = COALESCE(EXCLUDED.fhir_id, th_series_data.fhir_id),
+        fhir_mapping_info = EXCLUDED.fhir_mapping_info,
+        update_time = CURRENT_TIMESTAMP
+"""
+
+TH_SERIES_DATA_STAGING = "_stage_th_series_data"
+
+TH_SERIES_DATA_STAGING_COLUMNS: List[Tuple[str, str]] = [
+    ("seq", "int8"),
+    ("user_id", "text"),
+    ("indicator", "text"),
+    ("value", "text"),
+    ("start_time", "timestamp"),
+    ("end_time", "timestamp"),
+    ("source_table", "text"),
+    ("source_table_id", "text"),
+    ("comment", "text"),
+    ("indicator_id", "text"),
+    ("source", "text"),
+    ("task_id", "text"),
+    ("fhir_id", "int8"),
+    ("fhir_mapping_info", "text"),
+]
+
+# encrypt_content() runs set-wise over the deduplicated staging rows
+TH_SERIES_DATA_MERGE = f"""
+    INSERT INTO th_series_data (
+        user_id, indicator, value, start_time, end_time, source_table,
+        source_table_id, comment, indicator_id, source, task_id,
+        fhir_id, fhir_mapping_info, create_time, update_time, deleted
+    )
+    SELECT
+        user_id, indicator, value, start_time, end_time, source_table,
+        source_table_id, encrypt_content(comment), indicator_id, source, task_id,
+        fhir_id, fhir_mapping_info::jsonb, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 0
+    FROM (
+        SELECT DISTINCT ON (user_id, indicator, start_time, end_time) *
+        FROM {TH_SERIES_DATA_STAGING}
+        ORDER BY user_id, indicator, start_time, end_time, seq DESC
+    ) staged
+    ON CONFLICT (user_id, indicator, start_time, end_time)
+    DO UPDATE SET
+        value = EXCLUDED.value,
+        source_table = EXCLUDED.source_table,
+        source_table_id = EXCLUDED.source_table_id,
+        comment = EXCLUDED.comment,
+        source = EXCLUDED.source,
+        task_id = EXCLUDED.task_id,
+        fhir_id = COALESCE(EXCLUDED.fhir_id, th_series_data.fhir_id),
+        fhir_mapping_info = EXCLUDED.fhir_mapping_info,
+        update_time = CURRENT_TIMESTAMP
+"""
+
 
 class HealthDataRepository:
-    """Health data repository"""
+    """Health data repository
+
+    Batches of at least copy_min_rows rows are streamed with binary COPY into a
+    temp staging table and merged with one INSERT ... SELECT ... ON CONFLICT;
+    smaller batches (and batches whose COPY fails) run the upsert statement:
+    once over column arrays for series_data, via executemany for th_series_data.
+    """
+
+    SERIES_BATCH_SIZE = 10000
+    SUMMARY_BATCH_SIZE = 1000
+    COPY_MIN_ROWS = 500
+
+    def __init__(
+        self,
+        series_batch_size: Optional[int] = None,
+        summary_batch_size: Optional[int] = None,
+        copy_min_rows: Optional[int] = None,
+    ):
+        """
+        Args:
+            series_batch_size: Rows per series_data batch
+            summary_batch_size: Rows per th_series_data batch
+            copy_min_rows: Smallest batch loaded via COPY, 0 disables COPY
+        """
+        self.series_batch_size = series_batch_size or self.SERIES_BATCH_SIZE
+        self.summary_batch_size = summary_batch_size or self.SUMMARY_BATCH_SIZE
+        self.copy_min_rows = self.COPY_MIN_ROWS if copy_min_rows is None else copy_min_rows
+
+    def _use_copy(self, batch_len: int) -> bool:
+        return 0 < self.copy_min_rows <= batch_len
+
+    async def _save_batch(
+        self,
+        params: List[Dict[str, Any]],
+        upsert_query: str,
+        staging: str,
+        staging_columns: List[Tuple[str, str]],
+        merge_query: str,
+        lock_users: bool = False,
+        upsert_arrays: bool = False,
+    ) -> None:
+        """Save one batch via COPY + merge, falling back to the upsert statement
+
+        lock_users takes the batch users' series_data write locks first.
+        upsert_arrays binds the batch to upsert_query once, as one list per
+        column, instead of executing it per row.
+        """
+        names = [name for name, _ in staging_columns[1:]]
+        if self._use_copy(len(params)):
+            rows = ((seq, *(p[name] for name in names)) for seq, p in enumerate(params))
+            prelude = [SERIES_DATA_LOCK_STAGED] if lock_users else []
+            try:
+                await execute_copy(staging, staging_columns, rows, merge_query, prelude=prelude)
+                return
+            except Exception as e:
+                logging.warning(f"COPY into {staging} failed, falling back to the upsert statement: {str(e)}")
+
+        prelude = [(SERIES_DATA_LOCK_USERS, {"user_ids": sorted({p["user_id"] for p in params})})] if lock_users else []
+        if upsert_arrays:
+            await execute_query(upsert_query, {name: [p[name] for p in params] for name in names}, prelude=prelude)
+        else:
+            await execute_query(upsert_query, params, prelude=prelude)
 
     async def save_health_records(
         self,
@@ -36,24 +284,7 @@ class HealthDataRepository:
                 logging.info("No records to save")
                 return True
 
-            # Batch insert SQL
-            query_batch = """
-                INSERT INTO series_data (user_id, indicator, source, time, value, timezone, task_id, source_id, create_time, update_time) 
-                VALUES (:user_id, :indicator, :source, :time, :value, :timezone, :task_id, :source_id, now(), now())
-                ON CONFLICT (user_id, indicator, source, time) 
-                DO UPDATE 
-                SET 
-                  value = EXCLUDED.value, 
-                  timezone = EXCLUDED.timezone,
-                  task_id = EXCLUDED.task_id,
-                  source_id = EXCLUDED.source_id,
-                  update_time = now()
-                WHERE series_data.value IS DISTINCT FROM EXCLUDED.value
-                   OR series_data.task_id IS DISTINCT FROM EXCLUDED.task_id
-            """
-
-            # Process in batches, 1000 records per batch
-            batch_size = 10000
+            batch_size = self.series_batch_size
             total_records = len(records)
             successfully_processed = 0
 
@@ -92,7 +323,15 @@ class HealthDataRepository:
                         max_time = record_time
 
                 # Execute batch insert
-                await execute_query(query_batch, batch_params)
+                await self._save_batch(
+                    batch_params,
+                    SERIES_DATA_UPSERT,
+                    SERIES_DATA_STAGING,
+                    SERIES_DATA_STAGING_COLUMNS,
+                    SERIES_DATA_MERGE,
+                    lock_users=True,
+                    upsert_arrays=True,
+                )
 
                 successfully_processed += len(batch_records)
 
@@ -105,6 +344,40 @@ class HealthDataRepository:
             logging.error(f"Failed to save health records: {str(e)}, total_records={len(records)}", stack_info=True)
             return False
 
+    async def save_summary_records(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Save summary records to th_series_data, comment is encrypted in the database
+
+        Args:
+            records: Summary record list, each record contains the th_series_data columns
+
+        Returns:
+            int: Number of records saved
+
+        Raises:
+            Exception: Database errors are propagated to the caller
+        """
+        if not records:
+            return 0
+
+        batch_size = self.summary_batch_size
+        total_processed = 0
+
+        for i in range(0, len(records), batch_size):
+            batch = records[i:i + batch_size]
+            logging.info(f"Executing batch {i // batch_size + 1} with {len(batch)} records")
+            await self._save_batch(
+                batch,
+                TH_SERIES_DATA_UPSERT,
+                TH_SERIES_DATA_STAGING,
+                TH_SERIES_DATA_STAGING_COLUMNS,
+                TH_SERIES_DATA_MERGE,
+            )
+            total_processed += len(batch)
+            logging.info(f"Processed summary batch {i // batch_size + 1}: {len(batch)} records")
+
+        return total_processed
+
 
 # Create singleton instance
 health_data_repository = HealthDataRepository()
@@ -0,0 +1,194 @@
+"""series_data merges against Postgres: the ingest ledger stays equal to a recount of series_data
+when writes to the same keys overlap (opt-in, PULSE_PG_TESTS=1 on a scratch database with res/sql applied)."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import uuid
+
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+import pytest
+import pytest_asyncio
+
+from .health_data import SERIES_DATA_LOCK_USERS, SERIES_DATA_UPSERT, HealthDataRepository
+
+pytestmark = pytest.mark.skipif(
+    os.environ.get("PULSE_PG_TESTS") != "1",
+    reason="set PULSE_PG_TESTS=1 and PG_* to a scratch database with res/sql applied",
+)
+
+AT = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+
+
+@pytest_asyncio.fixture
+async def pg_user():
+    from ....utils.config import Config
+    from ....utils.db import global_engines
+    from ....utils import execute_query
+
+    await Config.init(yaml_filenames=None)
+    user_id = f"test-ledger-{uuid.uuid4().hex[:12]}"
+    yield user_id
+    for table in ("series_data", "series_ingest_ledger", "aggregate_dirty_bucket"):
+        await execute_query(f"DELETE FROM {table} WHERE user_id = :user_id", {"user_id": user_id}, log_sql=False)
+    # Engines are bound to this test's event loop
+    for engine in global_engines.values():
+        await engine.dispose()
+    global_engines.clear()
+
+
+def _row(user_id: str, value: str, at: datetime = AT) -> Dict[str, Any]:
+    return {
+        "user_id": user_id, "indicator": "heartRates", "source": "test", "time": at, "value": value,
+        "timezone": "UTC", "task_id": None, "source_id": f"test-{at.isoformat()}",
+    }
+
+
+async def _ledger_and_recount(user_id: str) -> tuple:
+    from ....utils import execute_query
+    from ...core.monitor.ingest_ledger import NUMERIC_VALUE
+
+    ledger = await execute_query(
+        """
+        SELECT COALESCE(SUM(records), 0) AS records, COALESCE(SUM(non_numeric), 0) AS non_numeric,
+               COALESCE(SUM(numeric_clean), 0) AS numeric_clean
+        FROM series_ingest_ledger WHERE user_id = :user_id
+        """,
+        {"user_id": user_id}, log_sql=False,
+    )
+    recount = await execute_query(
+        f"""
+        SELECT COUNT(*) AS records,
+               COUNT(*) FILTER (WHERE NOT ({NUMERIC_VALUE})) AS non_numeric,
+               COUNT(*) FILTER (WHERE {NUMERIC_VALUE}) AS numeric_clean
+        FROM series_data WHERE user_id = :user_id
+        """,
+        {"user_id": user_id}, log_sql=False,
+    )
+    as_tuple = lambda row: (int(row["records"]), int(row["non_numeric"]), int(row["numeric_clean"]))
+    return as_tuple(ledger[0]), as_tuple(recount[0])
+
+
+async def _overlap(first: Dict[str, Any], second: Dict[str, Any], lock_users: bool) -> None:
+    """`first` writes and holds its transaction open while `second` writes the same key, then commits.
+
+    lock_users takes the user's write lock first, as HealthDataRepository does;
+    without it the two statements only meet on series_data row locks.
+    """
+    from sqlalchemy import text
+    from ....utils.db import _get_engine
+
+    async def write(conn, row: Dict[str, Any]) -> None:
+        if lock_users:
+            await conn.execute(text(SERIES_DATA_LOCK_USERS), {"user_ids": [row["user_id"]]})
+        await conn.execute(text(SERIES_DATA_UPSERT), {name: [value] for name, value in row.items()})
+
+    engine = _get_engine("")
+    async with engine.connect() as conn_a, engine.connect() as conn_b:
+        tx_a = await conn_a.begin()
+        await write(conn_a, first)
+
+        async def write_second() -> None:
+            async with conn_b.begin():
+                await write(conn_b, second)
+
+        blocked = asyncio.create_task(write_second())
+        await asyncio.sleep(0.2)
+        assert not blocked.done(), "the second write should wait for the first one's lock"
+        await tx_a.commit()
+        await blocked
+
+
+@pytest.mark.asyncio
+async def test_overlapping_inserts_of_a_new_key_apply_in_order(pg_user: str) -> None:
+    from ....utils import execute_query
+
+    # The second write starts before the first commits, then overwrites it
+    await _overlap(_row(pg_user, "70"), _row(pg_user, "n/a"), lock_users=True)
+
+    ledger, recount = await _ledger_and_recount(pg_user)
+    assert ledger == recount == (1, 1, 0)
+    rows = await execute_query("SELECT value FROM series_data WHERE user_id = :u", {"u": pg_user}, log_sql=False)
+    assert [r["value"] for r in rows] == ["n/a"]
+
+
+@pytest.mark.asyncio
+async def test_overlapping_updates_subtract_the_version_they_overwrite(pg_user: str) -> None:
+    from ....utils import execute_query
+
+    assert await HealthDataRepository(copy_min_rows=0).save_health_records(
+        [{**_row(pg_user, "pending"), "start_time": AT}]
+    )
+    # The second write starts from a snapshot holding "pending" but overwrites "70"
+    await _overlap(_row(pg_user, "70"), _row(pg_user, "n/a"), lock_users=False)
+
+    ledger, recount = await _ledger_and_recount(pg_user)
+    assert ledger == recount == (1, 1, 0)
+    rows = await execute_query("SELECT value FROM series_data WHERE user_id = :u", {"u": pg_user}, log_sql=False)
+    assert [r["value"] for r in rows] == ["n/a"]
+
+
+@pytest.mark.asyncio
+async def test_copy_merges_racing_array_upserts_keep_the_ledger_exact(pg_user: str) -> None:
+    hours = [AT - timedelta(hours=h) for h in range(600)]
+    records = lambda value: [{**_row(pg_user, value, at), "start_time": at} for at in hours]
+    await HealthDataRepository(copy_min_rows=1).save_health_records(records("60"))
+
+    copy_writer = HealthDataRepository(series_batch_size=200, copy_min_rows=1)
+    array_writer = HealthDataRepository(series_batch_size=50, copy_min_rows=0)
+    results = await asyncio.gather(
+        copy_writer.save_health_records(records("61")),
+        array_writer.save_health_records(records("bad")),
+        copy_writer.save_health_records(records("62")[::-1]),
+    )
+
+    assert all(results)
+    ledger, recount = await _ledger_and_recount(pg_user)
+    assert ledger == recount
+    assert recount[0] == len(hours)
+
+
+@pytest.mark.asyncio
+async def test_small_batch_is_one_statement_keeping_the_last_occurrence_of_a_key(pg_user: str) -> None:
+    from ....utils import execute_query
+
+    minutes = [AT + timedelta(minutes=m) for m in range(20)]
+    records = [{**_row(pg_user, str(60 + m), at), "start_time": at} for m, at in enumerate(minutes)]
+    records.append({**_row(pg_user, "n/a", minutes[0]), "start_time": minutes[0]})
+    assert await HealthDataRepository(copy_min_rows=0).save_health_records(records)
+
+    ledger, recount = await _ledger_and_recount(pg_user)
+    assert ledger == recount == (20, 1, 19)
+    # One ledger row for the hour, not one per record
+    rows = await execute_query("SELECT records FROM series_ingest_ledger WHERE user_id = :u", {"u": pg_user}, log_sql=False)
+    assert [r["records"] for r in rows] == [20]
+    rows = await execute_query(
+        "SELECT value FROM series_data WHERE user_id = :u AND time = :t", {"u": pg_user, "t": minutes[0]}, log_sql=False,
+    )
+    assert [r["value"] for r in rows] == ["n/a"]
+
+
+@pytest.mark.asyncio
+async def test_compaction_covers_every_old_day_in_place(pg_user: str) -> None:
+    from ....utils import execute_query
+    from ...core.monitor.collector_service import MonitorCollectorService
+
+    days = [AT - timedelta(days=d) for d in (40, 45)]
+    repository = HealthDataRepository(copy_min_rows=0)
+    for value in ("70", "71", "n/a"):
+        assert await repository.save_health_records([{**_row(pg_user, value, at), "start_time": at} for at in days])
+    ledger_xids = "SELECT CAST(xid AS text) AS xid FROM series_ingest_ledger WHERE user_id = :u"
+    written = {r["xid"] for r in await execute_query(ledger_xids, {"u": pg_user}, log_sql=False)}
+
+    compacted = (await MonitorCollectorService(db_config="").compact_ledger())["days"]
+
+    assert {at.date().isoformat() for at in days} <= set(compacted)
+    ledger, recount = await _ledger_and_recount(pg_user)
+    assert ledger == recount == (2, 2, 0)
+    kept = await execute_query(ledger_xids, {"u": pg_user}, log_sql=False)
+    assert len(kept) == 2 and {r["xid"] for r in kept} <= written
+    # Compaction wrote no new ledger rows, so the next run has nothing to visit for these days
+    assert not {at.date().isoformat() for at in days} & set((await MonitorCollectorService(db_config="").compact_ledger())["days"])
@@ -0,0 +1,157 @@
+"""Parity tests: columnar batch preparation vs the per-record path."""
+
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pytest
+
+from ..models.requests import StandardPulseRecord
+from .columnar import PulseRecordColumns
+from .upload_health import StandardHealthService
+
+
+USER_ID = "42"
+USER_TIMEZONE = "America/Los_Angeles"
+
+RULES = {
+    "heartRates": [">0", "<=350"],
+    "oxygenSaturations": [">=50", "<=100"],
+    "bodyTemperatures": [">25", "<50"],
+}
+
+# (type, unit, value generator)
+SHAPES = [
+    ("heartRates", "count/min", lambda r: r.uniform(30, 400)),
+    ("heartrates", "bpm", lambda r: r.choice([72, "72", "n/a", float("nan")])),
+    ("oxygenSaturations", "%", lambda r: r.uniform(0.8, 1.0)),
+    ("bodyTemperatures", "°F", lambda r: r.uniform(90, 105)),
+    ("bodyTemperatures", None, lambda r: r.uniform(30, 45)),
+    ("bloodGlucoses", "mmol/L", lambda r: r.uniform(3, 12)),
+    ("bodyMasss", "g", lambda r: r.uniform(40000, 120000)),
+    ("waters", "g", lambda r: r.uniform(100, 500)),
+    ("dailySteps", "count", lambda r: r.randint(0, 30000)),
+    ("dailyWeight", "kg", lambda r: r.uniform(40, 120)),
+    ("systolicPressures", "mmHg", lambda r: r.uniform(90, 160)),
+    ("notARealIndicator", "widgets", lambda r: r.uniform(0, 10)),
+    ("", "", lambda r: 1.0),
+]
+
+
+def _make_records(count: int, seed: int = 7) -> list[StandardPulseRecord]:
+    rnd = random.Random(seed)
+    base_ms = 1_735_689_600_000  # 2025-01-01T00:00:00Z
+    records = []
+    for i in range(count):
+        record_type, unit, gen = rnd.choice(SHAPES)
+        timestamp = base_ms + rnd.randint(0, 30 * 86_400_000)
+        explicit_range = rnd.random() < 0.3
+        records.append(StandardPulseRecord(
+            source=rnd.choice(["apple_health", "Garmin", "vital.oura"]),
+            type=record_type,
+            timestamp=timestamp,
+            unit=unit,
+            value=gen(rnd),
+            timezone=rnd.choice(["UTC", "Asia/Shanghai", None]),
+            startTime=timestamp - 3_600_000 if explicit_range else None,
+            endTime=timestamp if explicit_range else None,
+            source_id=rnd.choice([None, f"src-{i}"]),
+            task_id=rnd.choice([None, "task-1"]),
+            comment=rnd.choice([None, "", "meal: rice"]),
+        ))
+    return records
+
+
+@pytest.fixture
+def service(monkeypatch) -> StandardHealthService:
+    svc = StandardHealthService()
+    for indicator, rules in RULES.items():
+        svc._value_validator._rules[indicator] = [
+            (rule, svc._value_validator._OPS[op], threshold)
+            for rule, (op, threshold) in ((r, svc._value_validator._parse_rule(r)) for r in rules)
+        ]
+    svc._value_validator._loaded = True
+
+    calls = []
+
+    async def _tz(user_id: str) -> str:
+        calls.append(user_id)
+        return USER_TIMEZONE
+
+    monkeypatch.setattr(svc, "_get_user_timezone", _tz)
+    svc.tz_calls = calls
+    return svc
+
+
+async def _per_record(service: StandardHealthService, records):
+    service.COLUMNAR_MIN_RECORDS = len(records) + 1
+    return await service._classify_and_prepare_records(records, USER_ID)
+
+
+async def _columnar(service: StandardHealthService, records):
+    service.COLUMNAR_MIN_RECORDS = 1
+    return await service._classify_and_prepare_records(records, USER_ID)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("seed", [1, 2, 3])
+async def test_parity_with_per_record_path(service, seed) -> None:
+    records = _make_records(2000, seed=seed)
+
+    expected_summary, expected_series = await _per_record(service, records)
+    actual_summary, actual_series = await _columnar(service, records)
+
+    assert actual_summary == expected_summary
+    assert actual_series == expected_series
+    assert expected_summary and expected_series
+
+
+@pytest.mark.asyncio
+async def test_out_of_range_values_are_marked(service) -> None:
+    records = [
+        StandardPulseRecord(source="Garmin", type="heartRates", timestamp=1_735_689_600_000 + i, unit="count/min", value=v)
+        for i, v in enumerate([60, 500, -1, 120])
+    ]
+    _, series = await _columnar(service, records)
+    assert [r["task_id"] for r in series] == [None, "filtered_out_of_range", "filtered_out_of_range", None]
+
+
+@pytest.mark.asyncio
+async def test_failed_conversion_still_marks_out_of_range_values(service, monkeypatch) -> None:
+    def fail(*args, **kwargs):
+        raise ValueError("no conversion")
+
+    monkeypatch.setattr(service, "normalize_health_data_unit", fail)
+    records = [
+        StandardPulseRecord(source="Garmin", type="heartRates", timestamp=1_735_689_600_000 + i, unit="count/min", value=v)
+        for i, v in enumerate([60, 500, -1, 120])
+    ]
+    expected = await _per_record(service, records)
+    actual = await _columnar(service, records)
+    assert actual == expected
+    assert [r["task_id"] for r in actual[1]] == [None, "filtered_out_of_range", "filtered_out_of_range", None]
+
+
+@pytest.mark.asyncio
+async def test_timezone_resolved_once(service) -> None:
+    await _columnar(service, _make_records(500))
+    assert service.tz_calls == [USER_ID]
+
+
+def test_columns_mixed_values() -> None:
+    records = [
+        StandardPulseRecord(source="s", type="heartRates", timestamp=0, value=v)
+        for v in [1.5, "2", "abc"]
+    ]
+    columns = PulseRecordColumns.from_records(records)
+    assert columns.numeric.tolist() == [True, True, False]
+    assert columns.value[:2].tolist() == [1.5, 2.0]
+    assert np.isnan(columns.value[2])
+
+
+def test_validate_array_matches_validate(service) -> None:
+    validator = service._value_validator
+    values = np.array([-5.0, 0.0, 60.0, 350.0, 350.5, np.nan])
+    mask = validator.validate_array("heartRates", values)
+    assert mask.tolist() == [validator.validate("heartRates", v).is_valid for v in values.tolist()]
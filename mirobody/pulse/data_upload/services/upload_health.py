@@ -5,19 +5,20 @@ Standard Health data service
 import json
 import logging
 import time
+import numpy as np
 
 from datetime import datetime, timezone, timedelta
 from typing import Any, Dict, List
 from zoneinfo import ZoneInfo
 
 from .base import BaseHealthService
+from .columnar import PulseRecordColumns
 from ..models.requests import StandardPulseData
 from ..repositories.health_data import HealthDataRepository
 from ...core.indicators_info import is_summary_indicator, is_series_indicator, normalize_indicator_name
 from ...core.fhir_mapping import get_fhir_id
 from ...core.value_range_validator import ValueRangeValidator
 from ...core.user import ThetaUserService
-from ....utils import execute_query
 
 
 class StandardHealthService(BaseHealthService):
@@ -33,6 +34,9 @@ class StandardHealthService(BaseHealthService):
         "RESPIRATORY_RATE": "respiratory_rate",
     }
 
+    # Batches at least this large are prepared through the columnar path
+    COLUMNAR_MIN_RECORDS = 1000
+
     def __init__(self, repository: HealthDataRepository = None):
         self.user_service = ThetaUserService()
         self._value_validator = ValueRangeValidator()
@@ -131,6 +135,14 @@ class StandardHealthService(BaseHealthService):
         Returns:
             tuple: (summary_records, series_records)
         """
+        if len(health_data) >= self.COLUMNAR_MIN_RECORDS:
+            try:
+                columns = PulseRecordColumns.from_records(health_data)
+            except Exception as e:
+                logging.warning(f"Failed to build columnar batch, falling back to per-record path: {e}")
+            else:
+                return await self._classify_and_prepare_columns(columns, user_id)
+
         summary_records = []
         series_records = []
 
@@ -161,6 +173,120 @@ class StandardHealthService(BaseHealthService):
         logging.info(f"Classified records: {len(summary_records)} summary, {len(series_records)} series")
         return summary_records, series_records
 
+    async def _classify_and_prepare_columns(self, columns: PulseRecordColumns, user_id: str) -> tuple[
+        List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Columnar equivalent of the per-record classification loop
+
+        Indicator normalization, summary/series classification and unit conversion
+        are resolved once per distinct (type, unit, percentage_handling) group;
+        conversion and range validation run as numpy operations over each group.
+        Output records are identical to the per-record path.
+
+        Args:
+            columns: Batch laid out as columns
+            user_id: User ID
+
+        Returns:
+            tuple: (summary_records, series_records)
+        """
+        count = len(columns)
+        user_timezone = await self._get_user_timezone(user_id)
+
+        indicators: List[str] = [""] * count
+        values: List[Any] = list(columns.raw_value)
+        is_summary = np.zeros(count, dtype=bool)
+        is_series = np.zeros(count, dtype=bool)
+        out_of_range = np.zeros(count, dtype=bool)
+
+        for (record_type, unit, percentage_handling), positions in columns.group_indices().items():
+            indicator = normalize_indicator_name(record_type)
+            for i in positions.tolist():
+                indicators[i] = indicator
+            is_summary[positions] = is_summary_indicator(record_type)
+            is_series[positions] = is_series_indicator(record_type)
+
+            numeric_positions = positions[columns.numeric[positions]]
+            if len(numeric_positions) == 0:
+                continue
+
+            try:
+                converted, _ = self.normalize_health_data_unit(
+                    indicator,
+                    columns.value[numeric_positions],
+                    unit,
+                    percentage_handling=percentage_handling
+                )
+                converted = np.broadcast_to(np.asarray(converted, dtype=np.float64), numeric_positions.shape)
+            except Exception as e:
+                # Keep the original values, but validate them as the per-record path does
+                logging.warning(f"Columnar unit conversion failed for {record_type} {unit}: {e}, keeping original values")
+                converted = columns.value[numeric_positions]
+            else:
+                for i, v in zip(numeric_positions.tolist(), converted.tolist()):
+                    values[i] = v
+
+            invalid = ~self._value_validator.validate_array(indicator, converted)
+            if invalid.any():
+                out_of_range[numeric_positions[invalid]] = True
+                logging.info(f"[ValidRange] {int(invalid.sum())} values of {indicator} out of range, filtered")
+
+        summary_records = []
+        series_records = []
+
+        record_times = columns.record_times()
+        timestamps = columns.timestamp.tolist()
+
+        for i in range(count):
+            record_time = record_times[i]
+            if not isinstance(record_time, datetime):
+                logging.warning(f"Failed to process single record: timestamp {timestamps[i]} out of range")
+                continue
+
+            timezone_info = columns.timezone[i]
+            if timezone_info == "UTC":
+                timezone_info = user_timezone
+
+            source = columns.source[i].lower()
+            value = str(values[i])
+            task_id = "filtered_out_of_range" if out_of_range[i] else columns.task_id[i]
+
+            if is_summary[i]:
+                summary_record = self._prepare_summary_record({
+                    "user_id": user_id,
+                    "indicator": indicators[i],
+                    "source": source,
+                    "value": value,
+                    "timestamp": timestamps[i],
+                    "record_time": record_time,
+                    "unit": columns.unit[i],
+                    "timezone": timezone_info,
+                    "source_id": columns.source_id[i],
+                    "task_id": task_id,
+                    "custom_comment": columns.comment[i],
+
+                    "original_start_time_ms": columns.start_time[i],
+                    "original_end_time_ms": columns.end_time[i],
+                })
+                if summary_record:
+                    summary_records.append(summary_record)
+            if is_series[i]:
+                series_records.append({
+                    "user_id": user_id,
+                    "indicator": indicators[i],
+                    "value": value,
+                    "start_time": record_time,
+                    "end_time": record_time,
+                    "source": source,
+                    "timezone": timezone_info,
+                    "record_type": "vital_health",
+                    "source_id": columns.source_id[i],
+                    "task_id": task_id,
+                })
+
+        logging.info(f"Classified records (columnar): {len(summary_records)} summary, {len(series_records)} series")
+        return summary_records, series_records
+
     async def _prepare_common_record_data(self, record: Dict[str, Any], user_id: str, user_timezone: str = None) -> Dict[str, Any]:
         try:
             source = record.get("source", "UNKNOWN")
@@ -308,43 +434,11 @@ class StandardHealthService(BaseHealthService):
             return True, 0
 
         try:
-            query = """
-            INSERT INTO th_series_data (
-                user_id, indicator, value, start_time, end_time, source_table,
-                source_table_id, comment, indicator_id, source, task_id,
-                fhir_id, fhir_mapping_info, create_time, update_time, deleted
-            ) VALUES (
-                :user_id, :indicator, :value, :start_time, :end_time, :source_table,
-                :source_table_id, encrypt_content(:comment), :indicator_id, :source, :task_id,
-                :fhir_id, :fhir_mapping_info, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 0
-            )
-            ON CONFLICT (user_id, indicator, start_time, end_time)
-            DO UPDATE SET
-                value = EXCLUDED.value,
-                source_table = EXCLUDED.source_table,
-                source_table_id = EXCLUDED.source_table_id,
-                comment = EXCLUDED.comment,
-                source = EXCLUDED.source,
-                task_id = EXCLUDED.task_id,
-                fhir_id = COALESCE(EXCLUDED.fhir_id, th_series_data.fhir_id),
-                fhir_mapping_info = EXCLUDED.fhir_mapping_info,
-                update_time = CURRENT_TIMESTAMP
-            """
-
-            batch_size = 1000
-            total_processed = 0
-
             logging.info(f"About to save {len(summary_records)} summary records to th_series_data")
             for record in summary_records[:2]:  # Log first 2 records for debugging
                 logging.info(f"Sample record: {record}")
 
-            for i in range(0, len(summary_records), batch_size):
-                batch = summary_records[i:i + batch_size]
-                logging.info(f"Executing batch {i // batch_size + 1} with {len(batch)} records")
-                result = await execute_query(query=query, params=batch)
-                logging.info(f"Batch execution result: {result}")
-                total_processed += len(batch)
-                logging.info(f"Processed summary batch {i // batch_size + 1}: {len(batch)} records")
+            total_processed = await self.repository.save_summary_records(summary_records)
 
             logging.info(f"Successfully batch saved {total_processed} summary records to th_series_data")
             return True, total_processed
@@ -0,0 +1,158 @@
+"""
+WebSocket Upload Benchmark: base64/JSON chunks vs binary frames
+
+Feeds a synthetic --mb MB file, in --chunk-kb KB chunks, through the upload
+manager exactly as the /ws/upload-health-report loop hands frames to it, in
+one of three modes, each in a fresh process so peak RSS is comparable:
+
+  - json-buffered: the previous handler; json.loads the text frame,
+    base64-decode, keep every chunk in a dict, reassemble a bytearray,
+    one file_progress message per chunk
+  - json:   handle_file_chunk; same frames, chunks spooled to a temp file,
+    coalesced progress
+  - binary: handle_binary_chunk; 24-byte header + raw bytes, CRC32 checked,
+    written at its offset in the spool, coalesced progress
+
+Server CPU is process time spent inside the handler calls only (building
+the client frames is excluded); processing of the finished upload is not
+run. Messages counts what the server sent back over the socket.
+
+Usage:
+    python3 -m mirobody.pulse.file_parser.bench_upload [--mb 500] [--chunk-kb 1024]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import resource
+import time
+
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator
+
+from .file_upload_manager import WebSocketFileUploadManager
+from .services.upload_spool import pack_chunk_frame
+
+
+class _Socket:
+    def __init__(self) -> None:
+        self.client_state = SimpleNamespace(value=1)
+        self.messages = 0
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        self.messages += 1
+
+
+def _chunks(mb: int, chunk_size: int) -> Iterator[bytes]:
+    block = os.urandom(chunk_size)  # Incompressible, reused so the client side stays small
+    total = mb * 1024 * 1024
+    for offset in range(0, total, chunk_size):
+        yield block[:min(chunk_size, total - offset)]
+
+
+async def _buffered_chunk(session: Dict[str, Any], socket: _Socket, text: str) -> None:
+    """The previous handle_file_chunk, minus logging."""
+    message_data = json.loads(text)
+    file_content = base64.b64decode(message_data["chunk"])
+    record = session.setdefault("file", {"chunks": {}, "received_chunks": 0, "content": bytearray()})
+    if message_data["chunkIndex"] not in record["chunks"]:
+        record["chunks"][message_data["chunkIndex"]] = file_content
+        record["received_chunks"] += 1
+    file_progress = record["received_chunks"] / message_data["totalChunks"] * 100
+    await socket.send_text(json.dumps({"type": "file_progress", "progress": file_progress, "message": f"Uploading: {file_progress:.1f}%"}))
+    if record["received_chunks"] == message_data["totalChunks"]:
+        record["content"] = bytearray()
+        for i in range(message_data["totalChunks"]):
+            record["content"].extend(record["chunks"][i])
+        await socket.send_text(json.dumps({"type": "file_received", "size": len(record["content"])}))
+
+
+async def _child(mode: str, mb: int, chunk_size: int) -> Dict[str, Any]:
+    manager = WebSocketFileUploadManager()
+    done = asyncio.Event()
+
+    async def start_file_processing(connection_id: str, message_id: str) -> None:
+        done.set()
+
+    manager.start_file_processing = start_file_processing
+    socket = _Socket()
+    await manager.connect(socket, "bench_1")
+    size = mb * 1024 * 1024
+    await manager.handle_upload_start("bench_1", {
+        "messageId": "m-bench", "_real_user_id": "bench",
+        "files": [{"filename": "genome.txt", "contentType": "text/plain", "size": size}],
+    })
+    upload_id = manager.upload_sessions["m-bench"]["uploaded_files"][0]["upload_id"]
+    total_chunks = -(-size // chunk_size)
+    buffered_session: Dict[str, Any] = {}
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cpu = 0.0
+    start = time.perf_counter()
+    offset = 0
+    for index, chunk in enumerate(_chunks(mb, chunk_size)):
+        if mode == "binary":
+            frame = pack_chunk_frame(upload_id, offset, chunk)
+            t0 = time.process_time()
+            await manager.handle_binary_chunk("bench_1", frame)
+        else:
+            text = json.dumps({
+                "type": "upload_chunk", "messageId": "m-bench", "filename": "genome.txt", "contentType": "text/plain",
+                "chunk": base64.b64encode(chunk).decode(), "chunkIndex": index, "totalChunks": total_chunks,
+            })
+            t0 = time.process_time()
+            if mode == "json":
+                await manager.handle_file_chunk("bench_1", json.loads(text))
+            else:
+                await _buffered_chunk(buffered_session, socket, text)
+        cpu += time.process_time() - t0
+        offset += len(chunk)
+        del chunk
+    elapsed = time.perf_counter() - start
+
+    received = len(buffered_session["file"]["content"]) if mode == "json-buffered" else (
+        manager.upload_sessions["m-bench"]["uploaded_files"][0]["spool"].received if done.is_set() else -1
+    )
+    return {
+        "received_mb": received / 2**20,
+        "seconds": elapsed,
+        "cpu_seconds": cpu,
+        "messages": socket.messages - 2,  # Minus connection_established and upload_start_confirmed
+        "rss_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024,
+    }
+
+
+def _run_child(mode: str, mb: int, chunk_size: int, results: Any) -> None:
+    results.put(asyncio.run(_child(mode, mb, chunk_size)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=int, default=500)
+    parser.add_argument("--chunk-kb", type=int, default=1024)
+    args = parser.parse_args()
+
+    print(f"{args.mb} MB upload, {args.chunk_kb} KB chunks")
+    print(f"{'mode':<14} {'received MB':>11} {'seconds':>8} {'server CPU s':>12} {'messages':>9} {'peak RSS MB':>12}")
+    for mode in ("json-buffered", "json", "binary"):
+        # Fresh process per mode: ru_maxrss never goes down.
+        ctx = multiprocessing.get_context("fork")
+        results = ctx.Queue()
+        child = ctx.Process(target=_run_child, args=(mode, args.mb, args.chunk_kb * 1024, results))
+        child.start()
+        r = results.get()
+        child.join()
+        print(
+            f"{mode:<14} {r['received_mb']:>11.0f} {r['seconds']:>8.2f} {r['cpu_seconds']:>12.2f} "
+            f"{r['messages']:>9} {r['rss_mb']:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,44 +3,50 @@ WebSocket file upload manager
 Supports file upload through WebSocket with real-time progress synchronization
 
 SECTION INDEX (line numbers are approximate):
-    ~27   MemoryUploadFile             — in-memory UploadFile shim
-    ~64   WebSocketFileUploadManager   — main orchestrator class
-    ~82     connect()                  — establish WebSocket connection
-    ~120    disconnect()               — clean up connection state
-    ~135    send_message()             — send JSON message to client
-    ~191    handle_upload_start()      — initialize file upload session
-    ~307    handle_file_chunk()        — receive and buffer file chunks
-    ~445    start_file_processing()    — kick off processing after upload
-    ~475    process_files_async()      — main file processing pipeline
-    ~667    update_genetic_processing_complete()
-    ~680  ---- Helper Methods for process_files_async ----
-    ~682    _save_files_to_database()
-    ~813    _normalize_raw_data()
-    ~828    _calculate_progress_allocation()
-    ~851    _create_progress_callback()
-    ~887    _prepare_background_files_data()
-    ~907    _start_async_background_tasks()
-    ~934    _send_final_completion_status()
-    ~1010   _start_embedding_update_task()
-    ~1048   _build_return_info_for_failed()
-    ~1127 ---- End Helper Methods ----
-    ~1129   _build_return_info()       — build response info for completed files
-    ~1326   update_progress()          — send progress update to client
-    ~1368   delete_failed_message_record()
-    ~1377   handle_upload_end()        — finalize upload session
-    ~1430   handle_ping()              — WebSocket keepalive
-    ~1445   get_upload_status()        — query upload status
+    ~64   MemoryUploadFile             — in-memory UploadFile shim
+    ~105  WebSocketFileUploadManager   — main orchestrator class
+    ~125    connect()                  — establish WebSocket connection
+    ~163    disconnect()               — clean up connection state (suspends resumable uploads)
+    ~188    send_message()             — send JSON message to client
+    ~244    handle_upload_start()      — initialize file upload session
+    ~376    handle_file_chunk()        — receive base64/JSON chunks into the spool
+    ~468    handle_binary_chunk()      — receive binary chunk frames into the spool
+    ~544    handle_upload_resume()     — reattach a reconnected client, report received ranges
+    ~586  ---- Upload Spooling Helpers ----
+    ~717    start_file_processing()    — kick off processing after upload
+    ~747    process_files_async()      — main file processing pipeline
+    ~938    update_genetic_processing_complete()
+    ~950  ---- Helper Methods for process_files_async ----
+    ~953    _save_files_to_database()
+    ~1084   _normalize_raw_data()
+    ~1099   _calculate_progress_allocation()
+    ~1122   _create_progress_callback()
+    ~1158   _prepare_background_files_data()
+    ~1178   _start_async_background_tasks()
+    ~1205   _send_final_completion_status()
+    ~1281   _start_embedding_update_task()
+    ~1313   _build_return_info_for_failed()
+    ~1392 ---- End Helper Methods ----
+    ~1394   _build_return_info()       — build response info for completed files
+    ~1591   update_progress()          — send progress update to client
+    ~1633   delete_failed_message_record()
+    ~1642   handle_upload_end()        — finalize upload session
+    ~1695   handle_ping()              — WebSocket keepalive
+    ~1710   get_upload_status()        — query upload status
 """
 
 import asyncio
+import itertools
 import json
 import logging
+import time
 import uuid
 from datetime import datetime
 from typing import Dict, List
 
 from fastapi import WebSocket
 from mirobody.utils import get_req_ctx
+from mirobody.utils.config import safe_read_cfg
 from mirobody.pulse.file_parser.file_processor import FileProcessor
 
 from mirobody.pulse.file_parser.services.async_file_processor import AsyncFileProcessor
@@ -48,6 +54,12 @@ from mirobody.pulse.file_parser.services.database_services import FileParserData
 from mirobody.pulse.file_parser.services.file_db_service import FileDbService
 from mirobody.pulse.file_parser.services.db_utils import get_mime_type
 from mirobody.pulse.file_parser.handlers.genetic import GeneticHandler
+from mirobody.pulse.file_parser.services.upload_spool import (
+    ChunkFrameError,
+    ProgressThrottle,
+    UploadSpool,
+    parse_chunk_frame,
+)
 
 from ...chat.user_profile import UserProfileService
 
@@ -89,12 +101,18 @@ class MemoryUploadFile:
         pass
 
 
+# Suspended (disconnected mid-upload) sessions can be resumed for this long
+UPLOAD_RESUME_TTL = 30 * 60
+
+
 class WebSocketFileUploadManager:
     """WebSocket file upload manager"""
 
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}  # user_id -> websocket
         self.upload_sessions: Dict[str, Dict] = {}  # message_id -> session_info
+        self.upload_ids: Dict[int, tuple] = {}  # binary frame upload id -> (message_id, file_record)
+        self._upload_id_counter = itertools.count(1)
         self._file_processor = None  # Lazy initialization
         self.instance_id = f"ws_upload_{datetime.now().timestamp()}"
         # Database service will be initialized when needed
@@ -151,14 +169,24 @@ class WebSocketFileUploadManager:
             del self.active_connections[connection_id]
             logging.info(f"🔌 WebSocket file upload connection disconnected - connection_id: {connection_id}")
 
-            # Clean up incomplete upload sessions for this connection
+            # Clean up incomplete upload sessions for this connection; ones still
+            # receiving chunks are kept (spooled to disk) so the client can resume
             sessions_to_remove = []
             for message_id, session in self.upload_sessions.items():
-                if session.get("connection_id") == connection_id and session.get("status") != "completed":
+                if session.get("connection_id") != connection_id:
+                    continue
+                if session.get("status") == "uploading":
+                    session["status"] = "suspended"
+                    session["suspended_at"] = time.monotonic()
+                elif session.get("status") not in ("completed", "suspended"):
                     sessions_to_remove.append(message_id)
 
             for message_id in sessions_to_remove:
-                del self.upload_sessions[message_id]
+                session = self.upload_sessions.pop(message_id)
+                if session.get("status") != "processing":  # Processing releases its own files
+                    self._release_session_files(session)
+
+        self._expire_suspended_sessions()
 
     async def send_message(self, connection_id: str, message: Dict):
         """Send message to specified connection"""
@@ -280,7 +308,20 @@ class WebSocketFileUploadManager:
                     return True
                 else:
                     logging.info(f"Message ID {message_id} exists but is completed, creating new upload session")
+                    self._release_session_files(existing_session)
 
+            self._expire_suspended_sessions()
+
+            # Declared files get a spool and a binary upload id up front
+            session_info["uploaded_files"] = [
+                self._new_file_record(
+                    message_id,
+                    f.get("filename", ""),
+                    f.get("contentType", "application/octet-stream"),
+                    f.get("size", f.get("fileSize")),
+                )
+                for f in files_info
+            ]
             self.upload_sessions[message_id] = session_info
 
             # Generate summary for first message (session summary, not th_messages)
@@ -313,7 +354,10 @@ class WebSocketFileUploadManager:
                     "status": "uploading",
                     "progress": 0,
                     "message": f"Ready to receive {len(files_info)} files",
-                    "files": files_info,
+                    "files": [
+                        {**f, "uploadId": record["upload_id"]}
+                        for f, record in zip(files_info, session_info["uploaded_files"])
+                    ],
                 },
             )
 
@@ -375,7 +419,7 @@ class WebSocketFileUploadManager:
                 )
                 return False
 
-            logging.info(f"filename: {filename}, chunk_index: {chunk_index}, total_chunks: {total_chunks}")
+            logging.debug(f"filename: {filename}, chunk_index: {chunk_index}, total_chunks: {total_chunks}")
             # Check if data for this file already exists
             existing_file = None
             for uploaded_file in session["uploaded_files"]:
@@ -387,89 +431,292 @@ class WebSocketFileUploadManager:
                 # New file, create record
                 content_type = message_data.get("contentType", "application/octet-stream")
                 file_size = message_data.get("fileSize", 0)
-
-                file_record = {
-                    "filename": filename,
-                    "content_type": content_type,
-                    "size": file_size,
-                    "chunks": {},
-                    "total_chunks": total_chunks,
-                    "received_chunks": 0,
-                    "content": bytearray(),
-                }
-                session["uploaded_files"].append(file_record)
-                existing_file = file_record
-
-            # Add data chunk
-            if chunk_index not in existing_file["chunks"]:
-                existing_file["chunks"][chunk_index] = file_content
+                existing_file = self._new_file_record(message_id, filename, content_type, file_size)
+                session["uploaded_files"].append(existing_file)
+
+            if existing_file["total_chunks"] is None:
+                # Indexed chunks: the size is whatever the chunks add up to
+                existing_file["total_chunks"] = total_chunks
+                existing_file["spool"].size = None
+
+            # Spool chunks in index order; early ones wait in memory until the gap is filled
+            pending = existing_file["pending_chunks"]
+            if chunk_index >= existing_file["next_chunk"] and chunk_index not in pending:
+                pending[chunk_index] = file_content
                 existing_file["received_chunks"] += 1
+                while existing_file["next_chunk"] in pending:
+                    existing_file["spool"].append(pending.pop(existing_file["next_chunk"]))
+                    existing_file["next_chunk"] += 1
 
-            # Calculate file upload progress
-            file_progress = (existing_file["received_chunks"] / existing_file["total_chunks"]) * 100
+            if existing_file["received_chunks"] == existing_file["total_chunks"]:
+                existing_file["spool"].size = existing_file["spool"].received
 
-            # Send progress update
+            await self._after_chunk(connection_id, message_id, session, existing_file)
+            return True
+
+        except Exception as e:
+            logging.error(f"Failed to handle file data chunk: {e}", stack_info=True)
             await self.send_message(
                 connection_id,
                 {
-                    "type": "file_progress",
-                    "messageId": message_id,
-                    "filename": filename,
-                    "progress": file_progress,
-                    "status": "uploading",
-                    "message": f"Uploading {filename}: {file_progress:.1f}%",
+                    "type": "upload_error",
+                    "messageId": message_data.get("messageId"),
+                    "filename": message_data.get("filename"),
+                    "status": "failed",
+                    "message": f"Failed to process file data: {str(e)}",
                 },
             )
+            return False
 
-            # Check if file is complete
-            if existing_file["received_chunks"] == existing_file["total_chunks"]:
-                # Reassemble file content
-                existing_file["content"] = bytearray()
-                for i in range(existing_file["total_chunks"]):
-                    if i in existing_file["chunks"]:
-                        existing_file["content"].extend(existing_file["chunks"][i])
+    async def handle_binary_chunk(self, connection_id: str, frame: bytes):
+        """Handle a binary chunk frame (header layout in services/upload_spool.py)
 
-                # Update actual file size in record
-                actual_file_size = len(existing_file["content"])
-                existing_file["size"] = actual_file_size
+        The payload is written straight to the file's spool at its offset, so
+        chunks may arrive in any order and re-sent chunks are harmless.
+        """
+        try:
+            try:
+                chunk = parse_chunk_frame(frame)
+            except ChunkFrameError as e:
+                await self.send_message(
+                    connection_id,
+                    {
+                        "type": "upload_error",
+                        "status": "failed",
+                        "message": f"Invalid chunk frame: {str(e)}",
+                    },
+                )
+                return False
 
-                # Complete file received
+            message_id, record = self.upload_ids.get(chunk.upload_id, (None, None))
+            session = self.upload_sessions.get(message_id)
+            if not session or session.get("connection_id") != connection_id or session.get("status") != "uploading":
                 await self.send_message(
                     connection_id,
                     {
-                        "type": "file_received",
+                        "type": "upload_error",
                         "messageId": message_id,
-                        "filename": filename,
-                        "status": "received",
-                        "message": f"File {filename} received successfully",
-                        "size": actual_file_size,
+                        "uploadId": chunk.upload_id,
+                        "status": "failed",
+                        "message": "Invalid upload session",
                     },
                 )
+                return False
 
-                logging.info(f"File received successfully: {filename}, actual size: {actual_file_size} bytes")
+            if not chunk.crc_ok():
+                reason = "CRC32 mismatch"
+            elif record["total_chunks"] is not None or record["spool"].size is None:
+                reason = "Binary chunks need the file size declared in upload_start"
+            else:
+                reason = None
+                try:
+                    record["spool"].write(chunk.offset, chunk.payload)
+                except ValueError as e:
+                    reason = str(e)
 
-            # Check if all files have been received
-            all_files_received = all(f["received_chunks"] == f["total_chunks"] for f in session["uploaded_files"])
-            if all_files_received:
-                # Start processing files
-                await self.start_file_processing(connection_id, message_id)
+            if reason:
+                # The client re-sends the chunk; nothing was recorded for it
+                await self.send_message(
+                    connection_id,
+                    {
+                        "type": "chunk_rejected",
+                        "messageId": message_id,
+                        "filename": record["filename"],
+                        "uploadId": chunk.upload_id,
+                        "offset": chunk.offset,
+                        "message": reason,
+                    },
+                )
+                return False
 
+            await self._after_chunk(connection_id, message_id, session, record)
             return True
 
         except Exception as e:
-            logging.error(f"Failed to handle file data chunk: {e}", stack_info=True)
+            logging.error(f"Failed to handle binary file chunk: {e}", stack_info=True)
             await self.send_message(
                 connection_id,
                 {
                     "type": "upload_error",
-                    "messageId": message_data.get("messageId"),
-                    "filename": message_data.get("filename"),
                     "status": "failed",
                     "message": f"Failed to process file data: {str(e)}",
                 },
             )
             return False
 
+    async def handle_upload_resume(self, connection_id: str, message_data: Dict):
+        """Reattach a reconnected client to its upload and report what has been received
+
+        Args:
+            connection_id: Unique connection identifier of the new connection
+            message_data: Resume message data, may contain _real_user_id (set by router)
+        """
+        message_id = message_data.get("messageId")
+        real_user_id = message_data.get("_real_user_id") or connection_id.split("_")[0]
+        session = self.upload_sessions.get(message_id)
+
+        if not session or session.get("user_id") != real_user_id:
+            await self.send_message(
+                connection_id,
+                {
+                    "type": "upload_resume_status",
+                    "messageId": message_id,
+                    "status": "not_found",
+                    "message": "Upload session not found, start a new upload",
+                },
+            )
+            return False
+
+        if session.get("status") in ("uploading", "suspended"):
+            session["connection_id"] = connection_id
+            session["status"] = "uploading"
+            session.pop("suspended_at", None)
+            logging.info(f"Upload resumed: connection_id={connection_id}, message_id={message_id}")
+
+        await self.send_message(
+            connection_id,
+            {
+                "type": "upload_resume_status",
+                "messageId": message_id,
+                "sessionId": session.get("session_id"),
+                "status": session.get("status"),
+                "progress": session.get("progress", 0),
+                "uploads": self._describe_uploads(session),
+            },
+        )
+        return True
+
+    # ==================== Upload Spooling Helpers ====================
+
+    def _new_file_record(self, message_id: str, filename: str, content_type: str, size) -> Dict:
+        """Create the record for one uploaded file, spooled to a temporary file"""
+        try:
+            size = int(size) if size is not None else None
+        except (TypeError, ValueError):
+            size = None
+
+        record = {
+            "filename": filename,
+            "content_type": content_type,
+            "size": size or 0,
+            "upload_id": next(self._upload_id_counter),
+            "spool": UploadSpool(size),
+            "total_chunks": None,  # Set by indexed (base64/JSON) chunks
+            "received_chunks": 0,
+            "next_chunk": 0,
+            "pending_chunks": {},
+            "received": False,
+            "progress_throttle": ProgressThrottle(
+                interval=float(safe_read_cfg("UPLOAD_PROGRESS_INTERVAL") or 0.5),
+                step=float(safe_read_cfg("UPLOAD_PROGRESS_STEP") or 5),
+            ),
+        }
+        self.upload_ids[record["upload_id"]] = (message_id, record)
+        return record
+
+    async def _after_chunk(self, connection_id: str, message_id: str, session: Dict, record: Dict):
+        """Send coalesced progress, announce a completed file, and start processing once all are in"""
+        filename = record["filename"]
+        spool = record["spool"]
+        if record["total_chunks"] is not None:
+            file_progress = (record["received_chunks"] / record["total_chunks"]) * 100
+        else:
+            file_progress = (spool.received / spool.size) * 100 if spool.size else 100.0
+
+        if record["progress_throttle"].ready(file_progress):
+            await self.send_message(
+                connection_id,
+                {
+                    "type": "file_progress",
+                    "messageId": message_id,
+                    "filename": filename,
+                    "progress": file_progress,
+                    "status": "uploading",
+                    "message": f"Uploading {filename}: {file_progress:.1f}%",
+                },
+            )
+
+        if not record["received"] and spool.complete:
+            record["received"] = True
+            record["size"] = spool.size
+
+            # Complete file received
+            await self.send_message(
+                connection_id,
+                {
+                    "type": "file_received",
+                    "messageId": message_id,
+                    "filename": filename,
+                    "status": "received",
+                    "message": f"File {filename} received successfully",
+                    "size": spool.size,
+                },
+            )
+            logging.info(f"File received successfully: {filename}, actual size: {spool.size} bytes")
+
+        # Check if all files have been received
+        if session.get("status") == "uploading" and all(f["received"] for f in session["uploaded_files"]):
+            session["status"] = "processing"
+            await self.start_file_processing(connection_id, message_id)
+
+    @staticmethod
+    def _describe_uploads(session: Dict) -> List[Dict]:
+        """Per-file received byte ranges, for resuming after a reconnect"""
+        uploads = []
+        for record in session.get("uploaded_files", []):
+            spool = record["spool"]
+            info = {
+                "filename": record["filename"],
+                "uploadId": record["upload_id"],
+                "size": spool.size,
+                "received": spool.received,
+                "ranges": spool.ranges.as_list(),
+                "nextOffset": spool.ranges.next_offset,
+                "complete": record["received"],
+            }
+            if record["total_chunks"] is not None:
+                info["nextChunkIndex"] = record["next_chunk"]
+            uploads.append(info)
+        return uploads
+
+    @staticmethod
+    def _open_upload_file(file_data: Dict):
+        """UploadFile-like view of a received file"""
+        spool = file_data.get("spool")
+        if spool is not None:
+            return spool.open(file_data["filename"], file_data["content_type"])
+        return MemoryUploadFile(file_data["content"], file_data["filename"], file_data["content_type"])
+
+    @staticmethod
+    async def _read_content(file_data: Dict) -> bytes:
+        """Whole content of a received file, for consumers that need bytes; read off the event loop"""
+        spool = file_data.get("spool")
+        if spool is not None:
+            return await spool.read_all_async()
+        return file_data.get("content", b"")
+
+    def _release_session_files(self, session: Dict):
+        """Close the session's spools and forget their upload ids"""
+        for record in session.get("uploaded_files", []):
+            self.upload_ids.pop(record.get("upload_id"), None)
+            if record.get("spool") is not None:
+                record["spool"].close()
+            record.get("pending_chunks", {}).clear()
+
+    def _expire_suspended_sessions(self):
+        """Drop suspended uploads whose client has not come back within UPLOAD_RESUME_TTL"""
+        now = time.monotonic()
+        expired = [
+            message_id
+            for message_id, session in self.upload_sessions.items()
+            if session.get("status") == "suspended" and now - session.get("suspended_at", now) > UPLOAD_RESUME_TTL
+        ]
+        for message_id in expired:
+            logging.info(f"Suspended upload expired: message_id={message_id}")
+            self._release_session_files(self.upload_sessions.pop(message_id))
+
+    # ==================== End Upload Spooling Helpers ====================
+
     async def start_file_processing(self, connection_id: str, message_id: str):
         """Start processing uploaded files"""
         try:
@@ -485,7 +732,7 @@ class WebSocketFileUploadManager:
             has_genetic_files = False
             for f in uploaded_files:
                 # Create adapter for checking
-                temp_file = MemoryUploadFile(f["content"], f["filename"], f["content_type"])
+                temp_file = self._open_upload_file(f)
                 if await GeneticHandler.is_genetic_file(temp_file):
                     has_genetic_files = True
                     break
@@ -556,12 +803,8 @@ class WebSocketFileUploadManager:
                         file_start_progress, file_end_progress, i + 1, file_data["filename"], connection_id, message_id
                     )
 
-                    # Wrap in MemoryUploadFile adapter
-                    temp_file = MemoryUploadFile(
-                        file_data["content"], 
-                        file_data["filename"], 
-                        file_data["content_type"]
-                    )
+                    # Wrap in UploadFile adapter over the spooled content
+                    temp_file = self._open_upload_file(file_data)
 
                     # UNIFIED PROCESSING ENTRY POINT (use real user_id for business logic)
                     result = await self.file_processor.process_single_file(
@@ -618,7 +861,7 @@ class WebSocketFileUploadManager:
             logging.info(f"Processing result statistics: {successful_files}/{total_files} files successful")
 
             # Start background tasks for file abstract generation
-            files_data_for_background = self._prepare_background_files_data(uploaded_files, results)
+            files_data_for_background = await self._prepare_background_files_data(uploaded_files, results)
             await self._start_async_background_tasks(files_data_for_background, message_id)
 
             if successful_files == 0:
@@ -691,6 +934,9 @@ class WebSocketFileUploadManager:
         except Exception as e:
             logging.error(f"Asynchronous file processing failed: {e}", exc_info=True)
             await self.update_progress(connection_id, message_id, "failed", 0, f"Processing failed: {str(e)}")
+        finally:
+            # Processing has its own copies from here on; drop the spooled uploads
+            self._release_session_files({"uploaded_files": uploaded_files})
 
     async def update_genetic_processing_complete(self, user_id: str, message_id: str):
         """Update genetic processing completion status"""
@@ -912,7 +1158,7 @@ class WebSocketFileUploadManager:
 
         return file_progress_callback
 
-    def _prepare_background_files_data(
+    async def _prepare_background_files_data(
         self,
         uploaded_files: List[Dict],
         results: List[Dict],
@@ -925,7 +1171,7 @@ class WebSocketFileUploadManager:
         for i, file_data in enumerate(uploaded_files):
             if i < len(results) and results[i].get("success", False):
                 files_data.append({
-                    "content": file_data.get("content", b""),
+                    "content": await self._read_content(file_data),
                     "filename": file_data.get("filename", ""),
                     "content_type": file_data.get("content_type", ""),
                     "s3_key": results[i].get("s3_key", results[i].get("file_key", "")),
@@ -1241,7 +1487,7 @@ class WebSocketFileUploadManager:
                             logging.info(f"🔍 [WebSocket] Generating file abstract for {uploaded_files[i]['filename']}, type: {file_type}")
                             
                             result_data = await extractor.extract_file_abstract(
-                                file_content=uploaded_files[i]["content"],
+                                file_content=await self._read_content(uploaded_files[i]),
                                 file_type=file_type,
                                 filename=uploaded_files[i]["filename"],
                                 content_type=uploaded_files[i]["content_type"]
@@ -1475,6 +1721,7 @@ class WebSocketFileUploadManager:
                     "status": session.get("status", "unknown"),
                     "progress": session.get("progress", 0),
                     "files": session.get("files", []),
+                    "uploads": self._describe_uploads(session),
                     "timestamp": datetime.now().isoformat(),
                 }
             else:
@@ -0,0 +1,125 @@
+"""
+Genetic Loader Benchmark: executemany vs COPY + merge
+
+Generates a 23andMe-style raw data file (--lines data lines) and times:
+
+  - parse:  the previous dict-per-line generator with periodic gc.collect()
+    against iter_genetic_rows, without touching the database
+  - load:   GeneticDataLoader.load_user_genetic_data with use_copy=False
+    (executemany, as before) and use_copy=True (binary COPY into a temp
+    staging table + one INSERT ... SELECT per batch) on the configured
+    Postgres; skipped with --parse-only
+
+Rows are written under a throwaway user_id and deleted afterwards.
+Progress updates are off (no file_key), so only parsing and loading count.
+
+Usage:
+    PG_HOST=127.0.0.1 PG_USER=postgres PG_DBNAME=mirobody PG_SCHEMA=public \\
+        python3 -m mirobody.pulse.file_parser.services.bench_genetic_loader [--lines 1000000] [--parse-only]
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from typing import Any, Dict, Generator
+
+from ....utils import execute_query
+from ....utils.config import Config
+from .genetic_processor import GeneticDataLoader, iter_genetic_rows
+
+
+def _write_file(path: str, lines: int) -> None:
+    rng = random.Random(7)
+    genotypes = ["AA", "AG", "GG", "CT", "CC", "TT", "--"]
+    with open(path, "w") as f:
+        f.write("# This data file generated by WeGene at: Mon Jan 01 00:00:00 2024\n")
+        f.write("# rsid\tchromosome\tposition\tgenotype\n")
+        for i in range(lines):
+            f.write(f"rs{1000 + i}\t{i * 23 // lines + 1}\t{10_000 + i * 37}\t{rng.choice(genotypes)}\n")
+
+
+def _previous_parser(file_path: str, user_id: str) -> Generator[Dict[str, Any], None, None]:
+    """The parser as it was: strip, periodic gc.collect(), one dict per row."""
+    with open(file_path, "r", encoding="utf-8") as file:
+        data_started = False
+        for processed_lines, line in enumerate(file, 1):
+            line = line.strip()
+            if processed_lines % 10000 == 0:
+                gc.collect()
+            if not data_started:
+                if line.startswith("# rsid") and "chromosome" in line and "position" in line and "genotype" in line:
+                    data_started = True
+                continue
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split("\t") if "\t" in line else line.split()
+            if len(parts) >= 4:
+                rsid, chromosome, position_str, genotype = parts[:4]
+                yield {
+                    "user_id": user_id, "rsid": rsid.strip(), "chromosome": chromosome.strip(),
+                    "position": int(position_str), "genotype": genotype.strip(),
+                    "source_table": None, "source_table_id": None,
+                }
+
+
+def _time_parse(path: str) -> None:
+    start = time.perf_counter()
+    previous = sum(1 for _ in _previous_parser(path, "bench"))
+    previous_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as f:
+        current = sum(1 for _ in iter_genetic_rows(f))
+    current_s = time.perf_counter() - start
+
+    assert previous == current
+    print(f"{'parse':<12} {'previous':<12} {previous:>10,} {previous_s:>9.2f} {previous / previous_s:>12,.0f}")
+    print(f"{'parse':<12} {'split rows':<12} {current:>10,} {current_s:>9.2f} {current / current_s:>12,.0f}")
+
+
+async def _time_load(path: str, mode: str, batch_size: int) -> None:
+    user_id = f"bench-{uuid.uuid4().hex[:12]}"
+    loader = GeneticDataLoader()
+    try:
+        start = time.perf_counter()
+        saved = await loader.load_user_genetic_data(
+            user_id, path, batch_size=batch_size, is_up_progress=False, use_copy=(mode == "copy"),
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        await execute_query("DELETE FROM th_series_data_genetic WHERE user_id = :user_id", {"user_id": user_id}, log_sql=False)
+    print(f"{'load':<12} {mode:<12} {saved:>10,} {elapsed:>9.2f} {saved / elapsed:>12,.0f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--modes", nargs="+", default=["executemany", "copy"], choices=["executemany", "copy"])
+    parser.add_argument("--parse-only", action="store_true")
+    parser.add_argument("--config", nargs="*", default=None, help="Extra config yaml files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "genome.txt")
+        _write_file(path, args.lines)
+        print(f"{args.lines:,} lines, {os.path.getsize(path) / 2**20:.1f} MB, batch {args.batch:,}")
+        print(f"{'stage':<12} {'mode':<12} {'rows':>10} {'seconds':>9} {'rows/s':>12}")
+        _time_parse(path)
+
+        if not args.parse_only:
+            await Config.init(yaml_filenames=args.config)
+            logging.getLogger().setLevel(logging.WARNING)
+            for mode in args.modes:
+                await _time_load(path, mode, args.batch)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,16 +1,16 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import asyncio
 import json
 import os
 import logging
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Generator, List
+from typing import Any, Dict, Generator, Iterable, Iterator, List, Optional, Tuple
 
 from mirobody.utils.i18n import clear_translation_cache, t
-from mirobody.utils import execute_query
+from mirobody.utils import execute_copy, execute_query
 from mirobody.pulse.file_parser.services.database_services import FileParserDatabaseService
 from mirobody.pulse.file_parser.services.file_db_service import FileDbService
 
@@ -34,9 +34,95 @@ async def debug_message_content(message_id: str, stage: str = "unknown"):
         pass
 
 
+GENETIC_INSERT = """
+INSERT INTO th_series_data_genetic 
+(user_id, rsid, chromosome, position, genotype, source_table, source_table_id, create_time, update_time, is_deleted)
+VALUES (:user_id, :rsid, :chromosome, :position, :genotype, :source_table, :source_table_id, NOW(), NOW(), FALSE)
+"""
+
+GENETIC_STAGING = "_stage_th_series_data_genetic"
+
+GENETIC_STAGING_COLUMNS: List[Tuple[str, str]] = [
+    ("user_id", "text"),
+    ("rsid", "text"),
+    ("chromosome", "text"),
+    ("position", "int4"),
+    ("genotype", "text"),
+    ("source_table", "text"),
+    ("source_table_id", "text"),
+]
+
+GENETIC_MERGE = f"""
+    INSERT INTO th_series_data_genetic
+    (user_id, rsid, chromosome, position, genotype, source_table, source_table_id, create_time, update_time, is_deleted)
+    SELECT user_id, rsid, chromosome, position, genotype, source_table, source_table_id, NOW(), NOW(), FALSE
+    FROM {GENETIC_STAGING}
+"""
+
+
+def parse_genetic_header(line: str) -> Optional[Tuple[Optional[str], bool]]:
+    """Recognize a genotype column header
+
+    Handles 23andMe/WeGene ("# rsid<TAB>chromosome<TAB>position<TAB>genotype"),
+    AncestryDNA ("rsid<TAB>chromosome<TAB>position<TAB>allele1<TAB>allele2")
+    and comma-separated exports ("RSID","CHROMOSOME","POSITION","RESULT").
+
+    Returns:
+        (delimiter, split_alleles) for a header line, None otherwise.
+        delimiter is a tab, a comma, or None (whitespace).
+    """
+    header = line.lstrip("#").strip().replace('"', "").lower()
+    delimiter = "\t" if "\t" in header else "," if "," in header else None
+    fields = [f.strip() for f in header.split(delimiter)]
+    if fields[:3] != ["rsid", "chromosome", "position"] or len(fields) < 4:
+        return None
+    return delimiter, fields[3:5] == ["allele1", "allele2"]
+
+
+def iter_genetic_rows(lines: Iterable[str]) -> Iterator[Tuple[str, str, int, str]]:
+    """Yield (rsid, chromosome, position, genotype) for every data line after the header
+
+    Lines are split with str.split only; comment lines and malformed rows are skipped.
+    """
+    lines = iter(lines)
+    layout = None
+    for line in lines:
+        layout = parse_genetic_header(line)
+        if layout:
+            logging.info(f"Found data start marker line: {line.strip()}")
+            break
+    if not layout:
+        return
+
+    delimiter, split_alleles = layout
+    width = 5 if split_alleles else 4
+    for line in lines:
+        if not line or line[0] == "#":
+            continue
+        if delimiter == ",":
+            parts = line.replace('"', "").split(",", width)
+        elif "\t" in line:
+            parts = line.split("\t", width)
+        else:
+            parts = line.split(None, width)
+        if len(parts) < width:
+            if line.strip():
+                logging.warning(f"Data format error: {line.strip()}")
+            continue
+        try:
+            position = int(parts[2])
+        except ValueError:
+            logging.warning(f"Data format error: {line.strip()}")
+            continue
+        genotype = parts[3].strip() + parts[4].strip() if split_alleles else parts[3].strip()
+        yield parts[0].strip(), parts[1].strip(), position, genotype
+
+
 class GeneticDataLoader:
     """Genetic data loader, supports large file streaming processing and progress updates"""
 
+    PROGRESS_INTERVAL = 2.0  # Seconds between progress updates while loading
+
     def __init__(
         self,
         message_id=None,
@@ -61,63 +147,17 @@ class GeneticDataLoader:
         source_table_id: str = None,
     ) -> Generator[Dict[str, Any], None, None]:
         """Parse genetic data file (generator version, yield line by line)"""
-        import gc
-
         with open(file_path, "r", encoding="utf-8") as file:
-            data_started = False
-            processed_lines = 0
-            valid_records = 0
-
-            for line_num, line in enumerate(file, 1):
-                line = line.strip()
-                processed_lines += 1
-
-                # Release memory every 10000 lines processed
-                if processed_lines % 10000 == 0:
-                    gc.collect()
-
-                # Find data start marker
-                if not data_started:
-                    if line.startswith("# rsid") and "chromosome" in line and "position" in line and "genotype" in line:
-                        data_started = True
-                        logging.info(f"Found data start marker line: {line}")
-                        continue
-                    else:
-                        continue
-
-                # Skip empty lines and comment lines
-                if not line or line.startswith("#"):
-                    continue
-
-                # Parse data line
-                parts = line.split("\t") if "\t" in line else line.split()
-                if len(parts) >= 4:
-                    try:
-                        rsid, chromosome, position_str, genotype = parts[:4]
-                        rsid, chromosome, genotype = (
-                            rsid.strip(),
-                            chromosome.strip(),
-                            genotype.strip(),
-                        )
-
-                        position = int(position_str)
-                        valid_records += 1
-
-                        yield {
-                            "user_id": user_id,
-                            "rsid": rsid,
-                            "chromosome": chromosome,
-                            "position": position,
-                            "genotype": genotype,
-                            "source_table": source_table,
-                            "source_table_id": source_table_id,
-                        }
-                    except (ValueError, IndexError) as e:
-                        logging.warning(f"Data format error in line {line_num}: {line} - {e}")
-                        continue
-
-            logging.info(f"Parsing complete: processed {processed_lines} lines total, generated {valid_records} valid records")
-
+            for rsid, chromosome, position, genotype in iter_genetic_rows(file):
+                yield {
+                    "user_id": user_id,
+                    "rsid": rsid,
+                    "chromosome": chromosome,
+                    "position": position,
+                    "genotype": genotype,
+                    "source_table": source_table,
+                    "source_table_id": source_table_id,
+                }
 
     async def update_progress(self, processed: int, saved: int, message: str, total: int = None):
         """Update processing progress - updates th_files table"""
@@ -195,6 +235,30 @@ class GeneticDataLoader:
             logging.error(f"Batch insertion failed: {e}")
             return False
 
+    async def copy_batch(self, rows: List[Tuple]) -> bool:
+        """Load one batch via binary COPY + merge, falling back to executemany
+
+        Args:
+            rows: Tuples in GENETIC_STAGING_COLUMNS order
+        """
+        try:
+            await execute_copy(GENETIC_STAGING, GENETIC_STAGING_COLUMNS, rows, GENETIC_MERGE)
+            return True
+        except Exception as e:
+            logging.warning(f"COPY into {GENETIC_STAGING} failed, falling back to executemany: {str(e)}")
+
+        names = [name for name, _ in GENETIC_STAGING_COLUMNS]
+        return await self.process_batch([dict(zip(names, row)) for row in rows], GENETIC_INSERT)
+
+    @staticmethod
+    def count_lines(file_path: str) -> int:
+        """Count lines without decoding the file (progress estimate)"""
+        count = 0
+        with open(file_path, "rb") as f:
+            while block := f.read(1 << 20):
+                count += block.count(b"\n")
+        return count
+
     async def load_user_genetic_data(
         self,
         user_id: str,
@@ -203,78 +267,69 @@ class GeneticDataLoader:
         is_up_progress: bool = True,
         source_table: str = None,
         source_table_id: str = None,
+        use_copy: bool = True,
     ):
-        """Load user genetic data (streaming batch insertion, supports very large files)"""
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File does not exist: {file_path}")
+        """Load user genetic data (streaming batch insertion, supports very large files)
 
-        insert_sql = """
-        INSERT INTO th_series_data_genetic 
-        (user_id, rsid, chromosome, position, genotype, source_table, source_table_id, create_time, update_time, is_deleted)
-        VALUES (:user_id, :rsid, :chromosome, :position, :genotype, :source_table, :source_table_id, NOW(), NOW(), FALSE)
+        Rows are parsed straight into batches of tuples and loaded with binary COPY
+        into a temp staging table plus one INSERT ... SELECT per batch (use_copy=False,
+        or a failed COPY, uses executemany). Progress goes out at most every
+        PROGRESS_INTERVAL seconds.
         """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File does not exist: {file_path}")
 
         batch, total_processed, total_saved, batch_count, failed_batches = [], 0, 0, 0, 0
-        estimated_total = sum(1 for _ in open(file_path, "r", encoding="utf-8"))
-        
+        estimated_total = self.count_lines(file_path)
+        last_progress = time.monotonic()
+
         if is_up_progress:
             await self.update_progress(0, 0, t("genetic_file_estimation", self.language, "load_genetic_data", total=estimated_total), estimated_total)
 
+        async def flush() -> None:
+            nonlocal total_saved, batch_count, failed_batches
+            if use_copy:
+                saved = await self.copy_batch(batch)
+            else:
+                names = [name for name, _ in GENETIC_STAGING_COLUMNS]
+                saved = await self.process_batch([dict(zip(names, row)) for row in batch], GENETIC_INSERT)
+            if saved:
+                total_saved += len(batch)
+                batch_count += 1
+                logging.info(f"Batch {batch_count}: saved {len(batch)} records")
+            else:
+                failed_batches += 1
+            batch.clear()
+
         try:
-            # Process each record
-            for record in self.parse_genetic_file(file_path, user_id, source_table, source_table_id):
-                batch.append(record)
-                total_processed += 1
-
-                # Periodically update parsing progress
-                if total_processed % batch_size == 0:
-                    if is_up_progress:
+            with open(file_path, "r", encoding="utf-8") as file:
+                for rsid, chromosome, position, genotype in iter_genetic_rows(file):
+                    batch.append((user_id, rsid, chromosome, position, genotype, source_table, source_table_id))
+                    if len(batch) < batch_size:
+                        continue
+
+                    total_processed += len(batch)
+                    await flush()
+
+                    # Time-throttled progress: th_files and the websocket, not every batch
+                    if is_up_progress and time.monotonic() - last_progress >= self.PROGRESS_INTERVAL:
+                        last_progress = time.monotonic()
                         await self.update_progress(
                             total_processed,
                             total_saved,
                             t(
-                                "genetic_parsing_progress",
+                                "genetic_batch_status",
                                 self.language,
                                 "load_genetic_data",
-                                total=total_processed,
+                                batches=batch_count,
                             ),
                             estimated_total,
                         )
 
-                # Batch insertion
-                if len(batch) >= batch_size:
-                    if await self.process_batch(batch, insert_sql):
-                        total_saved += len(batch)
-                        batch_count += 1
-                        logging.info(f"Batch {batch_count}: saved {len(batch)} records")
-                    else:
-                        failed_batches += 1
-
-                    batch.clear()
-
-                    # Update batch completion progress
-                    if batch_count % 5 == 0:
-                        if is_up_progress:
-                            await self.update_progress(
-                                total_processed,
-                                total_saved,
-                                t(
-                                    "genetic_batch_status",
-                                    self.language,
-                                    "load_genetic_data",
-                                    batches=batch_count,
-                                ),
-                                estimated_total,
-                            )
-                        await asyncio.sleep(0.1)  # Give system time to handle other tasks
-
             # Process remaining batch
             if batch:
-                if await self.process_batch(batch, insert_sql):
-                    total_saved += len(batch)
-                    batch_count += 1
-                else:
-                    failed_batches += 1
+                total_processed += len(batch)
+                await flush()
 
             # Final progress update
             if is_up_progress:
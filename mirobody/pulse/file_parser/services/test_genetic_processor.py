@@ -0,0 +1,135 @@
+"""Genetic file loader: split-based tokenizer for 23andMe/AncestryDNA/CSV exports, COPY batches and throttled progress."""
+
+from __future__ import annotations
+
+from typing import Any, List
+
+import pytest
+
+from . import genetic_processor
+from .genetic_processor import GENETIC_STAGING, GeneticDataLoader, iter_genetic_rows, parse_genetic_header
+
+_23ANDME = (
+    "# This data file generated by WeGene at: Mon Jan 01 2024\n"
+    "# rsid\tchromosome\tposition\tgenotype\n"
+    "rs4477212\t1\t82154\tAA\r\n"
+    "\n"
+    "# trailing comment\n"
+    "rs3094315\t1\t752566\tAG\n"
+    "i713426 1 1000 --\n"  # Whitespace separated line
+    "rs12124819\t1\tnot-a-number\tAA\n"
+    "rs11240777\t1\n"
+)
+
+_ANCESTRY = (
+    "#AncestryDNA raw data download\n"
+    "rsid\tchromosome\tposition\tallele1\tallele2\n"
+    "rs3131972\t1\t752721\tA\tG\n"
+    "rs114525117\t1\t759036\t0\t0\n"
+)
+
+_CSV = (
+    "# MyHeritage DNA raw data.\n"
+    "RSID,CHROMOSOME,POSITION,RESULT\n"
+    '"rs4477212","1","82154","AA"\n'
+    "rs3094315,X,752566,AG\n"
+)
+
+
+def test_header_detection() -> None:
+    assert parse_genetic_header("# rsid\tchromosome\tposition\tgenotype\n") == ("\t", False)
+    assert parse_genetic_header("rsid\tchromosome\tposition\tallele1\tallele2") == ("\t", True)
+    assert parse_genetic_header('"RSID","CHROMOSOME","POSITION","RESULT"') == (",", False)
+    assert parse_genetic_header("# rsid chromosome position genotype") == (None, False)
+    for line in ("# This data file generated by WeGene", "rs4477212\t1\t82154\tAA", "# rsid\tchromosome\tposition", ""):
+        assert parse_genetic_header(line) is None, line
+
+
+def test_tokenizer_handles_tab_whitespace_allele_and_comma_formats() -> None:
+    assert list(iter_genetic_rows(_23ANDME.splitlines(keepends=True))) == [
+        ("rs4477212", "1", 82154, "AA"),
+        ("rs3094315", "1", 752566, "AG"),
+        ("i713426", "1", 1000, "--"),
+    ]
+    assert list(iter_genetic_rows(_ANCESTRY.splitlines(keepends=True))) == [
+        ("rs3131972", "1", 752721, "AG"),
+        ("rs114525117", "1", 759036, "00"),
+    ]
+    assert list(iter_genetic_rows(_CSV.splitlines(keepends=True))) == [
+        ("rs4477212", "1", 82154, "AA"),
+        ("rs3094315", "X", 752566, "AG"),
+    ]
+    # No header, no data (same as before: lines ahead of the header are never parsed)
+    assert list(iter_genetic_rows(["rs4477212\t1\t82154\tAA\n"])) == []
+
+
+def _write(tmp_path, count: int) -> str:
+    path = tmp_path / "genome.txt"
+    with open(path, "w") as f:
+        f.write("# rsid\tchromosome\tposition\tgenotype\n")
+        for i in range(count):
+            f.write(f"rs{i}\t{i % 22 + 1}\t{i * 10}\tAG\n")
+    return str(path)
+
+
+@pytest.fixture
+def db(monkeypatch) -> dict[str, List[Any]]:
+    calls: dict[str, List[Any]] = {"copy": [], "executemany": [], "progress": []}
+
+    async def execute_copy(staging, columns, rows, merge_query, **kwargs):
+        rows = list(rows)
+        if any(row[1] == "rs7" for row in rows):
+            raise RuntimeError("COPY failed")
+        calls["copy"].append((staging, rows, merge_query))
+        return {"record_count": len(rows), "merged_count": len(rows)}
+
+    async def execute_query(query, params=None, **kwargs):
+        calls["executemany"].append(params)
+        return {"record_count": len(params)}
+
+    monkeypatch.setattr(genetic_processor, "execute_copy", execute_copy)
+    monkeypatch.setattr(genetic_processor, "execute_query", execute_query)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_rows_are_copied_in_batches_with_executemany_fallback(tmp_path, db, monkeypatch) -> None:
+    path = _write(tmp_path, 25)
+    loader = GeneticDataLoader(message_id="m-1", file_key="files/genome.txt")
+
+    async def update_progress(processed, saved, message, total=None):
+        db["progress"].append((processed, saved))
+
+    monkeypatch.setattr(loader, "update_progress", update_progress)
+    monkeypatch.setattr(GeneticDataLoader, "PROGRESS_INTERVAL", 3600)
+
+    saved = await loader.load_user_genetic_data("u1", path, batch_size=10, source_table="th_files", source_table_id="f-1")
+
+    assert saved == 25
+    # Batch 1 (rs0..rs9) holds rs7, whose COPY fails, so it is retried with executemany
+    assert [len(rows) for _, rows, _ in db["copy"]] == [10, 5]
+    assert db["copy"][0][0] == GENETIC_STAGING and "INSERT INTO th_series_data_genetic" in db["copy"][0][2]
+    assert db["copy"][0][1][0] == ("u1", "rs10", "11", 100, "AG", "th_files", "f-1")
+    assert len(db["executemany"]) == 1 and db["executemany"][0][7] == {
+        "user_id": "u1", "rsid": "rs7", "chromosome": "8", "position": 70, "genotype": "AG",
+        "source_table": "th_files", "source_table_id": "f-1",
+    }
+    # Only the initial estimate and the final update: the interval was never reached
+    assert db["progress"] == [(0, 0), (25, 25)]
+
+
+@pytest.mark.asyncio
+async def test_progress_is_time_throttled(tmp_path, db, monkeypatch) -> None:
+    path = _write(tmp_path, 50)
+    loader = GeneticDataLoader(message_id="m-1", file_key="files/genome.txt")
+
+    async def update_progress(processed, saved, message, total=None):
+        db["progress"].append((processed, total))
+
+    monkeypatch.setattr(loader, "update_progress", update_progress)
+    monkeypatch.setattr(GeneticDataLoader, "PROGRESS_INTERVAL", 0)
+
+    assert await loader.load_user_genetic_data("u1", path, batch_size=20, use_copy=False) == 50
+    assert db["copy"] == [] and [len(p) for p in db["executemany"]] == [20, 20, 10]
+    assert db["progress"] == [(0, 51), (20, 51), (40, 51), (50, 50)]
+    assert loader.count_lines(path) == 51
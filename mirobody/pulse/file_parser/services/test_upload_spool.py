@@ -0,0 +1,123 @@
+"""Upload spooling: binary frame header, received-range bookkeeping, spooled reads and progress coalescing."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from .upload_spool import (
+    FRAME_HEADER,
+    ChunkFrameError,
+    ProgressThrottle,
+    ReceivedRanges,
+    UploadSpool,
+    pack_chunk_frame,
+    parse_chunk_frame,
+)
+
+
+def test_frame_round_trip_and_validation() -> None:
+    frame = pack_chunk_frame(7, 2 ** 33, b"payload")
+    assert FRAME_HEADER.size == 24 and len(frame) == 24 + 7
+
+    chunk = parse_chunk_frame(frame)
+    assert (chunk.upload_id, chunk.offset, bytes(chunk.payload)) == (7, 2 ** 33, b"payload")
+    assert chunk.crc_ok()
+
+    corrupted = bytearray(frame)
+    corrupted[-1] ^= 0xFF
+    assert not parse_chunk_frame(bytes(corrupted)).crc_ok()
+
+    for bad in (frame[:10], b"XX" + frame[2:], frame[:2] + b"\x09" + frame[3:], frame + b"!"):
+        with pytest.raises(ChunkFrameError):
+            parse_chunk_frame(bad)
+
+
+def test_received_ranges_merge_and_count_new_bytes() -> None:
+    ranges = ReceivedRanges()
+    assert ranges.add(10, 20) == 10
+    assert ranges.add(30, 40) == 10
+    assert ranges.next_offset == 0 and ranges.as_list() == [[10, 20], [30, 40]]
+
+    assert ranges.add(15, 35) == 10  # Bridges the gap, only 20..30 is new
+    assert ranges.as_list() == [[10, 40]]
+    assert ranges.add(0, 10) == 10  # Adjacent ranges merge
+    assert ranges.add(5, 25) == 0  # Re-sent chunk
+    assert ranges.add(50, 50) == 0
+
+    assert ranges.as_list() == [[0, 40]] and ranges.covered == 40 and ranges.next_offset == 40
+    assert ranges.covers(0, 40) and ranges.covers(39, 40) and not ranges.covers(0, 41)
+
+
+def test_spool_accepts_chunks_in_any_order() -> None:
+    data = bytes(range(256)) * 4
+    spool = UploadSpool(len(data))
+    try:
+        for offset in (768, 0, 512):
+            spool.write(offset, memoryview(data)[offset:offset + 256])
+        assert not spool.complete and spool.ranges.next_offset == 256
+        spool.write(256, data[256:512])
+        assert spool.write(512, data[512:768]) == 0  # Re-sent chunk
+        assert spool.complete and spool.read_all() == data
+
+        with pytest.raises(ValueError):
+            spool.write(1000, b"x" * 100)
+    finally:
+        spool.close()
+    assert spool.closed
+
+
+@pytest.mark.asyncio
+async def test_spooled_upload_file_reads_like_upload_file() -> None:
+    spool = UploadSpool()
+    spool.append(b"# This data file generated by WeGene at ")
+    spool.append(b"2024\n")
+    spool.size = spool.received
+    assert spool.complete
+
+    upload = spool.open("genome.txt", "text/plain")
+    assert (upload.filename, upload.content_type, upload.size) == ("genome.txt", "text/plain", 45)
+    assert await upload.read(6) == b"# This"
+    assert upload.tell() == 6
+    assert await upload.seek(0, 2) == 45
+    assert await upload.read() == b""
+    await upload.seek(-5, 2)
+    assert await upload.read() == b"2024\n"
+    await upload.seek(0)
+    assert await upload.read() == spool.read_all()
+    spool.close()
+
+
+@pytest.mark.asyncio
+async def test_async_reads_run_off_the_event_loop(monkeypatch) -> None:
+    spool = UploadSpool()
+    spool.append(b"rs4477212\t1\t82154\tAA\n" * 1000)
+    spool.size = spool.received
+    data = spool.read_all()
+
+    threads = []
+    pread = spool.pread
+    monkeypatch.setattr(spool, "pread", lambda offset, size: threads.append(threading.get_ident()) or pread(offset, size))
+
+    assert await spool.read_all_async() == data
+    assert await spool.open("genome.txt", "text/plain").read() == data
+    assert len(threads) == 2 and threading.get_ident() not in threads
+    spool.close()
+
+
+def test_progress_throttle_coalesces_by_time_and_step() -> None:
+    throttle = ProgressThrottle(interval=1.0, step=10)
+    now = throttle._last_time
+
+    assert not throttle.ready(3, now + 0.1)
+    assert throttle.ready(11, now + 0.2)  # Step reached
+    assert not throttle.ready(15, now + 0.3)
+    assert throttle.ready(16, now + 1.3)  # Interval elapsed
+    assert not throttle.ready(16, now + 5)  # No progress, nothing to send
+    assert throttle.ready(100, now + 1.4)  # Completion always goes out
+    assert not throttle.ready(100, now + 1.5)
+
+    # 2000 chunks arriving within one interval: one update per 5% step
+    throttle = ProgressThrottle(interval=0.5, step=5)
+    assert sum(throttle.ready(i * 100 / 2000, throttle._last_time) for i in range(1, 2001)) == 20
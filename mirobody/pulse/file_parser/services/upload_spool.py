@@ -0,0 +1,217 @@
+"""
+Upload spooling service
+
+Receives WebSocket upload chunks straight into a temporary file instead of
+memory, tracks which byte ranges have arrived (so a reconnecting client can
+resume), parses binary chunk frames and coalesces progress updates.
+
+Binary chunk frame (integers big-endian, 24-byte header followed by payload):
+
+    magic     2s  b"MU"
+    version   B   1
+    reserved  x
+    uploadId  I   per-file id returned in upload_start_confirmed
+    offset    Q   byte offset of the payload within the file
+    length    I   payload length
+    crc32     I   zlib.crc32 of the payload
+"""
+
+import asyncio
+import bisect
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from typing import List, NamedTuple, Optional
+
+FRAME_MAGIC = b"MU"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("!2sBxIQII")
+
+
+class ChunkFrameError(ValueError):
+    """Malformed binary chunk frame"""
+
+
+class ChunkFrame(NamedTuple):
+    """Parsed binary chunk frame; `payload` is a view into the received frame"""
+
+    upload_id: int
+    offset: int
+    payload: memoryview
+    crc32: int
+
+    def crc_ok(self) -> bool:
+        return zlib.crc32(self.payload) == self.crc32
+
+
+def pack_chunk_frame(upload_id: int, offset: int, payload: bytes) -> bytes:
+    """Build a binary chunk frame (client side; used by tests and benchmarks)"""
+    header = FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, upload_id, offset, len(payload), zlib.crc32(payload))
+    return header + payload
+
+
+def parse_chunk_frame(frame: bytes) -> ChunkFrame:
+    """Split a binary frame into header fields and payload; the CRC is left to the caller"""
+    if len(frame) < FRAME_HEADER.size:
+        raise ChunkFrameError(f"Frame too short: {len(frame)} bytes")
+    magic, version, upload_id, offset, length, crc32 = FRAME_HEADER.unpack_from(frame)
+    if magic != FRAME_MAGIC:
+        raise ChunkFrameError("Bad frame magic")
+    if version != FRAME_VERSION:
+        raise ChunkFrameError(f"Unsupported frame version: {version}")
+    if len(frame) - FRAME_HEADER.size != length:
+        raise ChunkFrameError(f"Frame length mismatch: header says {length}, payload is {len(frame) - FRAME_HEADER.size}")
+    return ChunkFrame(upload_id, offset, memoryview(frame)[FRAME_HEADER.size:], crc32)
+
+
+class ReceivedRanges:
+    """Sorted, merged set of received byte ranges [start, end)"""
+
+    def __init__(self):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self.covered = 0
+
+    def add(self, start: int, end: int) -> int:
+        """Mark [start, end) as received; returns how many of those bytes were new"""
+        if end <= start:
+            return 0
+        # Ranges overlapping or touching [start, end) are merged into one
+        lo = bisect.bisect_left(self._ends, start)
+        hi = bisect.bisect_right(self._starts, end)
+        merged = sum(e - s for s, e in zip(self._starts[lo:hi], self._ends[lo:hi]))
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+        added = (end - start) - merged
+        self.covered += added
+        return added
+
+    def covers(self, start: int, end: int) -> bool:
+        if end <= start:
+            return True
+        i = bisect.bisect_right(self._starts, start) - 1
+        return i >= 0 and self._ends[i] >= end
+
+    @property
+    def next_offset(self) -> int:
+        """End of the contiguous prefix received from byte 0"""
+        return self._ends[0] if self._starts and self._starts[0] == 0 else 0
+
+    def as_list(self) -> List[List[int]]:
+        return [[s, e] for s, e in zip(self._starts, self._ends)]
+
+
+class UploadSpool:
+    """Temporary file collecting one uploaded file's chunks at their offsets"""
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = size  # Declared size; None while unknown (legacy indexed chunks)
+        self.ranges = ReceivedRanges()
+        self._file = tempfile.TemporaryFile(prefix="mirobody_upload_")
+        # Reads run in worker threads (see read_all_async); seek + read/write must not interleave
+        self._lock = threading.Lock()
+
+    @property
+    def received(self) -> int:
+        return self.ranges.covered
+
+    @property
+    def complete(self) -> bool:
+        return self.size is not None and self.ranges.covers(0, self.size)
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def write(self, offset: int, data) -> int:
+        """Write `data` at `offset`; returns the number of newly received bytes"""
+        end = offset + len(data)
+        if offset < 0 or (self.size is not None and end > self.size):
+            raise ValueError(f"Chunk [{offset}, {end}) is outside the file (size {self.size})")
+        with self._lock:
+            self._file.seek(offset)
+            self._file.write(data)
+        return self.ranges.add(offset, end)
+
+    def append(self, data) -> int:
+        """Write `data` right after the contiguous prefix received so far"""
+        return self.write(self.ranges.next_offset, data)
+
+    def pread(self, offset: int, size: int) -> bytes:
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def read_all(self) -> bytes:
+        """Whole received content; for consumers that need bytes rather than a file"""
+        return self.pread(0, self.ranges.next_offset)
+
+    async def read_all_async(self) -> bytes:
+        """read_all() in a worker thread, keeping the disk read off the event loop"""
+        return await asyncio.to_thread(self.read_all)
+
+    def open(self, filename: str, content_type: str) -> "SpooledUploadFile":
+        return SpooledUploadFile(self, filename, content_type)
+
+    def close(self):
+        self._file.close()
+
+
+class SpooledUploadFile:
+    """Mimics FastAPI UploadFile over a completed UploadSpool"""
+
+    def __init__(self, spool: UploadSpool, filename: str, content_type: str):
+        self.spool = spool
+        self.filename = filename
+        self.content_type = content_type
+        self.size = spool.ranges.next_offset
+        self._position = 0
+        # Dummy file attribute if accessed directly
+        self.file = self
+
+    async def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.size - self._position
+        size = max(0, min(size, self.size - self._position))
+        result = await asyncio.to_thread(self.spool.pread, self._position, size)
+        self._position += len(result)
+        return result
+
+    async def seek(self, position: int, whence: int = 0):
+        if whence == 1:
+            position += self._position
+        elif whence == 2:
+            position += self.size
+        self._position = max(0, min(position, self.size))
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    async def close(self):
+        pass
+
+
+class ProgressThrottle:
+    """Coalesces progress updates: emit after `interval` seconds or a `step` percent advance, and always at 100%"""
+
+    def __init__(self, interval: float = 0.5, step: float = 5.0):
+        self.interval = interval
+        self.step = step
+        self._last_progress = 0.0
+        self._last_time = time.monotonic()
+
+    def ready(self, progress: float, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if progress <= self._last_progress:
+            return False
+        if progress < 100 and progress - self._last_progress < self.step and now - self._last_time < self.interval:
+            return False
+        self._last_progress = progress
+        self._last_time = now
+        return True
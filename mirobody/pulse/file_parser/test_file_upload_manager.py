@@ -0,0 +1,179 @@
+"""WebSocket upload manager: spooled base64 and binary chunks, coalesced progress, and resuming after a reconnect."""
+
+from __future__ import annotations
+
+import base64
+import json
+import threading
+
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+
+from .file_upload_manager import WebSocketFileUploadManager
+from .services.upload_spool import pack_chunk_frame
+
+_DATA = bytes(range(256)) * 4096  # 1 MB
+_CHUNK = 64 * 1024
+
+
+class _Socket:
+    """Records what the manager sends; always open."""
+
+    def __init__(self) -> None:
+        self.client_state = SimpleNamespace(value=1)
+        self.sent: List[Dict[str, Any]] = []
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+
+    def of_type(self, kind: str) -> List[Dict[str, Any]]:
+        return [m for m in self.sent if m["type"] == kind]
+
+
+@pytest.fixture
+def manager(monkeypatch) -> WebSocketFileUploadManager:
+    manager = WebSocketFileUploadManager()
+    manager.processed: List[Dict[str, Any]] = []
+
+    async def start_file_processing(connection_id: str, message_id: str) -> None:
+        session = manager.upload_sessions[message_id]
+        manager.processed.append({
+            f["filename"]: await manager._open_upload_file(f).read() for f in session["uploaded_files"]
+        })
+
+    monkeypatch.setattr(manager, "start_file_processing", start_file_processing)
+    return manager
+
+
+async def _start(manager: WebSocketFileUploadManager, connection_id: str, size: int = len(_DATA)) -> tuple[_Socket, int]:
+    socket = _Socket()
+    await manager.connect(socket, connection_id)
+    await manager.handle_upload_start(connection_id, {
+        "messageId": "m-1", "sessionId": "s-1", "_real_user_id": "u1",
+        "files": [{"filename": "genome.txt", "contentType": "text/plain", "size": size}],
+    })
+    confirmed = socket.of_type("upload_start_confirmed")[0]
+    return socket, confirmed["files"][0]["uploadId"]
+
+
+@pytest.mark.asyncio
+async def test_base64_chunks_are_spooled_in_index_order(manager: WebSocketFileUploadManager) -> None:
+    socket, _ = await _start(manager, "u1_a")
+    chunks = [_DATA[i:i + _CHUNK // 4] for i in range(0, len(_DATA), _CHUNK // 4)]
+    order = [1, 0, 2, 2] + list(range(3, len(chunks)))  # Out of order, with a duplicate
+
+    for index in order:
+        await manager.handle_file_chunk("u1_a", {
+            "type": "upload_chunk", "messageId": "m-1", "filename": "genome.txt", "contentType": "text/plain",
+            "chunk": base64.b64encode(chunks[index]).decode(), "chunkIndex": index, "totalChunks": len(chunks),
+        })
+
+    assert manager.processed == [{"genome.txt": _DATA}]
+    received = socket.of_type("file_received")
+    assert len(received) == 1 and received[0]["size"] == len(_DATA)
+    # 64 chunks of ~1.6% each, 5% step: one progress message per few chunks, the last one at 100%
+    progress = [m["progress"] for m in socket.of_type("file_progress")]
+    assert len(progress) <= 20 and progress[-1] == 100
+
+
+@pytest.mark.asyncio
+async def test_binary_frames_any_order_with_crc_rejection(manager: WebSocketFileUploadManager) -> None:
+    socket, upload_id = await _start(manager, "u1_a")
+    offsets = list(range(0, len(_DATA), _CHUNK))[::-1]
+
+    corrupt = bytearray(pack_chunk_frame(upload_id, 0, _DATA[:_CHUNK]))
+    corrupt[-1] ^= 0xFF
+    assert not await manager.handle_binary_chunk("u1_a", bytes(corrupt))
+    rejected = socket.of_type("chunk_rejected")
+    assert rejected[0]["offset"] == 0 and "CRC32" in rejected[0]["message"]
+
+    assert not await manager.handle_binary_chunk("u1_a", pack_chunk_frame(upload_id, len(_DATA) - 10, b"x" * 20))
+    assert not await manager.handle_binary_chunk("u1_b", pack_chunk_frame(upload_id, 0, b"x"))  # Not its upload
+    assert not await manager.handle_binary_chunk("u1_a", pack_chunk_frame(upload_id + 1, 0, b"x"))
+
+    for offset in offsets:
+        assert await manager.handle_binary_chunk("u1_a", pack_chunk_frame(upload_id, offset, _DATA[offset:offset + _CHUNK]))
+
+    assert manager.processed == [{"genome.txt": _DATA}]
+    assert socket.of_type("file_received")[0]["size"] == len(_DATA)
+    assert manager.upload_sessions["m-1"]["status"] == "processing"
+
+    # Re-sent chunks after completion neither write nor re-trigger processing
+    assert not await manager.handle_binary_chunk("u1_a", pack_chunk_frame(upload_id, 0, _DATA[:_CHUNK]))
+    assert len(manager.processed) == 1
+
+
+@pytest.mark.asyncio
+async def test_resume_after_reconnect_reports_received_ranges(manager: WebSocketFileUploadManager) -> None:
+    socket, upload_id = await _start(manager, "u1_a")
+    for offset in (0, _CHUNK, 4 * _CHUNK):
+        await manager.handle_binary_chunk("u1_a", pack_chunk_frame(upload_id, offset, _DATA[offset:offset + _CHUNK]))
+
+    await manager.disconnect("u1_a")
+    session = manager.upload_sessions["m-1"]
+    assert session["status"] == "suspended"
+
+    # Another user cannot attach to it
+    intruder = _Socket()
+    await manager.connect(intruder, "u2_x")
+    assert not await manager.handle_upload_resume("u2_x", {"messageId": "m-1", "_real_user_id": "u2"})
+    assert intruder.of_type("upload_resume_status")[0]["status"] == "not_found"
+
+    socket = _Socket()
+    await manager.connect(socket, "u1_b")
+    assert await manager.handle_upload_resume("u1_b", {"messageId": "m-1", "_real_user_id": "u1"})
+    status = socket.of_type("upload_resume_status")[0]
+    assert status["status"] == "uploading"
+    upload = status["uploads"][0]
+    assert upload["uploadId"] == upload_id and upload["size"] == len(_DATA)
+    assert upload["ranges"] == [[0, 2 * _CHUNK], [4 * _CHUNK, 5 * _CHUNK]]
+    assert (upload["nextOffset"], upload["received"], upload["complete"]) == (2 * _CHUNK, 3 * _CHUNK, False)
+
+    # The old connection's upload id now belongs to the new connection only
+    assert not await manager.handle_binary_chunk("u1_a", pack_chunk_frame(upload_id, 2 * _CHUNK, b"x"))
+    for start, end in [(2 * _CHUNK, 4 * _CHUNK), (5 * _CHUNK, len(_DATA))]:
+        for offset in range(start, end, _CHUNK):
+            await manager.handle_binary_chunk("u1_b", pack_chunk_frame(upload_id, offset, _DATA[offset:offset + _CHUNK]))
+
+    assert manager.processed == [{"genome.txt": _DATA}]
+    assert (await manager.get_upload_status("u1_b", "m-1"))["uploads"][0]["complete"]
+
+
+@pytest.mark.asyncio
+async def test_expired_and_restarted_uploads_release_their_spools(manager: WebSocketFileUploadManager, monkeypatch) -> None:
+    await _start(manager, "u1_a")
+    spool = manager.upload_sessions["m-1"]["uploaded_files"][0]["spool"]
+    await manager.disconnect("u1_a")
+    assert not spool.closed
+
+    # Restarting the same message id from scratch replaces the suspended upload
+    _, upload_id = await _start(manager, "u1_b")
+    assert spool.closed and list(manager.upload_ids) == [upload_id]
+
+    spool = manager.upload_sessions["m-1"]["uploaded_files"][0]["spool"]
+    await manager.disconnect("u1_b")
+    monkeypatch.setattr("mirobody.pulse.file_parser.file_upload_manager.UPLOAD_RESUME_TTL", -1)
+    await manager.disconnect("someone-else")
+    assert spool.closed and manager.upload_sessions == {} and manager.upload_ids == {}
+
+
+@pytest.mark.asyncio
+async def test_read_content_reads_the_spool_off_the_event_loop(manager: WebSocketFileUploadManager, monkeypatch) -> None:
+    await _start(manager, "u1_a", size=len(_DATA))
+    record = manager.upload_sessions["m-1"]["uploaded_files"][0]
+    record["spool"].append(_DATA)
+
+    threads = []
+    read_all = record["spool"].read_all
+    monkeypatch.setattr(record["spool"], "read_all", lambda: threads.append(threading.get_ident()) or read_all())
+
+    assert await manager._read_content(record) == _DATA
+    assert threads and threading.get_ident() not in threads
+    files = await manager._prepare_background_files_data([record], [{"success": True, "s3_key": "k"}])
+    assert files[0]["content"] == _DATA and files[0]["s3_key"] == "k"
+    await manager.disconnect("u1_a")
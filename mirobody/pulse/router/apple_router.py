@@ -6,14 +6,18 @@ import logging
 import gzip
 import json
 import time
-from typing import Any, Dict, Optional
+import uuid
+from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, Header, Request, status
 from fastapi.responses import JSONResponse
 
-from ..apple.models import AppleHealthRequest, AppleHealthStatisticsRequest
+from ..apple.ingest import IngestResult, stream_apple_health
+from ..apple.models import AppleHealthRecord, AppleHealthStatisticsRequest
 from ..apple.statistics_service import process_apple_health_statistics
 from ..manager import platform_manager
+from ...task.apple_health_ingest import AppleHealthIngestTask
+from ...utils.config import safe_read_cfg
 from ...utils.utils_auth import verify_token
 
 # Create router
@@ -125,30 +129,22 @@ async def process_apple_health_data(
             }
         ]
     }
-    """
-    try:
-        # Process request data (supports gzip compression)
-        t1 = time.time()
-        raw_data = await _process_request_data(request, content_encoding, content_type)
-        t2 = time.time()
 
-        # Validate data using Pydantic model
-        try:
-            validated_data = AppleHealthRequest(**raw_data)
-        except Exception as e:
-            logging.error(f"Data validation failed: {str(e)}")
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"success": False, "message": f"Invalid request data: {str(e)}"},
-            )
+    The body is gunzipped and parsed as a stream and records are validated
+    APPLE_HEALTH_INGEST_BATCH at a time. By default each batch goes to the
+    AppleHealthIngestTask queue and the response is 202 with a job_id to poll
+    at GET /apple/health/jobs/{job_id}; APPLE_HEALTH_ASYNC_INGEST=false
+    processes the batches inline and answers 200 as before. Either way no
+    batch is written unless the whole body parses.
+    """
+    gzipped = bool(content_encoding) and content_encoding.lower() == "gzip"
+    batch_size = int(safe_read_cfg("APPLE_HEALTH_INGEST_BATCH") or 1000)
+    async_ingest = safe_read_cfg("APPLE_HEALTH_ASYNC_INGEST", "true").lower() not in ("0", "false", "no")
 
-        # Add debug log
-        logging.info(f"Validated data: request_id={validated_data.request_id}, "
-            f"timezone={validated_data.metaInfo.timezone}, "
-            f"time_cost={(t2 - t1) * 1e3}, "
-            f"healthData_count={len(validated_data.healthData)}")
+    if async_ingest:
+        return await _ingest_apple_health_async(request, current_user, gzipped, batch_size)
 
-        # Get Apple Health platform
+    try:
         apple_platform = platform_manager.get_platform("apple")
         if not apple_platform:
             return JSONResponse(
@@ -156,22 +152,36 @@ async def process_apple_health_data(
                 content={"success": False, "message": "Apple Health platform not initialized"},
             )
 
-        # Construct data format that matches platform interface, pass Pydantic objects directly for better performance
-        platform_data = {
-            "user_id": current_user,
-            "request_id": validated_data.request_id,
-            "health_data": validated_data.healthData,  # Pass Pydantic object list directly
-            "meta_info": validated_data.metaInfo,  # Pass Pydantic object directly
-        }
+        failed_batches = 0
+        t1 = time.time()
+        batches: List[List[AppleHealthRecord]] = []
 
-        # Call platform to process data
-        msg_id = f"apple_health_{current_user}_{int(time.time() * 1000)}"
-        success = await apple_platform.post_data(provider_slug="apple_health", data=platform_data, msg_id=msg_id)
+        async def collect_batch(result: IngestResult, index: int, records: List[AppleHealthRecord]) -> None:
+            batches.append(records)
+
+        # Parse and validate the whole body first: a malformed body writes nothing
+        result = await stream_apple_health(request.stream(), gzipped, collect_batch, batch_size)
+
+        for index, records in enumerate(batches):
+            # Construct data format that matches platform interface, pass Pydantic objects directly for better performance
+            platform_data = {
+                "user_id": current_user,
+                "request_id": result.request_id,
+                "health_data": records,
+                "meta_info": result.meta_info,
+            }
+            msg_id = f"apple_health_{current_user}_{int(time.time() * 1000)}_{index}"
+            if not await apple_platform.post_data(provider_slug="apple_health", data=platform_data, msg_id=msg_id):
+                failed_batches += 1
 
-        t3 = time.time()
+        success = failed_batches == 0
 
-        # Add result log
-        logging.info(f"Processing result: success={success}, taskId={validated_data.metaInfo.taskId}, time_cost={(t3 - t2) * 1e3}")
+        logging.info(
+            f"Processing result: success={success}, request_id={result.request_id}, "
+            f"taskId={result.meta_info.taskId}, records={result.records}, invalid={result.invalid_records}, "
+            f"batches={result.batches}, failed_batches={failed_batches}, bytes={result.bytes_read}, "
+            f"time_cost={(time.time() - t1) * 1e3}"
+        )
 
         if success:
             return JSONResponse(
@@ -179,7 +189,7 @@ async def process_apple_health_data(
                 content={
                     "success": True,
                     "code": 0,
-                    "data": {"request_id": validated_data.request_id},
+                    "data": {"request_id": result.request_id},
                     "message": "Apple Health data processed successfully",
                     "msg": "Apple Health data processed successfully"
                 },
@@ -188,7 +198,7 @@ async def process_apple_health_data(
             return JSONResponse(
                 status_code=status.HTTP_200_OK,
                 content={
-                    "success": False, 
+                    "success": False,
                     "code": 1,
                     "message": "Apple Health data processing failed",
                     "msg": "Apple Health data processing failed"
@@ -220,6 +230,140 @@ async def process_apple_health_data(
         )
 
 
+async def _ingest_apple_health_async(
+        request: Request,
+        current_user: str,
+        gzipped: bool,
+        batch_size: int,
+) -> JSONResponse:
+    """Stream the body into AppleHealthIngestTask batches and answer 202 with the job id."""
+    job_id = uuid.uuid4().hex
+    t1 = time.time()
+
+    async def enqueue_batch(result: IngestResult, index: int, records: List[AppleHealthRecord]) -> None:
+        await AppleHealthIngestTask.enqueue_batch(job_id, {
+            "batch": index,
+            "user_id": current_user,
+            "request_id": result.request_id,
+            "meta_info": result.meta_info.model_dump(mode="json"),
+            "records": [r.model_dump(mode="json") for r in records],
+        })
+
+    try:
+        await AppleHealthIngestTask.create_job(job_id, current_user)
+        result = await stream_apple_health(request.stream(), gzipped, enqueue_batch, batch_size)
+    except ValueError as e:
+        await _fail_job(job_id, f"Request data parsing failed: {str(e)}")
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "success": False,
+                "code": 1,
+                "data": {"job_id": job_id},
+                "message": f"Request data parsing failed: {str(e)}",
+                "msg": f"Request data parsing failed: {str(e)}"
+            },
+        )
+    except RuntimeError as e:
+        # Ingest queue full: the worker is behind, client should retry later
+        await _fail_job(job_id, str(e))
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "60"},
+            content={"success": False, "code": 1, "message": "Apple Health ingest is busy, retry later", "msg": "Apple Health ingest is busy, retry later"},
+        )
+    except Exception as e:
+        logging.error(f"Service error occurred: {str(e)}", stack_info=True)
+        await _fail_job(job_id, str(e))
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                "success": False,
+                "code": 1,
+                "message": f"Processing failed: {str(e)}",
+                "msg": f"Processing failed: {str(e)}"
+            }
+        )
+
+    # The whole body parsed: only now do its batches reach the workers
+    await AppleHealthIngestTask.finish_job(job_id, {
+        "state": "queued",
+        "request_id": result.request_id,
+        "batches": result.batches,
+        "records": result.records,
+        "invalid_records": result.invalid_records,
+    })
+    try:
+        await AppleHealthIngestTask.publish_job(job_id)
+    except Exception as e:
+        logging.error(f"Failed to publish Apple Health job {job_id}: {str(e)}", stack_info=True)
+        await _fail_job(job_id, f"Failed to queue batches: {str(e)}")
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                "success": False,
+                "code": 1,
+                "message": f"Processing failed: {str(e)}",
+                "msg": f"Processing failed: {str(e)}"
+            }
+        )
+
+    logging.info(
+        f"Apple Health ingest queued: job_id={job_id}, request_id={result.request_id}, "
+        f"taskId={result.meta_info.taskId}, records={result.records}, invalid={result.invalid_records}, "
+        f"batches={result.batches}, bytes={result.bytes_read}, time_cost={(time.time() - t1) * 1e3}"
+    )
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "success": True,
+            "code": 0,
+            "data": {
+                "request_id": result.request_id,
+                "job_id": job_id,
+                "status_url": f"{router.prefix}/health/jobs/{job_id}",
+                "records": result.records,
+                "invalid_records": result.invalid_records,
+            },
+            "message": "Apple Health data accepted",
+            "msg": "Apple Health data accepted"
+        },
+    )
+
+
+async def _fail_job(job_id: str, error: str) -> None:
+    try:
+        await AppleHealthIngestTask.discard_job(job_id)
+        await AppleHealthIngestTask.finish_job(job_id, {"state": "failed", "error": error})
+    except Exception as e:
+        logging.error(f"Failed to mark Apple Health job {job_id} failed: {str(e)}")
+
+
+@router.get("/health/jobs/{job_id}")
+async def get_apple_health_job(
+        job_id: str,
+        current_user: str = Depends(verify_token),
+) -> JSONResponse:
+    """
+    Status of an asynchronous Apple Health upload
+
+    status: receiving | failed | processing | completed | completed_with_errors
+    """
+    job = await AppleHealthIngestTask.get_job(job_id)
+    if not job or job.get("user_id") != current_user:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"success": False, "code": 1, "message": "Job not found", "msg": "Job not found"},
+        )
+
+    job.pop("user_id", None)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"success": True, "code": 0, "data": {"job_id": job_id, **job}, "message": "ok", "msg": "ok"},
+    )
+
+
 @router.post("/statistics")
 async def process_apple_health_statistics_data(
         request: Request,
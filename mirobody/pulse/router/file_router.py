@@ -72,8 +72,47 @@ class FileDeleteResponse(BaseModel):
 
 my_data_service = MyDataService()
 
+def _parse_byte_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single-range "bytes=" Range header against the file size.
+
+    Returns (start, end) inclusive, None when the header should be ignored
+    (malformed, other unit, or several ranges: the full file is served), and
+    raises ValueError when the range cannot be satisfied (416).
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = (part.strip() for part in spec.partition("-"))
+    if not sep or not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - int(last), 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise ValueError("Range starts beyond end of file")
+    return start, min(end, size - 1)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires."""
+    if if_none_match.strip() == "*":
+        return True
+    tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in if_none_match.split(","))
+
+
 @router.get("/files/{file_path:path}", tags=["files"])
-async def serve_storage_file(file_path: str):
+async def serve_storage_file(file_path: str, request: Request):
     """
     Proxy files from storage (S3/OSS) through backend.
     
@@ -86,10 +125,13 @@ async def serve_storage_file(file_path: str):
     - Single URL works for both browser and container access
     - Hides storage implementation details
     - Can add access control if needed
+
+    Content is streamed from storage chunk by chunk, so memory per download
+    stays constant. Supports single-range `Range` requests (206 / 416),
+    `If-Range`, and `If-None-Match` against the storage ETag (304).
     """
-    from fastapi.responses import StreamingResponse
+    from fastapi.responses import Response, StreamingResponse
     from mirobody.utils.config.storage import get_storage_client
-    import io
     
     try:
         # Security check: prevent path traversal
@@ -100,32 +142,69 @@ async def serve_storage_file(file_path: str):
         # Get storage client
         storage = get_storage_client()
         
-        # Get file from storage
-        content, err = await storage.get(file_path)
+        # Size and ETag come from metadata, so the content itself is never buffered
+        info, err = await storage.get_file_info(file_path)
         if err:
             logging.warning(err)
         
-        if content is None:
+        if info is None or info.get("size") is None:
             logging.warning(f"File not found in storage: {file_path}")
             raise HTTPException(status_code=404, detail="File not found")
         
+        size = int(info["size"])
+        etag = str(info.get("etag") or "")
+        if etag and not etag.startswith(('"', 'W/"')):
+            etag = f'"{etag}"'
+        
         # Determine content type from filename
         content_type = storage.get_content_type_from_filename(file_path)
         
         # Extract filename for Content-Disposition header
         filename = file_path.split("/")[-1] if "/" in file_path else file_path
         
-        logging.debug(f"Serving file from storage: {file_path}, size: {len(content)} bytes")
+        headers = {
+            "Content-Disposition": f'inline; filename="{filename}"',
+            "Cache-Control": "public, max-age=86400",  # Cache for 1 day
+            "Accept-Ranges": "bytes",
+        }
+        if etag:
+            headers["ETag"] = etag
+        
+        if_none_match = request.headers.get("if-none-match")
+        if etag and if_none_match and _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        
+        byte_range = None
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        # A stale If-Range (the file changed) means: send the whole file
+        if range_header and (not if_range or (etag and if_range.strip() == etag and not etag.startswith("W/"))):
+            try:
+                byte_range = _parse_byte_range(range_header, size)
+            except ValueError:
+                return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        
+        if byte_range is not None:
+            start, end = byte_range
+            logging.debug(f"Serving file range from storage: {file_path}, bytes {start}-{end}/{size}")
+            return StreamingResponse(
+                storage.get_stream(file_path, start, end),
+                status_code=206,
+                media_type=content_type,
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{size}",
+                    "Content-Length": str(end - start + 1),
+                },
+            )
+        
+        logging.debug(f"Serving file from storage: {file_path}, size: {size} bytes")
         
         # Return file as streaming response
         return StreamingResponse(
-            io.BytesIO(content),
+            storage.get_stream(file_path),
             media_type=content_type,
-            headers={
-                "Content-Disposition": f'inline; filename="{filename}"',
-                "Content-Length": str(len(content)),
-                "Cache-Control": "public, max-age=86400",  # Cache for 1 day
-            }
+            headers={**headers, "Content-Length": str(size)},
         )
         
     except HTTPException:
@@ -205,14 +284,22 @@ async def websocket_upload_health_report(
             while True:
                 try:
                     # Add receive message timeout with asyncio.wait_for
-                    message = await asyncio.wait_for(
-                        websocket.receive_text(),
+                    frame = await asyncio.wait_for(
+                        websocket.receive(),
                         timeout=30.0,  # 30 second timeout for periodic idle time check
                     )
+                    if frame["type"] == "websocket.disconnect":
+                        raise WebSocketDisconnect(frame.get("code", 1000))
 
                     # Update last activity time
                     last_activity_time = datetime.now()
 
+                    # Binary frames carry file chunks (header + raw bytes, no base64/JSON)
+                    if frame.get("bytes") is not None:
+                        await websocket_file_upload_manager.handle_binary_chunk(connection_id, frame["bytes"])
+                        continue
+                    message = frame.get("text") or ""
+
                     try:
                         message_data = json.loads(message)
                         message_type = message_data.get("type")
@@ -230,6 +317,9 @@ async def websocket_upload_health_report(
                         elif message_type == "upload_end":
                             message_data["_real_user_id"] = str(user_id)
                             await websocket_file_upload_manager.handle_upload_end(connection_id, message_data)
+                        elif message_type == "upload_resume":
+                            message_data["_real_user_id"] = str(user_id)
+                            await websocket_file_upload_manager.handle_upload_resume(connection_id, message_data)
                         elif message_type == "ping":
                             # Send pong directly via current websocket, not through manager
                             # This avoids issues when user is not in active_connections
@@ -350,6 +350,7 @@ async def recalculate_date_range(
     start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: str = Query(..., description="End date (YYYY-MM-DD)"),
     user_id: Optional[str] = Query(None, description="Specific user ID (optional)"),
+    resume: bool = Query(True, description="Skip the units an interrupted run of this range already saved"),
     authorized: bool = Depends(verify_manage_key)
 ):
     """
@@ -361,9 +362,10 @@ async def recalculate_date_range(
         start_date: Start date in YYYY-MM-DD format
         end_date: End date in YYYY-MM-DD format
         user_id: Optional user ID filter
+        resume: Resume from the checkpoints of an interrupted run
         
     Returns:
-        Recalculation result
+        Recalculation result; 409 while a run of the same range and user is in progress
     """
     try:
         from ..core.aggregate_indicator.service import AggregateIndicatorService
@@ -378,8 +380,11 @@ async def recalculate_date_range(
         result = await service.recalculate_date_range(
             start_date=start,
             end_date=end,
-            user_id=user_id
+            user_id=user_id,
+            resume=resume
         )
+        if result.get("status") == "busy":
+            return ErrorResponse(code=409, detail=result["error"])
         
         return StandardResponse(
             code=0,
@@ -770,23 +775,31 @@ async def get_data_quality(
 async def trigger_backfill(
     hourly_days: int = Query(7, description="Days to backfill for hourly stats"),
     daily_days: int = Query(30, description="Days to backfill for daily profiles"),
+    rebuild_ledger: bool = Query(False, description="Rebuild the series ingest ledger from series_data first"),
     authorized: bool = Depends(verify_manage_key),
 ):
     """
     Trigger historical data backfill for report tables.
 
-    WARNING: This is a long-running operation. Hourly backfill (7 days = 168 hours)
-    can take several minutes.
+    Hourly stats fold the series ingest ledger and are cheap; daily profiles
+    read each day's value distribution from series_data.
+
+    WARNING: rebuild_ledger scans series_data once per day and is a
+    long-running operation; run it once after creating the ledger table.
     """
     try:
         from ..core.monitor.collector_service import MonitorCollectorService
         service = MonitorCollectorService()
 
+        ledger_result = None
+        if rebuild_ledger:
+            ledger_result = await service.rebuild_ledger(days=max(hourly_days, daily_days))
         hourly_result = await service.backfill_hourly(days=hourly_days)
         daily_result = await service.backfill_daily(days=daily_days)
 
         return StandardResponse(
             data={
+                "ledger_rebuild": ledger_result,
                 "hourly_backfill": hourly_result,
                 "daily_backfill": daily_result,
             }
@@ -952,11 +965,13 @@ async def run_insight_engine(
     target_date: Optional[str] = Query(None, description="Start date YYYY-MM-DD (optional, default: yesterday)"),
     end_date: Optional[str] = Query(None, description="End date for simulation range (optional, single day if omitted)"),
     skip_llm: bool = Query(False, description="Skip Layer 2 LLM calls (faster for simulation)"),
+    cohort_size: Optional[int] = Query(None, ge=0, description="Users per batch in batched mode (optional, default: INSIGHT_COHORT_SIZE, 0 = per user)"),
     authorized: bool = Depends(verify_manage_key),
 ):
     """
     Run insight engine for a specific user or all demo users.
     If end_date is provided, slides day by day from target_date to end_date.
+    With cohort_size > 0, users are fetched, profiled and evaluated in batches.
     """
     try:
         from ..core.insight.engine_task import InsightEnginePullTask
@@ -966,6 +981,7 @@ async def run_insight_engine(
             target_date_str=target_date,
             end_date_str=end_date,
             skip_llm=skip_llm,
+            cohort_size=cohort_size,
         )
         return StandardResponse(data={
             "success": result,
@@ -973,6 +989,7 @@ async def run_insight_engine(
             "target_date": target_date,
             "end_date": end_date,
             "skip_llm": skip_llm,
+            "cohort_size": cohort_size,
         })
     except Exception as e:
         logging.error(f"Insight engine run failed: {str(e)}")
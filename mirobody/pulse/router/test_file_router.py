@@ -0,0 +1,143 @@
+"""/files/{path}: streamed downloads, Range (206/416), If-None-Match (304) and If-Range over LocalStorage."""
+
+from __future__ import annotations
+
+import asyncio
+import tracemalloc
+
+from typing import Any, Dict
+
+import pytest
+
+from fastapi import FastAPI
+
+from mirobody.utils.config import storage as storage_module
+from mirobody.utils.config.storage.local import LocalStorage
+
+from .file_router import _parse_byte_range, router
+
+_GB = 1024 ** 3
+_DATA = bytes(range(256)) * 40  # 10240 bytes
+
+
+async def _get(app: FastAPI, path: str, headers: Dict[str, str] | None = None, keep: int = 1 << 20) -> Dict[str, Any]:
+    """Run one GET through the ASGI app, keeping at most `keep` body bytes (the rest is only counted)."""
+    response: Dict[str, Any] = {"body": b"", "length": 0, "chunks": 0}
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+
+    requested = False
+    disconnected = asyncio.Event()
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()  # The client stays connected until the response is done
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode().lower(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            if len(response["body"]) < keep:
+                response["body"] += body[:keep - len(response["body"])]
+            response["length"] += len(body)
+            response["chunks"] += bool(body)
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        disconnected.set()
+    return response
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch) -> FastAPI:
+    local = LocalStorage(base_path=str(tmp_path), proxy_url="http://test/files")
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "uploads" / "report.pdf").write_bytes(_DATA)
+    monkeypatch.setattr(storage_module, "get_storage_client", lambda: local)
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+def test_parse_byte_range() -> None:
+    assert _parse_byte_range("bytes=0-99", 1000) == (0, 99)
+    assert _parse_byte_range("bytes=900-", 1000) == (900, 999)
+    assert _parse_byte_range("bytes=-100", 1000) == (900, 999)
+    assert _parse_byte_range("bytes=-5000", 1000) == (0, 999)
+    assert _parse_byte_range("bytes=990-5000", 1000) == (990, 999)
+    for ignored in ("bytes=0-1,5-6", "items=0-1", "bytes=5-1", "bytes=a-b", "bytes=-", "bytes 0-1"):
+        assert _parse_byte_range(ignored, 1000) is None, ignored
+    for unsatisfiable in ("bytes=1000-", "bytes=2000-3000", "bytes=-0"):
+        with pytest.raises(ValueError):
+            _parse_byte_range(unsatisfiable, 1000)
+
+
+@pytest.mark.asyncio
+async def test_full_and_ranged_downloads(app: FastAPI) -> None:
+    full = await _get(app, "/files/uploads/report.pdf")
+    assert full["status"] == 200 and full["body"] == _DATA
+    assert full["headers"]["content-length"] == str(len(_DATA))
+    assert full["headers"]["accept-ranges"] == "bytes"
+    assert full["headers"]["content-type"] == "application/pdf"
+    etag = full["headers"]["etag"]
+
+    part = await _get(app, "/files/uploads/report.pdf", {"Range": "bytes=100-199"})
+    assert part["status"] == 206 and part["body"] == _DATA[100:200]
+    assert part["headers"]["content-range"] == f"bytes 100-199/{len(_DATA)}"
+    assert part["headers"]["content-length"] == "100"
+
+    tail = await _get(app, "/files/uploads/report.pdf", {"Range": "bytes=-10"})
+    assert tail["status"] == 206 and tail["body"] == _DATA[-10:]
+
+    beyond = await _get(app, "/files/uploads/report.pdf", {"Range": "bytes=20000-"})
+    assert beyond["status"] == 416 and beyond["headers"]["content-range"] == f"bytes */{len(_DATA)}"
+
+    # If-Range: a current ETag honours the range, a stale one gets the whole file.
+    assert (await _get(app, "/files/uploads/report.pdf", {"Range": "bytes=0-9", "If-Range": etag}))["status"] == 206
+    stale = await _get(app, "/files/uploads/report.pdf", {"Range": "bytes=0-9", "If-Range": '"old"'})
+    assert stale["status"] == 200 and stale["body"] == _DATA
+
+
+@pytest.mark.asyncio
+async def test_conditional_requests_and_errors(app: FastAPI) -> None:
+    etag = (await _get(app, "/files/uploads/report.pdf"))["headers"]["etag"]
+
+    cached = await _get(app, "/files/uploads/report.pdf", {"If-None-Match": f'"other", W/{etag}'})
+    assert cached["status"] == 304 and cached["length"] == 0 and cached["headers"]["etag"] == etag
+    assert (await _get(app, "/files/uploads/report.pdf", {"If-None-Match": '"other"'}))["status"] == 200
+
+    assert (await _get(app, "/files/uploads/missing.pdf"))["status"] == 404
+    assert (await _get(app, "/files/uploads/../secret"))["status"] == 403
+
+
+@pytest.mark.asyncio
+async def test_1gb_download_is_streamed_in_constant_memory(app: FastAPI, tmp_path) -> None:
+    with open(tmp_path / "uploads" / "genome.vcf", "wb") as f:
+        f.truncate(_GB)  # Sparse: no disk space used
+
+    tracemalloc.start()
+    try:
+        full = await _get(app, "/files/uploads/genome.vcf", keep=0)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        part = await _get(app, "/files/uploads/genome.vcf", {"Range": f"bytes={_GB // 2}-"}, keep=0)
+        _, range_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert full["status"] == 200 and full["length"] == _GB and full["chunks"] > 1000
+    assert part["status"] == 206 and part["length"] == _GB // 2
+    assert peak < 8 * 1024 * 1024, f"peak {peak} bytes"
+    assert range_peak < 8 * 1024 * 1024, f"peak {range_peak} bytes"
@@ -0,0 +1,267 @@
+"""
+Async OAuth 1.0a client for the Garmin APIs
+
+- OAuth1Signer: RFC 5849 HMAC-SHA1 request signing (Authorization header)
+- GarminApiClient: one pooled aiohttp session shared by every user, bounded
+  parallel fetches per user and retry with backoff on 429 / 5xx
+
+Config:
+- GARMIN_PULL_CONCURRENCY: endpoints fetched at once per user (default 4)
+- GARMIN_HTTP_POOL_SIZE: open connections for the whole process (default 32)
+- GARMIN_HTTP_TIMEOUT: seconds per request (default 30)
+- GARMIN_MAX_RETRIES: retries on 429 / 5xx / network errors (default 3)
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import random
+import secrets
+import time
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qsl, quote, urlsplit, urlunsplit
+
+import aiohttp
+
+from mirobody.utils.config import safe_read_cfg
+
+
+# ========== RFC 5849 Signing ==========
+
+def percent_encode(value: Any) -> str:
+    """RFC 5849 section 3.6: UTF-8, everything but unreserved characters escaped."""
+    return quote(str(value).encode("utf-8"), safe="-._~")
+
+
+def base_string_uri(url: str) -> str:
+    """RFC 5849 section 3.4.1.2: lowercase scheme/host, no default port, query or fragment."""
+    parts = urlsplit(url)
+    scheme, host = parts.scheme.lower(), (parts.hostname or "").lower()
+    port = parts.port
+    if port and (scheme, port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{port}"
+    return urlunsplit((scheme, host, parts.path or "/", "", ""))
+
+
+def normalize_parameters(params: Iterable[Tuple[str, str]]) -> str:
+    """RFC 5849 section 3.4.1.3.2: encode, sort by name then value, join with '&'."""
+    encoded = sorted((percent_encode(k), percent_encode(v)) for k, v in params)
+    return "&".join(f"{k}={v}" for k, v in encoded)
+
+
+def signature_base_string(method: str, url: str, params: Iterable[Tuple[str, str]]) -> str:
+    """RFC 5849 section 3.4.1: METHOD&uri&parameters, each part percent-encoded."""
+    return "&".join((
+        percent_encode(method.upper()),
+        percent_encode(base_string_uri(url)),
+        percent_encode(normalize_parameters(params)),
+    ))
+
+
+def hmac_sha1_signature(base_string: str, client_secret: str, token_secret: str = "") -> str:
+    """RFC 5849 section 3.4.2."""
+    key = f"{percent_encode(client_secret)}&{percent_encode(token_secret or '')}"
+    digest = hmac.new(key.encode("utf-8"), base_string.encode("utf-8"), hashlib.sha1).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+class OAuth1Signer:
+    """Signs requests for one client / token pair (token is empty for request tokens)."""
+
+    def __init__(
+        self,
+        client_key: str,
+        client_secret: str,
+        token: Optional[str] = None,
+        token_secret: Optional[str] = None,
+        verifier: Optional[str] = None,
+        callback: Optional[str] = None,
+    ):
+        self.client_key = client_key
+        self.client_secret = client_secret
+        self.token = token
+        self.token_secret = token_secret or ""
+        self.verifier = verifier
+        self.callback = callback
+
+    def oauth_params(self, nonce: Optional[str] = None, timestamp: Optional[int] = None) -> Dict[str, str]:
+        params = {
+            "oauth_consumer_key": self.client_key,
+            "oauth_nonce": nonce or secrets.token_hex(16),
+            "oauth_signature_method": "HMAC-SHA1",
+            "oauth_timestamp": str(timestamp if timestamp is not None else int(time.time())),
+            "oauth_version": "1.0",
+        }
+        if self.token:
+            params["oauth_token"] = self.token
+        if self.verifier:
+            params["oauth_verifier"] = self.verifier
+        if self.callback:
+            params["oauth_callback"] = self.callback
+        return params
+
+    def sign(
+        self,
+        method: str,
+        url: str,
+        body_params: Optional[Mapping[str, str]] = None,
+        oauth_params: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, str]:
+        """
+        Sign a request
+
+        Query parameters are read from the URL; form-encoded body parameters
+        are passed separately. Returns the oauth_* parameters including
+        oauth_signature.
+        """
+        params = dict(oauth_params if oauth_params is not None else self.oauth_params())
+        params.pop("oauth_signature", None)
+        all_params: List[Tuple[str, str]] = parse_qsl(urlsplit(url).query, keep_blank_values=True)
+        all_params.extend((body_params or {}).items())
+        all_params.extend((k, v) for k, v in params.items() if k != "realm")
+
+        base_string = signature_base_string(method, url, all_params)
+        params["oauth_signature"] = hmac_sha1_signature(base_string, self.client_secret, self.token_secret)
+        return params
+
+    def authorization_header(self, method: str, url: str, body_params: Optional[Mapping[str, str]] = None) -> str:
+        """RFC 5849 section 3.5.1 Authorization header value."""
+        params = self.sign(method, url, body_params)
+        return "OAuth " + ", ".join(f'{percent_encode(k)}="{percent_encode(v)}"' for k, v in params.items())
+
+
+# ========== Pooled Client ==========
+
+@dataclass
+class GarminResponse:
+    status: int
+    text: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def json(self) -> Any:
+        return json.loads(self.text) if self.text else None
+
+
+class GarminApiClient:
+    """
+    aiohttp client shared by every Garmin user in the process
+
+    Connections are pooled (GARMIN_HTTP_POOL_SIZE), so users pulled at the
+    same time reuse TLS sessions instead of opening one per request. 429 and
+    5xx responses are retried with Retry-After or exponential backoff.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        pool_size: int = 32,
+        concurrency: int = 4,
+        timeout: float = 30,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ):
+        self.pool_size = pool_size
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(self.max_backoff, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        # Full jitter keeps users that hit the limit together from retrying together.
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    async def request(
+        self,
+        signer: OAuth1Signer,
+        method: str,
+        url: str,
+        data: Optional[Mapping[str, str]] = None,
+    ) -> GarminResponse:
+        """Signed request; each retry is signed again with a fresh nonce and timestamp."""
+        attempt = 0
+        while True:
+            headers = {"Authorization": signer.authorization_header(method, url, data)}
+            try:
+                async with self.session.request(method, url, headers=headers, data=data) as resp:
+                    response = GarminResponse(resp.status, await resp.text(), dict(resp.headers))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt, None)
+                logging.warning(f"Garmin {method} {url} failed ({type(e).__name__}: {e}), retrying in {delay:.1f}s")
+            else:
+                if response.status not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+                logging.warning(f"Garmin {method} {url} returned {response.status}, retrying in {delay:.1f}s")
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, signer: OAuth1Signer, url: str) -> GarminResponse:
+        return await self.request(signer, "GET", url)
+
+    async def fetch_all(self, signer: OAuth1Signer, urls: Mapping[str, str]) -> Dict[str, Any]:
+        """
+        GET every url at once, at most `concurrency` in flight
+
+        Returns:
+            Dict of key to GarminResponse, or to the exception that request raised
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(url: str) -> GarminResponse:
+            async with semaphore:
+                return await self.get(signer, url)
+
+        results = await asyncio.gather(*(fetch(url) for url in urls.values()), return_exceptions=True)
+        return dict(zip(urls.keys(), results))
+
+
+_client: Optional[GarminApiClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_garmin_client() -> GarminApiClient:
+    """Shared client for the running event loop."""
+    global _client, _client_loop
+
+    # An aiohttp session is bound to the loop that created it.
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = GarminApiClient(
+            pool_size=int(safe_read_cfg("GARMIN_HTTP_POOL_SIZE") or 32),
+            concurrency=int(safe_read_cfg("GARMIN_PULL_CONCURRENCY") or 4),
+            timeout=float(safe_read_cfg("GARMIN_HTTP_TIMEOUT") or 30),
+            max_retries=int(safe_read_cfg("GARMIN_MAX_RETRIES") or 3),
+        )
+        _client_loop = loop
+    return _client
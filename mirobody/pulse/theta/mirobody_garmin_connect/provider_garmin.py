@@ -8,17 +8,13 @@ import asyncio
 import json
 import logging
 import time
-import uuid
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple, Set
 from urllib.parse import parse_qs, urlencode
 
-from requests_oauthlib import OAuth1Session
-
 from mirobody.pulse.base import ProviderInfo
 from mirobody.pulse.core import LinkType, ProviderStatus
 from mirobody.pulse.core.indicators_info import StandardIndicator
-from mirobody.pulse.core.push_service import push_service
 from mirobody.pulse.core.units import UNIT_CONVERSIONS
 from mirobody.pulse.data_upload.models.requests import (
     FormatDataInput,
@@ -28,6 +24,7 @@ from mirobody.pulse.data_upload.models.requests import (
 )
 from mirobody.pulse.theta.platform.base import BaseThetaProvider
 from mirobody.pulse.theta.platform.utils import ThetaDataFormatter, ThetaTimeUtils
+from mirobody.pulse.theta.mirobody_garmin_connect.oauth1_client import OAuth1Signer, get_garmin_client
 from mirobody.utils import execute_query
 from mirobody.utils.config import safe_read_cfg, global_config
 
@@ -37,6 +34,9 @@ SECONDS_TO_MILLISECONDS = UNIT_CONVERSIONS["s"]["ms"]  # 1000
 class ThetaGarminProvider(BaseThetaProvider):
     """Theta Garmin Provider - Garmin OAuth Data Integration"""
 
+    # api_url carries the pull window's timestamps, which move on every pull
+    RAW_HASH_EXCLUDE_KEYS = BaseThetaProvider.RAW_HASH_EXCLUDE_KEYS + ("api_url",)
+
     # Unified Garmin data configuration - combines simple fields and time series
     GARMIN_DATA_CONFIG = {
         "dailies": {
@@ -304,20 +304,14 @@ class ThetaGarminProvider(BaseThetaProvider):
             if not self.client_id or not self.client_secret:
                 raise ValueError("Missing GARMIN_CLIENT_ID or GARMIN_CLIENT_SECRET configuration")
 
-            # Create OAuth1Session for request token
-            oauth = OAuth1Session(
-                client_key=self.client_id,
-                client_secret=self.client_secret,
-                signature_method='HMAC-SHA1',
-                signature_type='auth_header',
-                verifier=None
-            )
+            # Sign with client credentials only for the request token
+            signer = OAuth1Signer(client_key=self.client_id, client_secret=self.client_secret)
 
             # Get request token
-            resp = oauth.post(self.request_token_url)
+            resp = await get_garmin_client().request(signer, "POST", self.request_token_url)
 
-            if resp.status_code != 200:
-                raise RuntimeError(f"Failed to get request token: {resp.status_code} - {resp.text}")
+            if resp.status != 200:
+                raise RuntimeError(f"Failed to get request token: {resp.status} - {resp.text}")
 
             # Parse response
             params = parse_qs(resp.text)
@@ -460,21 +454,21 @@ class ThetaGarminProvider(BaseThetaProvider):
             if not user_id:
                 raise ValueError("Missing user_id for OAuth callback")
 
-            # Create OAuth1Session for access token
-            oauth = OAuth1Session(
+            # Sign with the request token and verifier for the access token
+            signer = OAuth1Signer(
                 client_key=self.client_id,
                 client_secret=self.client_secret,
-                resource_owner_key=oauth_token,
-                resource_owner_secret=oauth_token_secret,
+                token=oauth_token,
+                token_secret=oauth_token_secret,
                 verifier=oauth_verifier
             )
-            garmin_user_id = self._get_user_id(oauth)
+            garmin_user_id = await self._get_user_id(signer)
 
             # Get access token
-            resp = oauth.post(self.access_token_url)
+            resp = await get_garmin_client().request(signer, "POST", self.access_token_url)
 
-            if resp.status_code != 200:
-                raise RuntimeError(f"Failed to get access token: {resp.status_code} - {resp.text}")
+            if resp.status != 200:
+                raise RuntimeError(f"Failed to get access token: {resp.status} - {resp.text}")
 
             # Parse access token response
             params = parse_qs(resp.text)
@@ -482,7 +476,7 @@ class ThetaGarminProvider(BaseThetaProvider):
             access_token_secret = params['oauth_token_secret'][0]
 
             # Save credentials to database using new OAuth1 method with user_name
-            # Use Garmin user id retrieved via _get_user_id(oauth)
+            # Use Garmin user id retrieved via _get_user_id(signer)
             success = await self.db_service.save_oauth1_credentials(
                 user_id, self.info.slug, access_token, access_token_secret, user_name=garmin_user_id
             )
@@ -545,23 +539,23 @@ class ThetaGarminProvider(BaseThetaProvider):
                 logging.warning(f"Invalid stored credentials for user {user_id}")
                 # Will be removed from database in finally block
             else:
-                # Create OAuth1Session for API calls
-                oauth = OAuth1Session(
+                # Sign API calls with the user's access token
+                signer = OAuth1Signer(
                     client_key=self.client_id,
                     client_secret=self.client_secret,
-                    resource_owner_key=access_token,
-                    resource_owner_secret=token_secret
+                    token=access_token,
+                    token_secret=token_secret
                 )
 
                 # Call DELETE API to unlink user
                 unlink_url = f"{self.api_base_url}/user/registration"
-                resp = oauth.delete(unlink_url)
+                resp = await get_garmin_client().request(signer, "DELETE", unlink_url)
 
-                if resp.status_code == 204:
+                if resp.status == 204:
                     api_unlink_success = True
                     logging.info(f"Successfully unlinked Garmin provider for user {user_id}")
                 else:
-                    api_error_message = f"Garmin API unlink failed: {resp.status_code} - {resp.text}"
+                    api_error_message = f"Garmin API unlink failed: {resp.status} - {resp.text}"
                     logging.error(api_error_message)
                     # Raise on API unlink failure as requested
                     raise RuntimeError(api_error_message)
@@ -1172,16 +1166,16 @@ class ThetaGarminProvider(BaseThetaProvider):
             if not access_token or not token_secret:
                 raise ValueError("Access token and token secret are required")
 
-            # Create OAuth session
-            oauth = OAuth1Session(
+            # Sign API calls with the user's access token
+            signer = OAuth1Signer(
                 client_key=self.client_id,
                 client_secret=self.client_secret,
-                resource_owner_key=access_token,
-                resource_owner_secret=token_secret
+                token=access_token,
+                token_secret=token_secret
             )
 
             # Get user ID first
-            user_id = self._get_user_id(oauth)
+            user_id = await self._get_user_id(signer)
 
             all_data = []
 
@@ -1198,11 +1192,11 @@ class ThetaGarminProvider(BaseThetaProvider):
                     batch_start = batch_end - (24 * 60 * 60)
                     logging.info(f"Pulling batch {day_offset + 1}/{days}: {batch_start} to {batch_end}")
                     
-                    batch_data = self._pull_data_batch(oauth, user_id, batch_start, batch_end)
+                    batch_data = await self._pull_data_batch(signer, user_id, batch_start, batch_end)
                     all_data.extend(batch_data)
             else:
                 # Single day request
-                batch_data = self._pull_data_batch(oauth, user_id, start_timestamp, end_timestamp)
+                batch_data = await self._pull_data_batch(signer, user_id, start_timestamp, end_timestamp)
                 all_data.extend(batch_data)
 
             logging.info(f"Completed Garmin data pull: {len(all_data)} data sets retrieved")
@@ -1212,12 +1206,15 @@ class ThetaGarminProvider(BaseThetaProvider):
             logging.error(f"Error in Garmin data pull: {str(e)}")
             return []
 
-    def _pull_data_batch(self, oauth: OAuth1Session, user_id: str, start_timestamp: int, end_timestamp: int) -> List[Dict[str, Any]]:
+    async def _pull_data_batch(self, signer: OAuth1Signer, user_id: str, start_timestamp: int, end_timestamp: int) -> List[Dict[str, Any]]:
         """
         Pull data for a single time batch (max 24 hours)
+
+        All summary endpoints are fetched concurrently through the shared
+        client (GARMIN_PULL_CONCURRENCY at a time, 429s retried with backoff).
         
         Args:
-            oauth: OAuth session
+            signer: OAuth1 signer with the user's access token
             user_id: Garmin user ID
             start_timestamp: Start timestamp in seconds
             end_timestamp: End timestamp in seconds
@@ -1230,12 +1227,15 @@ class ThetaGarminProvider(BaseThetaProvider):
         # Get API endpoints with correct parameter names for each endpoint
         data_types = self._get_api_endpoints_config(start_timestamp, end_timestamp)
 
+        responses = await get_garmin_client().fetch_all(signer, data_types)
+
         for data_type, url in data_types.items():
             try:
-                logging.info(f"Pulling {data_type} data from Garmin API")
-                resp = oauth.get(url)
+                resp = responses[data_type]
+                if isinstance(resp, BaseException):
+                    raise resp
 
-                if resp.status_code == 200:
+                if resp.status == 200:
                     data = resp.json()
                     # Normalize response for certain endpoints that wrap list in a key
                     if data_type == "epochs" and isinstance(data, dict) and "epochs" in data:
@@ -1251,7 +1251,7 @@ class ThetaGarminProvider(BaseThetaProvider):
                     batch_data.append(raw_data)
                     logging.info(f"Successfully pulled {data_type} data: {len(data) if isinstance(data, list) else 1} records")
                 else:
-                    logging.warning(f"Failed to pull {data_type} data: {resp.status_code} - {resp.text}")
+                    logging.warning(f"Failed to pull {data_type} data: {resp.status} - {resp.text}")
 
             except Exception as e:
                 logging.error(f"Error pulling {data_type} data: {str(e)}")
@@ -1259,19 +1259,19 @@ class ThetaGarminProvider(BaseThetaProvider):
         
         return batch_data
 
-    def _get_user_id(self, oauth: OAuth1Session) -> str:
+    async def _get_user_id(self, signer: OAuth1Signer) -> str:
         """Get Garmin user ID"""
         try:
             user_id_url = f"{self.api_base_url}/user/id"
-            resp = oauth.get(user_id_url)
+            resp = await get_garmin_client().get(signer, user_id_url)
 
-            if resp.status_code == 200:
+            if resp.status == 200:
                 user_data = resp.json()
                 user_id = user_data.get("userId", "")
                 logging.info(f"Retrieved Garmin user ID: {user_id}")
                 return str(user_id)
             else:
-                logging.error(f"Failed to get user ID: {resp.status_code} - {resp.text}")
+                logging.error(f"Failed to get user ID: {resp.status} - {resp.text}")
                 return ""
 
         except Exception as e:
@@ -1638,36 +1638,14 @@ class ThetaGarminProvider(BaseThetaProvider):
                 logging.info(f"No data pulled for user {user_id}")
                 return True
 
-            success_count = 0
-            error_count = 0
-
             for raw_data in raw_data_list:
-                try:
-                    raw_data["user_id"] = user_id
+                raw_data["user_id"] = user_id
+            success_count, skipped_count, error_count = await self._push_new_records(user_id, raw_data_list)
 
-                    # Optional: allow provider-level dedup gates
-                    if await self.is_data_already_processed(raw_data):
-                        continue
-
-                    msg_id = str(uuid.uuid4())
-                    push_success = await push_service.push_data(
-                        platform="theta",
-                        provider_slug=self.info.slug,
-                        data=raw_data,
-                        msg_id=msg_id,
-                    )
-
-                    if push_success:
-                        success_count += 1
-                    else:
-                        error_count += 1
-                        logging.error(f"Failed to push data for user {user_id} with msg_id {msg_id}")
-                except Exception as e:
-                    error_count += 1
-                    logging.error(f"Error processing data for user {user_id}: {str(e)}")
-                    continue
-
-            logging.info(f"Processed {success_count} records for user {user_id}; errors={error_count}")
+            logging.info(
+                f"Processed {success_count} records for user {user_id}; "
+                f"unchanged={skipped_count}, errors={error_count}"
+            )
             return error_count == 0
 
         except Exception as e:
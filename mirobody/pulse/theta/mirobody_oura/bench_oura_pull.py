@@ -0,0 +1,153 @@
+"""
+Oura Pull Benchmark: session per user + serial endpoints vs pooled + concurrent
+
+Starts a fake Oura API (aiohttp, per-request latency, --pages next_token
+pages per collection) and pulls --users users through ThetaOuraProvider,
+--user-concurrency users at a time as the pull task does:
+
+  - per-user: a new aiohttp session for every user and one endpoint after
+    another (the previous pull_from_vendor_api)
+  - pooled:   the provider-wide keep-alive session, OURA_ENDPOINT_CONCURRENCY
+    endpoints at once, pages streamed into batched pushes
+
+Reports wall time, API requests and TCP connections the server accepted.
+Pushes go to an in-memory sink, so only the pull path is measured.
+
+Usage:
+    python3 -m mirobody.pulse.theta.mirobody_oura.bench_oura_pull \\
+        [--users 200] [--user-concurrency 16] [--endpoint-concurrency 6] \\
+        [--latency-ms 30] [--pages 3]
+"""
+
+import argparse
+import asyncio
+import time
+
+from collections import Counter
+from typing import Any, Dict, List
+from unittest import mock
+
+import aiohttp
+
+from aiohttp import web
+
+from mirobody.pulse.theta.platform import base as base_module
+
+from .provider_oura import ThetaOuraProvider
+
+
+def _fake_oura(latency: float, pages: int) -> tuple[web.Application, Dict[str, Any]]:
+    stats: Dict[str, Any] = {"requests": 0, "connections": set()}
+
+    async def collection(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        stats["connections"].add(request.transport.get_extra_info("peername"))
+        await asyncio.sleep(latency)
+        if request.match_info["kind"] == "personal_info":
+            return web.json_response({"id": "oura", "weight": 70})
+        page = int(request.query.get("next_token", 0))
+        body = {"data": [{"day": f"2026-01-{d + 1:02d}", "score": 80 + page} for d in range(30)]}
+        if page + 1 < pages:
+            body["next_token"] = str(page + 1)
+        return web.json_response(body)
+
+    app = web.Application()
+    app.router.add_get("/v2/usercollection/{kind}", collection)
+    return app, stats
+
+
+class _PerUserSessionProvider(ThetaOuraProvider):
+    """The previous behaviour: every pull opens (and later drops) its own session."""
+
+    def __init__(self):
+        super().__init__()
+        self.sessions: List[aiohttp.ClientSession] = []
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.request_timeout))
+        self.sessions.append(session)
+        return session
+
+    async def close(self) -> None:
+        await asyncio.gather(*(s.close() for s in self.sessions))
+
+
+async def _run(provider: ThetaOuraProvider, users: int, user_concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(user_concurrency)
+
+    async def pull(user: int) -> bool:
+        async with semaphore:
+            return await provider._pull_and_push_for_user(
+                {"user_id": str(user), "access_token": "bench", "last_pull_at": 1}
+            )
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(pull(u) for u in range(users)))
+    elapsed = time.perf_counter() - start
+    assert all(results), "some users failed"
+    return elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--user-concurrency", type=int, default=16)
+    parser.add_argument("--endpoint-concurrency", type=int, default=6)
+    parser.add_argument("--latency-ms", type=float, default=30)
+    parser.add_argument("--pages", type=int, default=3)
+    args = parser.parse_args()
+
+    app, stats = _fake_oura(args.latency_ms / 1000, args.pages)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    pushes: Counter = Counter()
+
+    async def push_batch(platform, provider_slug, data_list):
+        pushes["records"] += len(data_list)
+        return [True] * len(data_list)
+
+    async def no_hashes(self, user_id, hashes):
+        return set()
+
+    async def mark(self, user_id, hashes):
+        pass
+
+    print(
+        f"{args.users} users x {len(ThetaOuraProvider.API_ENDPOINTS)} endpoints x {args.pages} pages, "
+        f"{args.user_concurrency} users at once, latency {args.latency_ms:g} ms"
+    )
+    print(f"{'mode':<10} {'seconds':>9} {'users/s':>9} {'requests':>9} {'conns':>7} {'pushed':>8}")
+
+    try:
+        with mock.patch.object(base_module.push_service, "push_batch", push_batch), \
+             mock.patch.object(ThetaOuraProvider, "_load_processed_hashes", no_hashes), \
+             mock.patch.object(ThetaOuraProvider, "_mark_processed_hashes", mark):
+            for name, cls, endpoint_concurrency in (
+                ("per-user", _PerUserSessionProvider, 1),
+                ("pooled", ThetaOuraProvider, args.endpoint_concurrency),
+            ):
+                provider = cls()
+                provider.API_BASE_URL = base_url
+                provider.endpoint_concurrency = endpoint_concurrency
+                stats.update(requests=0, connections=set())
+                pushes.clear()
+                try:
+                    seconds = await _run(provider, args.users, args.user_concurrency)
+                finally:
+                    await provider.close()
+                print(
+                    f"{name:<10} {seconds:>9.2f} {args.users / seconds:>9.1f} "
+                    f"{stats['requests']:>9} {len(stats['connections']):>7} {pushes['records']:>8}"
+                )
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -11,14 +11,13 @@ import logging
 import time
 from datetime import datetime, timezone, timedelta
 from zoneinfo import ZoneInfo
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import aiohttp
 
 from mirobody.pulse.base import ProviderInfo
 from mirobody.pulse.core import LinkType, ProviderStatus
 from mirobody.pulse.core.indicators_info import StandardIndicator
-from mirobody.pulse.core.push_service import push_service
 from mirobody.pulse.data_upload.models.requests import (
     FormatDataInput,
     StandardPulseData,
@@ -45,6 +44,9 @@ class ThetaOuraProvider(BaseThetaProvider):
     # e.g. curl -H "Authorization: Bearer test" https://api.ouraring.com/v2/sandbox/usercollection/sleep
     SANDBOX_API_PREFIX = "/v2/sandbox/usercollection"
 
+    # Oura allows 5000 requests per 5 minutes per application
+    PULL_RATE_LIMIT = (5000, 300)
+
     # Endpoints configuration.
     #
     # time_strategy declares where each data_type's record timestamp comes from:
@@ -94,6 +96,12 @@ class ThetaOuraProvider(BaseThetaProvider):
         # Pull configuration
         self.backfill_days = 30
         self.request_timeout = 30
+        self.max_retries = 3
+        self.endpoint_concurrency = max(1, int(safe_read_cfg("OURA_ENDPOINT_CONCURRENCY") or 6))
+        self.http_pool_size = int(safe_read_cfg("OURA_HTTP_POOL_SIZE") or 100)
+        self.http_per_host = int(safe_read_cfg("OURA_HTTP_PER_HOST") or 64)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
 
         if not client_id or not client_secret:
             logging.error("Oura OAuth credentials not configured. Please set OURA_CLIENT_ID and OURA_CLIENT_SECRET")
@@ -250,106 +258,146 @@ class ThetaOuraProvider(BaseThetaProvider):
                 logging.error(f"No valid access token for Oura user {user_id}")
                 return False
 
-            refresh_token = credentials.get("refresh_token", "")
-
             # Determine pull range: backfill on first pull, 1 day otherwise
             last_pull = credentials.get("last_pull_at")
             days = self.backfill_days if not last_pull else 1
 
-            raw_data_list = await self.pull_from_vendor_api(access_token, refresh_token, days=days)
-
-            success_count = 0
-            error_count = 0
-
-            for raw_data in raw_data_list:
-                try:
-                    raw_data["theta_user_id"] = user_id
-                    await push_service.push_data(
-                        platform="theta",
-                        provider_slug=self.info.slug,
-                        data=raw_data,
-                    )
-                    success_count += 1
-                except Exception as e:
-                    error_count += 1
-                    logging.error(f"Failed to push Oura data for user {user_id}: {e}")
-
-            logging.info(f"Oura pull complete for user {user_id}: {success_count} success, {error_count} errors")
+            # Push pages as they stream in, PUSH_BATCH_SIZE at a time
+            counts = (0, 0, 0)  # pushed, unchanged, failed
+            batch: List[Dict[str, Any]] = []
+            async for raw_data in self.iter_vendor_data(access_token, days=days):
+                raw_data["theta_user_id"] = user_id
+                batch.append(raw_data)
+                if len(batch) >= self.PUSH_BATCH_SIZE:
+                    counts = tuple(map(sum, zip(counts, await self._push_new_records(user_id, batch))))
+                    batch = []
+            if batch:
+                counts = tuple(map(sum, zip(counts, await self._push_new_records(user_id, batch))))
+            success_count, skipped_count, error_count = counts
+
+            logging.info(
+                f"Oura pull complete for user {user_id}: {success_count} success, "
+                f"{skipped_count} unchanged, {error_count} errors"
+            )
             return error_count == 0
 
         except Exception as e:
             logging.error(f"Oura pull_and_push failed for user {user_id}: {e}")
             return False
 
-    async def pull_from_vendor_api(
-        self, access_token: str, refresh_token: str, days: Optional[int] = None
-    ) -> List[Dict[str, Any]]:
-        """Fetch data from all Oura API endpoints"""
+    def pull_request_cost(self, credentials: Dict[str, Any]) -> int:
+        # One request per endpoint; extra pages are not known up front
+        return len(self.API_ENDPOINTS)
+
+    # =========================================================================
+    # HTTP — one pooled session per provider, endpoints fetched concurrently
+    # =========================================================================
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Provider-wide session; keeps TLS connections to the Oura API alive across users."""
+        # An aiohttp session is bound to the loop that created it.
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.http_pool_size,
+                    limit_per_host=self.http_per_host,
+                    keepalive_timeout=60,
+                    ttl_dns_cache=300,
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _endpoint_params(self, data_type: str, start_date: str, end_date: str) -> Dict[str, str]:
+        # Heart rate uses datetime params
+        if data_type == "heartrate":
+            return {
+                "start_datetime": f"{start_date}T00:00:00+00:00",
+                "end_datetime": f"{end_date}T23:59:59+00:00",
+            }
+        if data_type == "personal_info":
+            return {}
+        return {"start_date": start_date, "end_date": end_date}
+
+    async def iter_vendor_data(self, access_token: str, days: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield one raw data record per fetched page, across all Oura endpoints
+
+        Endpoints are fetched concurrently (OURA_ENDPOINT_CONCURRENCY at a time)
+        and pages are yielded as they arrive, so a long backfill is never held
+        in memory whole. A bounded queue pauses the fetchers while the consumer
+        is busy pushing.
+        """
         pull_days = days or 1
 
         start_date = (datetime.now(timezone.utc) - timedelta(days=pull_days)).strftime("%Y-%m-%d")
         end_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
         headers = {"Authorization": f"Bearer {access_token}"}
-        all_data = []
-
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=self.request_timeout)
-        ) as session:
-            for endpoint_config in self.API_ENDPOINTS:
-                path = endpoint_config["path"]
-                data_type = endpoint_config["data_type"]
-                paginated = endpoint_config.get("paginated", True)
-
-                # Heart rate uses datetime params
-                if data_type == "heartrate":
-                    params = {
-                        "start_datetime": f"{start_date}T00:00:00+00:00",
-                        "end_datetime": f"{end_date}T23:59:59+00:00",
-                    }
-                elif data_type == "personal_info":
-                    params = {}
-                else:
-                    params = {"start_date": start_date, "end_date": end_date}
+        session = self.session
+        semaphore = asyncio.Semaphore(self.endpoint_concurrency)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.endpoint_concurrency * 2)
+
+        async def fetch_endpoint(endpoint_config: Dict[str, Any]) -> None:
+            data_type = endpoint_config["data_type"]
+            url = f"{self.API_BASE_URL}{endpoint_config['path']}"
+            params = self._endpoint_params(data_type, start_date, end_date)
+            count = 0
 
+            async with semaphore:
                 try:
-                    url = f"{self.API_BASE_URL}{path}"
-
-                    if paginated:
-                        data = await self._fetch_paginated_data(session, url, headers, params)
-                    elif data_type == "personal_info":
-                        data = await self._fetch_single_resource(session, url, headers)
-                    else:
-                        # heartrate returns flat list in "data" key
-                        data = await self._fetch_list_data(session, url, headers, params)
-
-                    if data:
-                        all_data.append({
+                    async for records in self._iter_endpoint_pages(session, data_type, url, headers, params):
+                        if not records:
+                            continue
+                        count += len(records)
+                        await queue.put({
                             "data_type": data_type,
-                            "data": data if isinstance(data, list) else [data],
+                            "data": records,
                             "timestamp": int(time.time() * 1000),
                         })
-                        logging.info(f"Fetched {len(data) if isinstance(data, list) else 1} {data_type} records")
                 except Exception as e:
                     logging.error(f"Failed to fetch Oura {data_type}: {e}")
 
-        return all_data
+            if count:
+                logging.info(f"Fetched {count} {data_type} records")
 
-    async def _fetch_paginated_data(
-        self, session: aiohttp.ClientSession, url: str,
-        headers: dict, params: dict
-    ) -> List[Dict[str, Any]]:
-        """Handle Oura pagination (next_token)"""
-        all_records = []
-        next_token = None
+        async def fetch_all() -> None:
+            try:
+                await asyncio.gather(*(fetch_endpoint(e) for e in self.API_ENDPOINTS))
+            finally:
+                await queue.put(None)
 
-        while True:
-            req_params = dict(params)
-            if next_token:
-                req_params["next_token"] = next_token
+        producer = asyncio.create_task(fetch_all())
+        try:
+            while (raw_data := await queue.get()) is not None:
+                yield raw_data
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
 
-            async with session.get(url, headers=headers, params=req_params) as resp:
-                if resp.status == 429:
+    async def pull_from_vendor_api(
+        self, access_token: str, refresh_token: str, days: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Fetch data from all Oura API endpoints (one record per page)"""
+        return [raw_data async for raw_data in self.iter_vendor_data(access_token, days)]
+
+    async def _get_with_retry(
+        self, session: aiohttp.ClientSession, url: str, headers: dict, params: Optional[dict] = None
+    ) -> Optional[Any]:
+        """GET JSON, honouring Retry-After on 429; None on other errors"""
+        for attempt in range(self.max_retries + 1):
+            async with session.get(url, headers=headers, params=params) as resp:
+                if resp.status == 429 and attempt < self.max_retries:
                     retry_after = int(resp.headers.get("Retry-After", 60))
                     logging.warning(f"Oura rate limited, waiting {retry_after}s")
                     await asyncio.sleep(retry_after)
@@ -358,44 +406,49 @@ class ThetaOuraProvider(BaseThetaProvider):
                     raise ValueError("Oura access token expired or invalid")
                 if resp.status != 200:
                     logging.warning(f"Oura API error {resp.status} for {url}: {await resp.text()}")
-                    break
+                    return None
+                return await resp.json()
+        return None
 
-                body = await resp.json()
-                records = body.get("data", [])
-                all_records.extend(records)
+    async def _iter_endpoint_pages(
+        self, session: aiohttp.ClientSession, data_type: str, url: str,
+        headers: dict, params: dict
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        if data_type == "personal_info":
+            resource = await self._fetch_single_resource(session, url, headers)
+            if resource:
+                yield [resource]
+            return
+        # heartrate is not flagged paginated but follows next_token when present
+        async for records in self._iter_pages(session, url, headers, params):
+            yield records
+
+    async def _iter_pages(
+        self, session: aiohttp.ClientSession, url: str,
+        headers: dict, params: dict
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield each page's records, following Oura's next_token"""
+        next_token = None
+
+        while True:
+            req_params = dict(params)
+            if next_token:
+                req_params["next_token"] = next_token
 
-                next_token = body.get("next_token")
-                if not next_token:
-                    break
+            body = await self._get_with_retry(session, url, headers, req_params)
+            if not body:
+                return
+            yield body.get("data", [])
 
-        return all_records
+            next_token = body.get("next_token")
+            if not next_token:
+                return
 
     async def _fetch_single_resource(
         self, session: aiohttp.ClientSession, url: str, headers: dict
     ) -> Optional[Dict[str, Any]]:
         """Fetch a single resource (e.g., personal_info)"""
-        async with session.get(url, headers=headers) as resp:
-            if resp.status != 200:
-                logging.error(f"Oura API error {resp.status} for {url}")
-                return None
-            return await resp.json()
-
-    async def _fetch_list_data(
-        self, session: aiohttp.ClientSession, url: str,
-        headers: dict, params: dict
-    ) -> List[Dict[str, Any]]:
-        """Fetch list data without pagination (e.g., heartrate)"""
-        async with session.get(url, headers=headers, params=params) as resp:
-            if resp.status == 429:
-                retry_after = int(resp.headers.get("Retry-After", 60))
-                logging.warning(f"Oura rate limited, waiting {retry_after}s")
-                await asyncio.sleep(retry_after)
-                return await self._fetch_list_data(session, url, headers, params)
-            if resp.status != 200:
-                logging.warning(f"Oura API error {resp.status} for {url}: {await resp.text()}")
-                return []
-            body = await resp.json()
-            return body.get("data", [])
+        return await self._get_with_retry(session, url, headers)
 
     # =========================================================================
     # Raw Data Storage
@@ -0,0 +1,122 @@
+"""Pooled, concurrent and paginated Oura pulls against a fake local Oura API."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+
+from collections import Counter
+from typing import Any, Dict, List
+
+import pytest
+
+from aiohttp import web
+
+from mirobody.pulse.theta.platform import base as base_module
+
+from .provider_oura import ThetaOuraProvider
+
+_PAGES = 3
+
+
+def _fake_oura(latency: float) -> tuple[web.Application, Dict[str, Any]]:
+    """Every collection has _PAGES pages of 2 records; /daily_sleep answers 429 once."""
+    stats: Dict[str, Any] = {"requests": Counter(), "peers": set(), "in_flight": 0, "max_in_flight": 0}
+
+    async def collection(request: web.Request) -> web.Response:
+        kind = request.match_info["kind"]
+        stats["requests"][kind] += 1
+        stats["peers"].add(request.transport.get_extra_info("peername"))
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            stats["in_flight"] -= 1
+
+        assert request.headers["Authorization"] == "Bearer token"
+        if kind == "daily_sleep" and stats["requests"][kind] == 1:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        if kind == "personal_info":
+            return web.json_response({"id": "oura-1", "weight": 70})
+
+        page = int(request.query.get("next_token", 0))
+        body = {"data": [{"day": f"2026-01-{page * 2 + i + 1:02d}", "kind": kind} for i in range(2)]}
+        if page + 1 < _PAGES:
+            body["next_token"] = str(page + 1)
+        return web.json_response(body)
+
+    app = web.Application()
+    app.router.add_get("/v2/usercollection/{kind}", collection)
+    return app, stats
+
+
+@contextlib.asynccontextmanager
+async def _oura():
+    app, stats = _fake_oura(latency=0.05)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    provider = ThetaOuraProvider()
+    provider.API_BASE_URL = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    provider.endpoint_concurrency = 4
+    try:
+        yield provider, stats
+    finally:
+        await provider.close()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_endpoints_are_fetched_concurrently_page_by_page() -> None:
+    async with _oura() as (provider, stats):
+        start = time.perf_counter()
+        data = await provider.pull_from_vendor_api("token", "", days=7)
+        elapsed = time.perf_counter() - start
+    paginated = len(provider.API_ENDPOINTS) - 1
+
+    # One record per page; every page of every endpoint, 429 retried.
+    assert len(data) == paginated * _PAGES + 1
+    assert Counter(d["data_type"] for d in data)["sleep"] == _PAGES
+    assert {r["day"] for d in data if d["data_type"] == "heartrate" for r in d["data"]} == {
+        f"2026-01-{i:02d}" for i in range(1, _PAGES * 2 + 1)
+    }
+    assert stats["requests"]["daily_sleep"] == _PAGES + 1
+
+    requests = sum(stats["requests"].values())
+    assert stats["max_in_flight"] == 4
+    assert elapsed < requests * 0.05 / 2
+
+
+@pytest.mark.asyncio
+async def test_session_is_shared_across_users_and_pages_stream_into_pushes(monkeypatch) -> None:
+    pushed: List[List[Dict[str, Any]]] = []
+
+    async def push_batch(platform, provider_slug, data_list):
+        pushed.append(list(data_list))
+        return [True] * len(data_list)
+
+    async def no_hashes(self, user_id, hashes):
+        return set()
+
+    async def mark(self, user_id, hashes):
+        pass
+
+    monkeypatch.setattr(base_module.push_service, "push_batch", push_batch)
+    monkeypatch.setattr(ThetaOuraProvider, "_load_processed_hashes", no_hashes)
+    monkeypatch.setattr(ThetaOuraProvider, "_mark_processed_hashes", mark)
+    monkeypatch.setattr(ThetaOuraProvider, "PUSH_BATCH_SIZE", 5)
+
+    async with _oura() as (provider, stats):
+        for user in ("1", "2", "3"):
+            assert await provider._pull_and_push_for_user({"user_id": user, "access_token": "token", "last_pull_at": 1})
+
+    records = [r for batch in pushed for r in batch]
+    per_user = (len(provider.API_ENDPOINTS) - 1) * _PAGES + 1
+    assert len(records) == 3 * per_user
+    assert max(len(batch) for batch in pushed) == 5
+    # Keep-alive: three users reuse the connections opened for the first one.
+    assert len(stats["peers"]) <= provider.endpoint_concurrency
@@ -8,7 +8,6 @@ import asyncio
 import json
 import logging
 import time
-import uuid
 from datetime import datetime, timezone, timedelta
 from typing import Any, Dict, List, Optional
 
@@ -17,7 +16,6 @@ import aiohttp
 from mirobody.pulse.base import ProviderInfo
 from mirobody.pulse.core import LinkType, ProviderStatus
 from mirobody.pulse.core.indicators_info import StandardIndicator
-from mirobody.pulse.core.push_service import push_service
 from mirobody.pulse.core.units import UNIT_CONVERSIONS
 from mirobody.pulse.data_upload.models.requests import (
     FormatDataInput,
@@ -1187,32 +1185,17 @@ class ThetaWhoopProvider(BaseThetaProvider):
                 logging.info(f"No recent whoop data for user {user_id}")
                 return True
 
-            success_count = 0
-            error_count = 0
+            # Inject system user ID (from credentials DB).
+            # No need to inject external user ID — _extract_external_user_id
+            # override reads it from data[0]["user_id"] at every call site.
             for raw_data in raw_data_list:
-                try:
-                    # Inject system user ID (from credentials DB).
-                    # No need to inject external user ID — _extract_external_user_id
-                    # override reads it from data[0]["user_id"] at every call site.
-                    raw_data["theta_user_id"] = user_id
-                    msg_id = str(uuid.uuid4())
-                    push_success = await push_service.push_data(
-                        platform="theta",
-                        provider_slug=self.info.slug,
-                        data=raw_data,
-                        msg_id=msg_id,
-                    )
-                    if push_success:
-                        success_count += 1
-                    else:
-                        error_count += 1
-                        logging.error(f"Failed to push whoop data for user {user_id} with msg_id {msg_id}")
-                except Exception as e:
-                    error_count += 1
-                    logging.error(f"Error processing whoop data for user {user_id}: {str(e)}")
-                    continue
+                raw_data["theta_user_id"] = user_id
+            success_count, skipped_count, error_count = await self._push_new_records(user_id, raw_data_list)
 
-            logging.info(f"Processed whoop data for user {user_id}: success={success_count}, errors={error_count}")
+            logging.info(
+                f"Processed whoop data for user {user_id}: success={success_count}, "
+                f"unchanged={skipped_count}, errors={error_count}"
+            )
             return error_count == 0
         except Exception as e:
             logging.error(f"Error in whoop _pull_and_push_for_user: {str(e)}")
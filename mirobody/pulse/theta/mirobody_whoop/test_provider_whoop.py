@@ -0,0 +1,66 @@
+"""Whoop pulls go through the batched, raw-data-deduplicated push."""
+
+from __future__ import annotations
+
+import time
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pytest
+
+from mirobody.pulse.theta.platform import base as base_module
+
+from .provider_whoop import ThetaWhoopProvider
+
+
+class _Whoop(ThetaWhoopProvider):
+    """Whoop provider with canned token, credentials and pulls; dedupe state in a set."""
+
+    def __init__(self, records: int) -> None:
+        super().__init__()
+        self.records = records
+        self.seen: Set[Tuple[str, str]] = set()
+        self.lookups = 0
+
+    async def get_valid_access_token(self, user_id: str) -> str:
+        return "token"
+
+    async def pull_from_vendor_api(self, access_token: str, refresh_token: str, days: Optional[int] = None) -> List[Dict[str, Any]]:
+        # Same payloads every pull, new sync timestamp
+        timestamp = int(time.time() * 1000)
+        return [
+            {"user_id": "", "data_type": "cycles", "data": [{"id": n, "strain": 10 + n}], "timestamp": timestamp}
+            for n in range(self.records)
+        ]
+
+    async def _load_processed_hashes(self, user_id: str, hashes: Set[str]) -> Set[str]:
+        self.lookups += 1
+        return {h for h in hashes if (user_id, h) in self.seen}
+
+    async def _mark_processed_hashes(self, user_id: str, hashes) -> None:
+        self.seen.update((user_id, h) for h in hashes)
+
+
+@pytest.mark.asyncio
+async def test_repeated_pull_pushes_in_batches_and_skips_unchanged_records(monkeypatch) -> None:
+    batches: List[List[Dict[str, Any]]] = []
+
+    async def push_batch(platform, provider_slug, data_list):
+        batches.append(list(data_list))
+        return [True] * len(data_list)
+
+    async def get_user_credentials(user_id, slug, auth_type):
+        return {"refresh_token": "refresh"}
+
+    monkeypatch.setattr(base_module.push_service, "push_batch", push_batch)
+    provider = _Whoop(records=7)
+    provider.PUSH_BATCH_SIZE = 3
+    monkeypatch.setattr(provider.db_service, "get_user_credentials", get_user_credentials)
+
+    assert await provider._pull_and_push_for_user({"user_id": "u1"})
+    assert [len(b) for b in batches] == [3, 3, 1]
+    assert {r["theta_user_id"] for b in batches for r in b} == {"u1"}
+
+    assert await provider._pull_and_push_for_user({"user_id": "u1"})
+    assert sum(len(b) for b in batches) == 7
+    assert provider.lookups == 2
@@ -2,10 +2,13 @@
 Base classes for Theta providers
 """
 
+import asyncio
+import hashlib
+import json
 import logging
 import uuid
 from abc import abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 from mirobody.pulse import LinkRequest
 from mirobody.pulse.base import Provider
@@ -19,7 +22,9 @@ from mirobody.pulse.data_upload.models.requests import (
     StandardPulseMetaInfo,
 )
 from mirobody.pulse.theta.platform.database_service import ThetaDatabaseService
+from mirobody.pulse.theta.platform.pull_control import filter_local_shard, get_rate_limiter, get_shard_config
 from mirobody.utils import execute_query
+from mirobody.utils.config import safe_read_cfg
 
 
 class BaseThetaProvider(Provider):
@@ -29,6 +34,15 @@ class BaseThetaProvider(Provider):
     Provides common functionality for Theta providers
     """
 
+    # Pull tuning, override per vendor
+    PULL_CONCURRENCY: Optional[int] = None  # Users pulled at once; None = THETA_PULL_CONCURRENCY (default 16)
+    PULL_RATE_LIMIT: Optional[Tuple[int, float]] = None  # Vendor API budget: (requests, seconds)
+    PUSH_BATCH_SIZE = 20  # Records pushed concurrently per batch
+
+    # Top-level keys left out of the raw-data hash (injected or sync-time values)
+    RAW_HASH_EXCLUDE_KEYS = ("theta_user_id", "msg_id", "timestamp")
+    RAW_HASH_RETENTION_DAYS = 30
+
     def __init__(self):
         self.db_service = ThetaDatabaseService()
         self.user_service = ThetaUserService()
@@ -271,9 +285,13 @@ class BaseThetaProvider(Provider):
     async def save_raw_data_to_db(self, raw_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         pass
 
-    @abstractmethod
     async def is_data_already_processed(self, raw_data: Dict[str, Any]) -> bool:
-        pass
+        """Per-record check, superseded by the set-based raw-data hash lookup in _push_new_records."""
+        return False
+
+    def pull_request_cost(self, credentials: Dict[str, Any]) -> int:
+        """Vendor API requests one user's pull spends from PULL_RATE_LIMIT."""
+        return 1
 
     async def pull_and_push(self) -> bool:
         try:
@@ -282,29 +300,53 @@ class BaseThetaProvider(Provider):
                 logging.info(f"No users found for provider {self.info.slug}")
                 return True
 
-            success_count = 0
-            error_count = 0
-
-            for cred in credentials:
-                try:
-                    user_success = await self._pull_and_push_for_user(cred)
-                    if user_success:
-                        success_count += 1
-                    else:
-                        error_count += 1
-                except Exception as e:
-                    logging.error(f"Error processing user {cred['user_id']}: {str(e)}")
-                    error_count += 1
+            workers, worker_id = get_shard_config()
+            if workers:
+                total = len(credentials)
+                credentials = filter_local_shard(credentials, workers, worker_id)
+                logging.info(f"Provider {self.info.slug} shard {worker_id}: {len(credentials)}/{total} users")
 
-            logging.info(
-                f"Pull and push completed for provider {self.info.slug}: {success_count} success, {error_count} errors"
-            )
-            return error_count == 0
+            success = await self.pull_users(credentials)
+            await self._prune_processed_hashes()
+            return success
 
         except Exception as e:
             logging.error(f"Error in pull_and_push for provider {self.info.slug}: {str(e)}")
             return False
 
+    async def pull_users(self, credentials: List[Dict[str, Any]]) -> bool:
+        """
+        Pull and push the given users concurrently
+
+        Bounded by PULL_CONCURRENCY / THETA_PULL_CONCURRENCY and the vendor's
+        PULL_RATE_LIMIT token bucket.
+
+        Returns:
+            True if every user succeeded
+        """
+        concurrency = self.PULL_CONCURRENCY or int(safe_read_cfg("THETA_PULL_CONCURRENCY") or 16)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        rate_limiter = get_rate_limiter(self.info.slug, self.PULL_RATE_LIMIT)
+
+        async def pull_user(cred: Dict[str, Any]) -> bool:
+            async with semaphore:
+                try:
+                    if rate_limiter:
+                        await rate_limiter.acquire(self.pull_request_cost(cred))
+                    return await self._pull_and_push_for_user(cred)
+                except Exception as e:
+                    logging.error(f"Error processing user {cred.get('user_id')}: {str(e)}")
+                    return False
+
+        results = await asyncio.gather(*(pull_user(cred) for cred in credentials))
+        success_count = sum(1 for ok in results if ok)
+        error_count = len(results) - success_count
+
+        logging.info(
+            f"Pull and push completed for provider {self.info.slug}: {success_count} success, {error_count} errors"
+        )
+        return error_count == 0
+
     async def _pull_and_push_for_user(self, credentials: Dict[str, Any]) -> bool:
         """
         Execute pull and push for a single user
@@ -331,44 +373,108 @@ class BaseThetaProvider(Provider):
                 logging.info(f"No data pulled for user {user_id}")
                 return True  # No data is not an error
 
-            success_count = 0
-
-            # 2. Process each data record
+            # 2. Skip already-pushed records, push the rest in batches
             for raw_data in raw_data_list:
-                try:
-                    # Inject system user ID with canonical key
-                    raw_data["theta_user_id"] = user_id
-
-                    # Check if already processed
-                    if await self.is_data_already_processed(raw_data):
-                        logging.info(f"Data already processed for user {user_id}")
-                        continue
-
-                    # Push data (function call)
-                    push_success = await push_service.push_data(
-                        platform="theta",
-                        provider_slug=self.info.slug,
-                        data=raw_data,
-                        msg_id=str(uuid.uuid4()),
-                    )
-
-                    if push_success:
-                        success_count += 1
-                        logging.info(f"Successfully pushed data for user {user_id}")
-                    else:
-                        logging.error(f"Failed to push data for user {user_id}")
-
-                except Exception as e:
-                    logging.error(f"Error processing data for user {user_id}: {str(e)}")
-                    continue
+                # Inject system user ID with canonical key
+                raw_data["theta_user_id"] = user_id
+            pushed, skipped, failed = await self._push_new_records(user_id, raw_data_list)
 
-            logging.info(f"Processed {success_count} records for user {user_id}")
+            logging.info(f"Processed {pushed} records for user {user_id} ({skipped} already processed, {failed} failed)")
             return True
 
         except Exception as e:
             logging.error(f"Error in _pull_and_push_for_user: {str(e)}")
             return False
 
+    # ========== Batched Push With Raw-Data Dedupe ==========
+
+    def raw_data_hash(self, raw_data: Dict[str, Any]) -> str:
+        """sha256 of the record's canonical JSON, without RAW_HASH_EXCLUDE_KEYS."""
+        content = {k: v for k, v in raw_data.items() if k not in self.RAW_HASH_EXCLUDE_KEYS}
+        canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def _push_new_records(self, user_id: str, raw_data_list: List[Dict[str, Any]]) -> Tuple[int, int, int]:
+        """
+        Push the records of one user that were not pushed before
+
+        One query looks up all raw-data hashes of the pull; new records are
+        pushed PUSH_BATCH_SIZE at a time and their hashes recorded after a
+        successful push, so failed records are retried on the next pull.
+
+        Returns:
+            (pushed, skipped, failed) record counts
+        """
+        hashes = [self.raw_data_hash(raw_data) for raw_data in raw_data_list]
+        processed = await self._load_processed_hashes(user_id, set(hashes))
+
+        pending: List[Tuple[str, Dict[str, Any]]] = []
+        for data_hash, raw_data in zip(hashes, raw_data_list):
+            if data_hash in processed:
+                continue
+            processed.add(data_hash)  # Same payload twice in one pull
+            pending.append((data_hash, raw_data))
+
+        pushed = failed = 0
+        for i in range(0, len(pending), self.PUSH_BATCH_SIZE):
+            batch = pending[i:i + self.PUSH_BATCH_SIZE]
+            results = await push_service.push_batch(
+                platform="theta",
+                provider_slug=self.info.slug,
+                data_list=[raw_data for _, raw_data in batch],
+            )
+            done = [data_hash for (data_hash, _), ok in zip(batch, results) if ok]
+            pushed += len(done)
+            failed += len(batch) - len(done)
+            if done:
+                await self._mark_processed_hashes(user_id, done)
+
+        if failed:
+            logging.error(f"Failed to push {failed} records for user {user_id}")
+        return pushed, len(raw_data_list) - len(pending), failed
+
+    async def _load_processed_hashes(self, user_id: str, hashes: Set[str]) -> Set[str]:
+        """Subset of `hashes` already pushed for this user; empty on lookup errors."""
+        if not hashes:
+            return set()
+        try:
+            rows = await execute_query(
+                query="""
+                    SELECT data_hash FROM theta_pull_dedupe
+                    WHERE provider_slug = :provider AND theta_user_id = :user_id AND data_hash = ANY(:hashes)
+                """,
+                params={"provider": self.info.slug, "user_id": str(user_id), "hashes": list(hashes)},
+            )
+            return {row["data_hash"] for row in rows or []}
+        except Exception as e:
+            logging.warning(f"Raw data dedupe lookup failed for {self.info.slug} user {user_id}: {str(e)}")
+            return set()
+
+    async def _mark_processed_hashes(self, user_id: str, hashes: Iterable[str]) -> None:
+        try:
+            await execute_query(
+                query="""
+                    INSERT INTO theta_pull_dedupe (provider_slug, theta_user_id, data_hash)
+                    SELECT :provider, :user_id, unnest(CAST(:hashes AS text[]))
+                    ON CONFLICT DO NOTHING
+                """,
+                params={"provider": self.info.slug, "user_id": str(user_id), "hashes": list(hashes)},
+            )
+        except Exception as e:
+            logging.warning(f"Failed to record pushed raw data for {self.info.slug} user {user_id}: {str(e)}")
+
+    async def _prune_processed_hashes(self) -> None:
+        try:
+            await execute_query(
+                query="""
+                    DELETE FROM theta_pull_dedupe
+                    WHERE provider_slug = :provider AND create_at < CURRENT_TIMESTAMP - make_interval(days => :days)
+                """,
+                params={"provider": self.info.slug, "days": self.RAW_HASH_RETENTION_DAYS},
+            )
+        except Exception as e:
+            logging.warning(f"Failed to prune raw data hashes for {self.info.slug}: {str(e)}")
+
     async def pull_from_vendor_api(self, username: str, password: str) -> List[Dict[str, Any]]:
         raise NotImplementedError("Subclasses must implement pull_from_vendor_api method")
 
@@ -0,0 +1,169 @@
+"""
+Theta Pull Benchmark: sequential vs concurrent, sharded pull_and_push
+
+Starts a fake vendor HTTP server (aiohttp, per-request latency, 429 above
+a request budget) and pulls --users linked users through BaseThetaProvider:
+
+  - sequential: one user at a time, one push per record (the previous loop),
+    timed on --baseline-users and extrapolated to --users
+  - concurrent: THETA_PULL_CONCURRENCY users at once under the vendor token
+    bucket, set-based raw-data dedupe, batched pushes
+  - sharded:    the same, split across --shards in-process workers by the
+    consistent hash ring (every user must be pulled exactly once)
+
+Pushes go to an in-memory sink and dedupe hashes to a set, so only the pull
+path is measured; a second concurrent run shows the dedupe skipping
+unchanged records.
+
+Usage:
+    python3 -m mirobody.pulse.theta.platform.bench_pull \\
+        [--users 10000] [--baseline-users 300] [--concurrency 64] \\
+        [--latency-ms 20] [--rate 5000] [--shards 4]
+"""
+
+import argparse
+import asyncio
+import time
+
+from collections import Counter
+from typing import Any, Dict, List
+from unittest import mock
+
+import aiohttp
+
+from aiohttp import web
+
+from mirobody.pulse.base import ProviderInfo
+
+from . import base as base_module
+from .base import BaseThetaProvider
+
+_RECORDS_PER_USER = 3
+
+
+def _vendor_app(latency: float) -> web.Application:
+    async def user_data(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        user = request.match_info["user"]
+        return web.json_response([
+            {"data_type": "daily_activity", "data": [{"day": f"2026-01-0{d + 1}", "steps": hash((user, d)) % 20000}]}
+            for d in range(_RECORDS_PER_USER)
+        ])
+
+    app = web.Application()
+    app.router.add_get("/users/{user}/data", user_data)
+    return app
+
+
+class _BenchProvider(BaseThetaProvider):
+    def __init__(self, base_url: str, users: int, concurrency: int, rate: int, legacy: bool = False):
+        self.base_url = base_url
+        self.users = users
+        self.PULL_CONCURRENCY = 1 if legacy else concurrency
+        self.PUSH_BATCH_SIZE = 1 if legacy else 20
+        self.PULL_RATE_LIMIT = (rate, 1.0) if rate else None
+        self.legacy = legacy
+        self.session: aiohttp.ClientSession | None = None
+        self.seen: set[tuple[str, str]] = set()
+
+    @property
+    def info(self) -> ProviderInfo:
+        return ProviderInfo(slug="theta_bench", name="Bench")
+
+    async def get_all_user_credentials(self) -> List[Dict[str, Any]]:
+        return [{"user_id": str(i), "username": str(i), "password": ""} for i in range(self.users)]
+
+    async def pull_from_vendor_api(self, username: str, password: str) -> List[Dict[str, Any]]:
+        async with self.session.get(f"{self.base_url}/users/{username}/data") as resp:
+            return [{**record, "timestamp": time.time()} for record in await resp.json()]
+
+    async def save_raw_data_to_db(self, raw_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [raw_data]
+
+    async def _load_processed_hashes(self, user_id, hashes):
+        if self.legacy:
+            return set()
+        return {h for h in hashes if (user_id, h) in self.seen}
+
+    async def _mark_processed_hashes(self, user_id, hashes) -> None:
+        if not self.legacy:
+            self.seen.update((user_id, h) for h in hashes)
+
+    async def _prune_processed_hashes(self) -> None:
+        pass
+
+
+async def _run(provider: _BenchProvider, workers: List[str] | None = None) -> float:
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+        provider.session = session
+        start = time.perf_counter()
+        if not workers:
+            with mock.patch.object(base_module, "get_shard_config", lambda: ([], "")):
+                await provider.pull_and_push()
+        else:
+            async def shard(worker_id: str) -> None:
+                # The same process plays every worker; each sees only its own slice.
+                with mock.patch.object(base_module, "get_shard_config", lambda: (workers, worker_id)):
+                    await provider.pull_and_push()
+            await asyncio.gather(*(shard(w) for w in workers))
+        return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--baseline-users", type=int, default=300, help="Users timed for the sequential run")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--rate", type=int, default=5000, help="Vendor requests per second (0 = unlimited)")
+    parser.add_argument("--shards", type=int, default=4)
+    args = parser.parse_args()
+
+    runner = web.AppRunner(_vendor_app(args.latency_ms / 1000), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    pushes: Counter = Counter()
+
+    async def push_sink(data: Dict[str, Any]) -> bool:
+        pushes[data["theta_user_id"]] += 1
+        return True
+
+    async def push_data(platform, provider_slug, data, msg_id=None):
+        return await push_sink(data)
+
+    async def push_batch(platform, provider_slug, data_list):
+        return list(await asyncio.gather(*(push_sink(d) for d in data_list)))
+
+    try:
+        with mock.patch.object(base_module.push_service, "push_data", push_data), \
+             mock.patch.object(base_module.push_service, "push_batch", push_batch):
+            print(f"{args.users} users, {_RECORDS_PER_USER} records each, vendor latency {args.latency_ms:g} ms")
+            print(f"{'mode':<24} {'users':>7} {'seconds':>9} {'users/s':>9} {'pushed':>8}")
+
+            def row(name: str, users: int, seconds: float) -> None:
+                print(f"{name:<24} {users:>7} {seconds:>9.2f} {users / seconds:>9.1f} {sum(pushes.values()):>8}")
+
+            baseline = _BenchProvider(base_url, args.baseline_users, 1, 0, legacy=True)
+            seconds = await _run(baseline)
+            row("sequential", args.baseline_users, seconds)
+            print(f"{'  -> extrapolated':<24} {args.users:>7} {seconds * args.users / args.baseline_users:>9.1f}")
+
+            pushes.clear()
+            provider = _BenchProvider(base_url, args.users, args.concurrency, args.rate)
+            row(f"concurrent x{args.concurrency}", args.users, await _run(provider))
+            row("  again (deduped)", args.users, await _run(provider))
+
+            pushes.clear()
+            workers = [f"worker-{i}" for i in range(args.shards)]
+            provider = _BenchProvider(base_url, args.users, args.concurrency, args.rate)
+            row(f"sharded {args.shards} workers", args.users, await _run(provider, workers))
+            assert len(pushes) == args.users and set(pushes.values()) == {_RECORDS_PER_USER}, "shards overlap or miss users"
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+Concurrency controls for Theta pull tasks
+
+- TokenBucket: vendor-wide request budget shared by every user pulled in
+  this process (e.g. Oura allows 5000 requests / 5 min per app)
+- HashRing: consistent-hash assignment of users to pull workers, so several
+  instances can share one provider and adding a worker only moves ~1/N users
+
+Sharding config (static):
+- THETA_PULL_WORKERS: comma-separated worker names, e.g. "pull-a,pull-b,pull-c"
+  (empty = no sharding, every instance pulls every user)
+- THETA_PULL_WORKER_ID: this instance's name, one of THETA_PULL_WORKERS
+
+Leasing config (dynamic, see distributed_lock.PullLeaseCoordinator; use
+instead of static sharding):
+- THETA_PULL_LEASES: "true" to lease user buckets instead of locking the provider
+- THETA_PULL_BUCKETS: user buckets per provider (default 64)
+- THETA_PULL_LEASE_SECONDS: lease TTL, renewed every third of it (default 60)
+- THETA_PULL_LEASE_BATCH: buckets one instance works on at once (default 4)
+"""
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import time
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from mirobody.utils.config import safe_read_cfg
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per `per` seconds, bursting up to `rate`."""
+
+    def __init__(self, rate: float, per: float):
+        self.capacity = float(rate)
+        self.fill_rate = rate / per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1) -> None:
+        tokens = min(float(tokens), self.capacity)
+        # FIFO: the lock makes waiters queue instead of starving large requests.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.fill_rate)
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes."""
+
+    def __init__(self, nodes: Iterable[str], replicas: int = 128):
+        self.nodes = sorted(set(nodes))
+        points = sorted((self._hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas))
+        self._keys = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def owner(self, key: str) -> str:
+        if not self._keys:
+            raise ValueError("HashRing has no nodes")
+        index = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._owners[index]
+
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+
+
+def get_rate_limiter(provider_slug: str, rate_limit: Optional[Tuple[int, float]]) -> Optional[TokenBucket]:
+    """Process-wide bucket for a vendor; the budget is split evenly across shards."""
+    if not rate_limit:
+        return None
+    if provider_slug not in _rate_limiters:
+        requests, seconds = rate_limit
+        workers = max(1, len(get_shard_config()[0]))
+        _rate_limiters[provider_slug] = TokenBucket(max(1.0, requests / workers), seconds)
+    return _rate_limiters[provider_slug]
+
+
+def get_shard_config() -> Tuple[List[str], str]:
+    """(worker names, this worker's name); ([], "") when sharding is off."""
+    workers = [w.strip() for w in (safe_read_cfg("THETA_PULL_WORKERS") or "").split(",") if w.strip()]
+    worker_id = (safe_read_cfg("THETA_PULL_WORKER_ID") or "").strip()
+    if workers and worker_id not in workers:
+        logging.warning(f"THETA_PULL_WORKER_ID={worker_id!r} not in THETA_PULL_WORKERS, sharding disabled")
+        return [], ""
+    return workers, worker_id
+
+
+def filter_local_shard(credentials: List[Dict], workers: List[str], worker_id: str) -> List[Dict]:
+    """Keep the credentials whose user_id hashes to this worker."""
+    if len(workers) <= 1:
+        return credentials
+    ring = HashRing(workers)
+    return [cred for cred in credentials if ring.owner(str(cred.get("user_id"))) == worker_id]
+
+
+def get_lease_config() -> Optional[Dict[str, float]]:
+    """Leasing settings, or None when THETA_PULL_LEASES is off."""
+    if str(safe_read_cfg("THETA_PULL_LEASES") or "").strip().lower() not in ("1", "true", "yes", "on"):
+        return None
+    return {
+        "buckets": max(1, int(safe_read_cfg("THETA_PULL_BUCKETS") or 64)),
+        "lease_seconds": float(safe_read_cfg("THETA_PULL_LEASE_SECONDS") or 60),
+        "batch": max(1, int(safe_read_cfg("THETA_PULL_LEASE_BATCH") or 4)),
+    }
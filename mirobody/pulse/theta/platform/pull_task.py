@@ -2,12 +2,15 @@
 Pull task implementation for Theta providers
 """
 
-import logging
+import logging, time
 
+from collections import defaultdict
 from typing import Dict, Optional
 
+from mirobody.pulse.core.distributed_lock import run_leased_round, user_bucket
 from mirobody.pulse.core.scheduler import PullTask, ScheduleType
 from .base import BaseThetaProvider
+from .pull_control import get_lease_config, get_shard_config
 
 # Provider execution interval configuration (hours)
 PROVIDER_EXECUTION_INTERVALS = {
@@ -15,7 +18,8 @@ PROVIDER_EXECUTION_INTERVALS = {
     "theta_vital": 6.0,  # Vital: execute once every 6 hours
     "theta_cgm": 1.0,  # CGM: execute once every 1 hour
     "theta_whoop": 24.0,  # Whoop: execute once every 24 hours
-    # Oura: pull every 5 min. Rate limit 5000 req/5min, 3 endpoints/user → supports ~1500 users
+    # Oura: pull every 5 min. Rate limit 5000 req/5min is enforced by ThetaOuraProvider.PULL_RATE_LIMIT;
+    # beyond that, shard users across workers with THETA_PULL_WORKERS / THETA_PULL_WORKER_ID
     "theta_oura": 5 / 60,
     "default": 1.0,  # Default: execute once every 1 hour
 }
@@ -71,6 +75,15 @@ class ThetaProviderPullTask(PullTask):
             lock_duration_hours=lock_duration,
         )
 
+        # Each shard pulls its own users, so shards must not share one lock
+        workers, worker_id = get_shard_config()
+        if workers:
+            self.lock_slug = f"{self.provider_slug}:{worker_id}"
+
+        # Leasing: all instances run every interval and share the user buckets
+        self.lease_config = get_lease_config()
+        self.use_leases = self.lease_config is not None
+
         logging.info(
             f"Initialized pull task for {self.provider_slug}: "
             f"execution_interval={execution_interval:.2f}h, "
@@ -99,8 +112,11 @@ class ThetaProviderPullTask(PullTask):
                 f"(execution_interval: {self.execution_interval_hours}h)"
             )
 
-            # Call provider's pull_and_push method
-            success = await self.provider.pull_and_push()
+            if self.use_leases:
+                success = await self._execute_leased()
+            else:
+                # Call provider's pull_and_push method
+                success = await self.provider.pull_and_push()
 
             if success:
                 logging.info(f"Pull task completed successfully for provider: {self.provider_slug}")
@@ -113,6 +129,37 @@ class ThetaProviderPullTask(PullTask):
             logging.error(f"Pull task error for provider {self.provider_slug}: {str(e)}")
             return False
 
+    async def _execute_leased(self) -> bool:
+        """Pull this interval's user buckets under per-bucket leases, alongside the other instances"""
+        credentials = await self.provider.get_all_user_credentials()
+        if not credentials:
+            logging.info(f"No users found for provider {self.provider_slug}")
+            return True
+
+        bucket_count = int(self.lease_config["buckets"])
+        users_by_bucket = defaultdict(list)
+        for cred in credentials:
+            users_by_bucket[user_bucket(cred.get("user_id"), bucket_count)].append(cred)
+
+        # Instances agree on the round from the clock, so each bucket is pulled once per interval
+        interval_seconds = max(60, int(self.execution_interval_hours * 3600))
+        round_id = str(int(time.time() // interval_seconds))
+
+        async def pull_bucket(bucket: int) -> bool:
+            return await self.provider.pull_users(users_by_bucket[bucket])
+
+        success = await run_leased_round(
+            self.provider_slug,
+            round_id,
+            sorted(users_by_bucket),
+            pull_bucket,
+            round_ttl_seconds=interval_seconds * 2,
+            lease_seconds=self.lease_config["lease_seconds"],
+            batch=int(self.lease_config["batch"]),
+        )
+        await self.provider._prune_processed_hashes()
+        return success
+
     def get_provider_config(self) -> Dict:
         """Get provider configuration information"""
         return {
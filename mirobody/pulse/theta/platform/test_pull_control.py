@@ -0,0 +1,166 @@
+"""Concurrent, sharded and deduplicated Theta pulls against an in-memory fake vendor."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from collections import Counter
+from typing import Any, Dict, List
+
+import pytest
+
+from mirobody.pulse.base import ProviderInfo
+
+from . import base as base_module
+from . import pull_control
+from .base import BaseThetaProvider
+from .pull_control import HashRing, TokenBucket, filter_local_shard
+
+
+class _FakeVendorProvider(BaseThetaProvider):
+    """Each user returns the same 3 records on every pull; dedupe state lives in a set."""
+
+    PULL_CONCURRENCY = 8
+    PUSH_BATCH_SIZE = 2
+
+    def __init__(self, users: int, latency: float = 0.0):
+        self.users = users
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.seen: set[tuple[str, str]] = set()
+        self.lookups = 0
+
+    @property
+    def info(self) -> ProviderInfo:
+        return ProviderInfo(slug="theta_fake", name="Fake")
+
+    async def get_all_user_credentials(self) -> List[Dict[str, Any]]:
+        return [{"user_id": str(i), "username": f"u{i}", "password": ""} for i in range(self.users)]
+
+    async def pull_from_vendor_api(self, username: str, password: str) -> List[Dict[str, Any]]:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return [{"data_type": "steps", "day": d, "value": 1000 + d, "timestamp": time.time()} for d in range(3)]
+        finally:
+            self.in_flight -= 1
+
+    async def save_raw_data_to_db(self, raw_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [raw_data]
+
+    async def _load_processed_hashes(self, user_id: str, hashes: set[str]) -> set[str]:
+        self.lookups += 1
+        return {h for h in hashes if (user_id, h) in self.seen}
+
+    async def _mark_processed_hashes(self, user_id: str, hashes) -> None:
+        self.seen.update((user_id, h) for h in hashes)
+
+    async def _prune_processed_hashes(self) -> None:
+        pass
+
+
+@pytest.fixture
+def pushed(monkeypatch) -> List[List[Dict[str, Any]]]:
+    batches: List[List[Dict[str, Any]]] = []
+
+    async def push_batch(platform, provider_slug, data_list):
+        batches.append(list(data_list))
+        return [True] * len(data_list)
+
+    monkeypatch.setattr(base_module.push_service, "push_batch", push_batch)
+    monkeypatch.setattr(base_module, "get_shard_config", lambda: ([], ""))
+    return batches
+
+
+@pytest.mark.asyncio
+async def test_pulls_users_concurrently_under_the_limit(pushed) -> None:
+    provider = _FakeVendorProvider(users=40, latency=0.05)
+
+    start = time.perf_counter()
+    assert await provider.pull_and_push()
+    elapsed = time.perf_counter() - start
+
+    assert provider.max_in_flight == 8
+    assert elapsed < 40 * 0.05 / 2
+    assert sum(len(b) for b in pushed) == 120
+    assert max(len(b) for b in pushed) == 2
+
+
+@pytest.mark.asyncio
+async def test_second_pull_is_deduplicated_with_one_lookup_per_user(pushed) -> None:
+    provider = _FakeVendorProvider(users=10)
+    assert await provider.pull_and_push()
+    assert provider.lookups == 10
+    first = sum(len(b) for b in pushed)
+
+    # Same records, new sync timestamps: nothing is pushed again.
+    assert await provider.pull_and_push()
+    assert provider.lookups == 20
+    assert sum(len(b) for b in pushed) == first == 30
+    assert {r["theta_user_id"] for b in pushed for r in b} == {str(i) for i in range(10)}
+
+
+@pytest.mark.asyncio
+async def test_failed_pushes_are_retried(monkeypatch) -> None:
+    calls = Counter()
+
+    async def push_batch(platform, provider_slug, data_list):
+        calls["records"] += len(data_list)
+        return [r["day"] != 1 or calls["records"] > 3 for r in data_list]
+
+    monkeypatch.setattr(base_module.push_service, "push_batch", push_batch)
+    monkeypatch.setattr(base_module, "get_shard_config", lambda: ([], ""))
+
+    provider = _FakeVendorProvider(users=1)
+    assert await provider.pull_and_push()
+    assert calls["records"] == 3
+    assert await provider.pull_and_push()
+    assert calls["records"] == 4  # Only the failed day is pushed again
+
+
+def test_hash_ignores_injected_and_sync_keys() -> None:
+    provider = _FakeVendorProvider(users=0)
+    a = {"data_type": "sleep", "data": [{"day": "2026-01-01"}], "timestamp": 1, "theta_user_id": "1"}
+    b = {"theta_user_id": "1", "timestamp": 2, "data": [{"day": "2026-01-01"}], "data_type": "sleep", "msg_id": "x"}
+    assert provider.raw_data_hash(a) == provider.raw_data_hash(b)
+    assert provider.raw_data_hash(a) != provider.raw_data_hash({**a, "data": [{"day": "2026-01-02"}]})
+
+
+def test_hash_ring_is_balanced_and_stable() -> None:
+    users = [{"user_id": str(i)} for i in range(10000)]
+    workers = ["w0", "w1", "w2", "w3"]
+
+    shards = {w: filter_local_shard(users, workers, w) for w in workers}
+    assert sum(len(s) for s in shards.values()) == len(users)
+    assert all(1800 < len(s) < 3200 for s in shards.values())
+
+    # Adding a worker only moves users onto the new worker.
+    before, after = HashRing(workers), HashRing(workers + ["w4"])
+    moved = [u for u in users if before.owner(u["user_id"]) != after.owner(u["user_id"])]
+    assert all(after.owner(u["user_id"]) == "w4" for u in moved)
+    assert len(moved) < len(users) * 0.3
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate() -> None:
+    bucket = TokenBucket(rate=10, per=0.5)
+
+    start = time.perf_counter()
+    for _ in range(20):
+        await bucket.acquire()
+    elapsed = time.perf_counter() - start
+
+    # 10 burst tokens, then 10 more at 20/s.
+    assert 0.4 < elapsed < 1.0
+
+
+def test_rate_limit_is_split_across_shards(monkeypatch) -> None:
+    monkeypatch.setattr(pull_control, "_rate_limiters", {})
+    monkeypatch.setattr(pull_control, "get_shard_config", lambda: (["a", "b"], "a"))
+    bucket = pull_control.get_rate_limiter("theta_oura", (5000, 300))
+    assert bucket.capacity == 2500
+    assert pull_control.get_rate_limiter("theta_oura", (5000, 300)) is bucket
+    assert pull_control.get_rate_limiter("theta_none", None) is None
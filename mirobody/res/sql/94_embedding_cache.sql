@@ -0,0 +1,15 @@
+-- Content-addressed cache behind mirobody.utils.embedding.text_embedding
+--
+-- cache_key is sha256(provider, model, dim, normalized text) in hex, so a
+-- model or dimension change never reads stale vectors. embedding holds the
+-- vector as little-endian fp16 (dim * 2 bytes). Rows are immutable; drop a
+-- retired model with DELETE ... WHERE provider = ... AND model = ....
+
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    cache_key   CHAR(64) PRIMARY KEY,
+    provider    TEXT NOT NULL,
+    model       TEXT NOT NULL,
+    dim         INTEGER NOT NULL,
+    embedding   BYTEA NOT NULL,
+    created_at  TIMESTAMPTZ DEFAULT NOW()
+);
@@ -0,0 +1,16 @@
+-- Trigram index behind PostgresBackend grep (PostgresLangGraphStore.grep):
+--
+--   SELECT ... FROM deep_agent_workspace
+--   WHERE session_id = :session_id AND user_id = :user_id
+--     AND content ~* :pattern
+--
+-- pg_trgm extracts the literal trigrams of the regex and answers the
+-- content test from this index, so only candidate files are split into
+-- lines and matched row by row. pg_trgm itself is created in 00_init_schema.sql.
+--
+-- Prod rollout on a large table: prefer running as
+--   CREATE INDEX CONCURRENTLY ...
+-- manually; plain CREATE INDEX blocks writes to the table while it builds.
+
+CREATE INDEX IF NOT EXISTS idx_agent_workspace_content_trgm
+    ON deep_agent_workspace USING gin (content gin_trgm_ops);
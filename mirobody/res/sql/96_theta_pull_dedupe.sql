@@ -0,0 +1,18 @@
+-- Raw-data hashes of records pushed by Theta pull tasks
+--
+-- BaseThetaProvider._push_new_records looks up every hash of one user's pull
+-- in a single query (data_hash = ANY(:hashes)) and skips records already
+-- pushed; hashes are inserted after a successful push. data_hash is
+-- sha256 of the record's canonical JSON (see BaseThetaProvider.raw_data_hash).
+-- Rows older than RAW_HASH_RETENTION_DAYS are pruned after each pull run.
+
+CREATE TABLE IF NOT EXISTS theta_pull_dedupe (
+    provider_slug   VARCHAR(100) NOT NULL,
+    theta_user_id   VARCHAR(100) NOT NULL,
+    data_hash       CHAR(64) NOT NULL,
+    create_at       TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (provider_slug, theta_user_id, data_hash)
+);
+
+CREATE INDEX IF NOT EXISTS idx_theta_pull_dedupe_create_at
+    ON theta_pull_dedupe (provider_slug, create_at);
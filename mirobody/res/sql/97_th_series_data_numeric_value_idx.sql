@@ -0,0 +1,23 @@
+-- Partial covering index behind the insight engine's cohort fetch
+-- (InsightDatabaseService.get_cohort_daily_values):
+--
+--   SELECT user_id, indicator, start_time::date, value::double precision
+--   FROM th_series_data
+--   WHERE user_id = ANY(:user_ids) AND indicator = ANY(:indicators)
+--     AND deleted = 0
+--     AND start_time >= :start_date AND start_time < :end_date
+--     AND value ~ '^-?[0-9]+\.?[0-9]*$'
+--
+-- The WHERE below is the query's numeric guard verbatim, so only rows whose
+-- value casts cleanly are in the index: the regex is evaluated once at write
+-- time instead of on every row of every fetch, and the cast can never fail.
+-- INCLUDE (value) lets the fetch run as an index-only scan.
+--
+-- Prod rollout on a large table: prefer running as
+--   CREATE INDEX CONCURRENTLY ...
+-- manually; plain CREATE INDEX blocks writes to the table while it builds.
+
+CREATE INDEX IF NOT EXISTS idx_th_series_data_numeric_value
+    ON th_series_data (user_id, indicator, start_time)
+    INCLUDE (value)
+    WHERE deleted = 0 AND value ~ '^-?[0-9]+\.?[0-9]*$';
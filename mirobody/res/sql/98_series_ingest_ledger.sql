@@ -0,0 +1,50 @@
+-- Append-only ingest ledger behind the monitor report tables (TH-141)
+--
+-- Every series_data write by HealthDataRepository (and the indicator rename
+-- in ManageDatabaseService) appends, in the same statement, one row per
+-- (hour, source, indicator, user) it touched with signed deltas: +1 for each
+-- row written, -1 for the previous version of each row it overwrote.
+-- MonitorCollectorService folds the ledger into platform_hourly_profile and
+-- indicator_daily_profile instead of rescanning series_data.
+--
+-- xid is the writing transaction. The collector only folds rows whose xid is
+-- below pg_snapshot_xmin() of its snapshot (every such transaction has
+-- finished), and keeps that horizon per report in monitor_ledger_watermark,
+-- so rows committed out of xid order are never skipped.
+--
+-- The value distribution of a changed daily slice (min/max/percentiles)
+-- cannot be folded from counts and is still read from series_data, restricted
+-- to the changed indicators; idx_series_data_indicator_time serves that read.
+--
+-- Prod rollout: run MonitorCollectorService.rebuild_ledger (POST
+-- /pulse/monitor/backfill?rebuild_ledger=true) once after creating the table
+-- to seed the ledger from existing series_data. On a large series_data prefer
+-- creating the index manually as CREATE INDEX CONCURRENTLY ...; plain CREATE
+-- INDEX blocks writes to the table while it builds.
+
+CREATE TABLE IF NOT EXISTS series_ingest_ledger (
+    id            bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    xid           xid8 NOT NULL DEFAULT pg_current_xact_id(),
+    stat_hour     timestamp without time zone NOT NULL,
+    source        varchar(128) NOT NULL,
+    indicator     varchar(200) NOT NULL,
+    user_id       varchar(200) NOT NULL,
+    records       integer NOT NULL DEFAULT 0,   -- rows
+    filtered      integer NOT NULL DEFAULT 0,   -- rows with task_id = 'filtered_out_of_range'
+    non_numeric   integer NOT NULL DEFAULT 0,   -- rows whose value is not numeric
+    numeric_clean integer NOT NULL DEFAULT 0,   -- numeric rows that are not filtered
+    created_at    timestamp with time zone NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_series_ingest_ledger_stat_hour ON series_ingest_ledger (stat_hour);
+CREATE INDEX IF NOT EXISTS idx_series_ingest_ledger_xid ON series_ingest_ledger (xid);
+
+
+CREATE TABLE IF NOT EXISTS monitor_ledger_watermark (
+    name        varchar(64) PRIMARY KEY,
+    last_xid    xid8 NOT NULL,
+    updated_at  timestamp with time zone NOT NULL DEFAULT now()
+);
+
+
+CREATE INDEX IF NOT EXISTS idx_series_data_indicator_time ON series_data (indicator, time);
@@ -0,0 +1,35 @@
+-- Checkpoints of aggregate indicator time-range recalculations
+--
+-- AggregateIndicatorService.recalculate_date_range splits a range into units
+-- (at most 30 days of series_data for a slice of users) and records each unit
+-- here, with the exact users it covered, once all of its summaries are saved.
+-- Re-running the same range after an interruption skips those users for that
+-- chunk; users that got data in between are recalculated. A run that finishes
+-- deletes its rows.
+--
+-- run_key is "<start date>..<end date>:<user_id or *>".
+--
+-- aggregate_recalc_run holds one lease per running run_key, so a second
+-- caller for the same range is turned away instead of writing the same
+-- checkpoints. The owner renews the lease while it runs; an expired lease
+-- (crashed process) can be taken over.
+--
+-- Prod rollout: plain CREATE, no backfill; safe to apply at any time.
+
+CREATE TABLE IF NOT EXISTS aggregate_recalc_checkpoint (
+    run_key        varchar(200) NOT NULL,
+    range_start    timestamp without time zone NOT NULL,
+    range_end      timestamp without time zone NOT NULL,
+    first_user_id  varchar NOT NULL,
+    user_ids       varchar[] NOT NULL,
+    summaries      integer NOT NULL DEFAULT 0,
+    completed_at   timestamp with time zone NOT NULL DEFAULT now(),
+    PRIMARY KEY (run_key, range_start, first_user_id)
+);
+
+CREATE TABLE IF NOT EXISTS aggregate_recalc_run (
+    run_key      varchar(200) PRIMARY KEY,
+    owner        varchar(128) NOT NULL,
+    started_at   timestamp with time zone NOT NULL DEFAULT now(),
+    lease_until  timestamp with time zone NOT NULL
+);
@@ -0,0 +1,47 @@
+-- Dirty buckets behind aggregate indicator trigger discovery
+--
+-- Every series_data write by HealthDataRepository (and the indicator rename
+-- in ManageDatabaseService) upserts, in the same statement, one row per
+-- (user, indicator, timezone, local day) it touched and bumps its version.
+-- The local day of a sleep indicator starts at 18:00, of any other at 00:00;
+-- data_begin_utc is that start in UTC, as SQLAggregator expects it.
+--
+-- AggregateIndicatorService drains the table instead of scanning series_data
+-- by update_time: workers claim buckets with FOR UPDATE SKIP LOCKED under a
+-- lease, aggregate them, then delete the ones whose version did not move
+-- while they were claimed and release the rest. A bucket marked by a write
+-- that is still open is skipped until that write commits, so writes that
+-- commit out of order are never missed.
+--
+-- Prod rollout: after deploying, trigger the aggregate_indicator task once
+-- with force=true; with no cursor it seeds the table from the last 24 hours
+-- of series_data updates.
+
+CREATE TABLE IF NOT EXISTS aggregate_dirty_bucket (
+    user_id          varchar NOT NULL,
+    indicator        varchar NOT NULL,
+    timezone         varchar(50) NOT NULL,
+    local_day        date NOT NULL,
+    data_begin_utc   timestamp without time zone NOT NULL,
+    version          bigint NOT NULL DEFAULT 1,
+    marked_at        timestamp with time zone NOT NULL DEFAULT now(),
+    claimed_by       varchar(128),
+    claimed_version  bigint,
+    lease_until      timestamp with time zone,
+    PRIMARY KEY (user_id, indicator, timezone, local_day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_aggregate_dirty_bucket_marked_at ON aggregate_dirty_bucket (marked_at);
+
+
+-- True if `tz` is a time zone AT TIME ZONE accepts. The ingest statement only
+-- marks rows whose timezone passes, so a malformed timezone cannot fail a write.
+CREATE OR REPLACE FUNCTION is_valid_timezone(tz TEXT)
+RETURNS BOOLEAN AS $$
+BEGIN
+    PERFORM now() AT TIME ZONE tz;
+    RETURN true;
+EXCEPTION WHEN invalid_parameter_value THEN
+    RETURN false;
+END;
+$$ LANGUAGE plpgsql STABLE;
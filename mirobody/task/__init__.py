@@ -11,6 +11,7 @@ from __future__ import annotations
 from .base import BaseRedisTask
 from .loader import load_tasks_from_directories as load_tasks_from_directories
 
+from .apple_health_ingest import AppleHealthIngestTask as AppleHealthIngestTask
 from .indicator_sync import IndicatorSyncTask as IndicatorSyncTask
 from .profile_refresh import ProfileRefreshTask as ProfileRefreshTask
 
@@ -0,0 +1,181 @@
+"""Apple Health ingest task.
+
+Producer (pulse apple router): the upload is parsed as a stream and every
+validated batch of records is `enqueue_batch`ed under a job id into the job's
+staging list; once the whole body has parsed, `publish_job` moves the staged
+batches to the queue (a body that fails to parse is `discard_job`ed and
+nothing of it is written). The request returns 202 before any record is
+written. `create_job` / `finish_job` / `get_job` keep the job's progress in a
+Redis hash that the status endpoint reads.
+
+Consumer (worker): one batch per message, handed to the Apple platform's
+`post_data` exactly as the synchronous endpoint did. Reliable mode, so a
+worker crash re-delivers the batch instead of dropping it.
+
+Job hash `apple_health_job:{job_id}` (expires after `job_ttl_sec`):
+  user_id, request_id, state (receiving | queued | failed), error,
+  batches, records, invalid_records, batches_done, batches_failed,
+  records_done, created_at, updated_at
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+
+from typing import Any, ClassVar
+
+from .base import BaseRedisTask
+
+#-----------------------------------------------------------------------------
+
+class AppleHealthIngestTask(BaseRedisTask):
+    """Queue payload: JSON ``{job_id, batch, user_id, request_id, meta_info, records}``."""
+
+    queue_key = "apple_health_ingest_queue"
+    reliable = True
+    drain_cap = 1  # One batch per lease: a retry never replays finished batches
+    lease_sec = 600
+    max_queue_len = 20000  # ~20M records in flight; enqueue raises beyond that
+
+    job_key_prefix: ClassVar[str] = "apple_health_job"
+    job_ttl_sec: ClassVar[int] = 7 * 24 * 3600
+
+    _platform: Any = None
+
+    @classmethod
+    def job_key(cls, job_id: str) -> str:
+        return f"{cls.job_key_prefix}:{job_id}"
+
+    @classmethod
+    def staged_key(cls, job_id: str) -> str:
+        return f"{cls.job_key_prefix}:{job_id}:staged"
+
+    # ---------- Producer side ----------
+
+    @classmethod
+    async def create_job(cls, job_id: str, user_id: str) -> None:
+        redis = await cls._get_producer_redis()
+        now = str(int(time.time()))
+        await redis.hset(cls.job_key(job_id), mapping={
+            "user_id": user_id, "state": "receiving", "created_at": now, "updated_at": now,
+        })
+        await redis.expire(cls.job_key(job_id), cls.job_ttl_sec)
+
+    @classmethod
+    async def enqueue_batch(cls, job_id: str, payload: dict[str, Any]) -> None:
+        """Stage one validated batch until `publish_job`. Unlike `enqueue`, every
+        failure raises: a dropped batch would silently lose health records."""
+        redis = await cls._get_producer_redis()
+        if cls.max_queue_len > 0 and await redis.llen(cls.queue_key) >= cls.max_queue_len:
+            raise RuntimeError(f"{cls.__name__}: queue {cls.queue_key} is full")
+        staged = cls.staged_key(job_id)
+        await redis.rpush(staged, json.dumps({"job_id": job_id, **payload}, ensure_ascii=False))
+        await redis.expire(staged, cls.job_ttl_sec)
+
+    @classmethod
+    async def publish_job(cls, job_id: str) -> int:
+        """Move the job's staged batches to the queue, in batch order; returns how many."""
+        redis = await cls._get_producer_redis()
+        staged = cls.staged_key(job_id)
+        published = 0
+        while await redis.lmove(staged, cls.queue_key, "LEFT", "LEFT") is not None:
+            published += 1
+        return published
+
+    @classmethod
+    async def discard_job(cls, job_id: str) -> None:
+        """Drop the batches staged for a job whose upload failed."""
+        redis = await cls._get_producer_redis()
+        await redis.delete(cls.staged_key(job_id))
+
+    @classmethod
+    async def finish_job(cls, job_id: str, fields: dict[str, Any]) -> None:
+        """Record the upload outcome (`state` queued or failed, counters, error)."""
+        redis = await cls._get_producer_redis()
+        await redis.hset(cls.job_key(job_id), mapping={
+            **{k: "" if v is None else str(v) for k, v in fields.items()},
+            "updated_at": str(int(time.time())),
+        })
+
+    @classmethod
+    async def get_job(cls, job_id: str) -> dict[str, Any] | None:
+        redis = await cls._get_producer_redis()
+        job = await redis.hgetall(cls.job_key(job_id))
+        if not job:
+            return None
+
+        counters = ("batches", "records", "invalid_records", "batches_done", "batches_failed", "records_done")
+        result: dict[str, Any] = {k: v for k, v in job.items() if k not in counters}
+        result.update({k: int(job.get(k) or 0) for k in counters})
+
+        # Derived status: the upload state until it is queued, then worker progress.
+        state = job.get("state", "receiving")
+        finished = result["batches_done"] + result["batches_failed"]
+        if state != "queued":
+            result["status"] = state
+        elif finished < result["batches"]:
+            result["status"] = "processing"
+        elif result["batches_failed"]:
+            result["status"] = "completed_with_errors"
+        else:
+            result["status"] = "completed"
+        return result
+
+    # ---------- Consumer side ----------
+
+    @classmethod
+    def _get_platform(cls) -> Any:
+        # Lazy import breaks mirobody.task ↔ mirobody.pulse cycle; the worker
+        # process has no platform_manager, so build the platform on demand.
+        from ..pulse.manager import platform_manager
+
+        platform = platform_manager.get_platform("apple")
+        if platform is not None:
+            return platform
+        if cls._platform is None:
+            from ..pulse.apple.platform import AppleHealthPlatform
+            cls._platform = AppleHealthPlatform()
+        return cls._platform
+
+    async def consume(self, messages: list[str]) -> None:
+        from ..pulse.apple.models import AppleHealthRecord, MetaInfo
+
+        for message in messages:
+            payload = json.loads(message)
+            job_id = payload["job_id"]
+            key = type(self).job_key(job_id)
+
+            if await self._redis.hget(key, "state") == "failed":
+                logging.info(f"apple_health_ingest skip: job {job_id} upload failed, batch {payload.get('batch')}")
+                continue
+
+            # Records were validated before they were queued.
+            records = [AppleHealthRecord.model_construct(**r) for r in payload["records"]]
+            platform_data = {
+                "user_id": payload["user_id"],
+                "request_id": payload.get("request_id"),
+                "health_data": records,
+                "meta_info": MetaInfo.model_validate(payload["meta_info"]),
+            }
+            msg_id = f"apple_health_{payload['user_id']}_{job_id}_{payload.get('batch', 0)}"
+
+            t1 = time.time()
+            success = await type(self)._get_platform().post_data(
+                provider_slug="apple_health", data=platform_data, msg_id=msg_id,
+            )
+
+            if success:
+                await self._redis.hincrby(key, "batches_done", 1)
+                await self._redis.hincrby(key, "records_done", len(records))
+            else:
+                await self._redis.hincrby(key, "batches_failed", 1)
+            await self._redis.hset(key, "updated_at", str(int(time.time())))
+
+            logging.info(
+                f"apple_health_ingest batch done: job={job_id}, batch={payload.get('batch')}, "
+                f"records={len(records)}, success={success}, time_cost={(time.time() - t1) * 1e3:.0f}"
+            )
+
+#-----------------------------------------------------------------------------
@@ -11,6 +11,13 @@ so producers never thread redis through); `run` drain-batches via
 BLPOP on an instance-owned redis. Domain subclasses extend `BaseRedisTask`,
 declare `queue_key`, and implement `consume`.
 
+Setting `reliable = True` on a subclass switches the consumer to
+at-least-once delivery: items are BLMOVEd into a per-consumer processing
+list, leased in a sorted set, and only dropped once `consume` succeeds. A
+reaper (run by every consumer) re-queues expired leases and the processing
+lists of consumers that stopped heartbeating; items re-delivered more than
+`max_retries` times land on a dead-letter list instead.
+
 Future backends (SQS, Postgres LISTEN/NOTIFY, in-memory for tests, …) can
 derive from `BaseTask` directly as siblings of `BaseRedisTask`.
 """
@@ -20,7 +27,10 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import os
+import socket
 import time
+import uuid
 
 from typing import Any, ClassVar
 from redis.asyncio import Redis
@@ -58,19 +68,63 @@ class BaseRedisTask(BaseTask):
     retry_sleep_sec: ClassVar[int] = 5
     heartbeat_sec: ClassVar[int] = 600  # log "still alive" every N seconds while idle
 
+    # Reliable (at-least-once) mode. Off by default: plain BLPOP + LPOP drain,
+    # where a crash mid-batch loses the popped items.
+    reliable: ClassVar[bool] = False
+    lease_sec: ClassVar[int] = 300  # in-flight deadline; renewed while consume runs
+    max_retries: ClassVar[int] = 3  # re-deliveries before an item is dead-lettered
+    reap_interval_sec: ClassVar[int] = 30
+
     # Shared across all BaseRedisTask subclasses — one connection pool per process.
     # Subclasses wanting a dedicated client can override `_get_producer_redis`.
     _producer_redis: ClassVar[Redis | None] = None
 
-    def __init__(self, redis: Redis) -> None:
+    def __init__(self, redis: Redis, consumer_id: str = "") -> None:
         # Consumer-only: worker loops hold their own redis so BLPOP's long-held
         # connection doesn't pin a slot from the producer pool.
         cls = type(self)
         if not cls.queue_key:
             raise RuntimeError(f"{cls.__name__}.queue_key must be set")
+        if cls.reliable and cls.lease_sec <= cls.blpop_timeout_sec:
+            raise RuntimeError(f"{cls.__name__}.lease_sec must exceed blpop_timeout_sec")
+        if "\n" in consumer_id:
+            raise RuntimeError(f"{cls.__name__}: consumer_id must not contain newlines")
 
         self._redis = redis
 
+        # Reliable-mode keys. A stable `consumer_id` lets a restarted worker
+        # reclaim its own processing list immediately instead of waiting for
+        # the reaper to notice the old one went quiet.
+        self._consumer_id = consumer_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._processing_key = cls.processing_key(self._consumer_id)
+        self._next_reap = 0.0
+
+    @classmethod
+    def processing_key(cls, consumer_id: str) -> str:
+        return f"{cls.queue_key}:processing:{consumer_id}"
+
+    @classmethod
+    def lease_key(cls) -> str:
+        """Sorted set of newline-joined (consumer_id, message) -> lease deadline (epoch seconds)."""
+        return f"{cls.queue_key}:leases"
+
+    @classmethod
+    def retry_key(cls) -> str:
+        """Hash of message -> re-delivery count."""
+        return f"{cls.queue_key}:retries"
+
+    @classmethod
+    def consumers_key(cls) -> str:
+        return f"{cls.queue_key}:consumers"
+
+    @classmethod
+    def alive_key(cls, consumer_id: str) -> str:
+        return f"{cls.queue_key}:alive:{consumer_id}"
+
+    @classmethod
+    def dead_letter_key(cls) -> str:
+        return f"{cls.queue_key}:dead"
+
     # ---------- Producer side ----------
 
     @classmethod
@@ -123,9 +177,18 @@ class BaseRedisTask(BaseTask):
         cls = type(self)
         logging.info(f"{cls.__name__} starting (queue={cls.queue_key}, heartbeat={cls.heartbeat_sec}s)")
 
+        if cls.reliable:
+            await self._register_consumer()
+
         last_active = time.monotonic()
         while not stop_event.is_set():
             try:
+                if cls.reliable:
+                    await self._redis.set(cls.alive_key(self._consumer_id), "1", ex=cls.lease_sec)
+                    if time.monotonic() >= self._next_reap:
+                        await self.reap()
+                        self._next_reap = time.monotonic() + cls.reap_interval_sec
+
                 batch = await self._pop_batch()
                 if not batch:
                     now = time.monotonic()
@@ -133,7 +196,10 @@ class BaseRedisTask(BaseTask):
                         logging.info(f"{cls.__name__} alive (queue {cls.queue_key} empty, idle {int(now - last_active)}s)")
                         last_active = now
                     continue
-                await self.consume(batch)
+                if cls.reliable:
+                    await self._consume_leased(batch)
+                else:
+                    await self.consume(batch)
                 last_active = time.monotonic()
             except asyncio.CancelledError:
                 logging.info(f"{cls.__name__} cancelled")
@@ -146,6 +212,9 @@ class BaseRedisTask(BaseTask):
 
     async def _pop_batch(self) -> list[str]:
         cls = type(self)
+        if cls.reliable:
+            return await self._pop_batch_reliable()
+
         popped = await self._redis.blpop(cls.queue_key, timeout=cls.blpop_timeout_sec)
         if popped is None:
             return []
@@ -160,4 +229,131 @@ class BaseRedisTask(BaseTask):
 
         return batch
 
+    # ---------- Reliable mode ----------
+
+    def _lease_member(self, message: str, consumer_id: str | None = None) -> str:
+        return f"{consumer_id or self._consumer_id}\n{message}"
+
+    async def _register_consumer(self) -> None:
+        cls = type(self)
+        await self._redis.sadd(cls.consumers_key(), self._consumer_id)
+        await self._redis.set(cls.alive_key(self._consumer_id), "1", ex=cls.lease_sec)
+
+        # Leftovers from a previous run under the same consumer_id
+        recovered = await self._recover_consumer(self._consumer_id)
+        if recovered:
+            logging.warning(f"{cls.__name__} re-queued {recovered} in-flight item(s) from a previous run")
+
+    async def _pop_batch_reliable(self) -> list[str]:
+        cls = type(self)
+        first = await self._redis.blmove(
+            cls.queue_key, self._processing_key, cls.blpop_timeout_sec, "LEFT", "RIGHT",
+        )
+        if first is None:
+            return []
+
+        batch = [first]
+        for _ in range(cls.drain_cap - 1):
+            more = await self._redis.lmove(cls.queue_key, self._processing_key, "LEFT", "RIGHT")
+            if more is None:
+                break
+            batch.append(more)
+
+        deadline = time.time() + cls.lease_sec
+        await self._redis.zadd(cls.lease_key(), {self._lease_member(m): deadline for m in batch})
+        return batch
+
+    async def _consume_leased(self, batch: list[str]) -> None:
+        """`consume` with lease renewal; ack on success, re-queue on failure."""
+        renewer = asyncio.create_task(self._renew_leases(batch))
+        try:
+            await self.consume(batch)
+        except asyncio.CancelledError:
+            # Shutdown: leave the batch leased, the reaper hands it back
+            raise
+        except Exception:
+            # Count the failure now rather than waiting out the lease
+            for message in batch:
+                await self._recover(self._consumer_id, message)
+            raise
+        finally:
+            renewer.cancel()
+
+        await self._ack(batch)
+
+    async def _renew_leases(self, batch: list[str]) -> None:
+        cls = type(self)
+        interval = max(cls.lease_sec / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                deadline = time.time() + cls.lease_sec
+                await self._redis.zadd(cls.lease_key(), {self._lease_member(m): deadline for m in batch}, xx=True)
+                await self._redis.set(cls.alive_key(self._consumer_id), "1", ex=cls.lease_sec)
+            except Exception as e:
+                logging.warning(f"{cls.__name__} lease renewal failed: {e}")
+
+    async def _ack(self, batch: list[str]) -> None:
+        cls = type(self)
+        # The processing list only ever holds the batch being consumed
+        await self._redis.delete(self._processing_key)
+        await self._redis.zrem(cls.lease_key(), *{self._lease_member(m) for m in batch})
+        await self._redis.hdel(cls.retry_key(), *set(batch))
+
+    async def _recover(self, consumer_id: str, message: str) -> bool:
+        """Hand one in-flight item back to the queue (or the dead-letter list).
+
+        LREM is the claim: only the caller that actually removes the item from
+        the processing list re-queues it, so concurrent reapers and a late ack
+        never double-deliver."""
+        cls = type(self)
+        removed = await self._redis.lrem(cls.processing_key(consumer_id), 1, message)
+        await self._redis.zrem(cls.lease_key(), self._lease_member(message, consumer_id))
+        if not removed:
+            return False
+
+        retries = await self._redis.hincrby(cls.retry_key(), message, 1)
+        if retries > cls.max_retries:
+            await self._redis.rpush(cls.dead_letter_key(), message)
+            await self._redis.hdel(cls.retry_key(), message)
+            logging.error(f"{cls.__name__} dead-lettered after {retries - 1} retries: {message}")
+        else:
+            # Tail of the queue: fresh work goes first, a poison item can't hot-loop
+            await self._redis.rpush(cls.queue_key, message)
+        return True
+
+    async def _recover_consumer(self, consumer_id: str) -> int:
+        cls = type(self)
+        recovered = 0
+        for message in await self._redis.lrange(cls.processing_key(consumer_id), 0, -1):
+            if await self._recover(consumer_id, message):
+                recovered += 1
+        return recovered
+
+    async def reap(self) -> int:
+        """Re-queue expired leases and the in-flight items of dead consumers.
+
+        Safe to run from every consumer concurrently. Returns the number of
+        items handed back (re-queued or dead-lettered)."""
+        cls = type(self)
+        recovered = 0
+
+        expired = await self._redis.zrangebyscore(cls.lease_key(), "-inf", time.time(), start=0, num=cls.drain_cap)
+        for member in expired:
+            consumer_id, _, message = member.partition("\n")
+            if await self._recover(consumer_id, message):
+                recovered += 1
+
+        # Consumers that crashed between BLMOVE and ZADD leave un-leased items
+        for consumer_id in await self._redis.smembers(cls.consumers_key()):
+            if consumer_id == self._consumer_id or await self._redis.exists(cls.alive_key(consumer_id)):
+                continue
+            recovered += await self._recover_consumer(consumer_id)
+            if not await self._redis.llen(cls.processing_key(consumer_id)):
+                await self._redis.srem(cls.consumers_key(), consumer_id)
+
+        if recovered:
+            logging.warning(f"{cls.__name__} reaper re-queued {recovered} item(s) on {cls.queue_key}")
+        return recovered
+
 #-----------------------------------------------------------------------------
@@ -6,7 +6,7 @@ need to re-declare this package in their `TASK_DIRS`.
 
 Each extra entry in `dirs` may be a filesystem path or a dotted package name
 (e.g. `myproj.tasks`); for package names, `importlib.util.find_spec` resolves
-the on-disk location. Every non-private `.py` module is imported, and any
+the on-disk location. Every non-private, non-test `.py` module is imported, and any
 `BaseRedisTask` subclass it declares becomes visible to `iter_redis_tasks()`.
 """
 
@@ -70,7 +70,7 @@ def _load_tasks_from_directory(dir: str, skip: set[str] | None = None) -> None:
     for entry in entries:
         if entry.is_dir() or \
            not entry.name.lower().endswith(".py") or \
-           entry.name.startswith("_"):
+           entry.name.startswith(("_", "test_")):
             continue
 
         stem = entry.name[:-3]
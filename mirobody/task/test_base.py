@@ -0,0 +1,142 @@
+"""Reliable-queue tests for BaseRedisTask against the in-process redis_compat server."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+
+from redis.asyncio import Redis
+
+from ..utils.config.redis_compat.server import RedisCompatServer
+from .base import BaseRedisTask
+
+
+class _ReliableTask(BaseRedisTask):
+    queue_key = "test_reliable_queue"
+    reliable = True
+    lease_sec = 60
+    blpop_timeout_sec = 1
+    max_retries = 2
+    retry_sleep_sec = 0
+    drain_cap = 500
+
+    def __init__(self, redis: Redis, consumer_id: str = "", fail: bool = False) -> None:
+        super().__init__(redis, consumer_id)
+        self.fail = fail
+        self.batches: list[list[str]] = []
+
+    async def consume(self, messages: list[str]) -> None:
+        self.batches.append(list(messages))
+        if self.fail:
+            raise RuntimeError("boom")
+
+
+@pytest_asyncio.fixture
+async def redis():
+    compat = RedisCompatServer()
+    server = await asyncio.start_server(compat.handle_client, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    client = Redis(host="127.0.0.1", port=port, decode_responses=True, protocol=2)
+    try:
+        yield client
+    finally:
+        await client.aclose()
+        server.close()
+
+
+async def _enqueue(redis: Redis, count: int) -> None:
+    await redis.lpush(_ReliableTask.queue_key, *[f"msg-{i}" for i in range(count)])
+
+
+@pytest.mark.asyncio
+async def test_batch_is_acked_after_consume(redis) -> None:
+    await _enqueue(redis, 1200)
+    task = _ReliableTask(redis, consumer_id="c1")
+
+    batch = await task._pop_batch()
+    assert len(batch) == 500
+    assert await redis.llen(task._processing_key) == 500
+    assert await redis.zcard(_ReliableTask.lease_key()) == 500
+
+    await task._consume_leased(batch)
+    assert task.batches == [batch]
+    assert await redis.llen(task._processing_key) == 0
+    assert await redis.zcard(_ReliableTask.lease_key()) == 0
+    assert await redis.llen(_ReliableTask.queue_key) == 700
+
+
+@pytest.mark.asyncio
+async def test_crashed_consumer_items_are_requeued(redis) -> None:
+    await _enqueue(redis, 3)
+    crashed = _ReliableTask(redis, consumer_id="crashed")
+    await crashed._register_consumer()
+    batch = await crashed._pop_batch()
+    assert len(batch) == 3
+    await redis.delete(_ReliableTask.alive_key("crashed"))
+
+    survivor = _ReliableTask(redis, consumer_id="survivor")
+    assert await survivor.reap() == 3
+    assert sorted(await redis.lrange(_ReliableTask.queue_key, 0, -1)) == sorted(batch)
+    assert await redis.llen(crashed._processing_key) == 0
+    assert "crashed" not in await redis.smembers(_ReliableTask.consumers_key())
+
+
+@pytest.mark.asyncio
+async def test_expired_leases_are_reaped_once(redis) -> None:
+    await _enqueue(redis, 2)
+    stuck = _ReliableTask(redis, consumer_id="stuck")
+    await stuck._register_consumer()
+    batch = await stuck._pop_batch()
+    expired = time.time() - 1
+    await redis.zadd(_ReliableTask.lease_key(), {stuck._lease_member(m): expired for m in batch})
+
+    reapers = [_ReliableTask(redis, consumer_id=f"r{i}") for i in range(3)]
+    counts = await asyncio.gather(*(r.reap() for r in reapers))
+    assert sum(counts) == 2
+    assert await redis.llen(_ReliableTask.queue_key) == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_go_to_dead_letter_after_retry_budget(redis) -> None:
+    await redis.lpush(_ReliableTask.queue_key, "poison")
+    task = _ReliableTask(redis, consumer_id="c1", fail=True)
+
+    for _ in range(_ReliableTask.max_retries + 1):
+        batch = await task._pop_batch()
+        assert batch == ["poison"]
+        with pytest.raises(RuntimeError):
+            await task._consume_leased(batch)
+
+    assert await redis.llen(_ReliableTask.queue_key) == 0
+    assert await redis.lrange(_ReliableTask.dead_letter_key(), 0, -1) == ["poison"]
+    assert await redis.hget(_ReliableTask.retry_key(), "poison") is None
+
+
+@pytest.mark.asyncio
+async def test_run_loop_drains_queue(redis) -> None:
+    await _enqueue(redis, 1000)
+    task = _ReliableTask(redis, consumer_id="c1")
+    stop = asyncio.Event()
+    runner = asyncio.create_task(task.run(stop))
+
+    for _ in range(100):
+        if sum(len(b) for b in task.batches) == 1000:
+            break
+        await asyncio.sleep(0.05)
+    stop.set()
+    await asyncio.wait_for(runner, timeout=5)
+
+    assert [len(b) for b in task.batches] == [500, 500]
+    assert await redis.llen(task._processing_key) == 0
+    assert await redis.zcard(_ReliableTask.lease_key()) == 0
+
+
+def test_lease_must_outlast_blocking_pop() -> None:
+    class _BadLease(_ReliableTask):
+        lease_sec = 1
+
+    with pytest.raises(RuntimeError):
+        _BadLease(redis=None)
@@ -32,6 +32,7 @@ from starlette.responses import Response, StreamingResponse
 from starlette.routing import Route
 
 from .db import (
+    execute_copy,
     execute_query
 )
 
@@ -0,0 +1,137 @@
+"""
+PgStore Blocking Pop Benchmark
+
+Compares LISTEN/NOTIFY-backed BLPOP on PgStore with the previous behaviour,
+where BLPOP returned None at once and consumers either spun or sleep-polled
+the mirobody_runtime_list table:
+
+  - latency: push -> pop p50/p99 with several concurrent consumers, plus a
+    duplicate-delivery check
+  - idle:    consumer-process CPU and pop queries/s while the queue is empty
+
+Usage:
+    python3 -m mirobody.utils.config.redis_compat.bench_pg_blocking \\
+        [--messages 500] [--consumers 4] [--idle-sec 10] [--config config.yaml]
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+
+from ...config import Config
+from .store_pg import PgStore
+
+
+class _CountingStore(PgStore):
+    """PgStore that counts pop round-trips."""
+
+    pops = 0
+
+    async def lpop(self, key: str) -> str | None:
+        self.pops += 1
+        return await super().lpop(key)
+
+
+async def _consume(store: _CountingStore, key: str, mode: str, poll_sleep: float, stop: asyncio.Event, out: list) -> None:
+    while not stop.is_set():
+        if mode == "notify":
+            popped = await store.bpop([key], timeout=0.5)
+            val = popped[1] if popped else None
+        else:
+            val = await store.lpop(key)
+            if val is None:
+                await asyncio.sleep(poll_sleep)
+        if val is not None:
+            out.append((val, time.perf_counter()))
+
+
+async def _run_consumers(store, key, mode, poll_sleep, consumers, body) -> list:
+    stop = asyncio.Event()
+    received: list = []
+    tasks = [
+        asyncio.create_task(_consume(store, key, mode, poll_sleep, stop, received))
+        for _ in range(consumers)
+    ]
+    try:
+        await body(received)
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks)
+    return received
+
+
+async def _latency(store, mode, poll_sleep, consumers, messages, interval) -> dict:
+    key = f"bench_blocking_{uuid.uuid4().hex[:8]}"
+
+    async def body(received):
+        for i in range(messages):
+            await store.rpush(key, f"{i}:{time.perf_counter()}")
+            await asyncio.sleep(interval)
+        deadline = time.monotonic() + 10
+        while len(received) < messages and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+    received = await _run_consumers(store, key, mode, poll_sleep, consumers, body)
+    await store.delete(key)
+
+    ids = [v.split(":")[0] for v, _ in received]
+    lat = sorted((t - float(v.split(":")[1])) * 1000 for v, t in received)
+    pct = lambda p: lat[min(len(lat) - 1, int(p * len(lat)))] if lat else float("nan")
+    return {
+        "received": len(received),
+        "duplicates": len(ids) - len(set(ids)),
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+    }
+
+
+async def _idle(store, mode, poll_sleep, consumers, idle_sec) -> dict:
+    key = f"bench_blocking_{uuid.uuid4().hex[:8]}"
+    stats: dict = {}
+
+    async def body(_received):
+        await asyncio.sleep(1)  # let LISTEN settle
+        store.pops = 0
+        cpu, wall = time.process_time(), time.perf_counter()
+        await asyncio.sleep(idle_sec)
+        wall = time.perf_counter() - wall
+        stats["cpu_pct"] = 100 * (time.process_time() - cpu) / wall
+        stats["pops_per_sec"] = store.pops / wall
+
+    await _run_consumers(store, key, mode, poll_sleep, consumers, body)
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--interval-ms", type=float, default=10, help="Gap between pushes")
+    parser.add_argument("--consumers", type=int, default=4)
+    parser.add_argument("--idle-sec", type=float, default=10)
+    parser.add_argument("--poll-sleep", type=float, default=0.1, help="Sleep for the sleep-poll baseline")
+    parser.add_argument("--config", nargs="*", default=None, help="Extra config yaml files")
+    args = parser.parse_args()
+
+    config = await Config.init(yaml_filenames=args.config)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    modes = [("spin", "poll", 0.0), ("sleep-poll", "poll", args.poll_sleep), ("notify", "notify", 0.0)]
+
+    print(f"{'mode':<12} {'recv':>6} {'dups':>5} {'p50 ms':>9} {'p99 ms':>9} {'idle cpu%':>10} {'idle pops/s':>12}")
+    for name, mode, poll_sleep in modes:
+        store = _CountingStore(config.get_postgresql())
+        try:
+            lat = await _latency(store, mode, poll_sleep, args.consumers, args.messages, args.interval_ms / 1000)
+            idle = await _idle(store, mode, poll_sleep, args.consumers, args.idle_sec)
+        finally:
+            await store.close()
+        print(
+            f"{name:<12} {lat['received']:>6} {lat['duplicates']:>5} {lat['p50_ms']:>9.2f} {lat['p99_ms']:>9.2f} "
+            f"{idle['cpu_pct']:>10.1f} {idle['pops_per_sec']:>12,.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -28,18 +28,25 @@ class RedisCompat:
         return True
 
     async def close(self) -> None:
-        pass
+        if isinstance(self._store, PgStore):
+            await self._store.close()
 
     async def aclose(self) -> None:
-        pass
+        await self.close()
 
     # -- String -----------------------------------------------------------
     async def get(self, key: str) -> str | None:
         return await self._store.get(key)
 
-    async def set(self, key: str, value: str, ex: int | None = None, nx: bool = False) -> bool:
+    async def mget(self, keys: str | list[str], *args: str) -> list[str | None]:
+        names = [keys] if isinstance(keys, str) else list(keys)
+        return [await self._store.get(k) for k in names + list(args)]
+
+    async def set(self, key: str, value: str, ex: int | None = None, px: int | None = None, nx: bool = False) -> bool:
+        if px is not None:
+            ex = px / 1000
         if nx:
-            return await self._store.setnx(key, str(value))
+            return await self._store.setnx(key, str(value), ex=ex)
         await self._store.set(key, str(value), ex=ex)
         return True
 
@@ -77,6 +84,9 @@ class RedisCompat:
     async def expire(self, key: str, seconds: int) -> bool:
         return await self._store.expire(key, seconds)
 
+    async def pexpire(self, key: str, milliseconds: int) -> bool:
+        return await self._store.expire(key, milliseconds / 1000)
+
     async def ttl(self, key: str) -> int:
         return await self._store.ttl(key)
 
@@ -170,12 +180,12 @@ class RedisCompat:
 
     async def blpop(self, *args, timeout: float = 0) -> tuple[str, str] | None:
         keys = list(args)
+        if isinstance(self._store, PgStore):
+            return await self._store.bpop(keys, timeout, "left")
         for key in keys:
             val = await self._store.lpop(key)
             if val is not None:
                 return (key, val)
-        if not isinstance(self._store, MemoryStore):
-            return None
         fut = self._store.add_list_waiter(keys, "left")
         try:
             return await asyncio.wait_for(fut, timeout=timeout or None)
@@ -184,18 +194,68 @@ class RedisCompat:
 
     async def brpop(self, *args, timeout: float = 0) -> tuple[str, str] | None:
         keys = list(args)
+        if isinstance(self._store, PgStore):
+            return await self._store.bpop(keys, timeout, "right")
         for key in keys:
             val = await self._store.rpop(key)
             if val is not None:
                 return (key, val)
-        if not isinstance(self._store, MemoryStore):
-            return None
         fut = self._store.add_list_waiter(keys, "right")
         try:
             return await asyncio.wait_for(fut, timeout=timeout or None)
         except asyncio.TimeoutError:
             return None
 
+    async def lmove(self, first_list: str, second_list: str, src: str = "LEFT", dest: str = "RIGHT") -> str | None:
+        return await self._store.lmove(first_list, second_list, src.lower(), dest.lower())
+
+    async def blmove(
+        self, first_list: str, second_list: str, timeout: float,
+        src: str = "LEFT", dest: str = "RIGHT",
+    ) -> str | None:
+        if isinstance(self._store, PgStore):
+            return await self._store.blmove(first_list, second_list, timeout, src.lower(), dest.lower())
+        val = await self.lmove(first_list, second_list, src, dest)
+        if val is not None:
+            return val
+        fut = self._store.add_list_waiter([first_list], src.lower())
+        try:
+            _key, val = await asyncio.wait_for(fut, timeout=timeout or None)
+        except asyncio.TimeoutError:
+            return None
+        if dest.upper() == "LEFT":
+            await self._store.lpush(second_list, val)
+        else:
+            await self._store.rpush(second_list, val)
+        return val
+
+    async def lrem(self, key: str, count: int, value: str) -> int:
+        return await self._store.lrem(key, count, value)
+
+    # -- Sorted set -------------------------------------------------------
+    async def zadd(self, key: str, mapping: dict[str, float], nx: bool = False, xx: bool = False) -> int:
+        if nx and xx:
+            raise ValueError("ZADD allows either 'nx' or 'xx', not both")
+        return await self._store.zadd(key, {k: float(v) for k, v in mapping.items()}, nx=nx, xx=xx)
+
+    async def zrem(self, key: str, *members: str) -> int:
+        return await self._store.zrem(key, *members)
+
+    async def zscore(self, key: str, member: str) -> float | None:
+        return await self._store.zscore(key, member)
+
+    async def zcard(self, key: str) -> int:
+        return await self._store.zcard(key)
+
+    async def zrangebyscore(
+        self, key: str, min: float | str, max: float | str,
+        start: int | None = None, num: int | None = None, withscores: bool = False,
+    ) -> list:
+        if (start is None) != (num is None):
+            raise ValueError("``start`` and ``num`` must both be specified")
+        items = await self._store.zrangebyscore(key, float(min), float(max), offset=start or 0, count=num)
+        return items if withscores else [m for m, _ in items]
+
     # -- Pub/Sub ----------------------------------------------------------
     async def publish(self, channel: str, message: str) -> int:
         return self._pubsub.publish(channel, message)
@@ -205,16 +265,23 @@ class RedisCompat:
 
     # -- Scripting --------------------------------------------------------
     async def eval(self, script: str, numkeys: int, *args) -> int:
-        """Minimal EVAL: only supports compare-and-delete (distributed lock release pattern).
+        """Minimal EVAL: only the distributed lock compare-and-delete / compare-and-pexpire patterns.
 
         Usage: eval('...redis.call("get",...)...redis.call("del",...)...', 1, key, expected)
+               eval('...redis.call("get",...)...redis.call("pexpire",...)...', 1, key, expected, ms)
         """
         if numkeys != 1 or len(args) < 2:
-            raise NotImplementedError("Only single-key compare-and-delete eval is supported.")
-        if 'redis.call("get"' not in script or 'redis.call("del"' not in script:
+            raise NotImplementedError("Only single-key compare-and-delete / compare-and-pexpire eval is supported.")
+        if 'redis.call("get"' not in script:
             raise NotImplementedError("Unsupported eval script.")
         key, expected = str(args[0]), str(args[1])
         current = await self.get(key)
-        if current == expected:
-            return await self.delete(key)
-        return 0
+        if 'redis.call("del"' in script:
+            if current == expected:
+                return await self.delete(key)
+            return 0
+        if 'redis.call("pexpire"' in script and len(args) >= 3:
+            if current == expected:
+                return 1 if await self.pexpire(key, int(args[2])) else 0
+            return 0
+        raise NotImplementedError("Unsupported eval script.")
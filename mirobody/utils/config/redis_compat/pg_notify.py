@@ -0,0 +1,143 @@
+"""LISTEN/NOTIFY wakeups for blocking list pops on PgStore.
+
+Pushes run `pg_notify(list_channel(key), '')` inside their transaction, so the
+notification is delivered on commit. One `ListNotifier` per PgStore holds a
+single dedicated LISTEN connection and fans notifications out to the
+coroutines blocked in BLPOP/BRPOP/BLMOVE; the pop itself still goes through the
+pool with `FOR UPDATE SKIP LOCKED`, so a wakeup is only a hint to retry.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import uuid
+
+from typing import Awaitable, Callable
+
+
+def list_channel(key: str) -> str:
+    """Per-key NOTIFY channel. Hashed: channels are identifiers capped at 63 bytes."""
+    return "mirobody_list_" + hashlib.md5(key.encode()).hexdigest()
+
+
+class ListNotifier:
+    """Shared LISTEN connection dispatching per-channel wakeups.
+
+    psycopg holds the connection lock for as long as `notifies()` is iterated,
+    so new LISTENs are applied between iterations: `listen()` records the
+    channel as pending and pokes a per-notifier control channel through the
+    pool, which makes the loop break out, LISTEN, and resume.
+    """
+
+    _MAX_BACKOFF_SEC = 30
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable],
+        notify: Callable[[str], Awaitable[None]],
+    ):
+        self._connect = connect  # -> autocommit psycopg.AsyncConnection
+        self._notify = notify    # pg_notify(channel, '') through the pool
+        self._control = f"mirobody_list_ctl_{uuid.uuid4().hex[:16]}"
+        self._waiters: dict[str, set[asyncio.Event]] = {}
+        self._listening: set[str] = set()
+        self._pending: dict[str, asyncio.Future] = {}
+        self._task: asyncio.Task | None = None
+
+    # -- Waiter side ------------------------------------------------------
+
+    def add_waiter(self, channels: list[str]) -> asyncio.Event:
+        event = asyncio.Event()
+        for ch in channels:
+            self._waiters.setdefault(ch, set()).add(event)
+        return event
+
+    def remove_waiter(self, channels: list[str], event: asyncio.Event) -> None:
+        for ch in channels:
+            waiters = self._waiters.get(ch)
+            if waiters is None:
+                continue
+            waiters.discard(event)
+            if not waiters:
+                del self._waiters[ch]
+
+    async def listen(self, channels: list[str], timeout: float | None = None) -> bool:
+        """Make sure `channels` are LISTENed on. Returns False on timeout/failure,
+        in which case callers should fall back to their periodic re-check."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+        loop = asyncio.get_running_loop()
+        futures = [
+            self._pending.setdefault(ch, loop.create_future())
+            for ch in channels if ch not in self._listening
+        ]
+        if not futures:
+            return True
+
+        try:
+            await self._notify(self._control)
+        except Exception as e:
+            logging.warning(f"redis_compat: cannot wake list listener: {e}")
+            return False
+
+        done, _ = await asyncio.wait(futures, timeout=timeout)
+        return len(done) == len(futures)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        self._listening.clear()
+
+    # -- Listener loop ----------------------------------------------------
+
+    def _wake_all(self) -> None:
+        for waiters in self._waiters.values():
+            for event in waiters:
+                event.set()
+
+    async def _run(self) -> None:
+        backoff = 1
+        while True:
+            try:
+                conn = await self._connect()
+                async with conn:
+                    await conn.execute(f'LISTEN "{self._control}"')
+                    self._listening.clear()
+                    while True:
+                        for ch in (set(self._waiters) | set(self._pending)) - self._listening:
+                            await conn.execute(f'LISTEN "{ch}"')
+                            self._listening.add(ch)
+                        for ch in list(self._pending):
+                            fut = self._pending.pop(ch)
+                            if not fut.done():
+                                fut.set_result(None)
+                        backoff = 1
+
+                        gen = conn.notifies()
+                        try:
+                            async for n in gen:
+                                if n.channel == self._control:
+                                    if self._pending:
+                                        break
+                                    continue
+                                for event in self._waiters.get(n.channel, ()):
+                                    event.set()
+                        finally:
+                            await gen.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"redis_compat: list listener failed, reconnecting in {backoff}s: {e}")
+                self._listening.clear()
+                # Notifications may have been missed: let every waiter re-poll
+                self._wake_all()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self._MAX_BACKOFF_SEC)
@@ -57,10 +57,23 @@ class RedisCompatServer:
                 if len(args) < 2:
                     return encode_error("wrong number of arguments for 'SET'")
                 key, value = args[0], args[1]
-                ex = None
-                if len(args) >= 4 and args[2].upper() == "EX":
-                    ex = int(args[3])
-                await self.store.set(key, value, ex=ex)
+                ex, nx = None, False
+                options = [a.upper() for a in args[2:]]
+                try:
+                    for i, option in enumerate(options):
+                        if option == "EX":
+                            ex = int(args[i + 3])
+                        elif option == "PX":
+                            ex = int(args[i + 3]) / 1000
+                        elif option == "NX":
+                            nx = True
+                except (IndexError, ValueError):
+                    return encode_error("syntax error")
+                if nx:
+                    if not await self.store.setnx(key, value, ex=ex):
+                        return encode_bulk_string(None)
+                else:
+                    await self.store.set(key, value, ex=ex)
                 return encode_simple_string("OK")
 
             case "GET":
@@ -68,6 +81,11 @@ class RedisCompatServer:
                     return encode_error("wrong number of arguments for 'GET'")
                 return encode_bulk_string(await self.store.get(args[0]))
 
+            case "MGET":
+                if not args:
+                    return encode_error("wrong number of arguments for 'MGET'")
+                return encode_array([encode_bulk_string(await self.store.get(k)) for k in args])
+
             case "SETEX":
                 if len(args) != 3:
                     return encode_error("wrong number of arguments for 'SETEX'")
@@ -146,6 +164,15 @@ class RedisCompatServer:
                     return encode_error("value is not an integer or out of range")
                 return encode_integer(1 if await self.store.expire(args[0], seconds) else 0)
 
+            case "PEXPIRE":
+                if len(args) != 2:
+                    return encode_error("wrong number of arguments for 'PEXPIRE'")
+                try:
+                    milliseconds = int(args[1])
+                except ValueError:
+                    return encode_error("value is not an integer or out of range")
+                return encode_integer(1 if await self.store.expire(args[0], milliseconds / 1000) else 0)
+
             case "TTL":
                 if len(args) != 1:
                     return encode_error("wrong number of arguments for 'TTL'")
@@ -249,6 +276,98 @@ class RedisCompatServer:
                 except asyncio.TimeoutError:
                     return encode_array([])
 
+            case "LMOVE":
+                if len(args) != 4:
+                    return encode_error("wrong number of arguments for 'LMOVE'")
+                wherefrom, whereto = args[2].lower(), args[3].lower()
+                if wherefrom not in ("left", "right") or whereto not in ("left", "right"):
+                    return encode_error("syntax error")
+                return encode_bulk_string(await self.store.lmove(args[0], args[1], wherefrom, whereto))
+
+            case "BLMOVE":
+                if len(args) != 5:
+                    return encode_error("wrong number of arguments for 'BLMOVE'")
+                src, dst = args[0], args[1]
+                wherefrom, whereto = args[2].lower(), args[3].lower()
+                if wherefrom not in ("left", "right") or whereto not in ("left", "right"):
+                    return encode_error("syntax error")
+                timeout = float(args[4])
+                val = await self.store.lmove(src, dst, wherefrom, whereto)
+                if val is not None:
+                    return encode_bulk_string(val)
+                fut = self.store.add_list_waiter([src], wherefrom)
+                try:
+                    _key, val = await asyncio.wait_for(fut, timeout=timeout or None)
+                except asyncio.TimeoutError:
+                    return encode_bulk_string(None)
+                if whereto == "left":
+                    await self.store.lpush(dst, val)
+                else:
+                    await self.store.rpush(dst, val)
+                return encode_bulk_string(val)
+
+            case "LREM":
+                if len(args) != 3:
+                    return encode_error("wrong number of arguments for 'LREM'")
+                try:
+                    count = int(args[1])
+                except ValueError:
+                    return encode_error("value is not an integer or out of range")
+                return encode_integer(await self.store.lrem(args[0], count, args[2]))
+
+            case "ZADD":
+                if len(args) < 3:
+                    return encode_error("wrong number of arguments for 'ZADD'")
+                key, rest = args[0], args[1:]
+                nx = xx = False
+                while rest and rest[0].upper() in ("NX", "XX"):
+                    nx = nx or rest[0].upper() == "NX"
+                    xx = xx or rest[0].upper() == "XX"
+                    rest = rest[1:]
+                if not rest or len(rest) % 2 or (nx and xx):
+                    return encode_error("syntax error")
+                try:
+                    mapping = {m: float(sc) for sc, m in zip(rest[::2], rest[1::2])}
+                except ValueError:
+                    return encode_error("value is not a valid float")
+                return encode_integer(await self.store.zadd(key, mapping, nx=nx, xx=xx))
+
+            case "ZREM":
+                if len(args) < 2:
+                    return encode_error("wrong number of arguments for 'ZREM'")
+                return encode_integer(await self.store.zrem(args[0], *args[1:]))
+
+            case "ZSCORE":
+                if len(args) != 2:
+                    return encode_error("wrong number of arguments for 'ZSCORE'")
+                score = await self.store.zscore(args[0], args[1])
+                return encode_bulk_string(None if score is None else f"{score:.17g}")
+
+            case "ZCARD":
+                if len(args) != 1:
+                    return encode_error("wrong number of arguments for 'ZCARD'")
+                return encode_integer(await self.store.zcard(args[0]))
+
+            case "ZRANGEBYSCORE":
+                if len(args) < 3:
+                    return encode_error("wrong number of arguments for 'ZRANGEBYSCORE'")
+                key, options = args[0], [a.upper() for a in args[3:]]
+                withscores = "WITHSCORES" in options
+                offset, count = 0, None
+                try:
+                    min_score, max_score = float(args[1]), float(args[2])
+                    if "LIMIT" in options:
+                        i = options.index("LIMIT")
+                        offset, count = int(args[3 + i + 1]), int(args[3 + i + 2])
+                except (ValueError, IndexError):
+                    return encode_error("min or max is not a float")
+                items: list[bytes] = []
+                for member, score in await self.store.zrangebyscore(key, min_score, max_score, offset, count):
+                    items.append(encode_bulk_string(member))
+                    if withscores:
+                        items.append(encode_bulk_string(f"{score:.17g}"))
+                return encode_array(items)
+
             case "HSET" | "HMSET":
                 if len(args) < 3 or len(args) % 2 == 0:
                     return encode_error(f"wrong number of arguments for '{cmd}'")
@@ -26,6 +26,7 @@ class MemoryStore:
         self._hashes: dict[str, dict[str, str]] = {}
         self._sets: dict[str, set[str]] = {}
         self._lists: dict[str, collections.deque[str]] = {}
+        self._zsets: dict[str, dict[str, float]] = {}
         # BLPOP/BRPOP waiters: key -> list of (side, future)
         self._list_waiters: dict[str, list[tuple[str, asyncio.Future]]] = {}
         # Guard compound read-modify-write sequences against future
@@ -46,12 +47,13 @@ class MemoryStore:
         expires_at = time.monotonic() + ex if ex is not None else None
         self._data[key] = Entry(value=value, expires_at=expires_at)
 
-    async def setnx(self, key: str, value: str) -> bool:
+    async def setnx(self, key: str, value: str, ex: float | None = None) -> bool:
         async with self._lock:
             entry = self._data.get(key)
             if entry is not None and not entry.expired:
                 return False
-            self._data[key] = Entry(value=value)
+            expires_at = time.monotonic() + ex if ex is not None else None
+            self._data[key] = Entry(value=value, expires_at=expires_at)
             return True
 
     async def incr(self, key: str, by: int = 1) -> int:
@@ -81,7 +83,7 @@ class MemoryStore:
     async def exists(self, *keys: str) -> int:
         count = 0
         for key in keys:
-            if key in self._hashes or key in self._sets or key in self._lists:
+            if key in self._hashes or key in self._sets or key in self._lists or key in self._zsets:
                 count += 1
             else:
                 entry = self._data.get(key)
@@ -105,20 +107,23 @@ class MemoryStore:
             if key in self._lists:
                 del self._lists[key]
                 deleted = True
+            if key in self._zsets:
+                del self._zsets[key]
+                deleted = True
             if deleted:
                 count += 1
         return count
 
     async def keys(self, pattern: str = "*") -> list[str]:
         now = time.monotonic()
-        all_keys = set(self._hashes.keys()) | set(self._sets.keys()) | set(self._lists.keys())
+        all_keys = set(self._hashes.keys()) | set(self._sets.keys()) | set(self._lists.keys()) | set(self._zsets.keys())
         all_keys.update(
             k for k, v in self._data.items()
             if not (v.expires_at and now > v.expires_at)
         )
         return [k for k in all_keys if fnmatch.fnmatch(k, pattern)]
 
-    async def expire(self, key: str, seconds: int) -> bool:
+    async def expire(self, key: str, seconds: float) -> bool:
         entry = self._data.get(key)
         if entry is not None and not entry.expired:
             entry.expires_at = time.monotonic() + seconds
@@ -290,6 +295,37 @@ class MemoryStore:
             return lst[index]
         return None
 
+    async def lmove(self, src: str, dst: str, wherefrom: str = "left", whereto: str = "right") -> str | None:
+        val = (await self.lpop(src)) if wherefrom == "left" else (await self.rpop(src))
+        if val is None:
+            return None
+        if whereto == "left":
+            await self.lpush(dst, val)
+        else:
+            await self.rpush(dst, val)
+        return val
+
+    async def lrem(self, key: str, count: int, value: str) -> int:
+        lst = self._lists.get(key)
+        if not lst:
+            return 0
+        items = list(lst) if count >= 0 else list(reversed(lst))
+        limit = abs(count) or len(items)
+        kept: list[str] = []
+        removed = 0
+        for item in items:
+            if removed < limit and item == value:
+                removed += 1
+            else:
+                kept.append(item)
+        if count < 0:
+            kept.reverse()
+        if kept:
+            self._lists[key] = collections.deque(kept)
+        else:
+            del self._lists[key]
+        return removed
+
     def _wake_waiters(self, key: str):
         waiters = self._list_waiters.get(key)
         if not waiters:
@@ -312,3 +348,51 @@ class MemoryStore:
         for key in keys:
             self._list_waiters.setdefault(key, []).append((side, fut))
         return fut
+
+    # -- Sorted set operations --------------------------------------------
+
+    async def zadd(self, key: str, mapping: dict[str, float], nx: bool = False, xx: bool = False) -> int:
+        z = self._zsets.setdefault(key, {})
+        added = 0
+        for member, score in mapping.items():
+            exists = member in z
+            if (nx and exists) or (xx and not exists):
+                continue
+            if not exists:
+                added += 1
+            z[member] = float(score)
+        if not z:
+            del self._zsets[key]
+        return added
+
+    async def zrem(self, key: str, *members: str) -> int:
+        z = self._zsets.get(key)
+        if z is None:
+            return 0
+        count = 0
+        for m in members:
+            if z.pop(m, None) is not None:
+                count += 1
+        if not z:
+            del self._zsets[key]
+        return count
+
+    async def zscore(self, key: str, member: str) -> float | None:
+        return self._zsets.get(key, {}).get(member)
+
+    async def zcard(self, key: str) -> int:
+        return len(self._zsets.get(key, {}))
+
+    async def zrangebyscore(
+        self, key: str, min_score: float, max_score: float,
+        offset: int = 0, count: int | None = None,
+    ) -> list[tuple[str, float]]:
+        z = self._zsets.get(key)
+        if not z:
+            return []
+        matched = sorted(
+            ((m, s) for m, s in z.items() if min_score <= s <= max_score),
+            key=lambda item: (item[1], item[0]),
+        )
+        end = None if count is None or count < 0 else offset + count
+        return matched[offset:end]
@@ -4,23 +4,43 @@ from __future__ import annotations
 
 import asyncio
 
+from .pg_notify import ListNotifier, list_channel
+
 
 class PgStore:
     """Drop-in replacement for MemoryStore, backed by PostgreSQL.
 
-    Uses mirobody_runtime_kv/hash/list/set tables.
+    Uses mirobody_runtime_kv/hash/list/set/zset tables. Blocking list pops
+    wait on LISTEN/NOTIFY (see pg_notify.py) instead of polling.
     """
 
     _KV = "mirobody_runtime_kv"
     _HASH = "mirobody_runtime_hash"
     _SET = "mirobody_runtime_set"
     _LIST = "mirobody_runtime_list"
+    _ZSET = "mirobody_runtime_zset"
     _schema_ready = False
 
+    # Blocked pops re-check the table at least this often, covering
+    # notifications lost while the LISTEN connection was reconnecting.
+    _BLOCK_RECHECK_SEC = 5.0
+
     def __init__(self, pg_config):
         self._pg = pg_config
         self._pool = None
         self._pool_lock = asyncio.Lock()
+        self._notifier: ListNotifier | None = None
+
+    def _conninfo(self) -> str:
+        return f"host={self._pg.host} port={self._pg.port} dbname={self._pg.database}"
+
+    def _connect_kwargs(self) -> dict:
+        return dict(
+            user=self._pg.user,
+            password=self._pg.password,
+            options=f"-c search_path={self._pg.schema}"
+                    f" -c app.encryption_key={self._pg.encrypt_key}",
+        )
 
     async def _get_pool(self):
         """Lazily create a connection pool and ensure the schema exists."""
@@ -31,18 +51,11 @@ class PgStore:
                 return self._pool
             import psycopg_pool
             self._pool = psycopg_pool.AsyncConnectionPool(
-                f"host={self._pg.host} port={self._pg.port} "
-                f"dbname={self._pg.database}",
+                self._conninfo(),
                 open=False,
                 min_size=self._pg.minconn,
                 max_size=self._pg.maxconn,
-                kwargs=dict(
-                    user=self._pg.user,
-                    password=self._pg.password,
-                    options=f"-c search_path={self._pg.schema}"
-                            f" -c app.encryption_key={self._pg.encrypt_key}",
-                    cursor_factory=None,
-                ),
+                kwargs=dict(self._connect_kwargs(), cursor_factory=None),
             )
             await self._pool.open()
             await self._ensure_schema()
@@ -82,11 +95,27 @@ class PgStore:
                         created_at  TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
                     )""",
                     f"CREATE INDEX IF NOT EXISTS idx_{self._LIST}_key ON {self._LIST} (cache_key)",
+                    f"""CREATE TABLE IF NOT EXISTS {self._ZSET} (
+                        cache_key  TEXT NOT NULL,
+                        member     TEXT NOT NULL,
+                        score      DOUBLE PRECISION NOT NULL,
+                        expires_at TIMESTAMPTZ,
+                        PRIMARY KEY (cache_key, member)
+                    )""",
+                    f"CREATE INDEX IF NOT EXISTS idx_{self._ZSET}_score ON {self._ZSET} (cache_key, score)",
                 ]:
                     await cur.execute(sql)
                 await conn.commit()
         PgStore._schema_ready = True
 
+    async def close(self) -> None:
+        if self._notifier is not None:
+            await self._notifier.close()
+            self._notifier = None
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
     async def _cleanup(self, cur, *keys):
         if keys:
             await cur.execute(
@@ -122,14 +151,17 @@ class PgStore:
                 )
                 await conn.commit()
 
-    async def setnx(self, key: str, value: str) -> bool:
+    async def setnx(self, key: str, value: str, ex: float | None = None) -> bool:
         async with (await self._get_pool()).connection() as conn:
             async with conn.cursor() as cur:
                 await self._cleanup(cur, key)
                 await cur.execute(
-                    f"INSERT INTO {self._KV} (cache_key, cache_value, updated_at) "
-                    f"VALUES (%s, %s, CURRENT_TIMESTAMP) ON CONFLICT (cache_key) DO NOTHING RETURNING 1",
-                    (key, value),
+                    f"INSERT INTO {self._KV} (cache_key, cache_value, expires_at, updated_at) "
+                    f"VALUES (%s, %s, "
+                    f"CASE WHEN %s IS NULL THEN NULL "
+                    f"ELSE CURRENT_TIMESTAMP + (%s * INTERVAL '1 second') END, "
+                    f"CURRENT_TIMESTAMP) ON CONFLICT (cache_key) DO NOTHING RETURNING 1",
+                    (key, value, ex, ex),
                 )
                 ok = await cur.fetchone() is not None
                 await conn.commit()
@@ -184,8 +216,9 @@ class PgStore:
                     f"  UNION SELECT cache_key FROM {self._HASH} WHERE cache_key=ANY(%s)"
                     f"  UNION SELECT cache_key FROM {self._SET} WHERE cache_key=ANY(%s)"
                     f"  UNION SELECT cache_key FROM {self._LIST} WHERE cache_key=ANY(%s)"
+                    f"  UNION SELECT cache_key FROM {self._ZSET} WHERE cache_key=ANY(%s)"
                     f") t",
-                    (list(keys), list(keys), list(keys), list(keys)),
+                    (list(keys), list(keys), list(keys), list(keys), list(keys)),
                 )
                 row = await cur.fetchone()
                 await conn.commit()
@@ -197,7 +230,7 @@ class PgStore:
         async with (await self._get_pool()).connection() as conn:
             async with conn.cursor() as cur:
                 deleted: set[str] = set()
-                for table in (self._KV, self._HASH, self._SET, self._LIST):
+                for table in (self._KV, self._HASH, self._SET, self._LIST, self._ZSET):
                     await cur.execute(
                         f"DELETE FROM {table} WHERE cache_key=ANY(%s) RETURNING cache_key",
                         (list(keys),),
@@ -219,18 +252,19 @@ class PgStore:
                     f"  UNION SELECT cache_key FROM {self._HASH} WHERE cache_key LIKE %s"
                     f"  UNION SELECT cache_key FROM {self._SET} WHERE cache_key LIKE %s"
                     f"  UNION SELECT cache_key FROM {self._LIST} WHERE cache_key LIKE %s"
+                    f"  UNION SELECT cache_key FROM {self._ZSET} WHERE cache_key LIKE %s"
                     f") t",
-                    (like, like, like, like),
+                    (like, like, like, like, like),
                 )
                 rows = await cur.fetchall()
                 await conn.commit()
                 return [r[0] for r in rows]
 
-    async def expire(self, key: str, seconds: int) -> bool:
+    async def expire(self, key: str, seconds: float) -> bool:
         async with (await self._get_pool()).connection() as conn:
             async with conn.cursor() as cur:
                 updated = 0
-                for table in (self._KV, self._HASH, self._SET, self._LIST):
+                for table in (self._KV, self._HASH, self._SET, self._LIST, self._ZSET):
                     await cur.execute(
                         f"UPDATE {table} SET expires_at = CURRENT_TIMESTAMP + (%s * INTERVAL '1 second') "
                         f"WHERE cache_key = %s",
@@ -243,7 +277,7 @@ class PgStore:
     async def ttl(self, key: str) -> int:
         async with (await self._get_pool()).connection() as conn:
             async with conn.cursor() as cur:
-                for table in (self._KV, self._HASH, self._SET, self._LIST):
+                for table in (self._KV, self._HASH, self._SET, self._LIST, self._ZSET):
                     await cur.execute(
                         f"SELECT expires_at, "
                         f"EXTRACT(EPOCH FROM (expires_at - CURRENT_TIMESTAMP))::BIGINT "
@@ -446,6 +480,77 @@ class PgStore:
 
     # -- List -------------------------------------------------------------
 
+    async def _notify_push(self, cur, key: str) -> None:
+        # Delivered on commit, so a woken waiter always sees the new row
+        await cur.execute("SELECT pg_notify(%s, '')", (list_channel(key),))
+
+    async def _get_notifier(self) -> ListNotifier:
+        if self._notifier is None:
+            import psycopg
+
+            async def connect():
+                return await psycopg.AsyncConnection.connect(
+                    self._conninfo(), autocommit=True, **self._connect_kwargs(),
+                )
+
+            async def notify(channel: str) -> None:
+                async with (await self._get_pool()).connection() as conn:
+                    await conn.execute("SELECT pg_notify(%s, '')", (channel,))
+                    await conn.commit()
+
+            self._notifier = ListNotifier(connect, notify)
+        return self._notifier
+
+    async def _block(self, keys: list[str], timeout: float, attempt):
+        """Run `attempt()` until it returns non-None, waking on pushes to `keys`.
+
+        `timeout` follows BLPOP: seconds, 0 = wait forever. Returns None on timeout."""
+        result = await attempt()
+        if result is not None:
+            return result
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        channels = [list_channel(k) for k in keys]
+        notifier = await self._get_notifier()
+        event = notifier.add_waiter(channels)
+        try:
+            # Register before re-checking so a push landing in between isn't missed
+            await notifier.listen(channels, timeout=self._BLOCK_RECHECK_SEC)
+            while True:
+                event.clear()
+                result = await attempt()
+                if result is not None:
+                    return result
+                wait = self._BLOCK_RECHECK_SEC
+                if deadline is not None:
+                    wait = min(wait, deadline - loop.time())
+                    if wait <= 0:
+                        return None
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            notifier.remove_waiter(channels, event)
+
+    async def bpop(self, keys: list[str], timeout: float, side: str = "left") -> tuple[str, str] | None:
+        """BLPOP/BRPOP: first non-empty key wins."""
+        async def attempt():
+            for key in keys:
+                val = (await self.lpop(key)) if side == "left" else (await self.rpop(key))
+                if val is not None:
+                    return (key, val)
+            return None
+
+        return await self._block(keys, timeout, attempt)
+
+    async def blmove(
+        self, src: str, dst: str, timeout: float,
+        wherefrom: str = "left", whereto: str = "right",
+    ) -> str | None:
+        return await self._block([src], timeout, lambda: self.lmove(src, dst, wherefrom, whereto))
+
     async def lpush(self, key: str, *values: str) -> int:
         async with (await self._get_pool()).connection() as conn:
             async with conn.cursor() as cur:
@@ -458,6 +563,7 @@ class PgStore:
                     )
                 await cur.execute(f"SELECT COUNT(*) FROM {self._LIST} WHERE cache_key=%s", (key,))
                 count = (await cur.fetchone())[0]
+                await self._notify_push(cur, key)
                 await conn.commit()
                 return count
 
@@ -471,6 +577,7 @@ class PgStore:
                     )
                 await cur.execute(f"SELECT COUNT(*) FROM {self._LIST} WHERE cache_key=%s", (key,))
                 count = (await cur.fetchone())[0]
+                await self._notify_push(cur, key)
                 await conn.commit()
                 return count
 
@@ -480,6 +587,7 @@ class PgStore:
                 await cur.execute(
                     f"DELETE FROM {self._LIST} WHERE id = ("
                     f"  SELECT id FROM {self._LIST} WHERE cache_key=%s ORDER BY id LIMIT 1"
+                    f"  FOR UPDATE SKIP LOCKED"
                     f") RETURNING item_value",
                     (key,),
                 )
@@ -493,6 +601,7 @@ class PgStore:
                 await cur.execute(
                     f"DELETE FROM {self._LIST} WHERE id = ("
                     f"  SELECT id FROM {self._LIST} WHERE cache_key=%s ORDER BY id DESC LIMIT 1"
+                    f"  FOR UPDATE SKIP LOCKED"
                     f") RETURNING item_value",
                     (key,),
                 )
@@ -548,3 +657,124 @@ class PgStore:
                 )
                 row = await cur.fetchone()
                 return row[0] if row else None
+
+    async def lmove(self, src: str, dst: str, wherefrom: str = "left", whereto: str = "right") -> str | None:
+        order = "" if wherefrom == "left" else " DESC"
+        async with (await self._get_pool()).connection() as conn:
+            async with conn.cursor() as cur:
+                # Delete + insert in one transaction so the item is never in neither list
+                await cur.execute(
+                    f"DELETE FROM {self._LIST} WHERE id = ("
+                    f"  SELECT id FROM {self._LIST} WHERE cache_key=%s ORDER BY id{order} LIMIT 1"
+                    f"  FOR UPDATE SKIP LOCKED"
+                    f") RETURNING item_value",
+                    (src,),
+                )
+                row = await cur.fetchone()
+                if row is None:
+                    await conn.commit()
+                    return None
+                if whereto == "left":
+                    await cur.execute(
+                        f"INSERT INTO {self._LIST} (id, cache_key, item_value) VALUES ("
+                        f"  COALESCE((SELECT MIN(id) FROM {self._LIST} WHERE cache_key=%s), 0) - 1,"
+                        f"  %s, %s)",
+                        (dst, dst, row[0]),
+                    )
+                else:
+                    await cur.execute(
+                        f"INSERT INTO {self._LIST} (cache_key, item_value) VALUES (%s, %s)",
+                        (dst, row[0]),
+                    )
+                await self._notify_push(cur, dst)
+                await conn.commit()
+                return row[0]
+
+    async def lrem(self, key: str, count: int, value: str) -> int:
+        order = "DESC" if count < 0 else "ASC"
+        limit = abs(count) or None
+        async with (await self._get_pool()).connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    f"DELETE FROM {self._LIST} WHERE id IN ("
+                    f"  SELECT id FROM {self._LIST} WHERE cache_key=%s AND item_value=%s "
+                    f"  ORDER BY id {order} LIMIT %s"
+                    f")",
+                    (key, value, limit),
+                )
+                removed = cur.rowcount or 0
+                await conn.commit()
+                return removed
+
+    # -- Sorted set -------------------------------------------------------
+
+    async def zadd(self, key: str, mapping: dict[str, float], nx: bool = False, xx: bool = False) -> int:
+        if not mapping:
+            return 0
+        async with (await self._get_pool()).connection() as conn:
+            async with conn.cursor() as cur:
+                added = 0
+                for member, score in mapping.items():
+                    if xx:
+                        await cur.execute(
+                            f"UPDATE {self._ZSET} SET score=%s WHERE cache_key=%s AND member=%s",
+                            (float(score), key, member),
+                        )
+                        continue
+                    conflict = "DO NOTHING" if nx else "DO UPDATE SET score=EXCLUDED.score"
+                    await cur.execute(
+                        f"INSERT INTO {self._ZSET} (cache_key, member, score) VALUES (%s, %s, %s) "
+                        f"ON CONFLICT (cache_key, member) {conflict} "
+                        f"RETURNING (xmax = 0) AS inserted",
+                        (key, member, float(score)),
+                    )
+                    row = await cur.fetchone()
+                    if row and row[0]:
+                        added += 1
+                await conn.commit()
+                return added
+
+    async def zrem(self, key: str, *members: str) -> int:
+        if not members:
+            return 0
+        async with (await self._get_pool()).connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    f"DELETE FROM {self._ZSET} WHERE cache_key=%s AND member=ANY(%s)",
+                    (key, list(members)),
+                )
+                count = cur.rowcount or 0
+                await conn.commit()
+                return count
+
+    async def zscore(self, key: str, member: str) -> float | None:
+        async with (await self._get_pool()).connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    f"SELECT score FROM {self._ZSET} WHERE cache_key=%s AND member=%s",
+                    (key, member),
+                )
+                row = await cur.fetchone()
+                return row[0] if row else None
+
+    async def zcard(self, key: str) -> int:
+        async with (await self._get_pool()).connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(f"SELECT COUNT(*) FROM {self._ZSET} WHERE cache_key=%s", (key,))
+                return (await cur.fetchone())[0]
+
+    async def zrangebyscore(
+        self, key: str, min_score: float, max_score: float,
+        offset: int = 0, count: int | None = None,
+    ) -> list[tuple[str, float]]:
+        if count is not None and count < 0:
+            count = None
+        async with (await self._get_pool()).connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    f"SELECT member, score FROM {self._ZSET} "
+                    f"WHERE cache_key=%s AND score BETWEEN %s AND %s "
+                    f"ORDER BY score, member OFFSET %s LIMIT %s",
+                    (key, min_score, max_score, offset, count),
+                )
+                return [(r[0], r[1]) for r in await cur.fetchall()]
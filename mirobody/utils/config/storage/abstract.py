@@ -1,6 +1,9 @@
 import mimetypes
 
-from typing import Any, BinaryIO
+from typing import Any, AsyncIterator, BinaryIO
+
+# Default chunk size for get_stream
+STREAM_CHUNK_SIZE = 256 * 1024
 
 #-----------------------------------------------------------------------------
 
@@ -62,6 +65,39 @@ class AbstractStorage:
         """
         ...
 
+    async def get_stream(
+        self,
+        key: str,
+        start: int = 0,
+        end: int | None = None,
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream file content, optionally a byte range, without loading it whole
+
+        Backends override this with a native stream; this fallback reads the
+        object with get() and slices it.
+
+        Args:
+            key: File key/path
+            start: First byte offset
+            end: Last byte offset, inclusive as in an HTTP Range (None: to end of file)
+            chunk_size: Maximum size of each yielded chunk
+
+        Yields:
+            Content chunks
+
+        Raises:
+            FileNotFoundError: The object does not exist
+        """
+        content, err = await self.get(key)
+        if content is None:
+            raise FileNotFoundError(err or key)
+
+        stop = len(content) if end is None else min(end + 1, len(content))
+        for offset in range(start, stop, chunk_size):
+            yield content[offset:min(offset + chunk_size, stop)]
+
     async def delete(self, key: str) -> str | None:
         """
         Delete file from storage
@@ -102,6 +138,7 @@ class AbstractStorage:
 
         Returns:
             (file_info, error). If successful, error is None.
+            file_info carries at least "size", "content_type" and "etag".
         """
         ...
 
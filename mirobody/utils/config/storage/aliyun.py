@@ -1,10 +1,10 @@
 import asyncio
 import logging
 
-from typing import IO, Dict, Any
+from typing import IO, AsyncIterator, Dict, Any
 from functools import partial
 
-from .abstract import AbstractStorage
+from .abstract import STREAM_CHUNK_SIZE, AbstractStorage
 
 logger = logging.getLogger(__name__)
 
@@ -219,6 +219,37 @@ class AliyunStorage(AbstractStorage):
     
     #-----------------------------------------------------
 
+    async def get_stream(
+        self,
+        key: str,
+        start: int = 0,
+        end: int | None = None,
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """Stream file (or byte range) from Aliyun OSS with a ranged GET"""
+        self._ensure_initialized()
+
+        object_key = self._build_object_key(key)
+        byte_range = (start, end) if start or end is not None else None
+
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                None,
+                partial(self._bucket.get_object, object_key, byte_range=byte_range)
+            )
+        except self._oss2.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+
+        # oss2 is synchronous: read each chunk in the thread pool
+        try:
+            while chunk := await loop.run_in_executor(None, result.read, chunk_size):
+                yield chunk
+        finally:
+            result.close()
+
+    #-----------------------------------------------------
+
     async def delete(self, key: str) -> str | None:
         """Delete file from Aliyun OSS"""
         try:
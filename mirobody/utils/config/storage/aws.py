@@ -1,8 +1,8 @@
 import logging
 
-from typing import Any, BinaryIO  # noqa: F401 – BinaryIO used in type hints
+from typing import Any, AsyncIterator, BinaryIO  # noqa: F401 – BinaryIO used in type hints
 
-from .abstract import AbstractStorage
+from .abstract import STREAM_CHUNK_SIZE, AbstractStorage
 
 logger = logging.getLogger(__name__)
 
@@ -176,6 +176,32 @@ class AwsStorage(AbstractStorage):
     
     #-----------------------------------------------------
 
+    async def get_stream(
+        self,
+        key: str,
+        start: int = 0,
+        end: int | None = None,
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """Stream file (or byte range) from AWS S3 with a ranged GET"""
+        await self._ensure_initialized()
+
+        params = {"Bucket": self.bucket, "Key": self._build_object_key(key)}
+        if start or end is not None:
+            params["Range"] = f"bytes={start}-{'' if end is None else end}"
+
+        try:
+            response = await self._client.get_object(**params)
+        except self._client.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+
+        body = response["Body"]
+        async with body:
+            async for chunk in body.iter_chunks(chunk_size):
+                yield chunk
+
+    #-----------------------------------------------------
+
     async def delete(self, key: str) -> str | None:
         """Delete file from AWS S3"""
         try:
@@ -2,10 +2,12 @@ import asyncio
 import logging
 
 from pathlib import Path
-from typing import IO, Optional, Dict, Any
+from typing import IO, AsyncIterator, Optional, Dict, Any
 from datetime import datetime
 
-from .abstract import AbstractStorage
+import aiofiles
+
+from .abstract import STREAM_CHUNK_SIZE, AbstractStorage
 
 logger = logging.getLogger(__name__)
 
@@ -207,6 +209,44 @@ class LocalStorage(AbstractStorage):
     
     #-----------------------------------------------------
 
+    async def get_stream(
+        self,
+        key: str,
+        start: int = 0,
+        end: int | None = None,
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a file (or byte range) from local storage chunk by chunk
+
+        Args:
+            key: File key/path
+            start: First byte offset
+            end: Last byte offset, inclusive (None: to end of file)
+            chunk_size: Maximum size of each yielded chunk
+
+        Yields:
+            Content chunks
+
+        Raises:
+            FileNotFoundError: The file does not exist
+        """
+        file_path = self._get_file_path(key)
+
+        async with aiofiles.open(file_path, "rb") as f:
+            if start:
+                await f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = await f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    #-----------------------------------------------------
+
     async def delete(self, key: str) -> str | None:
         """
         Delete file from local storage
@@ -304,6 +344,8 @@ class LocalStorage(AbstractStorage):
                     "success": True,
                     "size": stat.st_size,
                     "content_type": content_type,
+                    # Changes whenever the file is rewritten, like nginx's mtime-size ETag
+                    "etag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
                     "last_modified": datetime.fromtimestamp(stat.st_mtime),
                     "created": datetime.fromtimestamp(stat.st_ctime),
                     "path": str(file_path)
@@ -0,0 +1,165 @@
+"""get_stream on LocalStorage and AwsStorage (against a local S3-compatible stub): ranges and constant memory on 1 GB objects."""
+
+from __future__ import annotations
+
+import contextlib
+import tracemalloc
+
+from typing import AsyncIterator
+
+import pytest
+
+from aiohttp import web
+
+from .abstract import STREAM_CHUNK_SIZE
+from .aws import AwsStorage
+from .local import LocalStorage
+
+_GB = 1024 ** 3
+
+# Thread pool, aiohttp read buffers and client internals; nowhere near the 1 GB served
+_MAX_PEAK = 8 * 1024 * 1024
+
+
+def _pattern(start: int, end: int) -> bytes:
+    """Bytes [start, end) of the synthetic object: byte i is i % 251."""
+    return bytes(i % 251 for i in range(start, end))
+
+
+async def _drain(stream: AsyncIterator[bytes], keep: int = 0) -> tuple[int, bytes, int]:
+    """(total bytes, first `keep` bytes, largest chunk) without holding the content."""
+    total, head, largest = 0, b"", 0
+    async for chunk in stream:
+        if len(head) < keep:
+            head += chunk[:keep - len(head)]
+        total += len(chunk)
+        largest = max(largest, len(chunk))
+    return total, head, largest
+
+
+async def _traced(stream: AsyncIterator[bytes]) -> tuple[int, int, int]:
+    """(total bytes, largest chunk, peak traced memory) while draining the stream."""
+    tracemalloc.start()
+    try:
+        total, _, largest = await _drain(stream)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return total, largest, peak
+
+
+# ========== LocalStorage ==========
+
+@pytest.fixture
+def local(tmp_path) -> LocalStorage:
+    return LocalStorage(base_path=str(tmp_path), proxy_url="http://localhost/files")
+
+
+@pytest.mark.asyncio
+async def test_local_ranges(local: LocalStorage) -> None:
+    data = _pattern(0, 3 * STREAM_CHUNK_SIZE + 17)
+    await local.put("docs/a.bin", data)
+
+    assert (await _drain(local.get_stream("docs/a.bin"), len(data)))[:2] == (len(data), data)
+    assert (await _drain(local.get_stream("docs/a.bin", 10, 19), 100))[1] == data[10:20]
+    start = STREAM_CHUNK_SIZE - 5
+    assert (await _drain(local.get_stream("docs/a.bin", start), len(data)))[1] == data[start:]
+    assert (await _drain(local.get_stream("docs/a.bin", 5, 10 ** 9), len(data)))[1] == data[5:]
+
+    with pytest.raises(FileNotFoundError):
+        await _drain(local.get_stream("docs/missing.bin"))
+
+
+@pytest.mark.asyncio
+async def test_local_etag_tracks_content(local: LocalStorage) -> None:
+    await local.put("a.txt", b"one")
+    first, _ = await local.get_file_info("a.txt")
+    await local.put("a.txt", b"second")
+    second, _ = await local.get_file_info("a.txt")
+
+    assert first["etag"].startswith('"') and first["etag"] != second["etag"]
+    assert second["size"] == 6
+
+
+@pytest.mark.asyncio
+async def test_local_1gb_file_streams_in_constant_memory(local: LocalStorage, tmp_path) -> None:
+    with open(tmp_path / "big.bin", "wb") as f:
+        f.truncate(_GB)  # Sparse: no disk space used
+
+    total, largest, peak = await _traced(local.get_stream("big.bin"))
+    assert total == _GB and largest == STREAM_CHUNK_SIZE
+    assert peak < _MAX_PEAK, f"peak {peak} bytes"
+
+
+# ========== S3 stub ==========
+
+def _fake_s3(size: int) -> web.Application:
+    """One synthetic object at /bucket/big.bin, generated on the fly; honours Range."""
+
+    async def get_object(request: web.Request) -> web.StreamResponse:
+        if request.match_info["key"] != "big.bin":
+            body = (
+                "<?xml version='1.0' encoding='UTF-8'?><Error><Code>NoSuchKey</Code>"
+                "<Message>The specified key does not exist.</Message></Error>"
+            )
+            return web.Response(status=404, text=body, content_type="application/xml")
+
+        start, end, status = 0, size - 1, 200
+        if "Range" in request.headers:
+            first, _, last = request.headers["Range"].removeprefix("bytes=").partition("-")
+            start, end, status = int(first), int(last) if last else size - 1, 206
+
+        response = web.StreamResponse(status=status, headers={"ETag": '"stub-etag"', "Content-Length": str(end - start + 1)})
+        if status == 206:
+            response.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        await response.prepare(request)
+        block = _pattern(0, 251 * 4096)  # Repeats every 251 bytes, so it tiles exactly
+        offset = start
+        while offset <= end:
+            phase = offset % 251
+            piece = block[phase:phase + min(len(block) - 251, end - offset + 1)]
+            await response.write(piece)
+            offset += len(piece)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/bucket/{key:.+}", get_object)
+    return app
+
+
+@contextlib.asynccontextmanager
+async def _s3(size: int):
+    runner = web.AppRunner(_fake_s3(size), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    storage = AwsStorage(
+        access_key_id="test", secret_access_key="test", region="us-east-1", bucket="bucket",
+        endpoint=f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}",
+    )
+    try:
+        yield storage
+    finally:
+        await storage.close()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_s3_ranged_gets() -> None:
+    async with _s3(10_000) as storage:
+        assert (await _drain(storage.get_stream("big.bin", 1000, 1999), 5000))[:2] == (1000, _pattern(1000, 2000))
+        assert (await _drain(storage.get_stream("big.bin", 9990), 5000))[1] == _pattern(9990, 10_000)
+        with pytest.raises(FileNotFoundError):
+            await _drain(storage.get_stream("missing.bin"))
+
+
+@pytest.mark.asyncio
+async def test_s3_1gb_object_streams_in_constant_memory() -> None:
+    async with _s3(_GB) as storage:
+        # Warm the client up so its one-off allocations are not counted.
+        await _drain(storage.get_stream("big.bin", 0, 0))
+        total, largest, peak = await _traced(storage.get_stream("big.bin"))
+
+    assert total == _GB and largest <= STREAM_CHUNK_SIZE
+    assert peak < _MAX_PEAK, f"peak {peak} bytes"
@@ -1,5 +1,7 @@
 import logging, time
 
+from typing import Iterable, Sequence
+
 from sqlalchemy import text
 
 from .config import global_config
@@ -23,32 +25,41 @@ def _summarize_for_log(v, max_len: int = 512, max_rows: int = 5):
     return v
 
 
+def _get_engine(db_config: str):
+    # Engine cache: this check-then-set is safe only because every call below
+    # (global_config / get_postgresql / get_async_engine) is synchronous, so
+    # asyncio cannot switch coroutines mid-block. If any of them ever becomes
+    # async, two coroutines could both miss the cache and create duplicate
+    # engines (the loser leaks its connection pool) — add a lock at that point.
+    if db_config in global_engines:
+        return global_engines[db_config]
+
+    config = global_config()
+    if not config:
+        raise ValueError("no configuration found")
+
+    engine = config.get_postgresql(db_config).get_async_engine()
+    global_engines[db_config] = engine
+    return engine
+
+
 async def execute_query(
     query       : str,
     params      : dict | list[dict] | None = None,
     db_config   : str = "",
     trace_id    : str = "",
     log_sql     : bool = True,
+    prelude     : Sequence[tuple[str, dict | None]] = (),
     **kwargs
 ):
+    # prelude: (statement, params) pairs run first in the same transaction,
+    # e.g. to take transaction-level locks before `query` takes its snapshot.
+
     # Check SQL statement.
     if not query:
         raise ValueError("SQL script cannot be empty")
 
-    # Engine cache: this check-then-set is safe only because every call below
-    # (global_config / get_postgresql / get_async_engine) is synchronous, so
-    # asyncio cannot switch coroutines mid-block. If any of them ever becomes
-    # async, two coroutines could both miss the cache and create duplicate
-    # engines (the loser leaks its connection pool) — add a lock at that point.
-    if db_config in global_engines:
-        engine = global_engines[db_config]
-    else:
-        config = global_config()
-        if not config:
-            raise ValueError("no configuration found")
-
-        engine = config.get_postgresql(db_config).get_async_engine()
-        global_engines[db_config] = engine
+    engine = _get_engine(db_config)
 
     #-----------------------------------------------------
 
@@ -58,6 +69,9 @@ async def execute_query(
         # exception, and close in both cases. Don't reintroduce manual
         # commit/rollback/close here.
         async with engine.begin() as conn:
+            for statement, statement_params in prelude:
+                await conn.execute(text(statement), statement_params)
+
             # params=list[dict] triggers SQLAlchemy executemany; dict/None binds once.
             cur = await conn.execute(text(query), params)
 
@@ -112,3 +126,101 @@ async def execute_query(
 
 
 #-----------------------------------------------------------------------------
+
+async def execute_copy(
+    staging     : str,
+    columns     : list[tuple[str, str]],
+    rows        : Iterable[Sequence],
+    merge_query : str,
+    db_config   : str = "",
+    trace_id    : str = "",
+    log_sql     : bool = True,
+    prelude     : Sequence[str] = (),
+) -> dict:
+    """Bulk load rows through a temp staging table, then merge them in one statement.
+
+    Rows are streamed with binary COPY into `staging`, a session-local temp
+    table (never WAL-logged, emptied on commit), and `merge_query` — typically
+    INSERT ... SELECT ... FROM staging ON CONFLICT ... — runs once in the same
+    transaction.
+
+    Args:
+        staging     : Temp table name, created on first use per connection.
+        columns     : (name, postgres type) pairs; rows must match this order
+                      and carry Python values of the binary-compatible type.
+        rows        : Row tuples.
+        merge_query : Statement that moves staged rows into the target table.
+        prelude     : Statements run after the COPY and before `merge_query`,
+                      e.g. to lock what the staged rows will touch.
+
+    Returns:
+        {"record_count": rows copied, "merged_count": merge rowcount}
+    """
+    if not columns or not merge_query:
+        raise ValueError("columns and merge_query are required")
+
+    engine = _get_engine(db_config)
+
+    column_defs = ", ".join(f"{name} {pg_type}" for name, pg_type in columns)
+    column_names = ", ".join(name for name, _ in columns)
+
+    start_time = time.perf_counter()
+    copied = 0
+    try:
+        # Same transaction handling as execute_query(): commit on success,
+        # rollback on exception. The raw psycopg connection joins the
+        # transaction SQLAlchemy already opened.
+        async with engine.begin() as conn:
+            raw_conn = await conn.get_raw_connection()
+            pg_conn = raw_conn.driver_connection
+
+            async with pg_conn.cursor() as cur:
+                await cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {staging} ({column_defs}) ON COMMIT DELETE ROWS")
+
+                async with cur.copy(f"COPY {staging} ({column_names}) FROM STDIN (FORMAT BINARY)") as copy:
+                    copy.set_types([pg_type for _, pg_type in columns])
+                    for row in rows:
+                        await copy.write_row(row)
+                        copied += 1
+
+                for statement in prelude:
+                    await cur.execute(statement)
+
+                await cur.execute(merge_query)
+                merged = cur.rowcount
+
+        ret = {"record_count": copied, "merged_count": merged}
+
+        end_time = time.perf_counter()
+        extra = {
+            "records"   : copied,
+            "time_cost" : round((end_time-start_time)*1e3, 2)
+        }
+        if trace_id:
+            extra["trace_id"] = trace_id
+
+        if log_sql:
+            logged_query = " ".join(merge_query.split())
+            if len(logged_query) > 512:
+                logged_query = logged_query[:512] + "..."
+            logging.info(f"COPY {staging}: {logged_query}", extra=extra, stacklevel=2)
+
+        return ret
+
+    except Exception as e:
+        end_time = time.perf_counter()
+        extra = {
+            "sql"       : _summarize_for_log(" ".join(merge_query.split())),
+            "staging"   : staging,
+            "records"   : copied,
+            "time_cost" : round((end_time-start_time)*1e3, 2)
+        }
+        if trace_id:
+            extra["trace_id"] = trace_id
+
+        logging.error(str(e), extra=extra, stacklevel=2, exc_info=True)
+
+        raise
+
+
+#-----------------------------------------------------------------------------
@@ -6,6 +6,9 @@ Usage::
 
     vectors = await text_embedding(["hello", "world"])                # default: gemini
     vectors = await text_embedding(["hello", "world"], provider="qwen")
+
+Results are cached per (provider, model, dim, normalized text); see
+:mod:`mirobody.utils.embedding_cache` for the tiers and their config keys.
 """
 
 from __future__ import annotations
@@ -17,6 +20,15 @@ from typing import Literal
 
 import aiohttp
 
+from .embedding_cache import (
+    EmbeddingCache,
+    PgTier,
+    RedisTier,
+    cache_key,
+    decode_vector,
+    encode_vector,
+)
+
 log = logging.getLogger(__name__)
 
 # ── Retry settings ───────────────────────────────────────────────────
@@ -29,26 +41,30 @@ _EMB_RETRY_STATUSES = (408, 429, 502, 503, 504)
 #
 # Each factory returns (llm, url, batch_limit, max_concurrency, make_body, parse).
 # max_concurrency=1: sequential, fail-fast. >1: asyncio.gather + Semaphore fan-out.
+# (model, dim) is registered alongside: it is part of the cache key, so
+# changing either starts a fresh cache.
 
 _EMB_PROVIDERS: dict[str, callable] = {}
+_EMB_MODELS: dict[str, tuple[str, int]] = {}
 
 
-def _emb_provider(name: str):
+def _emb_provider(name: str, model: str, dim: int):
     """Decorator that registers an embedding provider factory."""
     def _register(fn):
         _EMB_PROVIDERS[name] = fn
+        _EMB_MODELS[name] = (model, dim)
         return fn
     return _register
 
 
-@_emb_provider("gemini")
+@_emb_provider("gemini", model="gemini-embedding-001", dim=1024)
 def _gemini():
     from mirobody.utils.config import global_config
     from mirobody.utils.config.llm import LLMProvider
 
     use_vertex = os.environ.get("GOOGLE_GENAI_USE_VERTEXAI", "0").lower() in ("true", "1")
     llm = global_config().get_llm(LLMProvider.VERTEX_AI if use_vertex else LLMProvider.GEMINI)
-    model = "gemini-embedding-001"
+    model, dim = _EMB_MODELS["gemini"]
 
     if use_vertex:
         # Vertex :predict accepts one input per request for this model;
@@ -61,7 +77,7 @@ def _gemini():
             10,  # max_concurrency
             lambda chunk: {
                 "instances"  : [{"content": chunk[0]}],
-                "parameters" : {"outputDimensionality": 1024},
+                "parameters" : {"outputDimensionality": dim},
             },
             lambda data: [item["embeddings"]["values"] for item in data["predictions"]],
         )
@@ -73,28 +89,67 @@ def _gemini():
         100,
         1,  # max_concurrency
         lambda chunk: {"requests": [
-            {"model": model_ref, "content": {"parts": [{"text": t}]}, "output_dimensionality": 1024}
+            {"model": model_ref, "content": {"parts": [{"text": t}]}, "output_dimensionality": dim}
             for t in chunk
         ]},
         lambda data: [item["values"] for item in data["embeddings"]],
     )
 
 
-@_emb_provider("qwen")
+@_emb_provider("qwen", model="text-embedding-v4", dim=1024)
 def _qwen():
     from mirobody.utils.config import global_config
     from mirobody.utils.config.llm import LLMProvider
 
+    model, dim = _EMB_MODELS["qwen"]
     return (
         global_config().get_llm(LLMProvider.DASHSCOPE),
         "embeddings",
         10,
         1,  # max_concurrency
-        lambda chunk: {"model": "text-embedding-v4", "input": chunk, "dimensions": 1024},
+        lambda chunk: {"model": model, "input": chunk, "dimensions": dim},
         lambda data: [item["embedding"] for item in data["data"]],
     )
 
 
+# ── Cache ────────────────────────────────────────────────────────────
+
+_caches: dict[str, EmbeddingCache] = {}
+_cache_redis = None
+
+
+async def _get_cache(provider: str) -> EmbeddingCache | None:
+    """Per-provider cache built from config on first use; None when disabled."""
+    global _cache_redis
+
+    if provider in _caches:
+        return _caches[provider]
+
+    from .config import global_config
+    cfg = global_config()
+    if cfg is not None and not cfg.get_bool("EMBEDDING_CACHE", True):
+        return None
+
+    model, dim = _EMB_MODELS[provider]
+    tiers = []
+    if cfg is not None:
+        if cfg.get_bool("EMBEDDING_CACHE_REDIS", False):
+            if _cache_redis is None:
+                _cache_redis = await cfg.get_redis().get_async_client()
+            if _cache_redis is not None:
+                tiers.append(RedisTier(_cache_redis, ttl=cfg.get_int("EMBEDDING_CACHE_REDIS_TTL", 7 * 24 * 3600)))
+        if cfg.get_bool("EMBEDDING_CACHE_PG", True):
+            tiers.append(PgTier(provider, model, dim))
+    lru_size = cfg.get_int("EMBEDDING_CACHE_SIZE", 10000) if cfg is not None else 10000
+
+    return _caches.setdefault(provider, EmbeddingCache(lru_size=lru_size, tiers=tiers))
+
+
+def embedding_cache_stats() -> dict[str, dict]:
+    """Hit / miss counters and hit rate per provider since process start."""
+    return {provider: cache.stats() for provider, cache in _caches.items()}
+
+
 # ── Public API ───────────────────────────────────────────────────────
 
 # Snapshot of provider names registered above. Callers that need to validate
@@ -106,6 +161,7 @@ EMBEDDING_PROVIDERS: frozenset[str] = frozenset(_EMB_PROVIDERS)
 async def text_embedding(
     texts: list[str],
     provider: Literal["gemini", "qwen"] | None = None,
+    use_cache: bool = True,
 ) -> list[list[float] | None]:
     """Compute 1024-dim embeddings via *provider*.
 
@@ -113,6 +169,12 @@ async def text_embedding(
     When *provider* is ``None``, reads config key ``EMBEDDING_PROVIDER`` (default: ``"gemini"``).
     Long input lists are chunked per provider batch limit.
     Invalid entries (non-str / blank) yield ``None`` at the same index.
+
+    Cached texts skip the provider; all misses go out in one batched call
+    and are written back to the cache in the background. Vectors are
+    returned fp16-rounded whether or not they came from the cache, so a
+    text always maps to the same values. Pass ``use_cache=False`` for
+    one-off bulk exports that would only flood the cache.
     """
     if provider is None:
         from .config import safe_read_cfg
@@ -133,13 +195,41 @@ async def text_embedding(
     if not clean_texts:
         return results
 
-    factory = _EMB_PROVIDERS.get(provider)
-    if not factory:
+    if provider not in _EMB_PROVIDERS:
         raise ValueError(f"unknown embedding provider: {provider!r} (available: {', '.join(_EMB_PROVIDERS)})")
-    llm, url, batch_limit, max_concurrency, make_body, parse = factory()
 
     unique_texts: list[str] = list(dict.fromkeys(clean_texts))
 
+    cache = await _get_cache(provider) if use_cache else None
+    if cache is None:
+        text_to_embedding = dict(zip(unique_texts, await _embed_remote(provider, unique_texts)))
+    else:
+        model, dim = _EMB_MODELS[provider]
+        keys = {t: cache_key(provider, model, dim, t) for t in unique_texts}
+        found = await cache.get_many(list(dict.fromkeys(keys.values())))
+
+        # Texts that normalise to the same key are embedded once.
+        missing: dict[str, str] = {}
+        for t in unique_texts:
+            if keys[t] not in found:
+                missing.setdefault(keys[t], t)
+        if missing:
+            embedded = await _embed_remote(provider, list(missing.values()))
+            fresh = {k: encode_vector(v) for k, v in zip(missing, embedded)}
+            cache.put_many(fresh)
+            found.update(fresh)
+
+        text_to_embedding = {t: decode_vector(found[keys[t]]) for t in unique_texts}
+
+    for idx, text in zip(valid_indices, clean_texts):
+        results[idx] = text_to_embedding[text]
+    return results
+
+
+async def _embed_remote(provider: str, unique_texts: list[str]) -> list[list[float]]:
+    """One provider round (chunked, retried) for already-deduplicated texts."""
+    llm, url, batch_limit, max_concurrency, make_body, parse = _EMB_PROVIDERS[provider]()
+
     embedded: list[list[float]] = []
     async with llm.get_aiohttp_session(timeout=aiohttp.ClientTimeout(total=30)) as session:
         async def _post_with_retry(body: dict) -> list[list[float]]:
@@ -183,7 +273,4 @@ async def text_embedding(
             f"{provider} returned {len(embedded)} embeddings for {len(unique_texts)} unique texts"
         )
 
-    text_to_embedding = dict(zip(unique_texts, embedded))
-    for idx, text in zip(valid_indices, clean_texts):
-        results[idx] = text_to_embedding[text]
-    return results
+    return embedded
@@ -0,0 +1,244 @@
+"""Layered, content-addressed cache for :func:`mirobody.utils.embedding.text_embedding`.
+
+Keys are ``sha256(provider, model, dim, normalized text)``; values are
+little-endian fp16 vectors, so every tier stores the same bytes:
+
+    1. in-process LRU                     (``EMBEDDING_CACHE_SIZE`` entries, 0 = off)
+    2. Redis / redis_compat, optional     (``EMBEDDING_CACHE_REDIS``, TTL ``EMBEDDING_CACHE_REDIS_TTL``)
+    3. PostgreSQL ``embedding_cache``     (``EMBEDDING_CACHE_PG``, default on)
+
+Lookups go top-down and promote hits into the tiers above them. Writes to
+Redis / Postgres run as background tasks so callers never wait on them.
+A remote tier that errors is switched off for the rest of the process
+(with one warning) rather than slowing every call down.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import logging
+import unicodedata
+
+from collections import OrderedDict
+from typing import Protocol
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+_VEC_DTYPE = np.dtype("<f2")
+
+_REDIS_PREFIX = "emb_cache:"
+_DEFAULT_LRU_SIZE = 10000           # ~20 MB at 1024 dims
+_DEFAULT_REDIS_TTL = 7 * 24 * 3600  # seconds
+
+# ── Keys and values ──────────────────────────────────────────────────
+
+
+def normalize_text(text: str) -> str:
+    """NFC + collapsed whitespace: texts that differ only there share a key."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(provider: str, model: str, dim: int, text: str) -> str:
+    raw = "\x1f".join((provider, model, str(dim), normalize_text(text)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def encode_vector(vector: list[float]) -> bytes:
+    return np.asarray(vector, dtype=_VEC_DTYPE).tobytes()
+
+
+def decode_vector(data: bytes) -> list[float]:
+    return np.frombuffer(data, dtype=_VEC_DTYPE).astype(np.float32).tolist()
+
+
+# ── Tiers ────────────────────────────────────────────────────────────
+
+
+class CacheTier(Protocol):
+    name: str
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]: ...
+
+    async def put_many(self, items: dict[str, bytes]) -> None: ...
+
+
+class RedisTier:
+    """Any redis.asyncio.Redis-compatible client created with ``decode_responses=True``."""
+
+    name = "redis"
+
+    def __init__(self, client, ttl: int = _DEFAULT_REDIS_TTL):
+        self._client = client
+        self._ttl = ttl
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        values = await self._client.mget([_REDIS_PREFIX + k for k in keys])
+        return {k: base64.b64decode(v) for k, v in zip(keys, values) if v}
+
+    async def put_many(self, items: dict[str, bytes]) -> None:
+        encoded = {_REDIS_PREFIX + k: base64.b64encode(v).decode("ascii") for k, v in items.items()}
+        # redis_compat has no pipelines; it is in-process, so plain SETs are cheap there.
+        if not hasattr(self._client, "pipeline"):
+            for k, v in encoded.items():
+                await self._client.set(k, v, ex=self._ttl)
+            return
+        async with self._client.pipeline(transaction=False) as pipe:
+            for k, v in encoded.items():
+                pipe.set(k, v, ex=self._ttl)
+            await pipe.execute()
+
+
+class PgTier:
+    """``embedding_cache`` table (res/sql/94_embedding_cache.sql)."""
+
+    name = "pg"
+
+    def __init__(self, provider: str, model: str, dim: int):
+        self._provider = provider
+        self._model = model
+        self._dim = dim
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        from .db import execute_query
+
+        rows = await execute_query(
+            "SELECT cache_key, embedding FROM embedding_cache WHERE cache_key = ANY(:keys)",
+            {"keys": keys},
+            log_sql=False,
+        )
+        return {r["cache_key"]: bytes(r["embedding"]) for r in rows or []}
+
+    async def put_many(self, items: dict[str, bytes]) -> None:
+        from .db import execute_query
+
+        await execute_query(
+            """
+            INSERT INTO embedding_cache (cache_key, provider, model, dim, embedding)
+            VALUES (:cache_key, :provider, :model, :dim, :embedding)
+            ON CONFLICT (cache_key) DO NOTHING
+            """,
+            [
+                {
+                    "cache_key": k,
+                    "provider" : self._provider,
+                    "model"    : self._model,
+                    "dim"      : self._dim,
+                    "embedding": v,
+                }
+                for k, v in items.items()
+            ],
+            log_sql=False,
+        )
+
+
+# ── Cache ────────────────────────────────────────────────────────────
+
+
+class EmbeddingCache:
+    """LRU in front of zero or more remote tiers, with hit-rate counters."""
+
+    def __init__(self, lru_size: int = _DEFAULT_LRU_SIZE, tiers: list[CacheTier] | None = None):
+        self._lru: OrderedDict[str, bytes] = OrderedDict()
+        self._lru_size = lru_size
+        self._tiers: list[CacheTier] = list(tiers or [])
+        self._pending: set[asyncio.Task] = set()
+        self._stats: dict[str, int] = {"lookups": 0, "lru_hits": 0, "misses": 0}
+        for tier in self._tiers:
+            self._stats[f"{tier.name}_hits"] = 0
+
+    # -- LRU --------------------------------------------------------------
+
+    def _lru_get(self, key: str) -> bytes | None:
+        value = self._lru.get(key)
+        if value is not None:
+            self._lru.move_to_end(key)
+        return value
+
+    def _lru_put(self, key: str, value: bytes) -> None:
+        if self._lru_size <= 0:
+            return
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self._lru_size:
+            self._lru.popitem(last=False)
+
+    # -- Public -----------------------------------------------------------
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        """Look *keys* up tier by tier; returns only the keys that were found."""
+        self._stats["lookups"] += len(keys)
+        found: dict[str, bytes] = {}
+        missing: list[str] = []
+        for k in keys:
+            value = self._lru_get(k)
+            if value is None:
+                missing.append(k)
+            else:
+                found[k] = value
+        self._stats["lru_hits"] += len(found)
+
+        tiers = list(self._tiers)
+        for i, tier in enumerate(tiers):
+            if not missing:
+                break
+            try:
+                hits = await tier.get_many(missing)
+            except Exception as e:
+                self._disable(tier, e)
+                continue
+            if not hits:
+                continue
+            self._stats[f"{tier.name}_hits"] += len(hits)
+            for k, v in hits.items():
+                self._lru_put(k, v)
+            # Promote into the remote tiers above this one.
+            self._write_back(hits, [t for t in tiers[:i] if t in self._tiers])
+            found.update(hits)
+            missing = [k for k in missing if k not in hits]
+
+        self._stats["misses"] += len(missing)
+        return found
+
+    def put_many(self, items: dict[str, bytes]) -> None:
+        """Store freshly computed vectors: LRU now, remote tiers in the background."""
+        for k, v in items.items():
+            self._lru_put(k, v)
+        self._write_back(items, self._tiers)
+
+    async def flush(self) -> None:
+        """Wait for pending background writes (tests, graceful shutdown)."""
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    def stats(self) -> dict:
+        lookups = self._stats["lookups"]
+        hits = lookups - self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate"  : round(hits / lookups, 4) if lookups else 0.0,
+            "lru_size"  : len(self._lru),
+            "tiers"     : [tier.name for tier in self._tiers],
+        }
+
+    # -- Internals --------------------------------------------------------
+
+    def _write_back(self, items: dict[str, bytes], tiers: list[CacheTier]) -> None:
+        for tier in tiers:
+            task = asyncio.create_task(self._put(tier, items))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _put(self, tier: CacheTier, items: dict[str, bytes]) -> None:
+        try:
+            await tier.put_many(items)
+        except Exception as e:
+            self._disable(tier, e)
+
+    def _disable(self, tier: CacheTier, e: Exception) -> None:
+        if tier in self._tiers:
+            self._tiers.remove(tier)
+            log.warning(f"embedding cache: {tier.name} tier disabled after error: {e!r}")
@@ -0,0 +1,152 @@
+"""text_embedding cache tests with a fake deterministic provider."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from redis.asyncio import Redis
+
+from . import embedding
+from .config.redis_compat.server import RedisCompatServer
+from .embedding_cache import EmbeddingCache, RedisTier, cache_key, decode_vector, encode_vector
+
+_DIM = 8
+
+
+def _fake_vector(text: str) -> list[float]:
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:4], "little")
+    return np.random.default_rng(seed).standard_normal(_DIM).tolist()
+
+
+class _FakeProvider:
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    async def __call__(self, provider: str, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [_fake_vector(t) for t in texts]
+
+
+class _DictTier:
+    """Stand-in for the Postgres tier."""
+
+    name = "pg"
+
+    def __init__(self, fail: bool = False) -> None:
+        self.rows: dict[str, bytes] = {}
+        self.fail = fail
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        if self.fail:
+            raise ConnectionError("db down")
+        return {k: self.rows[k] for k in keys if k in self.rows}
+
+    async def put_many(self, items: dict[str, bytes]) -> None:
+        self.rows.update(items)
+
+
+@pytest.fixture
+def fake(monkeypatch) -> _FakeProvider:
+    provider = _FakeProvider()
+    monkeypatch.setitem(embedding._EMB_PROVIDERS, "fake", lambda: None)
+    monkeypatch.setitem(embedding._EMB_MODELS, "fake", ("fake-model", _DIM))
+    monkeypatch.setattr(embedding, "_embed_remote", provider)
+    monkeypatch.setattr(embedding, "_caches", {})
+    return provider
+
+
+@pytest_asyncio.fixture
+async def redis():
+    compat = RedisCompatServer()
+    server = await asyncio.start_server(compat.handle_client, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    client = Redis(host="127.0.0.1", port=port, decode_responses=True, protocol=2)
+    try:
+        yield client
+    finally:
+        await client.aclose()
+        server.close()
+
+
+def test_cache_key_normalizes_whitespace_and_scopes_model() -> None:
+    assert cache_key("p", "m", 8, "blood  glucose\n") == cache_key("p", "m", 8, "blood glucose")
+    assert cache_key("p", "m", 8, "x") != cache_key("p", "m2", 8, "x")
+    assert cache_key("p", "m", 8, "x") != cache_key("p", "m", 16, "x")
+
+
+@pytest.mark.asyncio
+async def test_misses_batched_into_one_call(fake) -> None:
+    embedding._caches["fake"] = EmbeddingCache(lru_size=100)
+
+    out = await embedding.text_embedding(["a", "b", "a", " ", "b  "], provider="fake")
+    assert fake.calls == [["a", "b"]]
+    assert out[3] is None
+    assert out[0] == out[2] == decode_vector(encode_vector(_fake_vector("a")))
+    assert out[1] == out[4]
+
+    again = await embedding.text_embedding(["b", "c", "a"], provider="fake")
+    assert fake.calls == [["a", "b"], ["c"]]
+    assert again[0] == out[1] and again[2] == out[0]
+
+    stats = embedding.embedding_cache_stats()["fake"]
+    assert stats["lookups"] == 5 and stats["lru_hits"] == 2 and stats["misses"] == 3
+    assert stats["hit_rate"] == 0.4
+
+
+@pytest.mark.asyncio
+async def test_remote_tiers_written_back_and_promoted(fake, redis) -> None:
+    pg = _DictTier()
+    embedding._caches["fake"] = EmbeddingCache(lru_size=100, tiers=[RedisTier(redis), pg])
+    first = await embedding.text_embedding(["x", "y"], provider="fake")
+    await embedding._caches["fake"].flush()
+    assert len(pg.rows) == 2
+
+    # A fresh process: empty LRU, shared Redis and Postgres.
+    cache = EmbeddingCache(lru_size=100, tiers=[RedisTier(redis), pg])
+    embedding._caches["fake"] = cache
+    assert await embedding.text_embedding(["x", "y"], provider="fake") == first
+    assert fake.calls == [["x", "y"]]
+    assert cache.stats()["redis_hits"] == 2
+
+    # Only Postgres has it: served from there and promoted into Redis.
+    key = cache_key("fake", "fake-model", _DIM, "z")
+    pg.rows[key] = encode_vector(_fake_vector("z"))
+    cache = EmbeddingCache(lru_size=100, tiers=[RedisTier(redis), pg])
+    embedding._caches["fake"] = cache
+    await embedding.text_embedding(["z"], provider="fake")
+    await cache.flush()
+    assert fake.calls == [["x", "y"]]
+    assert cache.stats()["pg_hits"] == 1
+    assert await redis.get("emb_cache:" + key) is not None
+
+
+@pytest.mark.asyncio
+async def test_failing_tier_is_disabled(fake) -> None:
+    cache = EmbeddingCache(lru_size=100, tiers=[_DictTier(fail=True)])
+    embedding._caches["fake"] = cache
+    out = await embedding.text_embedding(["q"], provider="fake")
+    assert out[0] is not None
+    assert cache.stats()["tiers"] == []
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_oldest(fake) -> None:
+    cache = EmbeddingCache(lru_size=2)
+    embedding._caches["fake"] = cache
+    await embedding.text_embedding(["a", "b", "c"], provider="fake")
+    await embedding.text_embedding(["a"], provider="fake")
+    assert fake.calls == [["a", "b", "c"], ["a"]]
+
+
+@pytest.mark.asyncio
+async def test_use_cache_false_bypasses(fake) -> None:
+    embedding._caches["fake"] = EmbeddingCache(lru_size=100)
+    await embedding.text_embedding(["a"], provider="fake", use_cache=False)
+    await embedding.text_embedding(["a"], provider="fake", use_cache=False)
+    assert fake.calls == [["a"], ["a"]]
+    assert embedding.embedding_cache_stats()["fake"]["lookups"] == 0